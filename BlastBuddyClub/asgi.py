@@ -3,14 +3,24 @@ ASGI config for BlastBuddyClub project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The hit page and the polling views are asynchronous, so under an ASGI
+server, such as uvicorn, they wait on NCBI and the Celery broker without
+holding a thread. In development the static files are served as well,
+as runserver does.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.0/howto/deployment/asgi/
 """
 
 import os
 
+from django.conf import settings
+from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "BlastBuddyClub.settings")
 
 application = get_asgi_application()
+
+if settings.DEBUG:
+    application = ASGIStaticFilesHandler(application)
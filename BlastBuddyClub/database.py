@@ -0,0 +1,118 @@
+"""
+Database configuration for BlastBuddyClub.
+
+The database is configured from the environment, so the same settings
+can be used for development with SQLite and production with PostgreSQL.
+
+Environment variables:
+    DB_ENGINE: "sqlite" (default) or "postgresql".
+    DB_NAME: the database name, or the file path for SQLite.
+    DB_USER, DB_PASSWORD, DB_HOST, DB_PORT: PostgreSQL connection.
+    DB_CONN_MAX_AGE: seconds a PostgreSQL connection is kept open,
+        defaults to 60, 0 closes connections after every request.
+    DB_POOLER: set when connecting through a transaction pooler such
+        as PgBouncer, this disables server side cursors.
+    DB_BUSY_TIMEOUT: seconds SQLite waits on a locked database,
+        defaults to 20.
+    DB_SQLITE_WAL: set to 0 to keep SQLite's rollback journal.
+    DB_REPLICA_NAME, DB_REPLICA_HOST, DB_REPLICA_PORT, DB_REPLICA_USER,
+        DB_REPLICA_PASSWORD: setting any of these adds a "replica"
+        database, which read-only pages read from, see
+        BlastBuddyClub/replica.py. Unset values are taken from the
+        primary database.
+
+SQLite is opened in WAL mode with synchronous=NORMAL by default.
+This allows the web process to read while a Celery worker writes,
+where the rollback journal would answer with "database is locked".
+"""
+
+# Standard library imports
+from pathlib import Path
+import os
+
+
+def database_settings(base_dir: Path) -> dict:
+    """Returns the DATABASES setting based on the environment.
+
+    :param base_dir: the root of the project, for the SQLite file.
+    :type base_dir: Path
+    :raises ValueError: if DB_ENGINE is not a supported engine.
+    :return: the value for the DATABASES setting.
+    :rtype: dict
+    """
+    engine = os.environ.get("DB_ENGINE", "sqlite")
+
+    if engine == "sqlite":
+        default = {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": os.environ.get("DB_NAME", base_dir / "db.sqlite3"),
+            "OPTIONS": {
+                "timeout": int(os.environ.get("DB_BUSY_TIMEOUT", 20)),
+            },
+        }
+    elif engine == "postgresql":
+        default = {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": os.environ.get("DB_NAME", "masterblast"),
+            "USER": os.environ.get("DB_USER", "masterblast"),
+            "PASSWORD": os.environ.get("DB_PASSWORD", ""),
+            "HOST": os.environ.get("DB_HOST", "localhost"),
+            "PORT": os.environ.get("DB_PORT", "5432"),
+            "CONN_MAX_AGE": int(os.environ.get("DB_CONN_MAX_AGE", 60)),
+            "CONN_HEALTH_CHECKS": True,
+            "DISABLE_SERVER_SIDE_CURSORS":
+                os.environ.get("DB_POOLER") is not None,
+        }
+    else:
+        raise ValueError(f"Error: unsupported DB_ENGINE {engine}")
+
+    databases = {"default": default}
+    replica = replica_settings(default)
+    if replica:
+        databases["replica"] = replica
+    return databases
+
+
+def replica_settings(default: dict) -> dict | None:
+    """Returns the settings of the read replica, if one is configured.
+
+    The replica uses the settings of the primary database, with the
+    DB_REPLICA_* variables that are set replacing their counterpart.
+    With SQLite, DB_REPLICA_NAME is the path of a second file.
+    During tests the replica mirrors the primary database.
+
+    :param default: the settings of the primary database.
+    :type default: dict
+    :return: the settings of the replica, or None without a replica.
+    :rtype: dict | None
+    """
+    overrides = {
+        key: os.environ[f"DB_REPLICA_{key}"]
+        for key in ("NAME", "HOST", "PORT", "USER", "PASSWORD")
+        if f"DB_REPLICA_{key}" in os.environ
+    }
+    if not overrides:
+        return None
+
+    replica = {**default, **overrides}
+    replica["TEST"] = {"MIRROR": "default"}
+    return replica
+
+
+def configure_sqlite_connection(sender, connection, **kwargs) -> None:
+    """Sets the SQLite pragmas on every new connection.
+
+    Connected to the `connection_created` signal in BlasterConfig.
+    Connections to other databases are left untouched.
+
+    :param sender: the database wrapper class.
+    :param connection: the new database connection.
+    """
+    if connection.vendor != "sqlite":
+        return
+    if os.environ.get("DB_SQLITE_WAL", "1") == "0":
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
@@ -0,0 +1,235 @@
+# Standard library imports
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator
+import logging
+import re
+import time
+
+# Third-party imports
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+
+
+"""
+Profiling of the SQL queries of a request.
+
+Inside `profile_queries`, every query on any database connection is
+recorded with the time it took, including queries made in other
+threads by `sync_to_async`. Queries are grouped by their fingerprint,
+the SQL with its values left out, so a query repeated for every row
+of a page, an N+1 pattern, shows up as one fingerprint executed many
+times.
+
+With QUERY_PROFILING set, `QueryProfilingMiddleware` profiles every
+request. The number of queries, their total time and the number of
+repeated queries are added to the response headers, and logged, with
+the most repeated queries when there are any. Tests use the same
+profile to hold views to a query budget, see testing/pytest_fixtures.py.
+"""
+
+
+HEADERS = {
+    "count": "X-Query-Count",
+    "milliseconds": "X-Query-Time",
+    "duplicates": "X-Query-Duplicates",
+}
+
+logger = logging.getLogger(__name__)
+
+_profile = ContextVar("query_profile", default=None)
+
+_IN_LIST = re.compile(r"\bIN \((?:%s, )*%s\)", re.IGNORECASE)
+_VALUES_LIST = re.compile(
+    r"\bVALUES (\((?:%s, )*%s\))(?:, \((?:%s, )*%s\))*", re.IGNORECASE)
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint(sql: str) -> str:
+    """Returns the SQL of a query with its values left out.
+
+    Parameters, literals, and lists of parameters of any length are
+    replaced, so queries only differing in their values are the same.
+
+    :param sql: the SQL of the query, with placeholders for parameters.
+    :type sql: str
+    :return: the fingerprint of the query.
+    :rtype: str
+    """
+    sql = _WHITESPACE.sub(" ", sql).strip()
+    sql = _IN_LIST.sub("IN (...)", sql)
+    sql = _VALUES_LIST.sub(r"VALUES \1, ...", sql)
+    return _LITERAL.sub("?", sql)
+
+
+class QueryProfile:
+    """The queries made while profiling, with the seconds they took."""
+
+    def __init__(self) -> None:
+        self.queries: list[tuple[str, float]] = []
+
+    def add(self, sql: str, seconds: float) -> None:
+        """Records a query.
+
+        :param sql: the SQL of the query.
+        :type sql: str
+        :param seconds: the time the query took.
+        :type seconds: float
+        """
+        self.queries.append((sql, seconds))
+
+    @property
+    def count(self) -> int:
+        return len(self.queries)
+
+    @property
+    def seconds(self) -> float:
+        return sum(seconds for _, seconds in self.queries)
+
+    def duplicates(self) -> list[tuple[str, int]]:
+        """Returns the fingerprints of the queries made more than once.
+
+        :return: every repeated fingerprint and the number of times it
+            was executed, the most repeated first.
+        :rtype: list[tuple[str, int]]
+        """
+        counts = Counter(fingerprint(sql) for sql, _ in self.queries)
+        return [(sql, number) for sql, number in counts.most_common()
+                if number > 1]
+
+    @property
+    def duplicate_count(self) -> int:
+        return sum(number - 1 for _, number in self.duplicates())
+
+    def summary(self, limit: int = 5) -> str:
+        """Describes the profile, and the most repeated queries.
+
+        :param limit: the number of repeated queries to list.
+        :type limit: int
+        :return: a description on one or more lines.
+        :rtype: str
+        """
+        lines = [f"{self.count} queries in {self.seconds * 1000:.1f} ms, "
+                 f"{self.duplicate_count} repeated"]
+        lines += [f"    {number}x {sql}"
+                  for sql, number in self.duplicates()[:limit]]
+        return "\n".join(lines)
+
+
+def _record_query(execute: Callable, sql: str, params, many: bool,
+                  context: dict):
+    """Records a query in the current profile, if any.
+
+    Installed as an execute wrapper on every connection, see
+    `install_query_recorder`.
+    """
+    profile = _profile.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.add(sql, time.perf_counter() - start)
+
+
+def _install(connection, **kwargs) -> None:
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+def install_query_recorder() -> None:
+    """Records the queries of the connections of this thread, and of
+    every connection made from now on.
+
+    Outside of `profile_queries` the recorder only passes queries on.
+    """
+    connection_created.connect(_install, dispatch_uid="record_query")
+    for connection in connections.all():
+        _install(connection)
+
+
+@contextmanager
+def profile_queries() -> Iterator[QueryProfile]:
+    """Profiles the queries made inside the block.
+
+    :return: the profile, complete once the block is left.
+    :rtype: Iterator[QueryProfile]
+    """
+    install_query_recorder()
+    profile = QueryProfile()
+    token = _profile.set(profile)
+    try:
+        yield profile
+    finally:
+        _profile.reset(token)
+
+
+class QueryProfilingMiddleware:
+    """Profiles the queries of every request, when QUERY_PROFILING is
+    set.
+
+    Adds the X-Query-Count, X-Query-Time in milliseconds and
+    X-Query-Duplicates headers, and a Server-Timing entry, to the
+    response, and logs the profile. Has to be placed first, to count
+    the queries of the other middleware.
+
+    Supports both sync and async requests.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable) -> None:
+        if not settings.QUERY_PROFILING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+        install_query_recorder()
+
+    def __call__(self, request: WSGIRequest) -> HttpResponse:
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with profile_queries() as profile:
+            response = self.get_response(request)
+        return self.report(request, response, profile)
+
+    async def __acall__(self, request: WSGIRequest) -> HttpResponse:
+        with profile_queries() as profile:
+            response = await self.get_response(request)
+        return self.report(request, response, profile)
+
+    def report(self, request: WSGIRequest, response: HttpResponse,
+               profile: QueryProfile) -> HttpResponse:
+        """Adds the profile to the headers of the response, and logs it.
+
+        Repeated queries are logged as a warning.
+
+        :param request: Django request object.
+        :type request: WSGIRequest
+        :param response: the response to the request.
+        :type response: HttpResponse
+        :param profile: the queries of the request.
+        :type profile: QueryProfile
+        :return: the response.
+        :rtype: HttpResponse
+        """
+        milliseconds = profile.seconds * 1000
+        response[HEADERS["count"]] = str(profile.count)
+        response[HEADERS["milliseconds"]] = f"{milliseconds:.1f}"
+        response[HEADERS["duplicates"]] = str(profile.duplicate_count)
+        timing = f'db;dur={milliseconds:.1f};desc="{profile.count} queries"'
+        response["Server-Timing"] = ", ".join(
+            filter(None, [response.get("Server-Timing"), timing]))
+
+        level = logging.WARNING if profile.duplicate_count else logging.INFO
+        logger.log(level, "%s %s: %s", request.method, request.path,
+                   profile.summary())
+        return response
@@ -0,0 +1,180 @@
+# Standard library imports
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Callable, Iterator
+import time
+
+# Third-party imports
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, \
+    sync_to_async
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.http import HttpResponse
+
+
+"""
+Routing of read-only queries to a read replica.
+
+When a "replica" database is configured, see BlastBuddyClub/database.py,
+queries of the Blaster app made inside `replica_reads`, or by a view
+decorated with `read_only`, are read from the replica. All writes,
+and all reads of other apps, such as users and sessions, go to the
+primary database.
+
+A replica can lag behind the primary database. To let a user read
+their own writes, the session of the user is stuck to the primary
+database for REPLICA_STICKY_SECONDS after a request that could have
+written, or after a job of the user has just finished processing,
+see `stick_to_primary`.
+"""
+
+
+REPLICA = "replica"
+SESSION_KEY = "primary_until"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+_use_replica = ContextVar("use_replica", default=False)
+_use_primary = ContextVar("use_primary", default=False)
+
+
+def replica_configured() -> bool:
+    """Returns whether a read replica is configured.
+
+    :return: True if the replica database exists.
+    :rtype: bool
+    """
+    return REPLICA in settings.DATABASES
+
+
+@contextmanager
+def replica_reads() -> Iterator[None]:
+    """Reads the queries of the Blaster app from the replica.
+
+    Used for read-only pages and aggregate queries, which can be
+    slightly out of date. Without a replica this has no effect.
+    """
+    token = _use_replica.set(True)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+def read_only(view: Callable) -> Callable:
+    """Decorates a view to read from the replica.
+
+    Writes made by the view still go to the primary database. An async
+    view stays async, and reads from the replica while it's awaited.
+
+    :param view: the view to decorate.
+    :type view: Callable
+    :return: the decorated view.
+    :rtype: Callable
+    """
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def async_read_only_view(request: WSGIRequest, *args,
+                                       **kwargs):
+            with replica_reads():
+                return await view(request, *args, **kwargs)
+        return markcoroutinefunction(async_read_only_view)
+
+    @wraps(view)
+    def read_only_view(request: WSGIRequest, *args, **kwargs):
+        with replica_reads():
+            return view(request, *args, **kwargs)
+    return read_only_view
+
+
+def stick_to_primary(request: WSGIRequest) -> None:
+    """Reads from the primary database for the next requests.
+
+    Stores in the session of the user until when the primary database
+    should be used, so the user sees data that was just written.
+
+    :param request: Django request object.
+    :type request: WSGIRequest
+    """
+    if replica_configured():
+        request.session[SESSION_KEY] = \
+            time.time() + settings.REPLICA_STICKY_SECONDS
+
+
+class ReplicaRouter:
+    """Routes the reads of read-only views to the replica.
+
+    Reads are only routed to the replica within `replica_reads`,
+    for models of the Blaster app, while the request is not stuck to
+    the primary database. Everything else uses the default database.
+    """
+    def db_for_read(self, model, **hints) -> str | None:
+        if (_use_replica.get() and not _use_primary.get()
+                and model._meta.app_label == "Blaster"
+                and replica_configured()):
+            return REPLICA
+        return None
+
+    def db_for_write(self, model, **hints) -> str | None:
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints) -> bool:
+        return True
+
+
+class ReplicaStickinessMiddleware:
+    """Sticks a user to the primary database after they wrote.
+
+    Requests of a session that is stuck to the primary database don't
+    read from the replica. Requests other than GET, HEAD and OPTIONS
+    read from the primary database themselves, as they can read what
+    they wrote, and stick the session to the primary database.
+    Has to be placed after the SessionMiddleware.
+
+    Supports both sync and async requests, so async views are served
+    without switching threads.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable) -> None:
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request: WSGIRequest) -> HttpResponse:
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not replica_configured():
+            return self.get_response(request)
+
+        unsafe = request.method not in SAFE_METHODS
+        stuck = unsafe or request.session.get(SESSION_KEY, 0) > time.time()
+        token = _use_primary.set(stuck)
+        try:
+            response = self.get_response(request)
+        finally:
+            _use_primary.reset(token)
+
+        if unsafe:
+            stick_to_primary(request)
+        return response
+
+    async def __acall__(self, request: WSGIRequest) -> HttpResponse:
+        if not replica_configured():
+            return await self.get_response(request)
+
+        # Sessions are read from the database synchronously
+        unsafe = request.method not in SAFE_METHODS
+        stuck = unsafe or \
+            await sync_to_async(request.session.get)(SESSION_KEY, 0) \
+            > time.time()
+        token = _use_primary.set(stuck)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _use_primary.reset(token)
+
+        if unsafe:
+            await sync_to_async(stick_to_primary)(request)
+        return response
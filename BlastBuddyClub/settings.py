@@ -13,6 +13,8 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 from pathlib import Path
 import os
 
+from BlastBuddyClub.database import database_settings
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -46,11 +48,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "BlastBuddyClub.profiling.QueryProfilingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "BlastBuddyClub.replica.ReplicaStickinessMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -80,12 +84,51 @@ WSGI_APPLICATION = "BlastBuddyClub.wsgi.application"
 
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
-
-DATABASES = {
+# Configured from the environment, see BlastBuddyClub/database.py
+
+DATABASES = database_settings(BASE_DIR)
+
+# Read-only pages read from the replica, when one is configured.
+# After a write, a user reads from the primary database for
+# REPLICA_STICKY_SECONDS, to cover the lag of the replica.
+DATABASE_ROUTERS = ["BlastBuddyClub.replica.ReplicaRouter"]
+REPLICA_STICKY_SECONDS = int(os.environ.get("DB_REPLICA_STICKY_SECONDS", 10))
+
+# Cache
+# Shared by the web processes and the Celery workers, which mark the
+# Entrez fetches in flight and the versions of the cached graphs in it,
+# so it's kept in the database. The table is created with
+# `manage.py createcachetable`. A version is kept for every compared hit,
+# so it holds more entries than the default of 300.
+CACHES = {
     "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
-    }
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": "django_cache",
+        "OPTIONS": {
+            "MAX_ENTRIES": int(os.environ.get("CACHE_MAX_ENTRIES", 100000)),
+        },
+    },
+}
+
+# Query profiling
+# With QUERY_PROFILING set, the number of queries of every request,
+# their total time and the number of repeated queries are added to the
+# response headers and logged, see BlastBuddyClub/profiling.py.
+QUERY_PROFILING = os.environ.get("QUERY_PROFILING") is not None
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "BlastBuddyClub.profiling": {
+            "handlers": ["console"],
+            "level": "INFO",
+            "propagate": False,
+        },
+    },
 }
 
 
@@ -135,4 +178,85 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 # Celery Configuration Options
 
-# https://docs.celeryq.dev/en/stable/userguide/configuration.html#std-setting-task_serializer
\ No newline at end of file
+# https://docs.celeryq.dev/en/stable/userguide/configuration.html#std-setting-task_serializer
+
+CELERY_BEAT_SCHEDULE = {
+    "maintain-entrez-accession-caches": {
+        "task": "Blaster.tasks.maintain_entrez_accession_caches_task",
+        "schedule": 60 * 60 * 24,
+    },
+    "delete-unreferenced-subject-sequences": {
+        "task": "Blaster.tasks.delete_unreferenced_subject_sequences_task",
+        "schedule": 60 * 60 * 24,
+    },
+}
+
+
+# NCBI stand-in
+# NCBI_STAND_IN_URL points BLAST and Entrez at a local stand-in for
+# NCBI, see benchmarks/ncbi_stand_in.py, to run jobs without access to
+# NCBI. NCBI_BLAST_URL and ENTREZ_EUTILS_URL can also be set one by one.
+
+NCBI_STAND_IN_URL = os.environ.get("NCBI_STAND_IN_URL")
+if NCBI_STAND_IN_URL:
+    NCBI_STAND_IN_URL = NCBI_STAND_IN_URL.rstrip("/") + "/"
+NCBI_BLAST_URL = os.environ.get(
+    "NCBI_BLAST_URL", f"{NCBI_STAND_IN_URL}blast/Blast.cgi"
+    if NCBI_STAND_IN_URL else "https://blast.ncbi.nlm.nih.gov/Blast.cgi")
+
+# Entrez accession cache
+# The cache of GenBank and FASTA data is limited to a total size in
+# bytes, evicting the least recently accessed entries, and entries
+# are refreshed from NCBI once they are older than the TTL in days.
+
+ENTREZ_CACHE_MAX_BYTES = int(
+    os.environ.get("ENTREZ_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+ENTREZ_CACHE_TTL_DAYS = int(os.environ.get("ENTREZ_CACHE_TTL_DAYS", 30))
+
+# Entrez prefetching
+# Once a job is processed, the GenBank and FASTA data of the accessions
+# of its best hits are fetched in the background, in batches of
+# accessions per Entrez query. A fetch in flight is marked in the cache
+# for the number of seconds below. Setting ENTREZ_API_KEY raises the
+# rate limit of NCBI from 3 to 10 requests per second.
+
+ENTREZ_PREFETCH_HITS = int(os.environ.get("ENTREZ_PREFETCH_HITS", 10))
+ENTREZ_BATCH_SIZE = int(os.environ.get("ENTREZ_BATCH_SIZE", 20))
+ENTREZ_FETCH_TIMEOUT = int(os.environ.get("ENTREZ_FETCH_TIMEOUT", 120))
+
+# Asynchronous Entrez client
+# Used by the async views, see Blaster/utils/async_entrez.py. The URL
+# of the E-utilities can point to another server, for Bio.Entrez as
+# well, and queries are given up after the timeout in seconds.
+
+ENTREZ_EUTILS_URL = os.environ.get(
+    "ENTREZ_EUTILS_URL", f"{NCBI_STAND_IN_URL}entrez/eutils/"
+    if NCBI_STAND_IN_URL else "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/")
+ENTREZ_TIMEOUT = int(os.environ.get("ENTREZ_TIMEOUT", 30))
+
+# Sequence uploads
+# Uploaded sequence files are read in chunks, and decompressed when
+# they're gzip or bzip2 compressed. The size in bytes of the sequence
+# in a file, after decompression, is limited to the maximum below.
+
+SEQUENCE_FILE_MAX_SIZE = int(
+    os.environ.get("SEQUENCE_FILE_MAX_SIZE", 128 * 1024 * 1024))
+
+# BLAST result size
+# Site defaults for the E-value threshold, the number of subjects and
+# the number of HSPs per subject (0 for no limit) of a job, which a user
+# can change per job within the maximum number of subjects and of HSPs
+# per subject. They are passed to NCBI, and enforced again when the
+# results are stored.
+
+BLAST_EXPECT = float(os.environ.get("BLAST_EXPECT", 10.0))
+BLAST_HITLIST_SIZE = int(os.environ.get("BLAST_HITLIST_SIZE", 50))
+BLAST_MAX_HITLIST_SIZE = int(os.environ.get("BLAST_MAX_HITLIST_SIZE", 500))
+BLAST_MAX_HSPS = int(os.environ.get("BLAST_MAX_HSPS", 0))
+BLAST_MAX_HSPS_LIMIT = int(os.environ.get("BLAST_MAX_HSPS_LIMIT", 100))
+
+# Comparison data
+# The hits of the comparison data can be requested by their ids, up to
+# the maximum number below, see Blaster/views/comparison.py.
+
+COMPARISON_MAX_HITS = int(os.environ.get("COMPARISON_MAX_HITS", 5000))
@@ -2,13 +2,16 @@ from django.contrib import admin
 from django.urls import path
 from Blaster.views.index import index_page
 from Blaster.views.blast_results import blast_result_page, share_to_buddie
-from Blaster.views.blast_hit import blast_hit_page
+from Blaster.views.blast_hit import blast_hit_page, get_entrez_status, \
+    entrez_download
 from Blaster.views.loading import loading_result_page, get_processed_status
 from Blaster.views.login import login_page, logout_view
 from Blaster.views.signup import signup_page
 from Blaster.views.recent import recent_page
 from Blaster.views.personalia import personalia_page, remove_buddie, search_user, add_buddie
-from Blaster.views.comparison import comparison_page
+from Blaster.views.comparison import comparison_page, comparison_data
+from Blaster.views.job_comparison import job_comparison_page
+from Blaster.views.export import export_page
 
 
 urlpatterns = [
@@ -21,10 +24,19 @@ urlpatterns = [
     path("recent", recent_page),
     path("personalia", personalia_page, name="personalia_page"),
     path("comparison", comparison_page, name="comparison"),
+    path("comparison/data", comparison_data, name="comparison_data"),
+    path("comparison/jobs", job_comparison_page, name="job_comparison"),
+    path("comparison/<str:selection_code>", comparison_page,
+         name="comparison"),
+    path("export/<str:export_format>", export_page, name="export"),
     path("loading_result/<int:job_id>", loading_result_page),
     path("loading_result/get_processed_status/<int:job_id>",
          get_processed_status),
     path("blast_hit/<int:blast_hit_id>", blast_hit_page),
+    path("blast_hit/get_entrez_status/<int:blast_hit_id>",
+         get_entrez_status),
+    path("blast_hit/<int:blast_hit_id>/<str:entrez_format>",
+         entrez_download, name="entrez_download"),
     path('remove_buddie/<str:user_username>/<str:buddie_username>/',
           remove_buddie, name='remove_buddie'),
     path('search_user/', search_user, name='search_user'),
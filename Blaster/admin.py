@@ -1 +1,81 @@
+# Standard library imports
+from datetime import timedelta
+
+# Third-party imports
 from django.contrib import admin
+from django.core.handlers.wsgi import WSGIRequest
+from django.http import HttpResponse
+from django.template.response import TemplateResponse
+from django.urls import path
+from django.utils import timezone
+
+# Local imports
+from Blaster.models import BlastJob
+from Blaster.utils.instrumentation import PERCENTILES
+
+
+TIMING_WINDOWS = (1, 7, 30, 90)
+
+
+@admin.register(BlastJob)
+class BlastJobAdmin(admin.ModelAdmin):
+    """Lists BlastJobs with the time they took, and adds a page with
+    the percentiles of their phase timings, see
+    utils/instrumentation.py.
+    """
+    list_display = ("id", "title", "program", "user", "finished",
+                    "stored_hits", "total_seconds")
+    list_filter = ("program", "finished")
+    list_select_related = ("user",)
+    search_fields = ("title",)
+    exclude = ("sequence",)
+    readonly_fields = ("phase_seconds", "phase_counts", "stored_hits",
+                       "returned_hsps", "finished")
+
+    @admin.display(description="Seconds")
+    def total_seconds(self, job: BlastJob) -> str:
+        """Returns the seconds processing the job took.
+
+        :param job: the job.
+        :type job: BlastJob
+        :return: the total seconds, or "-" if not recorded.
+        :rtype: str
+        """
+        total = job.phase_seconds.get("total")
+        return "-" if total is None else f"{total:.1f}"
+
+    def get_urls(self) -> list:
+        return [
+            path("timings/", self.admin_site.admin_view(self.timings_view),
+                 name="Blaster_blastjob_timings"),
+        ] + super().get_urls()
+
+    def timings_view(self, request: WSGIRequest) -> HttpResponse:
+        """Renders the percentiles of the phase timings of the jobs
+        processed in the last days, one of TIMING_WINDOWS, 7 by
+        default.
+
+        :param request: Django request object
+        :type request: WSGIRequest
+        :return: the timings page
+        :rtype: HttpResponse
+        """
+        try:
+            days = int(request.GET.get("days", 7))
+        except ValueError:
+            days = 7
+        if days not in TIMING_WINDOWS:
+            days = 7
+        since = timezone.now() - timedelta(days=days)
+
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": "BLAST job timings",
+            "days": days,
+            "windows": TIMING_WINDOWS,
+            "percentiles": PERCENTILES,
+            "timings": BlastJob.objects.phase_timings(since),
+        }
+        return TemplateResponse(
+            request, "admin/Blaster/blastjob/timings.html", context)
@@ -1,6 +1,13 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class BlasterConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "Blaster"
+
+    def ready(self) -> None:
+        from BlastBuddyClub.database import configure_sqlite_connection
+        from Blaster.utils.entrez_redirect import redirect_entrez
+        connection_created.connect(configure_sqlite_connection)
+        redirect_entrez()
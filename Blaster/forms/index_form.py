@@ -1,11 +1,28 @@
 # Standard library imports
 from enum import Enum, auto
-import re
+from itertools import chain
+from typing import Iterator
+import bz2
+import gzip
+import math
+import zlib
 
 # Third-party imports
-from django.core.files.uploadedfile import InMemoryUploadedFile
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
 from django.utils.encoding import smart_str, DjangoUnicodeDecodeError
 
+# Local imports
+from Blaster.utils.sequence_validator import (SequenceValidator,
+                                              validate_sequence, CHUNK_SIZE)
+
+
+GZIP_MAGIC = b"\x1f\x8b"
+BZIP2_MAGIC = b"BZh"
+
+# Raised while reading a damaged or truncated compressed file
+DECOMPRESSION_ERRORS = (OSError, EOFError, zlib.error)
+
 
 class IndexValidationEnum(Enum):
     """
@@ -22,45 +39,94 @@ class IndexValidationEnum(Enum):
     INVALID_BLAST_MODE = auto()
     MISSING_SEQUENCE_INPUT = auto()
     INVALID_SEQUENCE = auto()
+    FILE_TOO_LARGE = auto()
+    INVALID_SEARCH_OPTIONS = auto()
+
+
+class SequenceFileTooLarge(ValueError):
+    """
+    Raised when the content of an uploaded file exceeds
+    SEQUENCE_FILE_MAX_SIZE.
+    """
 
 
-def read_index_file(seq_file: InMemoryUploadedFile | None) -> str:
+def read_index_file_chunks(seq_file: UploadedFile,
+                           max_size: int | None = None) -> Iterator[bytes]:
+    """
+    Reads the file provided to the index form in chunks of bytes.
+
+    Both uploads kept in memory and uploads Django stored as a
+    temporary file are read this way, so the file is never held in
+    memory as a whole. Files that are gzip or bzip2 compressed,
+    recognized by their first bytes, are decompressed while reading.
+
+    :param seq_file: The file provided to the index form.
+    :type seq_file: UploadedFile
+    :param max_size: The maximum size of the content in bytes,
+        defaults to SEQUENCE_FILE_MAX_SIZE.
+    :type max_size: int or None
+    :return: The chunks of the (decompressed) content.
+    :rtype: Iterator[bytes]
+    :raises SequenceFileTooLarge: once the content exceeds the
+        maximum size.
+    :raises OSError, EOFError, zlib.error: if a compressed file is
+        damaged or truncated.
+    """
+    if max_size is None:
+        max_size = settings.SEQUENCE_FILE_MAX_SIZE
+
+    seq_file.seek(0)
+    magic = seq_file.read(len(BZIP2_MAGIC))
+    seq_file.seek(0)
+    if magic.startswith(GZIP_MAGIC):
+        stream = gzip.GzipFile(fileobj=seq_file, mode="rb")
+    elif magic.startswith(BZIP2_MAGIC):
+        stream = bz2.BZ2File(seq_file)
+    else:
+        stream = seq_file
+
+    size = 0
+    while chunk := stream.read(CHUNK_SIZE):
+        size += len(chunk)
+        if size > max_size:
+            raise SequenceFileTooLarge(
+                f"the file exceeds {max_size} bytes")
+        yield chunk
+
+
+def read_index_file(seq_file: UploadedFile | None) -> str:
     """
     It will attempt to read and parse the contents of the file 
     provided to the index form as a string.
     If no file is provided, it will simply return an empty string.
 
     The file type provided is irrelevant, the file will simply
-    be read and an attempt to decode the content will be done
+    be read, decompressed if needed, see `read_index_file_chunks`,
+    and an attempt to decode the content will be done
     using django's `smart_str`.
-    In case the file cannot be decoded to a str by the method,
+    In case the file cannot be read or decoded to a str by the method,
     it will return an empty string instead.
 
-    As a result of `InMemoryUploadedFile` function as a generator,
-    it is impossible with the current implementation to identify
-    if the file content was empty, or could not be decoded to a string.
-
-    As a result of not checking the file extension, and using smart_str
-    it is could be possible that the content of a file 
-    could be altered, or misread. 
-    Testing is required to identify when this would happen.
+    The index form doesn't use this function, as it streams the file
+    into the validator instead, see `clean_index_form`.
 
     :param seq_file: The file provided to the index form.
-    :type seq_file: InMemoryUploadedFile or None
+    :type seq_file: UploadedFile or None
     :return: The contents of the file, or an empty string.
     :rtype: str
     """
     try:
-        if type(seq_file) is InMemoryUploadedFile:
-            return smart_str(seq_file.read())
-    except DjangoUnicodeDecodeError:
+        if isinstance(seq_file, UploadedFile):
+            return smart_str(b"".join(read_index_file_chunks(seq_file)))
+    except (DjangoUnicodeDecodeError, SequenceFileTooLarge,
+            *DECOMPRESSION_ERRORS):
         pass
     return ""
 
 
 def validate_index_form(
         blast_mode: str, job_name: str, seq_text: str,
-        seq_file: InMemoryUploadedFile | None,
+        seq_file: UploadedFile | None,
         seq_file_text: str) -> IndexValidationEnum:
     """
     Validates all the possible inputs to the form that are known
@@ -95,88 +161,141 @@ def validate_index_form(
     :param seq_text: The sequence as string
     :type seq_text str
     :param seq_file: The file that has been provided
-    :type seq_file InMemoryUploadedFile | None
+    :type seq_file UploadedFile | None
     :param seq_file_text: The sequence from the file
     :return:
     :rtype: IndexValidationEnum
     """
-    if any(type(i) is not str for i in
-           (blast_mode, job_name, seq_text, seq_file_text)):
+    if type(seq_file_text) is not str:
         return IndexValidationEnum.INVALID_INPUT_TYPES
+    return clean_index_form(
+        blast_mode, job_name, seq_text, seq_file, seq_file_text)[0]
 
-    if (seq_file is not None and
-            type(seq_file) is not InMemoryUploadedFile):
-        return IndexValidationEnum.INVALID_FILE_OBJECT
-
-    # # commented out as it's not behaviour the client has requested
-    # if type(seq_file) is InMemoryUploadedFile:
-    #     if any(not seq_file.name.endswith(i) for i in (".fasta",)):
-    #         return IndexValidationEnum.INVALID_FILE_EXTENSION
-
-    if blast_mode not in ("blastn", "blastp"):
-        return IndexValidationEnum.INVALID_BLAST_MODE
-
-    if seq_text == "" and seq_file_text == "":
-        return IndexValidationEnum.MISSING_SEQUENCE_INPUT
-
-    sequence = ""
-    if type(seq_file) is InMemoryUploadedFile and seq_file_text != "":
-        sequence = seq_file_text
-    elif seq_text != "":
-        sequence = seq_text
 
-    characters = ""
-    if blast_mode == "blastn":
-        characters = "atcg"
-    elif blast_mode == "blastp":
-        characters = "acdefghiklmnpqrstvwy"
-    pattern = rf"(?i)" \
-              rf"^(>.+(\n|\r\n))?" \
-              rf"(?>[{characters}]+(\n|\r\n)*)+$"
-
-    if not re.match(pattern, sequence):
-        return IndexValidationEnum.INVALID_SEQUENCE
-
-    return IndexValidationEnum.VALID
-
-
-def process_index_form(
-        seq_text: str, seq_file: InMemoryUploadedFile | None,
-        seq_file_text: str) -> tuple[str, str]:
+def clean_index_form(
+        blast_mode: str, job_name: str, seq_text: str,
+        seq_file: UploadedFile | None,
+        seq_file_text: str | None = None
+        ) -> tuple[IndexValidationEnum, SequenceValidator | None]:
     """
-    Processes the contents of the index form
+    Validates the inputs of the index form, as `validate_index_form`
+    does, and processes the sequence in the same pass,
     to allow for uniform usage by different parts of the application.
     Usage of this function is required when dealing with user input
     data from the form.
 
-    It selects which sequence to keep.
-
-    It replaces all carriage returns for escape characters.
-    This is to support different file formats, and text input
-    on the form produces carriage returns.
-
-    In case a fasta header is present, the header and
-    sequence are split from each other.
-    In case no fasta header is present the header is an empty string.
+    The sequence is checked by a `SequenceValidator`, which
+    splits off the fasta header and removes all enters from the
+    sequence while it checks the characters, see
+    utils/sequence_validator.py. In case no fasta header is present
+    the header is an empty string.
 
-    All enters from the sequence are removed.
+    Without seq_file_text, the file is streamed into the validator
+    as it's read and decompressed, see `read_index_file_chunks`.
+    An empty file counts as no file.
 
-    :param seq_text: The sequence text.
+    :param blast_mode: The blast mode selected
+    :type blast_mode str
+    :param job_name: The name of the job
+    :type job_name str
+    :param seq_text: The sequence as string
     :type seq_text str
-    :param seq_file: The sequence file.
-    :type seq_file InMemoryUploadedFile or None
-    :param seq_file_text: The sequence text from the file.
-    :type seq_file_text str
-    :return: A tuple containing the header and the cleaned up sequence.
-    :rtype: tuple[str, str]
+    :param seq_file: The file that has been provided
+    :type seq_file UploadedFile | None
+    :param seq_file_text: The sequence from the file, if it has been
+        read beforehand.
+    :type seq_file_text str | None
+    :return: The validation status, and the validator holding the
+        header and sequence, or the position of the first invalid
+        character. The validator is None if the sequence
+        wasn't checked.
+    :rtype: tuple[IndexValidationEnum, SequenceValidator | None]
     """
-    if type(seq_file) is InMemoryUploadedFile:
-        sequence = seq_file_text
-    else:
-        sequence = seq_text
-    sequence = sequence.replace("\r\n", "\n")
+    if any(type(i) is not str for i in
+           (blast_mode, job_name, seq_text)) \
+            or type(seq_file_text) not in (str, type(None)):
+        return IndexValidationEnum.INVALID_INPUT_TYPES, None
+
+    if (seq_file is not None and
+            not isinstance(seq_file, UploadedFile)):
+        return IndexValidationEnum.INVALID_FILE_OBJECT, None
+
+    # # commented out as it's not behaviour the client has requested
+    # if type(seq_file) is InMemoryUploadedFile:
+    #     if any(not seq_file.name.endswith(i) for i in (".fasta",)):
+    #         return IndexValidationEnum.INVALID_FILE_EXTENSION
+
+    if blast_mode not in ("blastn", "blastp"):
+        return IndexValidationEnum.INVALID_BLAST_MODE, None
 
-    if sequence.startswith(">"):
-        header, *sequence = sequence[1:].rstrip("\n").split("\n")
-        return header, "".join(sequence)
-    return "", sequence.replace("\n", "")
+    sequence = b""
+    try:
+        if seq_file is not None and seq_file_text is None:
+            chunks = read_index_file_chunks(seq_file)
+            first = next(chunks, b"")
+            if first:
+                sequence = chain((first,), chunks)
+        elif seq_file is not None and seq_file_text != "":
+            sequence = seq_file_text.encode("utf-8")
+
+        if not sequence and seq_text != "":
+            sequence = seq_text.encode("utf-8")
+        if not sequence:
+            return IndexValidationEnum.MISSING_SEQUENCE_INPUT, None
+
+        validator = validate_sequence(sequence, blast_mode)
+    except SequenceFileTooLarge:
+        return IndexValidationEnum.FILE_TOO_LARGE, None
+    except DECOMPRESSION_ERRORS:
+        return IndexValidationEnum.INVALID_FILE_OBJECT, None
+
+    if not validator.valid:
+        return IndexValidationEnum.INVALID_SEQUENCE, validator
+
+    return IndexValidationEnum.VALID, validator
+
+
+def clean_search_options(
+        expect: str | None, hitlist_size: str | None,
+        max_hsps: str | None
+        ) -> tuple[IndexValidationEnum, dict]:
+    """
+    Validates the result size options of the index form, and converts
+    them to the keyword arguments of `create_blast_job`.
+
+    An option that's left empty, or not sent at all, is left out of
+    the arguments, so the site default is used for it.
+    The E-value threshold has to be a positive number, the number of
+    subjects a whole number from 1 up to BLAST_MAX_HITLIST_SIZE, and
+    the number of HSPs per subject a whole number up to
+    BLAST_MAX_HSPS_LIMIT, 0 for no limit.
+
+    :param expect: The E-value threshold
+    :type expect str | None
+    :param hitlist_size: The number of subjects to keep
+    :type hitlist_size str | None
+    :param max_hsps: The number of HSPs to keep per subject
+    :type max_hsps str | None
+    :return: The validation status, and the options that were given.
+    :rtype: tuple[IndexValidationEnum, dict]
+    """
+    options = {}
+    try:
+        if expect:
+            options["expect"] = float(expect)
+            if not (math.isfinite(options["expect"])
+                    and options["expect"] > 0):
+                raise ValueError(expect)
+        if hitlist_size:
+            options["hitlist_size"] = int(hitlist_size)
+            if not 1 <= options["hitlist_size"] \
+                    <= settings.BLAST_MAX_HITLIST_SIZE:
+                raise ValueError(hitlist_size)
+        if max_hsps:
+            options["max_hsps"] = int(max_hsps)
+            if not 0 <= options["max_hsps"] \
+                    <= settings.BLAST_MAX_HSPS_LIMIT:
+                raise ValueError(max_hsps)
+    except (TypeError, ValueError):
+        return IndexValidationEnum.INVALID_SEARCH_OPTIONS, {}
+    return IndexValidationEnum.VALID, options
@@ -0,0 +1,36 @@
+# Third-party imports
+from django.core.management.base import BaseCommand
+from django.db.models import Avg, Count, Max, Sum
+
+# Local imports
+from Blaster.models import BlastJob
+
+
+class Command(BaseCommand):
+    """Reports the number of hits stored per processed BlastJob.
+
+    Jobs store the hits within their result size only, see
+    `parse_blast_job_results`. The report compares the pairs NCBI
+    returned with the hits that were stored, over the jobs processed
+    since both were recorded.
+
+    Usage:
+        `py manage.py blast_job_sizes`
+    """
+    help = "Reports the number of hits stored per BLAST job."
+
+    def handle(self, *args, **options) -> None:
+        totals = BlastJob.objects.filter(returned_hsps__gt=0).aggregate(
+            jobs=Count("id"), returned=Sum("returned_hsps"),
+            stored=Sum("stored_hits"), average=Avg("stored_hits"),
+            largest=Max("stored_hits"))
+        returned = totals["returned"] or 0
+        stored = totals["stored"] or 0
+
+        self.stdout.write(f"Jobs:     {totals['jobs']}")
+        self.stdout.write(
+            f"Stored:   {stored} of {returned} returned hits "
+            f"({stored / returned if returned else 0:.1%})")
+        self.stdout.write(
+            f"Per job:  {totals['average'] or 0:.1f} on average, "
+            f"{totals['largest'] or 0} at most")
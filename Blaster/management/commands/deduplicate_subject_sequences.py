@@ -0,0 +1,74 @@
+# Third-party imports
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+# Local imports
+from Blaster.models import BlastHit, SubjectSequence
+from Blaster.utils.packing import unpack_sequence
+
+
+class Command(BaseCommand):
+    """Moves the subject sequences of hits to shared SubjectSequences.
+
+    Hits created before SubjectSequence existed stored their own copy
+    of the subject sequence in the subject_seq column of the hit table.
+    This command reads that column for every hit without a subject,
+    stores every unique sequence once, and links the hits to it.
+
+    The old column is read directly, so the command has to be run
+    while the column still exists. When generating the migration for
+    this change, the new subject field has to be added first, and
+    subject_seq removed in a later migration, after running:
+        `py manage.py deduplicate_subject_sequences`
+    """
+    help = "Links hits to shared SubjectSequences, " \
+           "from their own subject_seq column."
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options) -> None:
+        batch_size = options["batch_size"]
+        table = BlastHit._meta.db_table
+
+        with connection.cursor() as cursor:
+            columns = [column.name for column in connection.introspection
+                       .get_table_description(cursor, table)]
+        if "subject_seq" not in columns:
+            raise CommandError(
+                f"Error: {table} has no subject_seq column to convert")
+
+        converted = 0
+        while True:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"SELECT id, subject_seq FROM {table} "
+                    f"WHERE subject_id IS NULL ORDER BY id LIMIT %s",
+                    [batch_size])
+                rows = cursor.fetchall()
+            if not rows:
+                break
+
+            # Depending on when a hit was created, its sequence is
+            # stored as text or packed.
+            sequences = {
+                hit_id: sequence if isinstance(sequence, str)
+                else unpack_sequence(sequence)
+                for hit_id, sequence in rows
+            }
+            subjects = SubjectSequence.objects.get_or_create_sequences(
+                sequences.values())
+
+            hits = []
+            for hit_id, sequence in sequences.items():
+                subject = subjects[sequence]
+                hits.append(BlastHit(id=hit_id, subject=subject,
+                                     subject_length=subject.length))
+            with transaction.atomic():
+                BlastHit.objects.bulk_update(
+                    hits, ["subject", "subject_length"])
+            converted += len(hits)
+
+        self.stdout.write(
+            f"Linked {converted} hits to "
+            f"{SubjectSequence.objects.count()} subject sequences")
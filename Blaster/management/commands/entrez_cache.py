@@ -0,0 +1,106 @@
+# Standard library imports
+from datetime import timedelta
+
+# Third-party imports
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+# Local imports
+from Blaster.models import EntrezAccessionCache
+from Blaster.utils.ncbi import refresh_entrez_accession_cache
+
+
+AGE_BUCKETS = (
+    ("today", 0),
+    ("1 - 7 days", 7),
+    ("8 - 30 days", 30),
+    ("31 - 90 days", 90),
+)
+
+
+class Command(BaseCommand):
+    """Reports on, and maintains, the EntrezAccessionCache.
+
+    By default, reports the size of the cache against its budget, the
+    hit rate and the distribution of the age of the entries.
+    The hit rate only covers the entries currently in the cache, as
+    the counters of evicted entries are deleted with them.
+
+    Usage:
+        `py manage.py entrez_cache`
+        `py manage.py entrez_cache --compress --refresh --evict`
+    """
+    help = "Reports the size, hit rate and age of the Entrez cache."
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--compress", action="store_true",
+            help="Compress entries that are still stored as text.")
+        parser.add_argument(
+            "--refresh", action="store_true",
+            help="Fetch entries older than the TTL again.")
+        parser.add_argument(
+            "--evict", action="store_true",
+            help="Evict the least recently used entries over budget.")
+
+    def handle(self, *args, **options) -> None:
+        if options["compress"]:
+            self.compress()
+        if options["refresh"]:
+            stale = list(EntrezAccessionCache.objects.stale()
+                         .values_list("id", flat=True))
+            for cache_id in stale:
+                refresh_entrez_accession_cache(cache_id)
+            self.stdout.write(f"Refreshed {len(stale)} entries")
+        if options["evict"]:
+            evicted = EntrezAccessionCache.objects.evict()
+            self.stdout.write(f"Evicted {evicted} entries")
+        self.report()
+
+    def compress(self) -> None:
+        """Saves the entries stored as text again, compressing them."""
+        compressed = 0
+        for cache in EntrezAccessionCache.objects.iterator(chunk_size=100):
+            if any(isinstance(cache.__dict__[name], str)
+                   for name in ("genbank", "fasta")):
+                cache.save(update_fields=["genbank", "fasta", "size"])
+                compressed += 1
+        self.stdout.write(f"Compressed {compressed} entries")
+
+    def report(self) -> None:
+        """Writes the size, hit rate and age distribution of the cache."""
+        caches = EntrezAccessionCache.objects
+        totals = caches.aggregate(
+            entries=Count("id"), size=Sum("size"),
+            hits=Sum("hits"), fetches=Sum("fetches"))
+        size = totals["size"] or 0
+        hits = totals["hits"] or 0
+        fetches = totals["fetches"] or 0
+        budget = settings.ENTREZ_CACHE_MAX_BYTES
+
+        self.stdout.write(f"Entries:  {totals['entries']}")
+        self.stdout.write(
+            f"Size:     {size} of {budget} bytes ({size / budget:.1%})")
+        hit_rate = hits / (hits + fetches) if hits + fetches else 0
+        self.stdout.write(
+            f"Hit rate: {hit_rate:.1%} ({hits} hits, {fetches} fetches)")
+
+        today = timezone.localdate()
+        buckets, newest = {}, today + timedelta(days=1)
+        for label, days in AGE_BUCKETS:
+            oldest = today - timedelta(days=days)
+            buckets[label] = Q(date__gte=oldest, date__lt=newest)
+            newest = oldest
+        buckets["older"] = Q(date__lt=newest)
+        ages = caches.aggregate(**{
+            f"age_{index}": Count("id", filter=condition)
+            for index, condition in enumerate(buckets.values())})
+
+        self.stdout.write("Age:")
+        for label, count in zip(buckets, ages.values()):
+            self.stdout.write(f"    {label:<14}{count}")
+        self.stdout.write(
+            f"Stale:    {caches.stale().count()} entries older than "
+            f"{settings.ENTREZ_CACHE_TTL_DAYS} days")
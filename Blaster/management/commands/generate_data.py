@@ -0,0 +1,365 @@
+# Standard library imports
+from datetime import datetime, time, timedelta
+from itertools import accumulate
+import random
+
+# Third-party imports
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+# Local imports
+from Blaster.models import (BlastBuddies, BlastHit, BlastJob,
+                            EntrezAccession, HitSelection, SharedJobs,
+                            SubjectSequence)
+
+
+ORGANISMS = [
+    "Homo sapiens", "Mus musculus", "Rattus norvegicus", "Danio rerio",
+    "Escherichia coli", "Saccharomyces cerevisiae",
+    "Drosophila melanogaster", "Arabidopsis thaliana", "Gallus gallus",
+    "Bos taurus", "Sus scrofa", "Caenorhabditis elegans",
+    "Pan troglodytes", "Xenopus laevis", "Oryza sativa",
+]
+
+# Maps every byte to a base, for drawing sequences from random bytes
+BASES = bytes(b"ACGT"[byte % 4] for byte in range(256))
+
+HIT_COLUMNS = (
+    "job", "accession", "description", "blast_score", "bit_score",
+    "e_value", "identities", "percentage_identity", "align_length",
+    "query_start", "query_end", "query_coverage", "subject",
+    "subject_length", "subject_start", "subject_end",
+)
+
+
+class Command(BaseCommand):
+    """Generates users, jobs and hits, to find the scaling limits of views.
+
+    The data is generated with distributions resembling real use:
+        - the number of jobs per user, and of hits per job, is
+          log-normal, so a few users and jobs are much larger than
+          the average;
+        - accessions and organisms are drawn by a Zipf distribution,
+          so popular subjects are found by many jobs;
+        - subject sequences are drawn from a shared pool, as hits of
+          different jobs align to the same subjects;
+        - E-values are log-uniform over the range NCBI reports.
+    Every user has buddies, jobs shared with them by those buddies,
+    and selections of hits to compare. A tenth of the jobs has no user.
+
+    Rows are inserted in bulk, a batch per transaction, so millions of
+    hits can be generated. Users are named <prefix><number>, with the
+    password "synthetic", and accession codes start with the prefix,
+    so the data can be told apart from real data. The command should
+    only be run against a database meant for testing, such as the one
+    of the load test, see benchmarks/load_test.py.
+
+    Usage:
+        `py manage.py generate_data --users 1000 --hits 2000000`
+    """
+    help = "Generates synthetic users, jobs and hits for load testing."
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--users", type=int, default=100)
+        parser.add_argument(
+            "--jobs", type=float, default=20,
+            help="The average number of jobs per user.")
+        parser.add_argument(
+            "--hits", type=int, default=100_000,
+            help="The total number of hits.")
+        parser.add_argument("--accessions", type=int, default=10_000)
+        parser.add_argument(
+            "--buddies", type=int, default=5,
+            help="The average number of buddies per user.")
+        parser.add_argument(
+            "--shared", type=int, default=3,
+            help="The average number of jobs shared with a user.")
+        parser.add_argument(
+            "--selections", type=int, default=2,
+            help="The number of hit selections per user.")
+        parser.add_argument("--days", type=int, default=730)
+        parser.add_argument("--prefix", default="synthetic")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options) -> None:
+        self.rng = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        prefix = options["prefix"]
+        if User.objects.filter(username__startswith=prefix).exists():
+            raise CommandError(
+                f"Error: users named {prefix}... exist already, "
+                f"choose another --prefix")
+
+        users = self.create_users(prefix, options["users"])
+        self.create_buddies(users, options["buddies"])
+        accessions = self.create_accessions(prefix, options["accessions"])
+        subjects = self.create_subjects(min(options["accessions"] * 2,
+                                            50_000))
+        jobs = self.create_jobs(users, options["jobs"], options["hits"],
+                                options["days"])
+        self.create_hits(jobs, accessions, subjects)
+        self.share_jobs(users, jobs, options["shared"])
+        self.create_selections(users, jobs, options["selections"])
+
+    def log_normal_counts(self, number: int, total: int,
+                          sigma: float = 1.0) -> list[int]:
+        """Divides a total over a number of items, log-normally.
+
+        :param number: the number of items.
+        :type number: int
+        :param total: the total to divide.
+        :type total: int
+        :param sigma: the spread of the distribution.
+        :type sigma: float
+        :return: the count of every item, summing to about the total.
+        :rtype: list[int]
+        """
+        weights = [self.rng.lognormvariate(0, sigma) for _ in range(number)]
+        scale = total / sum(weights)
+        return [round(weight * scale) for weight in weights]
+
+    def zipf_weights(self, number: int, exponent: float = 1.1) -> list:
+        """Returns the cumulative weights of a Zipf distribution.
+
+        :param number: the number of items, ranked by popularity.
+        :type number: int
+        :param exponent: how strongly popularity falls with the rank.
+        :type exponent: float
+        :return: the cumulative weights, for `random.choices`.
+        :rtype: list[float]
+        """
+        return list(accumulate(1 / rank ** exponent
+                               for rank in range(1, number + 1)))
+
+    def random_sequence(self, low: int, high: int) -> str:
+        """Draws a nucleotide sequence of a random length.
+
+        :param low: the minimum length.
+        :type low: int
+        :param high: the maximum length.
+        :type high: int
+        :rtype: str
+        """
+        return self.rng.randbytes(self.rng.randint(low, high))\
+            .translate(BASES).decode("ascii")
+
+    def create_users(self, prefix: str, number: int) -> list[User]:
+        """Creates users sharing a single hashed password.
+
+        :rtype: list[User]
+        """
+        password = make_password("synthetic")
+        users = User.objects.bulk_create(
+            [User(username=f"{prefix}{index}", password=password,
+                  email=f"{prefix}{index}@example.com")
+             for index in range(number)],
+            batch_size=self.batch_size)
+        self.stdout.write(f"Users:       {len(users)}")
+        return users
+
+    def create_buddies(self, users: list[User], average: int) -> None:
+        """Gives every user a BlastBuddies row, with random buddies."""
+        buddies = BlastBuddies.objects.bulk_create(
+            [BlastBuddies(user=user) for user in users],
+            batch_size=self.batch_size)
+        through = BlastBuddies.buddie.through
+        links = []
+        for row in buddies:
+            number = min(len(users) - 1,
+                         round(self.rng.expovariate(1 / average))
+                         if average else 0)
+            # Drawn with the user itself, which is left out
+            others = [buddy for buddy in self.rng.sample(users, number + 1)
+                      if buddy.id != row.user_id]
+            links.extend(through(blastbuddies_id=row.id, user_id=buddy.id)
+                         for buddy in others[:number])
+        through.objects.bulk_create(links, batch_size=self.batch_size)
+        self.stdout.write(f"Buddies:     {len(links)}")
+
+    def create_accessions(self, prefix: str,
+                          number: int) -> list[EntrezAccession]:
+        """Creates accessions, with organisms drawn by popularity.
+
+        :rtype: list[EntrezAccession]
+        """
+        organisms = self.rng.choices(
+            ORGANISMS, cum_weights=self.zipf_weights(len(ORGANISMS)),
+            k=number)
+        accessions = EntrezAccession.objects.bulk_create(
+            [EntrezAccession(code=f"{prefix.upper()}_{index:07d}",
+                             organism=organism)
+             for index, organism in enumerate(organisms)],
+            batch_size=self.batch_size)
+        self.stdout.write(f"Accessions:  {len(accessions)}")
+        return accessions
+
+    def create_subjects(self, number: int) -> list[SubjectSequence]:
+        """Creates a pool of subject sequences of 50 to 1000 bases.
+
+        :rtype: list[SubjectSequence]
+        """
+        subjects = []
+        for start in range(0, number, self.batch_size):
+            batch = {}
+            for _ in range(min(self.batch_size, number - start)):
+                batch[self.random_sequence(50, 1000)] = None
+            subjects.extend(SubjectSequence.objects
+                            .get_or_create_sequences(batch).values())
+        self.stdout.write(f"Subjects:    {len(subjects)}")
+        return subjects
+
+    def create_jobs(self, users: list[User], average: float,
+                    hits: int, days: int) -> list[BlastJob]:
+        """Creates processed jobs spread over the last days.
+
+        The number of hits of every job is stored in `stored_hits`,
+        before the hits are created.
+
+        :rtype: list[BlastJob]
+        """
+        counts = self.log_normal_counts(len(users),
+                                        round(len(users) * average))
+        owners = [user for user, count in zip(users, counts)
+                  for _ in range(count)]
+        # A tenth of the jobs is submitted without logging in
+        owners += [None] * (len(owners) // 9)
+        self.rng.shuffle(owners)
+        hit_counts = self.log_normal_counts(len(owners), hits)
+
+        now = timezone.now()
+        jobs = []
+        for index, (owner, hit_count) in enumerate(zip(owners, hit_counts)):
+            sequence = self.random_sequence(100, 3000)
+            jobs.append(BlastJob(
+                user=owner, title=f"Synthetic job {index}",
+                program="blastn", header=f"synthetic query {index}",
+                sequence=sequence, hitlist_size=max(50, hit_count),
+                stored_hits=hit_count, returned_hsps=hit_count,
+                finished=now))
+        jobs = BlastJob.objects.bulk_create(jobs, batch_size=self.batch_size)
+
+        # The date and time are set when a job is added, and can only be
+        # spread out afterwards
+        start = datetime.combine(timezone.localdate(), time())
+        for job in jobs:
+            submitted = start - timedelta(
+                seconds=self.rng.randrange(days * 24 * 3600))
+            job.date, job.time = submitted.date(), submitted.time()
+        BlastJob.objects.bulk_update(jobs, ["date", "time"],
+                                     batch_size=self.batch_size)
+        self.stdout.write(f"Jobs:        {len(jobs)}")
+        return jobs
+
+    def create_hits(self, jobs: list[BlastJob],
+                    accessions: list[EntrezAccession],
+                    subjects: list[SubjectSequence]) -> None:
+        """Creates the hits of every job, in batches.
+
+        The hits are inserted with plain SQL, as building model
+        instances for millions of rows takes most of the time.
+        """
+        accession_weights = self.zipf_weights(len(accessions))
+        batch, created = [], 0
+        for job in jobs:
+            chosen = self.rng.choices(accessions,
+                                      cum_weights=accession_weights,
+                                      k=job.stored_hits)
+            e_values = sorted(10 ** -self.rng.uniform(0, 180) * 10
+                              for _ in chosen)
+            for accession, e_value in zip(chosen, e_values):
+                subject = self.rng.choice(subjects)
+                identities = round(subject.length
+                                   * self.rng.uniform(0.7, 1.0))
+                query_start = self.rng.randint(1, job.sequence_length)
+                query_end = min(job.sequence_length,
+                                query_start + subject.length - 1)
+                batch.append((
+                    job.id, accession.id,
+                    f"{accession.organism} synthetic subject",
+                    identities * 2, identities * 1.8, e_value, identities,
+                    round(identities / subject.length * 100, 2),
+                    subject.length, query_start, query_end,
+                    round((query_end - query_start + 1)
+                          / job.sequence_length * 100, 2),
+                    subject.id, subject.length, 1, subject.length))
+            if len(batch) >= self.batch_size:
+                created += self.insert_hits(batch)
+                batch = []
+        created += self.insert_hits(batch)
+        self.stdout.write(f"Hits:        {created}")
+
+    def insert_hits(self, batch: list[tuple]) -> int:
+        """Inserts a batch of hits in a transaction of its own.
+
+        :param batch: the values of every hit, in the order of
+            HIT_COLUMNS.
+        :type batch: list[tuple]
+        :return: the number of hits inserted.
+        :rtype: int
+        """
+        columns = ", ".join(BlastHit._meta.get_field(name).column
+                            for name in HIT_COLUMNS)
+        placeholders = ", ".join(["%s"] * len(HIT_COLUMNS))
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {BlastHit._meta.db_table} ({columns}) "
+                f"VALUES ({placeholders})", batch)
+        return len(batch)
+
+    def share_jobs(self, users: list[User], jobs: list[BlastJob],
+                   average: int) -> None:
+        """Shares jobs of their buddies with users."""
+        jobs_by_user = {}
+        for job in jobs:
+            if job.user_id is not None:
+                jobs_by_user.setdefault(job.user_id, []).append(job.id)
+
+        shared_jobs = SharedJobs.objects.bulk_create(
+            [SharedJobs(user=user) for user in users],
+            batch_size=self.batch_size)
+        buddies = {}
+        for user_id, buddy_id in BlastBuddies.buddie.through.objects\
+                .filter(blastbuddies__user__in=users)\
+                .values_list("blastbuddies__user_id", "user_id"):
+            buddies.setdefault(buddy_id, []).append(user_id)
+
+        through = SharedJobs.shared_job.through
+        links = []
+        for row in shared_jobs:
+            # Jobs are shared by the users who have this user as buddy
+            candidates = [job_id for user_id in buddies.get(row.user_id, [])
+                          for job_id in jobs_by_user.get(user_id, [])]
+            number = min(len(candidates),
+                         round(self.rng.expovariate(1 / average))
+                         if average else 0)
+            links.extend(through(sharedjobs_id=row.id, blastjob_id=job_id)
+                         for job_id in self.rng.sample(candidates, number))
+        through.objects.bulk_create(links, batch_size=self.batch_size)
+        self.stdout.write(f"Shared jobs: {len(links)}")
+
+    def create_selections(self, users: list[User], jobs: list[BlastJob],
+                          number: int) -> None:
+        """Selects 2 to 20 hits of jobs of users, for comparison."""
+        jobs_by_user = {}
+        for job in jobs:
+            if job.user_id is not None and job.stored_hits >= 2:
+                jobs_by_user.setdefault(job.user_id, []).append(job.id)
+
+        created = 0
+        for user in users:
+            for job_id in self.rng.sample(
+                    jobs_by_user.get(user.id, []),
+                    min(number, len(jobs_by_user.get(user.id, [])))):
+                hit_ids = list(BlastHit.objects.filter(job_id=job_id)
+                               .values_list("id", flat=True))
+                if HitSelection.objects.get_or_create_selection(
+                        self.rng.sample(hit_ids,
+                                        min(len(hit_ids),
+                                            self.rng.randint(2, 20))),
+                        user):
+                    created += 1
+        self.stdout.write(f"Selections:  {created}")
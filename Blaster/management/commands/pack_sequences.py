@@ -0,0 +1,80 @@
+# Third-party imports
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+# Local imports
+from Blaster.models import BlastJob, SubjectSequence
+
+
+class Command(BaseCommand):
+    """Converts sequences stored as text to their packed form.
+
+    Rows written before BlastJob.sequence and SubjectSequence.sequence
+    were a PackedSequenceField still hold the sequence as text. These rows
+    can be read as is, but only take up less space once packed.
+    This command packs them in batches, and fills in the length fields.
+    Running it again only converts rows that are still text.
+
+    Usage, after migrating the models:
+        `py manage.py pack_sequences`
+    """
+    help = "Packs BlastJob and SubjectSequence sequences still " \
+           "stored as text."
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options) -> None:
+        batch_size = options["batch_size"]
+        for model, field_name, length_name in (
+                (BlastJob, "sequence", "sequence_length"),
+                (SubjectSequence, "sequence", "length")):
+            converted, text_bytes, packed_bytes = self.pack_model(
+                model, field_name, length_name, batch_size)
+            self.stdout.write(
+                f"{model.__name__}: packed {converted} rows, "
+                f"{text_bytes} bytes of text to {packed_bytes} bytes")
+
+    @staticmethod
+    def pack_model(model, field_name: str, length_name: str,
+                   batch_size: int) -> tuple[int, int, int]:
+        """Packs the text rows of one model.
+
+        :param model: the model class to convert.
+        :param field_name: name of the PackedSequenceField.
+        :type field_name: str
+        :param length_name: name of the matching length field.
+        :type length_name: str
+        :param batch_size: rows to update per query.
+        :type batch_size: int
+        :return: rows converted, bytes as text and bytes packed.
+        :rtype: tuple[int, int, int]
+        """
+        field = model._meta.get_field(field_name)
+        converted, text_bytes, packed_bytes = 0, 0, 0
+        batch = []
+
+        rows = model.objects.only("id", field_name).iterator(
+            chunk_size=batch_size)
+        for row in rows:
+            raw = row.__dict__[field_name]
+            if not isinstance(raw, str):
+                continue
+            # Assigning the text again updates the length field.
+            setattr(row, field_name, raw)
+            text_bytes += len(raw.encode("utf-8"))
+            packed_bytes += len(field.get_prep_value(raw))
+            batch.append(row)
+
+            if len(batch) >= batch_size:
+                with transaction.atomic():
+                    model.objects.bulk_update(
+                        batch, [field_name, length_name])
+                converted += len(batch)
+                batch = []
+
+        if batch:
+            with transaction.atomic():
+                model.objects.bulk_update(batch, [field_name, length_name])
+            converted += len(batch)
+        return converted, text_bytes, packed_bytes
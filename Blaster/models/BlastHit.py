@@ -1,16 +1,65 @@
 # Standard library imports
-from typing import Union
+from typing import Iterable, Union
 
 # Third-party imports
+from django.contrib.auth.models import AnonymousUser, User
 from django.db import models
+from django.db.models import Count, F, Max, Min
 from django.core.exceptions import ValidationError
 
 # Local imports
 from .BlastJob import BlastJob
 from .EntrezAccession import EntrezAccession
+from .SubjectSequence import SubjectSequence
 
 
 class BlastHitManager(models.Manager):
+    def build_hit(self,
+                  blast_job_id: int,
+                  accession_id: int,
+                  description: str,
+                  blast_score: int,
+                  bit_score: float,
+                  e_value: float,
+                  identities: int,
+                  align_length: int,
+                  query_start: int,
+                  query_end: int,
+                  query_length: int,
+                  subject: SubjectSequence,
+                  subject_start: int,
+                  subject_end: int
+                  ) -> "BlastHit":
+        """Builds a BlastHit object, without saving it.
+
+        Calculates percentage_identity and query_coverage, and takes
+        the subject length from the SubjectSequence. Used to store
+        many hits at once with `bulk_create`.
+
+        :return: The unsaved BlastHit object
+        :rtype: BlastHit
+        """
+        return self.model(
+            job_id=blast_job_id,
+            accession_id=accession_id,
+            description=description,
+            blast_score=blast_score,
+            bit_score=bit_score,
+            e_value=e_value,
+            identities=identities,
+            percentage_identity=round(
+                (identities / align_length) * 100, 2),
+            align_length=align_length,
+            query_start=query_start,
+            query_end=query_end,
+            query_coverage=round(
+                (query_end - query_start + 1) / query_length * 100, 2),
+            subject=subject,
+            subject_length=subject.length,
+            subject_start=subject_start,
+            subject_end=subject_end
+        )
+
     def create_hit(self,
                    blast_job_id: int,
                    accession_id: int,
@@ -23,7 +72,7 @@ class BlastHitManager(models.Manager):
                    query_start: int,
                    query_end: int,
                    query_length: int,
-                   subject_seq: str,
+                   subject_seq: Union[str, SubjectSequence],
                    subject_start: int,
                    subject_end: int
                    ) -> Union["BlastHit", str]:
@@ -31,40 +80,124 @@ class BlastHitManager(models.Manager):
 
         Creates a BlastHit instance with the provided parameters and
         calculates percentage_identity and query_coverage before
-        saving. If any errors occur during creation, an error message
-        is returned as a string.
+        saving, see `build_hit`. If any errors occur during creation,
+        an error message is returned as a string.
+
+        The subject sequence can be given as a string, which is looked
+        up or stored as a SubjectSequence, or as a SubjectSequence
+        retrieved beforehand.
 
         :return: The created BlastHit object or an error message
         :rtype: BlastHit | str
         """
         try:
-            percentage_identity = round(
-                (identities / align_length) * 100, 2)
-            query_coverage = round(
-                (query_end - query_start + 1) / query_length * 100, 2)
-
-            return self.create(
-                job_id=blast_job_id,
-                accession_id=accession_id,
-                description=description,
-                blast_score=blast_score,
-                bit_score=bit_score,
-                e_value=e_value,
-                identities=identities,
-                percentage_identity=percentage_identity,
-                align_length=align_length,
-                query_start=query_start,
-                query_end=query_end,
-                query_coverage=query_coverage,
-                subject_seq=subject_seq,
-                subject_start=subject_start,
-                subject_end=subject_end
-            )
+            subject = subject_seq
+            if not isinstance(subject, SubjectSequence):
+                subject = SubjectSequence.objects\
+                    .get_or_create_sequence(str(subject_seq))
+
+            hit = self.build_hit(
+                blast_job_id, accession_id, description, blast_score,
+                bit_score, e_value, identities, align_length, query_start,
+                query_end, query_length, subject, subject_start,
+                subject_end)
+            hit.save(force_insert=True, using=self.db)
+            return hit
         except ValidationError:
             return 'Error: a ValidationError occurred while creating BlastHit'
         except ValueError:
             return 'Error: a Value error occurred'
 
+    def bulk_create(self, objs: Iterable["BlastHit"], *args,
+                    **kwargs) -> list["BlastHit"]:
+        """Inserts hits at once, storing the subject sequences that
+        were set on them at once as well.
+
+        :param objs: the hits to insert.
+        :type objs: Iterable[BlastHit]
+        :return: the inserted hits.
+        :rtype: list[BlastHit]
+        """
+        objs = list(objs)
+        pending = [hit for hit in objs if '_subject_seq' in hit.__dict__]
+        if pending:
+            subjects = SubjectSequence.objects.get_or_create_sequences(
+                hit._subject_seq for hit in pending)
+            for hit in pending:
+                hit.subject = subjects[hit.__dict__.pop('_subject_seq')]
+                hit.subject_length = hit.subject.length
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def visible_to(self, user: User | AnonymousUser) -> models.QuerySet:
+        """Returns the hits a user is allowed to see.
+
+        These are the hits of the jobs returned by
+        `BlastJobManager.visible_to`.
+
+        :param user: the user, possibly anonymous.
+        :type user: User | AnonymousUser
+        :return: the hits visible to the user.
+        :rtype: QuerySet[BlastHit]
+        """
+        return self.filter(job__in=BlastJob.objects.visible_to(user))
+
+    def comparison_data(self,
+                        hit_ids: list[int],
+                        user: User | AnonymousUser
+                        ) -> dict[str, list]:
+        """Returns the metrics of hits as columns, for comparison.
+
+        The metrics are read with `values_list`, without instantiating
+        hits, and returned as a list per metric, ordered by hit id.
+        Hits the user is not allowed to see are left out.
+
+        :param hit_ids: the ids of the hits.
+        :type hit_ids: list[int]
+        :param user: the user requesting the hits.
+        :type user: User | AnonymousUser
+        :return: the metrics by name, with a value per hit.
+        :rtype: dict[str, list]
+        """
+        columns = {
+            'id': 'id',
+            'accession': 'accession__code',
+            'length': 'subject_length',
+            'identity': 'percentage_identity',
+            'coverage': 'query_coverage',
+            'e_value': 'e_value',
+            'bit_score': 'bit_score',
+        }
+        rows = self.visible_to(user).filter(id__in=hit_ids)\
+            .order_by('id').values_list(*columns.values())
+        values = list(zip(*rows)) or [()] * len(columns)
+        return {name: list(column)
+                for name, column in zip(columns, values)}
+
+    def compare_jobs(self, job_ids: list[int]) -> models.QuerySet:
+        """Returns the metrics of the hits of jobs, per accession.
+
+        The hits of all jobs are grouped by accession in the database,
+        with the number of jobs and hits of the accession, the lowest
+        E-value and the highest percentage identity, query coverage and
+        subject length. Ordered by E-value, the best accession first.
+
+        :param job_ids: the ids of the jobs to compare.
+        :type job_ids: list[int]
+        :return: a dict per accession, with code, organism, jobs, hits,
+            e_value, identity, coverage and length.
+        :rtype: QuerySet[dict]
+        """
+        return self.filter(job_id__in=job_ids)\
+            .values(code=F('accession__code'),
+                    organism=F('accession__organism'))\
+            .annotate(jobs=Count('job', distinct=True),
+                      hits=Count('id'),
+                      e_value=Min('e_value'),
+                      identity=Max('percentage_identity'),
+                      coverage=Max('query_coverage'),
+                      length=Max('subject_length'))\
+            .order_by('e_value', 'code')
+
 
 class BlastHit(models.Model):
     """A single hit found in a BLAST query.
@@ -72,6 +205,10 @@ class BlastHit(models.Model):
     The BlastHit model represents a single BLAST hit and is always
     linked to a BlastJob on creation. All of the fields are filled upon
     creation.
+
+    The subject sequence is shared with other hits through a
+    SubjectSequence, subject_seq reads through to it. The length is
+    also stored on the hit, so it can be shown without a join.
     """
     objects = BlastHitManager()
 
@@ -128,10 +265,19 @@ class BlastHit(models.Model):
         blank=False,
         null=False
     )
-    subject_seq = models.TextField(
+    subject_length = models.PositiveIntegerField(
+        default=0,
         blank=False,
         null=False
     )
+    # Only empty for hits that are not converted yet, see the
+    # deduplicate_subject_sequences management command.
+    subject = models.ForeignKey(
+        SubjectSequence,
+        on_delete=models.PROTECT,
+        blank=True,
+        null=True
+    )
     subject_start = models.PositiveIntegerField(
         blank=False,
         null=False
@@ -140,3 +286,35 @@ class BlastHit(models.Model):
         blank=False,
         null=False
     )
+
+    @property
+    def subject_seq(self) -> str:
+        """The aligned subject sequence, read from the SubjectSequence.
+
+        :return: the subject sequence, or an empty string.
+        :rtype: str
+        """
+        if '_subject_seq' in self.__dict__:
+            return self._subject_seq
+        return self.subject.sequence if self.subject else ''
+
+    @subject_seq.setter
+    def subject_seq(self, sequence: str) -> None:
+        """Sets the subject sequence, to be stored with the hit.
+
+        The SubjectSequence is only retrieved or created when the hit
+        is saved, or for all hits at once by `bulk_create`, so building
+        hits in memory makes no queries.
+
+        :param sequence: the aligned subject sequence.
+        :type sequence: str
+        """
+        self._subject_seq = str(sequence)
+
+    def save(self, *args, **kwargs) -> None:
+        """Saves the hit, storing a subject sequence that was set."""
+        if '_subject_seq' in self.__dict__:
+            self.subject = SubjectSequence.objects\
+                .get_or_create_sequence(self.__dict__.pop('_subject_seq'))
+            self.subject_length = self.subject.length
+        super().save(*args, **kwargs)
@@ -1,15 +1,27 @@
+# Standard library imports
+from datetime import datetime
+
 # Third-party imports
+from django.conf import settings
 from django.core.handlers.wsgi import WSGIRequest
 from django.db import models
-from django.contrib.auth.models import User
+from django.db.models import Q
+from django.contrib.auth.models import AnonymousUser, User
+from django.utils import timezone
 
 # Local imports
+from Blaster.utils.instrumentation import PHASES, PERCENTILES, percentiles
+from .PackedSequenceField import PackedSequenceField
 from .UnprocessedBlastJob import UnprocessedBlastJob
 
 
 class BlastJobManager(models.Manager):
     def create_blast_job(self, request: WSGIRequest, title: str, program: str, 
-                         header: str, sequence: str) -> "BlastJob":
+                         header: str, sequence: str,
+                         mask_low_complexity: bool = False,
+                         expect: float | None = None,
+                         hitlist_size: int | None = None,
+                         max_hsps: int | None = None) -> "BlastJob":
         """Creates a BlastJob object.
 
         Creates a BlastJob instance with the provided parameters and
@@ -19,13 +31,24 @@ class BlastJobManager(models.Manager):
         title, but there is a header, the header will be used as the
         title. If there is no title or header, "MasterBlast[job_id]"
         will be used.
+        With mask_low_complexity, the low-complexity regions of the
+        sequence are masked before it's submitted, see utils/masking.py.
+        The E-value threshold, number of subjects and number of HSPs
+        per subject default to the site settings BLAST_EXPECT,
+        BLAST_HITLIST_SIZE and BLAST_MAX_HSPS.
 
         :return: The created BlastJob object
         :rtype: BlastJob
         """
         job = self.create(
             program=program,
-            sequence=sequence
+            sequence=sequence,
+            mask_low_complexity=mask_low_complexity,
+            expect=settings.BLAST_EXPECT if expect is None else expect,
+            hitlist_size=settings.BLAST_HITLIST_SIZE
+            if hitlist_size is None else hitlist_size,
+            max_hsps=settings.BLAST_MAX_HSPS
+            if max_hsps is None else max_hsps
         )
 
         if title:
@@ -47,6 +70,52 @@ class BlastJobManager(models.Manager):
 
         return job
 
+    def visible_to(self, user: User | AnonymousUser) -> models.QuerySet:
+        """Returns the jobs a user is allowed to see.
+
+        These are the jobs without a user, jobs of the user and jobs
+        shared with the user, like on the BLAST result page.
+
+        :param user: the user, possibly anonymous.
+        :type user: User | AnonymousUser
+        :return: the jobs visible to the user.
+        :rtype: QuerySet[BlastJob]
+        """
+        visible = Q(user=None)
+        if user.is_authenticated:
+            visible |= Q(user=user) | Q(
+                id__in=BlastJob.shared_job.through.objects
+                .filter(sharedjobs__user=user).values('blastjob'))
+        return self.filter(visible)
+
+    def phase_timings(self, since: datetime) -> list[dict]:
+        """Returns percentiles of the phase timings of processed jobs.
+
+        Only jobs that finished since the given time, and that
+        recorded their timings, are included, see
+        utils/instrumentation.py.
+
+        :param since: the start of the time window.
+        :type since: datetime
+        :return: per phase and in total, the name, the number of jobs,
+            the mean and the PERCENTILES in seconds.
+        :rtype: list[dict]
+        """
+        recorded = self.filter(finished__gte=since)\
+            .exclude(phase_seconds={})\
+            .values_list('phase_seconds', flat=True)
+        seconds = {phase: [] for phase in (*PHASES, 'total')}
+        for job_seconds in recorded.iterator():
+            for phase, value in job_seconds.items():
+                seconds.setdefault(phase, []).append(value)
+
+        return [{
+            'phase': phase,
+            'jobs': len(values),
+            'mean': sum(values) / len(values) if values else None,
+            'percentiles': percentiles(values, PERCENTILES),
+        } for phase, values in seconds.items()]
+
 
 class BlastJob(models.Model):
     """A BLAST query run in MasterBlast
@@ -55,6 +124,10 @@ class BlastJob(models.Model):
     The relation to a User object and the error_msg and header fields are
     optional. All of the other fields are always filled upon creation
     of a BlastJob.
+
+    The sequence is stored packed, sequence_length is kept up to date
+    whenever the sequence is assigned, so the length can be used in
+    queries.
     """
     objects = BlastJobManager()
 
@@ -78,7 +151,13 @@ class BlastJob(models.Model):
         blank=False,
         null=False
     )
-    sequence = models.TextField(
+    sequence_length = models.PositiveIntegerField(
+        default=0,
+        blank=False,
+        null=False
+    )
+    sequence = PackedSequenceField(
+        length_field='sequence_length',
         blank=False,
         null=False
     )
@@ -97,3 +176,91 @@ class BlastJob(models.Model):
         blank=True,
         null=True,
     )
+    # The low-complexity regions of the sequence are masked before it's
+    # submitted, the masked regions are stored as [start, end] pairs,
+    # 0-based with an exclusive end.
+    mask_low_complexity = models.BooleanField(
+        default=False,
+        blank=False,
+        null=False
+    )
+    masked_regions = models.JSONField(
+        default=list,
+        blank=True,
+        null=False
+    )
+    # The size of the result: HSPs above the E-value threshold are
+    # left out, as are subjects beyond the hitlist size and HSPs of a
+    # subject beyond max_hsps, 0 meaning no limit.
+    expect = models.FloatField(
+        default=10.0,
+        blank=False,
+        null=False
+    )
+    hitlist_size = models.PositiveIntegerField(
+        default=50,
+        blank=False,
+        null=False
+    )
+    max_hsps = models.PositiveIntegerField(
+        default=0,
+        blank=False,
+        null=False
+    )
+    # The number of hits stored for the job, and the number of HSPs
+    # NCBI returned, to keep track of the rows a job costs.
+    stored_hits = models.PositiveIntegerField(
+        default=0,
+        blank=False,
+        null=False
+    )
+    returned_hsps = models.PositiveIntegerField(
+        default=0,
+        blank=False,
+        null=False
+    )
+    # The seconds spent per phase of processing the job, and the
+    # counters of remote calls and rows written, see
+    # utils/instrumentation.py. Empty for jobs processed before they
+    # were recorded.
+    phase_seconds = models.JSONField(
+        default=dict,
+        blank=True,
+        null=False
+    )
+    phase_counts = models.JSONField(
+        default=dict,
+        blank=True,
+        null=False
+    )
+    # Set when the job is processed, empty for jobs processed before
+    # it was recorded, see `finished_at`.
+    finished = models.DateTimeField(
+        blank=True,
+        null=True
+    )
+
+    def masked_length(self) -> int:
+        """Returns the number of masked positions of the sequence.
+
+        :return: the total length of the masked regions.
+        :rtype: int
+        """
+        return sum(end - start for start, end in self.masked_regions)
+
+    def finished_at(self) -> datetime | None:
+        """Returns when the job was processed.
+
+        Jobs processed before this was recorded return the time they
+        were created.
+
+        :return: the time the job was processed, or None while it's
+            still being processed.
+        :rtype: datetime | None
+        """
+        if not UnprocessedBlastJob.check_blast_job_is_processed(self.pk):
+            return None
+        if self.finished:
+            return self.finished
+        return datetime.combine(self.date, self.time,
+                                timezone.get_current_timezone())
@@ -0,0 +1,16 @@
+# Local imports
+from Blaster.utils.packing import compress_text
+from .PackedSequenceField import PackedSequenceField
+
+
+class CompressedTextField(PackedSequenceField):
+    """Stores text zlib compressed.
+
+    Behaves like a PackedSequenceField, including unpacking on
+    attribute access and reading rows still stored as text, but
+    always compresses rather than packing by alphabet.
+    """
+    def get_prep_value(self, value):
+        if value is None or isinstance(value, (bytes, memoryview)):
+            return super().get_prep_value(value)
+        return compress_text(str(value))
@@ -1,5 +1,15 @@
+# Standard library imports
+from datetime import timedelta
+
 # Third-party imports
+from django.conf import settings
 from django.db import models
+from django.db.models import F, Sum
+from django.utils import timezone
+
+# Local imports
+from Blaster.utils.packing import packed_sequence_length
+from .CompressedTextField import CompressedTextField
 
 
 class EntrezAccessionCacheManager(models.Manager):
@@ -20,16 +30,87 @@ class EntrezAccessionCacheManager(models.Manager):
         """
         return self.create(
             genbank=genbank if genbank else '',
-            fasta=fasta if fasta else ''
+            fasta=fasta if fasta else '',
+            last_accessed=timezone.now()
             )
 
+    def touch(self, cache: "EntrezAccessionCache") -> None:
+        """Records an access of a cache entry.
+
+        Updates the last access time, used for eviction, and the
+        number of hits, without saving the cached data again.
+
+        :param cache: the accessed cache entry.
+        :type cache: EntrezAccessionCache
+        """
+        self.filter(pk=cache.pk).update(
+            last_accessed=timezone.now(), hits=F('hits') + 1)
+
+    def total_size(self) -> int:
+        """Returns the stored size of all cache entries in bytes.
+
+        :return: the total size of the cache.
+        :rtype: int
+        """
+        return self.aggregate(total=Sum('size'))['total'] or 0
+
+    def stale(self) -> models.QuerySet:
+        """Returns the cache entries that are older than the TTL.
+
+        The TTL is configured by ENTREZ_CACHE_TTL_DAYS.
+
+        :return: the entries that should be refreshed.
+        :rtype: QuerySet[EntrezAccessionCache]
+        """
+        oldest = timezone.localdate() \
+            - timedelta(days=settings.ENTREZ_CACHE_TTL_DAYS)
+        return self.filter(date__lt=oldest)
+
+    def evict(self, budget: int | None = None) -> int:
+        """Deletes the least recently used entries exceeding the budget.
+
+        Entries are deleted, starting with the least recently accessed,
+        until the total size fits in the budget. Accessions of deleted
+        entries lose their cache, and will be fetched again on access.
+
+        :param budget: maximum size in bytes, defaults to the
+            ENTREZ_CACHE_MAX_BYTES setting.
+        :type budget: int | None
+        :return: the number of deleted entries.
+        :rtype: int
+        """
+        if budget is None:
+            budget = settings.ENTREZ_CACHE_MAX_BYTES
+        excess = self.total_size() - budget
+        if excess <= 0:
+            return 0
+
+        evicted = []
+        entries = self.order_by(F('last_accessed').asc(nulls_first=True))\
+            .values_list('id', 'size')
+        for cache_id, size in entries.iterator():
+            evicted.append(cache_id)
+            excess -= size
+            if excess <= 0:
+                break
+
+        for start in range(0, len(evicted), 500):
+            self.filter(id__in=evicted[start:start + 500]).delete()
+        return len(evicted)
+
 
 class EntrezAccessionCache(models.Model):
     """Cache for GenBank and FASTA data for an EntrezAccession
-    
+
     This cache is only filled when a user visits the BLAST hit page.
     It's possible that the GenBank or FASTA files can't be fetched, so
     the fields can be empty.
+
+    The GenBank and FASTA data are stored compressed, size holds the
+    stored size of both. The date is the last time the data was
+    fetched, after ENTREZ_CACHE_TTL_DAYS the entry is refreshed.
+    When the cache exceeds ENTREZ_CACHE_MAX_BYTES, the least recently
+    accessed entries are evicted.
     """
     objects = EntrezAccessionCacheManager()
 
@@ -38,11 +119,64 @@ class EntrezAccessionCache(models.Model):
         blank=False,
         null=False
     )
-    genbank = models.TextField(
+    last_accessed = models.DateTimeField(
+        db_index=True,
         blank=True,
         null=True
     )
-    fasta = models.TextField(
+    hits = models.PositiveIntegerField(
+        default=0,
+        blank=False,
+        null=False
+    )
+    fetches = models.PositiveIntegerField(
+        default=1,
+        blank=False,
+        null=False
+    )
+    size = models.PositiveIntegerField(
+        default=0,
+        blank=False,
+        null=False
+    )
+    genbank = CompressedTextField(
+        blank=True,
+        null=True
+    )
+    fasta = CompressedTextField(
         blank=True,
         null=True
     )
+
+    def is_stale(self) -> bool:
+        """Returns whether the entry is older than the TTL.
+
+        :return: True if the entry should be refreshed.
+        :rtype: bool
+        """
+        return self.date < timezone.localdate() \
+            - timedelta(days=settings.ENTREZ_CACHE_TTL_DAYS)
+
+    def text_length(self, name: str) -> int:
+        """Returns the length of the GenBank or FASTA text.
+
+        Data loaded from the database is measured by its header,
+        without decompressing it.
+
+        :param name: 'genbank' or 'fasta'.
+        :type name: str
+        :return: the number of characters of the text.
+        :rtype: int
+        """
+        value = self.__dict__.get(name)
+        if isinstance(value, (bytes, memoryview)):
+            return packed_sequence_length(value)
+        return len(getattr(self, name) or '')
+
+    def save(self, *args, **kwargs) -> None:
+        """Saves the entry, after calculating its stored size."""
+        self.size = sum(
+            len(self._meta.get_field(name).get_prep_value(
+                getattr(self, name)) or b'')
+            for name in ('genbank', 'fasta'))
+        super().save(*args, **kwargs)
@@ -0,0 +1,104 @@
+# Standard library imports
+from hashlib import sha256
+from typing import Iterable
+
+# Third-party imports
+from django.contrib.auth.models import AnonymousUser, User
+from django.db import models, transaction
+
+# Local imports
+from .BlastHit import BlastHit
+
+
+class HitSelectionManager(models.Manager):
+    @staticmethod
+    def code(hit_ids: Iterable[int]) -> str:
+        """Returns the short code identifying a set of hits.
+
+        :param hit_ids: the ids of the hits, in any order.
+        :type hit_ids: Iterable[int]
+        :return: the first 16 characters of the sha256 hex digest of
+            the sorted ids.
+        :rtype: str
+        """
+        ids = ",".join(str(hit_id) for hit_id in sorted(set(hit_ids)))
+        return sha256(ids.encode()).hexdigest()[:16]
+
+    def get_or_create_selection(self,
+                                hit_ids: Iterable[int | str],
+                                user: User | AnonymousUser
+                                ) -> "HitSelection | None":
+        """Returns the HitSelection of hits, creating it if needed.
+
+        Only hits that exist, and that the user is allowed to see, are
+        selected. A selection is identified by its hits, so selecting
+        the same hits again returns the existing selection.
+        The hits of a new selection are inserted in bulk. When none of
+        the hits can be selected, no selection is created.
+
+        :param hit_ids: the ids of the selected hits.
+        :type hit_ids: Iterable[int | str]
+        :param user: the user making the selection.
+        :type user: User | AnonymousUser
+        :raises ValueError: if a hit id is not a number.
+        :return: the selection of the hits, or None if there are none.
+        :rtype: HitSelection | None
+        """
+        hit_ids = list(BlastHit.objects.visible_to(user)
+                       .filter(id__in=[int(hit_id) for hit_id in hit_ids])
+                       .values_list('id', flat=True))
+        if not hit_ids:
+            return None
+
+        with transaction.atomic():
+            selection, created = self.get_or_create(
+                code=self.code(hit_ids),
+                defaults={
+                    'user': user if user.is_authenticated else None,
+                    'size': len(hit_ids)
+                })
+            if created:
+                HitSelection.hits.through.objects.bulk_create(
+                    [HitSelection.hits.through(
+                        hitselection_id=selection.id, blasthit_id=hit_id)
+                     for hit_id in hit_ids],
+                    batch_size=500)
+        return selection
+
+
+class HitSelection(models.Model):
+    """A selection of hits for comparison
+
+    Stores the hits selected on the BLAST result page, so a
+    comparison can be referred to by the short code in its URL rather
+    than by a list of hit ids in the session. The code is derived
+    from the selected hits, so a selection can be bookmarked, shared
+    and cached, and selecting the same hits again reuses it.
+    Hits are shown only to users allowed to see them.
+    """
+    objects = HitSelectionManager()
+
+    code = models.CharField(
+        max_length=16,
+        unique=True,
+        blank=False,
+        null=False
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True
+    )
+    created = models.DateTimeField(
+        auto_now_add=True
+    )
+    size = models.PositiveIntegerField(
+        default=0,
+        blank=False,
+        null=False
+    )
+    hits = models.ManyToManyField(
+        BlastHit,
+        related_name='selections'
+    )
@@ -0,0 +1,81 @@
+# Third-party imports
+from django.db import models
+from django.db.models.query_utils import DeferredAttribute
+
+# Local imports
+from Blaster.utils.packing import pack_sequence, unpack_sequence
+
+
+class PackedSequenceDescriptor(DeferredAttribute):
+    """Unpacks a PackedSequenceField on attribute access.
+
+    Values loaded from the database are kept packed on the instance,
+    and are only unpacked, once, when the attribute is accessed.
+    Assigning a string also updates the `length_field` of the field.
+    """
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+        value = super().__get__(instance, cls)
+        if isinstance(value, (bytes, memoryview)):
+            value = unpack_sequence(value)
+            instance.__dict__[self.field.attname] = value
+        return value
+
+    def __set__(self, instance, value) -> None:
+        instance.__dict__[self.field.attname] = value
+        if isinstance(value, str) and self.field.length_field:
+            setattr(instance, self.field.length_field, len(value))
+
+
+class PackedSequenceField(models.BinaryField):
+    """Stores a sequence in a packed binary form.
+
+    Nucleotide sequences are packed 2 or 4 bits per symbol,
+    other sequences are zlib compressed, see `Blaster.utils.packing`.
+    On the model the field behaves as a string.
+
+    Rows written before the field was packed are still stored as text,
+    these are returned as is and packed on their next save.
+    The `pack_sequences` management command converts them in bulk.
+
+    Since a packed value can't be measured by the database, the length
+    of the sequence can be kept in a separate integer field, named by
+    `length_field`, which is updated whenever a sequence is assigned.
+
+    Note that `values()` and `values_list()` return the packed bytes,
+    `unpack_sequence` can be used to unpack those.
+    """
+    descriptor_class = PackedSequenceDescriptor
+
+    def __init__(self, *args, length_field: str | None = None, **kwargs):
+        self.length_field = length_field
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.length_field:
+            kwargs["length_field"] = self.length_field
+        return name, path, args, kwargs
+
+    def get_default(self):
+        default = super().get_default()
+        return "" if default == b"" else default
+
+    def get_prep_value(self, value):
+        if value is None or isinstance(value, (bytes, memoryview)):
+            return super().get_prep_value(value)
+        return pack_sequence(str(value))
+
+    def from_db_value(self, value, expression, connection):
+        if isinstance(value, memoryview):
+            return bytes(value)
+        return value
+
+    def to_python(self, value):
+        if isinstance(value, (bytes, memoryview)):
+            return unpack_sequence(value)
+        return value
+
+    def value_to_string(self, obj) -> str:
+        return self.value_from_object(obj)
@@ -0,0 +1,138 @@
+# Standard library imports
+from hashlib import sha256
+from typing import Iterable
+
+# Third-party imports
+from django.db import models
+from django.db.models import ProtectedError
+
+# Local imports
+from Blaster.utils.instrumentation import count
+from .PackedSequenceField import PackedSequenceField
+
+
+class SubjectSequenceManager(models.Manager):
+    @staticmethod
+    def digest(sequence: str) -> str:
+        """Returns the content address of a sequence.
+
+        :param sequence: the sequence to address.
+        :type sequence: str
+        :return: sha256 hexdigest of the sequence.
+        :rtype: str
+        """
+        return sha256(sequence.encode("utf-8")).hexdigest()
+
+    def _find_digests(self, digests: list[str]
+                      ) -> dict[str, "SubjectSequence"]:
+        """Looks up SubjectSequence objects by digest, in batches.
+
+        Batches keep the number of query parameters within the limit
+        of the database.
+
+        :param digests: the digests to look up.
+        :type digests: list[str]
+        :return: the found SubjectSequence objects by digest.
+        :rtype: dict[str, SubjectSequence]
+        """
+        found = {}
+        for start in range(0, len(digests), 500):
+            found.update(
+                (subject.digest, subject) for subject in
+                self.filter(digest__in=digests[start:start + 500]))
+        return found
+
+    def get_or_create_sequence(self, sequence: str) -> "SubjectSequence":
+        """Returns the SubjectSequence of a sequence, creating it if needed.
+
+        :param sequence: the subject sequence.
+        :type sequence: str
+        :return: the stored SubjectSequence.
+        :rtype: SubjectSequence
+        """
+        return self.get_or_create_sequences([sequence])[sequence]
+
+    def get_or_create_sequences(self, sequences: Iterable[str]
+                                ) -> dict[str, "SubjectSequence"]:
+        """Returns the SubjectSequence objects of many sequences at once.
+
+        Looks up all sequences in a single query, and creates the
+        missing ones in a single insert. Sequences created at the same
+        time by another process are ignored on insert and looked up
+        again afterwards.
+
+        :param sequences: the subject sequences, may contain duplicates.
+        :type sequences: Iterable[str]
+        :return: SubjectSequence objects by their sequence.
+        :rtype: dict[str, SubjectSequence]
+        """
+        by_digest = {self.digest(sequence): sequence
+                     for sequence in sequences}
+        found = self._find_digests(list(by_digest))
+
+        missing = [SubjectSequence(digest=digest, sequence=sequence)
+                   for digest, sequence in by_digest.items()
+                   if digest not in found]
+        if missing:
+            self.bulk_create(missing, ignore_conflicts=True)
+            count("rows_written", len(missing))
+            found.update(self._find_digests(
+                [subject.digest for subject in missing]))
+
+        return {sequence: found[digest]
+                for digest, sequence in by_digest.items()}
+
+    def delete_unreferenced(self, batch_size: int = 500) -> int:
+        """Deletes the SubjectSequence objects no hit refers to anymore.
+
+        Hits are deleted with their jobs, while their sequences are
+        protected as long as a hit refers to them, so these are left
+        behind. They are deleted in batches. A batch of which a
+        sequence was taken up by a new hit in the meantime is skipped,
+        its other sequences are deleted by the next run.
+
+        :param batch_size: the number of sequences deleted at a time.
+        :type batch_size: int
+        :return: the number of deleted sequences.
+        :rtype: int
+        """
+        deleted, skipped = 0, []
+        while True:
+            unreferenced = list(
+                self.filter(blasthit=None).exclude(id__in=skipped)
+                .values_list('id', flat=True)[:batch_size])
+            if not unreferenced:
+                return deleted
+            try:
+                deleted += self.filter(id__in=unreferenced).delete()[0]
+            except ProtectedError:
+                skipped.extend(unreferenced)
+
+
+class SubjectSequence(models.Model):
+    """A subject sequence, shared by all hits aligned to it.
+
+    The same aligned subject sequence is often found by many jobs.
+    Instead of every BlastHit storing its own copy, hits refer to a
+    SubjectSequence, which is addressed by the sha256 digest of the
+    sequence. Storage therefore grows with the unique sequences rather
+    than with the hits.
+    """
+    objects = SubjectSequenceManager()
+
+    digest = models.CharField(
+        max_length=64,
+        unique=True,
+        blank=False,
+        null=False
+    )
+    length = models.PositiveIntegerField(
+        default=0,
+        blank=False,
+        null=False
+    )
+    sequence = PackedSequenceField(
+        length_field='length',
+        blank=False,
+        null=False
+    )
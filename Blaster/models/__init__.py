@@ -1,7 +1,9 @@
 from .BlastJob import BlastJob
 from .BlastHit import BlastHit
+from .SubjectSequence import SubjectSequence
 from .EntrezAccession import EntrezAccession
 from .EntrezAccessionCache import EntrezAccessionCache
 from .UnprocessedBlastJob import UnprocessedBlastJob
 from .BlastBuddies import BlastBuddies
 from .SharedJobs import SharedJobs
+from .HitSelection import HitSelection
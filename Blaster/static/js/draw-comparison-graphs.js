@@ -0,0 +1,469 @@
+/**
+ * Draws the graphs of the comparison page in the browser, from the
+ * comparison data of the selection, so the server only sends the data.
+ *
+ * The data is requested from the URL in the data-url attribute of
+ * "#comparison-graph-section", which answers a list per metric with a
+ * value per hit, see `comparison_data` in Blaster/views/comparison.py.
+ *
+ * The graphs follow the server rendered graphs of the job comparison,
+ * see Blaster/utils/bokeh.py: up to AGGREGATE_THRESHOLD hits, a bar per
+ * hit, above it a histogram, and a pie chart of the E-value categories.
+ * They are drawn as SVG, every bar, bin and wedge has a tooltip.
+ */
+
+// The same limits as Blaster/utils/bokeh.py
+const AGGREGATE_THRESHOLD = 200;
+const TOOLTIP_ACCESSIONS = 10;
+const MAX_LENGTH_BINS = 50;
+const E_VALUE_CATEGORIES = ["Extremely significant", "Very significant",
+                            "Moderately significant", "Not significant"];
+const E_VALUE_EDGES = [1e-50, 1e-20, 1e-5];
+const E_VALUE_COLORS = ["#1f77b4", "#ff7f0e", "#2ca02c", "#d62728"];
+
+const SVG_NAMESPACE = "http://www.w3.org/2000/svg";
+const BAR_COLOR = "#297373";
+const WIDTH = 1000;
+const HEIGHT = 400;
+
+
+/**
+ * Creates an SVG element with the given attributes, and text or
+ * children. Text is set as text, never parsed as HTML.
+ *
+ * @param {string} name The name of the element.
+ * @param {Object} attributes The attributes of the element.
+ * @param {string|Element[]} content The text or the children.
+ * @returns {Element} The element.
+ */
+function svgElement(name, attributes = {}, content = []){
+    const element = document.createElementNS(SVG_NAMESPACE, name);
+    for (const [attribute, value] of Object.entries(attributes)){
+        element.setAttribute(attribute, value);
+    }
+    if (typeof content === "string"){
+        element.textContent = content;
+    } else {
+        element.append(...content);
+    }
+    return element;
+}
+
+
+/**
+ * Rounds a value to at most two decimals for display.
+ *
+ * @param {number} value The value.
+ * @returns {string} The rounded value.
+ */
+function formatValue(value){
+    return String(Number(value.toFixed(2)));
+}
+
+
+/**
+ * Joins accessions for a tooltip, limited to TOOLTIP_ACCESSIONS.
+ *
+ * @param {string[]} accessions The accessions, only the first
+ *     TOOLTIP_ACCESSIONS are used.
+ * @param {number} total The total number of accessions.
+ * @returns {string} The accessions on a line each, followed by the
+ *     number of accessions left out.
+ */
+function tooltipAccessions(accessions, total){
+    let shown = accessions.slice(0, TOOLTIP_ACCESSIONS).join("\n");
+    if (total > TOOLTIP_ACCESSIONS){
+        shown += `\n... and ${total - TOOLTIP_ACCESSIONS} more`;
+    }
+    return shown;
+}
+
+
+/**
+ * Returns evenly spaced bin edges between two values.
+ *
+ * @param {number} start The first edge.
+ * @param {number} stop The last edge.
+ * @param {number} bins The number of bins.
+ * @returns {number[]} The bins + 1 edges.
+ */
+function linearEdges(start, stop, bins){
+    return Array.from({length: bins + 1},
+                      (_, index) => start + (stop - start) * index / bins);
+}
+
+
+/**
+ * Returns the value at a fraction of sorted values, interpolating
+ * between the two closest values.
+ *
+ * @param {number[]} sorted The values, sorted.
+ * @param {number} fraction The fraction, from 0 to 1.
+ * @returns {number} The quantile.
+ */
+function quantile(sorted, fraction){
+    const position = (sorted.length - 1) * fraction;
+    const below = Math.floor(position);
+    const above = Math.min(below + 1, sorted.length - 1);
+    return sorted[below] + (sorted[above] - sorted[below]) * (position - below);
+}
+
+
+/**
+ * Returns the bin edges of the sequence lengths, with the width that
+ * numpy's "auto" estimator picks: the smaller of the Sturges and
+ * Freedman-Diaconis widths, at most MAX_LENGTH_BINS bins.
+ *
+ * @param {number[]} values The sequence lengths.
+ * @returns {number[]} The bin edges.
+ */
+function autoEdges(values){
+    const sorted = [...values].sort((a, b) => a - b);
+    const first = sorted[0];
+    const last = sorted.at(-1);
+    if (first === last){
+        return [first - 0.5, first + 0.5];
+    }
+    const range = last - first;
+    const sturges = range / (Math.log2(sorted.length) + 1);
+    const iqr = quantile(sorted, 0.75) - quantile(sorted, 0.25);
+    const freedman = 2 * iqr * Math.cbrt(1 / sorted.length);
+    const width = freedman > 0 ? Math.min(freedman, sturges) : sturges;
+    const bins = Math.min(Math.max(Math.ceil(range / width), 1),
+                          MAX_LENGTH_BINS);
+    return linearEdges(first, last, bins);
+}
+
+
+/**
+ * Counts the hits per bin. Values outside of the edges are counted in
+ * the first or last bin, and the last bin includes its right edge.
+ *
+ * @param {string[]} accessions The unique accessions of the hits.
+ * @param {number[]} values The value of every hit, in the same order.
+ * @param {number[]} edges The edges of the bins.
+ * @returns {Object[]} Per bin its left and right edge, count and the
+ *     accessions for its tooltip.
+ */
+function histogram(accessions, values, edges){
+    const bins = edges.slice(0, -1).map((left, index) => (
+        {left: left, right: edges[index + 1], count: 0, accessions: []}));
+    values.forEach((value, hit) => {
+        let index = 0;
+        while (index < bins.length - 1 && value >= bins[index + 1].left){
+            index++;
+        }
+        bins[index].count++;
+        if (bins[index].accessions.length < TOOLTIP_ACCESSIONS){
+            bins[index].accessions.push(accessions[hit]);
+        }
+    });
+    return bins;
+}
+
+
+/**
+ * Counts the hits per E-value significance category, 0 is extremely
+ * significant and 3 not.
+ *
+ * @param {string[]} accessions The unique accessions of the hits.
+ * @param {number[]} eValues The E-values, in the same order.
+ * @returns {Object[]} Per category its name, color, count and the
+ *     accessions for its tooltip.
+ */
+function eValueCategories(accessions, eValues){
+    const categories = E_VALUE_CATEGORIES.map((name, index) => (
+        {name: name, color: E_VALUE_COLORS[index], count: 0,
+         accessions: []}));
+    eValues.forEach((eValue, hit) => {
+        const category = categories[
+            E_VALUE_EDGES.filter(edge => eValue >= edge).length];
+        category.count++;
+        if (category.accessions.length < TOOLTIP_ACCESSIONS){
+            category.accessions.push(accessions[hit]);
+        }
+    });
+    return categories;
+}
+
+
+/**
+ * Returns the ticks of an axis from 0, up to the first tick at or
+ * above the largest value, 1, 2 or 5 times a power of 10 apart.
+ *
+ * @param {number} max The largest value.
+ * @returns {number[]} The ticks.
+ */
+function axisTicks(max){
+    if (!(max > 0)){
+        return [0, 1];
+    }
+    const rough = max / 5;
+    const magnitude = 10 ** Math.floor(Math.log10(rough));
+    const step = [1, 2, 5, 10].map(factor => factor * magnitude)
+        .find(candidate => candidate >= rough);
+    const ticks = [0];
+    while (ticks.at(-1) < max){
+        ticks.push(Number((ticks.length * step).toPrecision(12)));
+    }
+    return ticks;
+}
+
+
+/**
+ * Creates a chart with a title, a y-axis with ticks and an x-axis
+ * label, in which the bars are drawn.
+ *
+ * @param {string} title The title of the chart.
+ * @param {string} xLabel The label of the x-axis.
+ * @param {string} yLabel The label of the y-axis.
+ * @param {number} max The largest value on the y-axis.
+ * @param {number} bottom The space below the plot, for the labels.
+ * @returns {Object} The svg, the plot area (left, top, width, height)
+ *     and a function scaling a value to its height on the y-axis.
+ */
+function chart(title, xLabel, yLabel, max, bottom){
+    const area = {left: 70, top: 40, width: WIDTH - 90,
+                  height: HEIGHT - 40 - bottom};
+    const ticks = axisTicks(max);
+    const scale = value => area.height * value / ticks.at(-1);
+    const svg = svgElement("svg", {
+        width: WIDTH, height: HEIGHT, viewBox: `0 0 ${WIDTH} ${HEIGHT}`,
+        style: "max-width: 100%; height: auto;",
+        "font-family": "sans-serif", "font-size": 12});
+
+    svg.append(
+        svgElement("text", {x: area.left, y: 20, "font-size": 14,
+                            "font-weight": "bold"}, title),
+        svgElement("text", {
+            x: area.left + area.width / 2, y: HEIGHT - 8,
+            "text-anchor": "middle"}, xLabel),
+        svgElement("text", {
+            transform: `translate(16, ${area.top + area.height / 2}) ` +
+                "rotate(-90)", "text-anchor": "middle"}, yLabel));
+    for (const tick of ticks){
+        const y = area.top + area.height - scale(tick);
+        svg.append(
+            svgElement("line", {x1: area.left, x2: area.left + area.width,
+                                y1: y, y2: y, stroke: "#e5e5e5"}),
+            svgElement("text", {x: area.left - 6, y: y + 4,
+                                "text-anchor": "end"}, String(tick)));
+    }
+    svg.append(svgElement("line", {
+        x1: area.left, x2: area.left, y1: area.top,
+        y2: area.top + area.height, stroke: "black"}));
+    return {svg: svg, area: area, scale: scale};
+}
+
+
+/**
+ * Draws a bar chart with a bar per hit, the accessions on the x-axis.
+ *
+ * @param {string[]} accessions The unique accessions of the hits.
+ * @param {number[]} values The value of every hit, in the same order.
+ * @param {string} title The title of the chart.
+ * @param {string} yLabel The label of the y-axis, also used in the
+ *     tooltip.
+ * @returns {Element} The svg.
+ */
+function hitBarChart(accessions, values, title, yLabel){
+    const {svg, area, scale} = chart(title, "Hit accessions", yLabel,
+                                     Math.max(...values), 140);
+    const step = area.width / accessions.length;
+    const baseline = area.top + area.height;
+
+    accessions.forEach((accession, index) => {
+        const x = area.left + step * index;
+        const height = scale(values[index]);
+        svg.append(
+            svgElement("rect", {
+                x: x + step * 0.125, y: baseline - height,
+                width: step * 0.75, height: height, fill: BAR_COLOR},
+                [svgElement("title", {},
+                            `Accession: ${accession}\n` +
+                            `${yLabel}: ${formatValue(values[index])}`)]),
+            svgElement("text", {
+                transform: `translate(${x + step / 2 + 4}, ` +
+                    `${baseline + 6}) rotate(-90)`,
+                "text-anchor": "end", "font-size": 10}, accession));
+    });
+    return svg;
+}
+
+
+/**
+ * Draws a histogram of the hits, used instead of a bar per hit for
+ * large selections.
+ *
+ * @param {Object[]} bins The bins, see `histogram`.
+ * @param {string} title The title of the chart.
+ * @param {string} xLabel The label of the x-axis, also used in the
+ *     tooltip.
+ * @returns {Element} The svg.
+ */
+function histogramChart(bins, title, xLabel){
+    const {svg, area, scale} = chart(
+        title, xLabel, "Hits",
+        Math.max(...bins.map(bin => bin.count)), 60);
+    const start = bins[0].left;
+    const range = bins.at(-1).right - start;
+    const x = value => area.left + area.width * (value - start) / range;
+    const baseline = area.top + area.height;
+    const every = Math.ceil(bins.length / 10);
+
+    bins.forEach((bin, index) => {
+        const height = scale(bin.count);
+        svg.append(svgElement("rect", {
+            x: x(bin.left), y: baseline - height,
+            width: x(bin.right) - x(bin.left), height: height,
+            fill: BAR_COLOR, stroke: "white"},
+            [svgElement("title", {},
+                        `${xLabel}: ${formatValue(bin.left)} - ` +
+                        `${formatValue(bin.right)}\n` +
+                        `Hits: ${bin.count}\n` +
+                        tooltipAccessions(bin.accessions, bin.count))]));
+        if (index % every === 0){
+            svg.append(svgElement("text", {
+                x: x(bin.left), y: baseline + 16, "text-anchor": "middle"},
+                formatValue(bin.left)));
+        }
+    });
+    svg.append(svgElement("text", {
+        x: x(bins.at(-1).right), y: baseline + 16, "text-anchor": "middle"},
+        formatValue(bins.at(-1).right)));
+    return svg;
+}
+
+
+/**
+ * Draws the pie chart of the E-value significance categories.
+ *
+ * @param {Object[]} categories The categories, see `eValueCategories`.
+ * @returns {Element} The svg.
+ */
+function eValueChart(categories){
+    const width = 650;
+    const svg = svgElement("svg", {
+        width: width, height: HEIGHT, viewBox: `0 0 ${width} ${HEIGHT}`,
+        style: "max-width: 100%; height: auto;",
+        "font-family": "sans-serif", "font-size": 12},
+        [svgElement("text", {x: 10, y: 20, "font-size": 14,
+                             "font-weight": "bold"},
+                    "E-value significance categories")]);
+    const center = {x: 220, y: HEIGHT / 2 + 10};
+    const radius = 160;
+    const total = categories.reduce((sum, category) => sum + category.count,
+                                    0);
+    const point = angle => `${center.x + radius * Math.cos(angle)} ` +
+        `${center.y - radius * Math.sin(angle)}`;
+
+    let angle = 0;
+    categories.forEach((category, index) => {
+        const tooltip = svgElement("title", {},
+            `Category: ${category.name}\nCount: ${category.count}\n` +
+            tooltipAccessions(category.accessions, category.count));
+        const sweep = total ? 2 * Math.PI * category.count / total : 0;
+        if (sweep >= 2 * Math.PI - 1e-9){
+            svg.append(svgElement("circle", {
+                cx: center.x, cy: center.y, r: radius,
+                fill: category.color, stroke: "white"}, [tooltip]));
+        } else if (sweep > 0){
+            // Counterclockwise from the right, as the server rendered
+            // chart, which flips the sweep flag as y points down
+            svg.append(svgElement("path", {
+                d: `M ${center.x} ${center.y} L ${point(angle)} ` +
+                    `A ${radius} ${radius} 0 ${sweep > Math.PI ? 1 : 0} 0 ` +
+                    `${point(angle + sweep)} Z`,
+                fill: category.color, stroke: "white"}, [tooltip]));
+        }
+        angle += sweep;
+
+        const y = 60 + index * 24;
+        svg.append(
+            svgElement("rect", {x: 420, y: y - 11, width: 14, height: 14,
+                                fill: category.color}),
+            svgElement("text", {x: 442, y: y},
+                       `${category.name} (${category.count})`));
+    });
+    return svg;
+}
+
+
+/**
+ * Draws all graphs of the comparison page from the comparison data.
+ *
+ * @param {Object} data The metrics of the hits, a list per metric.
+ */
+function drawComparisonGraphs(data){
+    // Accessions are made unique with the hit id, as in the table
+    const accessions = data["accession"].map(
+        (accession, index) => `${accession}.${data["id"][index]}`);
+    if (accessions.length === 0){
+        $("#seqlen").text("None of the selected hits can be shown.");
+        return;
+    }
+
+    let graphs;
+    if (accessions.length > AGGREGATE_THRESHOLD){
+        const percentages = linearEdges(0, 100, 20);
+        graphs = {
+            seqlen: histogramChart(
+                histogram(accessions, data["length"],
+                          autoEdges(data["length"])),
+                "Sequence length of hits", "Sequence length"),
+            perc_ident: histogramChart(
+                histogram(accessions, data["identity"], percentages),
+                "Percentage identity of hits", "Percentage identity"),
+            query_cov: histogramChart(
+                histogram(accessions, data["coverage"], percentages),
+                "Query coverage of hits", "Query coverage"),
+        };
+    } else {
+        graphs = {
+            seqlen: hitBarChart(accessions, data["length"],
+                                "Sequence length per hit",
+                                "Sequence length"),
+            perc_ident: hitBarChart(accessions, data["identity"],
+                                    "Percentage identity per hit",
+                                    "Percentage identity"),
+            query_cov: hitBarChart(accessions, data["coverage"],
+                                   "Query coverage per hit",
+                                   "Query coverage"),
+        };
+    }
+    graphs.evalue = eValueChart(
+        eValueCategories(accessions, data["e_value"]));
+
+    for (const [id, svg] of Object.entries(graphs)){
+        $(`#${id}`).empty().append(svg);
+    }
+}
+
+
+/**
+ * Saves the graph that is shown as an SVG file.
+ */
+function saveGraph(){
+    const svg = $("#comparison-graph > div:visible svg")[0];
+    if (svg === undefined){
+        return;
+    }
+    const blob = new Blob([new XMLSerializer().serializeToString(svg)],
+                          {type: "image/svg+xml"});
+    const link = document.createElement("a");
+    link.href = URL.createObjectURL(blob);
+    link.download = `${svg.parentElement.id}.svg`;
+    link.click();
+    URL.revokeObjectURL(link.href);
+}
+
+
+$(document).ready(function () {
+    const url = $("#comparison-graph-section").data("url");
+    $.getJSON(url)
+        .done(drawComparisonGraphs)
+        .fail(function () {
+            $("#seqlen").text("The graphs could not be loaded.");
+        });
+    $("#save-graph").click(saveGraph);
+});
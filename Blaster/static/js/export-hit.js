@@ -1,31 +1,49 @@
 /**
- * Contains the file export handler for the BLAST hit page.
- * This handler is triggered when the "Export" button is clicked.
+ * Contains the handlers for the GenBank and FASTA data on the BLAST hit
+ * page. The data is not part of the page, but loaded from the server
+ * when it's shown or exported.
  */
 
 /**
- * Retrieves the format type and its related data from the document.
- * Creates a blob to export and download a file of the chosen type.
+ * Downloads the file of the chosen format.
+ * The value of each format option is the URL of its download.
  */
 function exportFile() {
     event.preventDefault();
 
-    // Retrieve chosen export format and get metadata
-    const format = document.getElementById("export-format").value;
-    const data = $('#' + format).data();
-    const content = data.name;
-    const filename = data.other;
-
-    // Create blob to export and download it
-    const blob = new Blob([content], { type: 'text/plain' });
-    const url = window.URL.createObjectURL(blob);
-    const a = document.createElement('a');
-    a.href = url;
-    a.download = filename;
-    document.body.appendChild(a);
-    a.click();
-    window.URL.revokeObjectURL(url);
-    document.body.removeChild(a);
+    window.location.href = document.getElementById("export-format").value;
 
     return false;
-}
\ No newline at end of file
+}
+
+/**
+ * Loads the data of a format into its element and shows it, the data
+ * is only requested the first time.
+ *
+ * @param {string} format - genbank or fasta
+ */
+function showEntrez(format) {
+    const content = $('#' + format + '-content');
+    const button = $('#' + format + '-show-button');
+
+    if (content.data('loaded')) {
+        content.toggle();
+        return;
+    }
+
+    button.prop('disabled', true);
+    $.ajax({
+        url: content.data('url'),
+        type: 'GET',
+        dataType: 'text',
+        success: function(response){
+            content.text(response);
+            content.data('loaded', true);
+            content.show();
+            button.prop('disabled', false);
+        },
+        error: function(){
+            button.prop('disabled', false);
+        },
+    });
+}
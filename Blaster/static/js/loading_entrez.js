@@ -0,0 +1,39 @@
+/**
+ * This file contains the functions used to reload the BLAST hit page
+ * once the GenBank and FASTA data of its accession have been retrieved
+ * from NCBI in the background.
+ *
+ * Globally kept are:
+ *  Hit_id is the current hit, and is retrieved from the hyperlink.
+*/
+
+const hit_id = window.location.href.split("/").at(-1);
+
+
+/**
+ * requestEntrezStatus sends an ajax request to the server to retrieve
+ * whether the Entrez data of the current hit has been stored.
+ *
+ * If the data has been stored the webpage reloads itself, to show it.
+ * If the data could not be retrieved, polling stops and the placeholder
+ * says so, reloading the page tries again.
+*/
+function requestEntrezStatus(){
+    $.ajax({
+        url: `/blast_hit/get_entrez_status/${hit_id}`,
+        type: 'GET',
+        success: function(response){
+            if (response["status"] === true){
+                window.location.reload();
+            } else if (response["failed"] === true){
+                clearInterval(polling);
+                $("#blast-hit-entrez-pending p")
+                    .addClass("error-message")
+                    .text("The GenBank and FASTA data could not be " +
+                          "retrieved from NCBI. Please try again later.");
+            }
+        },
+    });
+}
+
+const polling = setInterval(requestEntrezStatus, 3000);
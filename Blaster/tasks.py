@@ -2,8 +2,10 @@
 from celery import shared_task
 
 # Local imports
-from Blaster.models import BlastJob
-from Blaster.utils.ncbi import perform_blast_job
+from Blaster.models import BlastJob, EntrezAccessionCache, SubjectSequence
+from Blaster.utils.ncbi import perform_blast_job, \
+    refresh_entrez_accession_cache, fetch_entrez_accession_caches, \
+    prefetch_entrez_accession_caches
 
 
 # --- test purposes ---
@@ -48,6 +50,77 @@ def perform_blast_job_task(*args, **kwargs) -> None:
     It has been done like this for the task to be registered
     within tasks.py and the namespace to be clear.
 
+    Once the job is processed, the Entrez data of its best hits is
+    prefetched by another task.
+
+    :rtype: None
+    """
+    perform_blast_job(*args, **kwargs)
+    prefetch_entrez_accession_caches_task.delay(*args, **kwargs)
+
+
+@shared_task
+def prefetch_entrez_accession_caches_task(blast_job_id: int) -> None:
+    """A wrapper function for `prefetch_entrez_accession_caches`.
+
+    :param blast_job_id: identifier for the processed BlastJob.
+    :type blast_job_id: int
+    :rtype: None
+    """
+    prefetch_entrez_accession_caches(blast_job_id)
+
+
+@shared_task
+def fetch_entrez_accession_cache_task(accession_id: int, db: str) -> None:
+    """Fetches the Entrez data of an accession without a cache.
+
+    Scheduled when the BLAST hit page of such an accession is visited,
+    which shows a placeholder until the data is stored.
+
+    :param accession_id: identifier for the EntrezAccession.
+    :type accession_id: int
+    :param db: Entrez database in which the entry is stored.
+    :type db: str
+    :rtype: None
+    """
+    fetch_entrez_accession_caches([accession_id], db)
+
+
+@shared_task
+def refresh_entrez_accession_cache_task(cache_id: int) -> None:
+    """A wrapper function for `refresh_entrez_accession_cache`.
+
+    Scheduled when a stale cache entry is accessed, so the entry is
+    refreshed in the background while the stale data is shown.
+
+    :param cache_id: identifier for the EntrezAccessionCache.
+    :type cache_id: int
+    :rtype: None
+    """
+    return refresh_entrez_accession_cache(cache_id)
+
+
+@shared_task
+def maintain_entrez_accession_caches_task() -> None:
+    """Refreshes stale cache entries and enforces the cache budget.
+
+    Runs periodically through the CELERY_BEAT_SCHEDULE.
+
+    :rtype: None
+    """
+    stale = EntrezAccessionCache.objects.stale()\
+        .values_list('id', flat=True)
+    for cache_id in list(stale):
+        refresh_entrez_accession_cache(cache_id)
+    EntrezAccessionCache.objects.evict()
+
+
+@shared_task
+def delete_unreferenced_subject_sequences_task() -> None:
+    """Deletes the subject sequences of hits that have been deleted.
+
+    Runs periodically through the CELERY_BEAT_SCHEDULE.
+
     :rtype: None
     """
-    return perform_blast_job(*args, **kwargs)
+    SubjectSequence.objects.delete_unreferenced()
@@ -0,0 +1,112 @@
+# Standard library imports
+from urllib.parse import urlencode, urlsplit
+import asyncio
+import os
+import time
+
+# Third-party imports
+from django.conf import settings
+
+
+"""
+An asynchronous client for Entrez efetch.
+
+Bio.Entrez blocks the calling thread while NCBI answers, which holds a
+worker thread for every hit page waiting on NCBI. This client performs
+the same efetch queries with asyncio streams, so an async view waits on
+NCBI without holding a thread. It only implements what MasterBlast
+needs: a GET request for a text result, over HTTP/1.0, so the response
+is read until the connection closes.
+
+Like Bio.Entrez, queries are spaced to stay within the rate limit of
+NCBI: 3 requests per second, or 10 with an ENTREZ_API_KEY. The rate
+limit applies per process.
+"""
+
+
+EMAIL = 'masterblast@bbc.com'
+TOOL = 'MasterBlast'
+
+_next_request = 0.0
+
+
+async def _wait_for_turn() -> None:
+    """Waits until a request can be made within the rate limit.
+
+    Every caller reserves the next free moment before awaiting, so
+    concurrent queries are spaced out rather than sent at once.
+    """
+    global _next_request
+    interval = 0.1 if os.environ.get('ENTREZ_API_KEY') else 1 / 3
+    now = time.monotonic()
+    turn = max(now, _next_request)
+    _next_request = turn + interval
+    if turn > now:
+        await asyncio.sleep(turn - now)
+
+
+def efetch_url(accession: str, db: str, rettype: str, retmode: str) -> str:
+    """Returns the efetch URL for a query.
+
+    :param accession: the accession code(s), comma separated.
+    :type accession: str
+    :param db: database to be queried.
+    :type db: str
+    :param rettype: the type of content to be efetched.
+    :type rettype: str
+    :param retmode: the format to return the content in.
+    :type retmode: str
+    :return: the URL, below ENTREZ_EUTILS_URL.
+    :rtype: str
+    """
+    params = {'db': db, 'id': accession, 'rettype': rettype,
+              'retmode': retmode, 'tool': TOOL, 'email': EMAIL}
+    if os.environ.get('ENTREZ_API_KEY'):
+        params['api_key'] = os.environ['ENTREZ_API_KEY']
+    return f'{settings.ENTREZ_EUTILS_URL}efetch.fcgi?{urlencode(params)}'
+
+
+async def aperform_entrez_query(accession: str, db: str, rettype: str,
+                                retmode: str) -> str:
+    """Performs an Entrez efetch query without blocking the thread.
+
+    The asynchronous counterpart of `ncbi.perform_entrez_query`, with
+    the same arguments and results.
+
+    :param accession: the accession code for an entry in Entrez.
+    :type accession: str
+    :param db: database to be queried.
+    :type db: str
+    :param rettype: the type of content to be efetched.
+    :type rettype: str
+    :param retmode: the format to return the content in.
+    :type retmode: str
+    :return: query result or error message.
+    :rtype: str
+    """
+    url = urlsplit(efetch_url(accession, db, rettype, retmode))
+    secure = url.scheme == 'https'
+    port = url.port or (443 if secure else 80)
+
+    await _wait_for_turn()
+    try:
+        async with asyncio.timeout(settings.ENTREZ_TIMEOUT):
+            reader, writer = await asyncio.open_connection(
+                url.hostname, port, ssl=secure or None)
+            writer.write(
+                f'GET {url.path}?{url.query} HTTP/1.0\r\n'
+                f'Host: {url.hostname}\r\n'
+                f'User-Agent: {TOOL}\r\n\r\n'.encode('ascii'))
+            await writer.drain()
+            response = await reader.read()
+            writer.close()
+    except TimeoutError:
+        return 'Error: a timeout occurred while executing Entrez query'
+    except OSError:
+        return 'Error: IOError occurred while executing Entrez query'
+
+    head, _, body = response.partition(b'\r\n\r\n')
+    status = head.split(b' ', 2)[1:2]
+    if status != [b'200']:
+        return 'Error: Entrez query was not successful'
+    return body.decode('utf-8', errors='replace')
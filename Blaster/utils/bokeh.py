@@ -11,248 +11,276 @@ from bokeh.models import HoverTool
 
 from django.db.models.query import QuerySet
 
+import numpy as np
 import pandas as pd
 
 
-def seqlen_graph(selected_hits: QuerySet) -> tuple[str, str]:
-    """Generates sequence length bar chart
+AGGREGATE_THRESHOLD = 200
+TOOLTIP_ACCESSIONS = 10
+MAX_LENGTH_BINS = 50
+E_VALUE_CATEGORIES = ('Extremely significant', 'Very significant',
+                      'Moderately significant', 'Not significant')
+E_VALUE_EDGES = np.array([1e-50, 1e-20, 1e-5])
 
-    Generates a Bokeh bar chart of sequence lengths for selected hits.
 
-    Takes a QuerySet of hit objects, extracts their unique 
-    accession and sequence lengths, and creates a bar graph
-    displaying each hit's length.
-    Toolbar only contains the save tool (and hover tool by default),
-    as the graph is not interactive.
-
-    Unique accessions have been made and used as the x-axis 
-    labels to avoid confusion as there are duplicate accessions.
-
-    :param selected_hits: QuerySet of hit objects
-        selected by the user
-    :type selected_hits: QuerySet
-    :return: A tuple containing the script and div
-        elements for embedding the Bokeh plot in the HTML template.
-    :rtype: tuple[str, str]
-    """
-
-    # Get the unique accessions and lengths of the selected hits
-    unique_accessions, lengths = [], []
-    for hit in selected_hits:
-        unique_accessions.append(hit.unique_accession)
-        lengths.append(len(hit.subject_seq))
+def comparison_graphs(selected_hits: QuerySet,
+                      aggregate: bool | None = None
+                      ) -> tuple[str, dict[str, str]]:
+    """Generates all graphs of the comparison of jobs
 
-    # Create a new plot
-    plot = figure(title="Sequence length per hit",
-                  x_axis_label="Hit accessions",
-                  y_axis_label="Sequence length",
-                  x_range=unique_accessions,
-                  toolbar_location="above",
-                  tools="save",
-                  width=1000,
-                  height=400)
-    plot.xaxis.major_label_orientation = 'vertical'
+    Generates the sequence length, percentage identity and query
+    coverage charts, and the E-value pie chart, for the selected hits.
+    The comparison page draws the same graphs in the browser, see
+    draw-comparison-graphs.js.
 
-    source = ColumnDataSource(data=dict(x=unique_accessions, 
-                                        y=lengths, 
-                                        accession=unique_accessions, 
-                                        length=lengths))
+    Up to AGGREGATE_THRESHOLD hits, the charts are bar charts with a
+    bar per hit, which share a single ColumnDataSource. Above it, a
+    bar per hit is no longer readable, and too slow for the browser,
+    so histograms of the hits are shown instead, which keeps the size
+    of the graphs bounded regardless of the number of hits.
+    All graphs are embedded with a single `components()` call,
+    resulting in one Bokeh document, and thus one script, for the
+    whole page.
 
-    # Add vertical bars to the plot 
-    plot.vbar(x='x', top='y', width=0.75, source=source, color='#297373')
-
-    # Add tooltips
-    tooltips = [
-        ("Accession", "@accession"),
-        ("Sequence Length", "@length")
-    ]
-    plot.add_tools(HoverTool(tooltips=tooltips))
-
-    # Generate HTML elements
-    script, div = components(plot)
-
-    return script, div
-
-
-def perc_identity_graph(selected_hits: QuerySet) -> tuple[str, str]:
-    """ Generates percentage identity bar chart
-
-    Generates a Bokeh bar chart of percentage identities 
-    for selected hits.
-
-    Takes a QuerySet of hit objects, extracts their unique 
-    accession and percentage identities, and creates a bar graph
-    displaying each hit's percentage identity with the query sequence.
-    Toolbar only contains the save tool (and hover tool by default),
-    as the graph is not interactive.
-    
-    Unique accessions have been made and used as the x-axis 
+    Unique accessions have been made and used as the x-axis
     labels to avoid confusion as there are duplicate accessions.
 
     :param selected_hits: QuerySet of hit objects
-        selected by the user
+        selected by the user, with their unique_accession set.
     :type selected_hits: QuerySet
-    :return: A tuple containing the script and div
-        elements for embedding the Bokeh plot in the HTML template.
-    :rtype: tuple[str, str]
-
+    :param aggregate: whether to show histograms, defaults to None,
+        which decides by the number of hits.
+    :type aggregate: bool | None
+    :return: A tuple containing the script, and the divs by graph
+        name, for embedding the Bokeh plots in the HTML template.
+    :rtype: tuple[str, dict[str, str]]
     """
-    # Get unique accessions and percentage identities
-    unique_accessions, perc_identity = [], []
+    unique_accessions, lengths, perc_identity, query_coverage, \
+        e_values = [], [], [], [], []
     for hit in selected_hits:
         unique_accessions.append(hit.unique_accession)
+        lengths.append(hit.subject_length)
         perc_identity.append(hit.percentage_identity)
+        query_coverage.append(hit.query_coverage)
+        e_values.append(float(hit.e_value))
+
+    if aggregate is None:
+        aggregate = len(unique_accessions) > AGGREGATE_THRESHOLD
+
+    if aggregate:
+        accessions = np.array(unique_accessions, dtype=object)
+        length_edges = np.histogram_bin_edges(lengths, bins='auto')
+        if len(length_edges) > MAX_LENGTH_BINS + 1:
+            length_edges = np.histogram_bin_edges(
+                lengths, bins=MAX_LENGTH_BINS)
+        plots = {
+            'seqlen': histogram_graph(
+                accessions, np.array(lengths), length_edges,
+                "Sequence length of hits", "Sequence length"),
+            'perc_identity': histogram_graph(
+                accessions, np.array(perc_identity),
+                np.linspace(0, 100, 21),
+                "Percentage identity of hits", "Percentage identity"),
+            'query_coverage': histogram_graph(
+                accessions, np.array(query_coverage),
+                np.linspace(0, 100, 21),
+                "Query coverage of hits", "Query coverage"),
+        }
+    else:
+        source = ColumnDataSource(data=dict(accession=unique_accessions,
+                                            length=lengths,
+                                            identity=perc_identity,
+                                            coverage=query_coverage))
+        plots = {
+            'seqlen': hit_bar_graph(
+                source, unique_accessions, 'length',
+                "Sequence length per hit", "Sequence length"),
+            'perc_identity': hit_bar_graph(
+                source, unique_accessions, 'identity',
+                "Percentage identity per hit", "Percentage identity"),
+            'query_coverage': hit_bar_graph(
+                source, unique_accessions, 'coverage',
+                "Query coverage per hit", "Query coverage"),
+        }
+    plots['e_value'] = e_value_graph(unique_accessions, e_values)
+
+    script, divs = components(plots)
+    return script, divs
+
+
+def tooltip_accessions(accessions: list[str], total: int) -> str:
+    """Joins accessions for a tooltip, limited to TOOLTIP_ACCESSIONS
+
+    :param accessions: the accessions, only the first
+        TOOLTIP_ACCESSIONS are used.
+    :type accessions: list[str]
+    :param total: the total number of accessions.
+    :type total: int
+    :return: the accessions separated by line breaks, followed by the
+        number of accessions left out.
+    :rtype: str
+    """
+    shown = '<br>'.join(accessions[:TOOLTIP_ACCESSIONS])
+    if total > TOOLTIP_ACCESSIONS:
+        shown += f'<br>... and {total - TOOLTIP_ACCESSIONS} more'
+    return shown
+
+
+def histogram_graph(accessions: np.ndarray,
+                    values: np.ndarray,
+                    edges: np.ndarray,
+                    title: str,
+                    x_axis_label: str) -> figure:
+    """Generates a histogram of the hits
+
+    Creates a Bokeh histogram, counting the hits per bin of a value,
+    used instead of a bar per hit for large selections.
+    The tooltip of a bin shows its range, the number of hits and the
+    first of their accessions.
+    Toolbar only contains the save tool (and hover tool by default),
+    as the graph is not interactive.
 
-    # Create a new plot
-    plot = figure(title="Percentage identity per hit",
-                  x_axis_label="Hit accessions",
-                  y_axis_label="Percentage identity",
-                  x_range=unique_accessions,
+    :param accessions: the unique accessions of the hits.
+    :type accessions: np.ndarray
+    :param values: the value of every hit, in the same order.
+    :type values: np.ndarray
+    :param edges: the edges of the bins.
+    :type edges: np.ndarray
+    :param title: the title of the graph.
+    :type title: str
+    :param x_axis_label: label of the x-axis, also used in the tooltip.
+    :type x_axis_label: str
+    :return: the Bokeh plot.
+    :rtype: figure
+    """
+    # Bin of every hit, values outside of the edges are counted in the
+    # first or last bin, and the last bin includes its right edge
+    bins = np.clip(np.searchsorted(edges, values, side='right') - 1,
+                   0, len(edges) - 2)
+    counts = np.bincount(bins, minlength=len(edges) - 1)
+    order = np.argsort(bins, kind='stable')
+    starts = np.searchsorted(bins[order], np.arange(len(counts)))
+
+    source = ColumnDataSource(data=dict(
+        left=edges[:-1],
+        right=edges[1:],
+        count=counts,
+        accessions=[
+            tooltip_accessions(
+                list(accessions[order[
+                    start:start + min(count, TOOLTIP_ACCESSIONS)]]),
+                count)
+            for start, count in zip(starts, counts)]))
+
+    plot = figure(title=title,
+                  x_axis_label=x_axis_label,
+                  y_axis_label="Hits",
                   toolbar_location="above",
-                  tools = "save",
+                  tools="save",
                   width=1000,
-                  height=400
-                  )
-    plot.xaxis.major_label_orientation = 'vertical'
-
-    source = ColumnDataSource(data=dict(x=unique_accessions, 
-                                        y=perc_identity, 
-                                        accession=unique_accessions, 
-                                        identity=perc_identity))
+                  height=400)
 
-    # Add vertical bars to the plot 
-    plot.vbar(x='x', top='y', width=0.75, source=source, color='#297373')
+    plot.quad(left='left', right='right', top='count', bottom=0,
+              source=source, color='#297373', line_color='white')
 
     # Add tooltips
     tooltips = [
-        ("Accession", "@accession"),
-        ("Percentage Identity", "@identity")
+        (x_axis_label.title(), "@left{0.[00]} - @right{0.[00]}"),
+        ("Hits", "@count"),
+        ("Accessions", "@accessions{safe}")
     ]
     plot.add_tools(HoverTool(tooltips=tooltips))
+    return plot
 
-    # Generate HTML elements
-    script, div = components(plot)
 
-    return script, div
+def hit_bar_graph(source: ColumnDataSource,
+                  unique_accessions: list[str],
+                  column: str,
+                  title: str,
+                  y_axis_label: str) -> figure:
+    """Generates a bar chart with a bar per hit
 
-
-def query_coverage_graph(selected_hits: QuerySet) -> tuple[str, str]:
-    """
-    Generates a Bokeh bar chart of query coverage for selected hits.
-
-    Takes a QuerySet of hit objects, extracts their unique 
-    accession and query coverages, and creates a bar graph
-    displaying the query coverage of each hit.
+    Creates a Bokeh bar chart of one column of the shared source,
+    with the unique accessions on the x-axis.
     Toolbar only contains the save tool (and hover tool by default),
     as the graph is not interactive.
 
-    Unique accessions have been made and used as the x-axis 
-    labels to avoid confusion as there are duplicate accessions.
-
-    :param selected_hits: QuerySet of hit objects
-        selected by the user
-    :type selected_hits: QuerySet
-    :return: A tuple containing the script and div
-        elements for embedding the Bokeh plot in the HTML template.
-    :rtype: tuple[str, str]
-        
+    :param source: the shared source, with a row per hit.
+    :type source: ColumnDataSource
+    :param unique_accessions: the unique accessions of the hits,
+        in the order of the source.
+    :type unique_accessions: list[str]
+    :param column: the column of the source to show.
+    :type column: str
+    :param title: the title of the graph.
+    :type title: str
+    :param y_axis_label: label of the y-axis, also used in the tooltip.
+    :type y_axis_label: str
+    :return: the Bokeh plot.
+    :rtype: figure
     """
-    # Get unique accessions and query coverages
-    unique_accessions, query_coverage = [], []
-    for hit in selected_hits:
-        unique_accessions.append(hit.unique_accession)
-        query_coverage.append(hit.query_coverage)
-
-    # Create a new plot
-    plot = figure(title="Query coverage per hit",
+    plot = figure(title=title,
                   x_axis_label="Hit accessions",
-                  y_axis_label="Query coverage",
+                  y_axis_label=y_axis_label,
                   x_range=unique_accessions,
                   toolbar_location="above",
-                  tools = "save",
+                  tools="save",
                   width=1000,
-                  height=400
-                  )
+                  height=400)
     plot.xaxis.major_label_orientation = 'vertical'
 
-    source = ColumnDataSource(data=dict(x=unique_accessions, 
-                                        y=query_coverage,
-                                        accession=unique_accessions, 
-                                        coverage=query_coverage))
-
-    # Add vertical bars to the plot 
-    plot.vbar(x='x', top='y', width=0.75, source=source, color='#297373')
+    # Add vertical bars to the plot
+    plot.vbar(x='accession', top=column, width=0.75, source=source,
+              color='#297373')
 
     # Add tooltips
     tooltips = [
         ("Accession", "@accession"),
-        ("Query Coverage", "@coverage")
+        (y_axis_label.title(), f"@{column}")
     ]
     plot.add_tools(HoverTool(tooltips=tooltips))
+    return plot
 
-    # Generate HTML elements
-    script, div = components(plot)
-
-    return script, div
 
-
-def e_value_graph(selected_hits: QuerySet) -> tuple[str, str]:
+def e_value_graph(unique_accessions: list[str],
+                  e_values: list[float]) -> figure:
     """ Generates E-value significance categories pie chart
 
     Generates a Bokeh pie chart of E-value significance categories for
-    the selected hits in the QuerySet. The categories are divided into
+    the selected hits. The categories are divided into
     four categories. The chart shows the distribution of hits in each
     category.
     Toolbar only contains the save tool (and hover tool by default),
     as the graph is not interactive.
 
-    Unique accessions have been made and used as labels to 
-    avoid confusion as there are duplicate accessions.
+    The pie chart has a row per category rather than per hit, so it
+    has its own source. The tooltip of a category lists at most
+    TOOLTIP_ACCESSIONS accessions, so its size is bounded.
 
-    :param selected_hits: QuerySet of hit objects
-        selected by the user
-    :type selected_hits: QuerySet
-    :return: A tuple containing the script and div
-        elements for embedding the Bokeh plot in the HTML template.
-    :rtype: tuple[str, str]
-        
+    :param unique_accessions: the unique accessions of the hits.
+    :type unique_accessions: list[str]
+    :param e_values: the E-values of the hits, in the same order.
+    :type e_values: list[float]
+    :return: the Bokeh plot.
+    :rtype: figure
     """
-    e_values_categories, accessions = {
-        'Extremely significant': 0,
-        'Very significant': 0,
-        'Moderately significant': 0,
-        'Not significant': 0
-    }, {
-        'Extremely': [],
-        'Very': [],
-        'Moderately': [],
-        'Not': []
-    }
-    
-    # Classify each hit
-    for hit in selected_hits:
-        e_value = float(hit.e_value)
-        if e_value < 1e-50:
-            e_values_categories['Extremely significant'] += 1
-            accessions['Extremely'].append(hit.unique_accession)
-        elif e_value < 1e-20:
-            e_values_categories['Very significant'] += 1
-            accessions['Very'].append(hit.unique_accession)
-        elif e_value < 1e-5:
-            e_values_categories['Moderately significant'] += 1
-            accessions['Moderately'].append(hit.unique_accession)
-        else:
-            e_values_categories['Not significant'] += 1
-            accessions['Not'].append(hit.unique_accession)
-    
+    # Classify each hit, 0 is extremely significant and 3 not
+    accessions = np.array(unique_accessions, dtype=object)
+    categories = np.digitize(e_values, E_VALUE_EDGES)
+    counts = np.bincount(categories, minlength=len(E_VALUE_CATEGORIES))
+
     # Prepare data for plotting
     data = pd.DataFrame({
-        'category': list(e_values_categories.keys()),
-        'value': list(e_values_categories.values()),
-        'accessions': ['<br>'.join(accs) for accs in accessions.values()]
+        'category': E_VALUE_CATEGORIES,
+        'value': counts,
+        'accessions': [
+            tooltip_accessions(
+                list(accessions[categories == category]
+                     [:TOOLTIP_ACCESSIONS]), count)
+            for category, count in enumerate(counts)]
     })
     data['angle'] = data['value'] / data['value'].sum() * 2 * pi
-    data['color'] = Category10[len(e_values_categories)]
+    data['color'] = Category10[len(E_VALUE_CATEGORIES)]
 
     source = ColumnDataSource(data)
 
@@ -271,15 +299,13 @@ def e_value_graph(selected_hits: QuerySet) -> tuple[str, str]:
     plot.wedge(x=0, y=1, radius=0.4,
                start_angle=cumsum('angle', include_zero=True),
                end_angle=cumsum('angle'),
-               line_color="white", 
-               fill_color='color', 
-               legend_field='category', 
+               line_color="white",
+               fill_color='color',
+               legend_field='category',
                source=source
                )
 
     plot.axis.axis_label = None
     plot.axis.visible = False
     plot.grid.grid_line_color = None
-
-    script, div = components(plot)
-    return script, div
\ No newline at end of file
+    return plot
@@ -0,0 +1,142 @@
+# Standard library imports
+from datetime import datetime
+from hashlib import sha256
+
+# Third-party imports
+from django.conf import settings
+from django.contrib import messages
+from django.core.handlers.wsgi import WSGIRequest
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+# Local imports
+from Blaster.models import BlastBuddies, BlastJob
+
+
+"""
+Conditional responses for the pages of processed jobs.
+
+Once a job is processed, its hits no longer change. Its pages are
+therefore versioned by the job and the time it finished, see
+`job_version`, together with whatever else the page shows, such as
+the sharing state of the job and the user requesting it. A client
+that sends the ETag or Last-Modified of its copy receives a 304
+response, without the page being rendered again.
+
+Pages are personal and always revalidated, they're sent with
+`Cache-Control: private, no-cache`.
+"""
+
+
+def job_version(job: BlastJob, finished: datetime | None) -> str | None:
+    """Returns the version of the hits of a job.
+
+    Also used as key for the template fragment cache of the hits.
+
+    :param job: the job.
+    :type job: BlastJob
+    :param finished: when the job was processed, see
+        `BlastJob.finished_at`.
+    :type finished: datetime | None
+    :return: the version, or None while the job is being processed.
+    :rtype: str | None
+    """
+    if finished is None:
+        return None
+    return f'{job.pk}-{int(finished.timestamp() * 1000000)}'
+
+
+def sharing_version(job: BlastJob, user) -> list[int]:
+    """Returns the sharing state of a job, as shown to a user.
+
+    These are the users the job is shared with and, as the user can
+    share the job with them, the buddies of the user.
+
+    :param job: the job.
+    :type job: BlastJob
+    :param user: the user requesting the page, possibly anonymous.
+    :type user: User | AnonymousUser
+    :return: the ids of the users the job is shared with, followed by
+        the ids of the buddies of the user.
+    :rtype: list[int]
+    """
+    shared = BlastJob.shared_job.through.objects.filter(blastjob=job)\
+        .order_by('sharedjobs__user_id')\
+        .values_list('sharedjobs__user_id', flat=True)
+    buddies = []
+    if user.is_authenticated:
+        buddies = BlastBuddies.buddie.through.objects\
+            .filter(blastbuddies__user=user).order_by('user_id')\
+            .values_list('user_id', flat=True)
+    return [*shared, 0, *buddies]
+
+
+def page_etag(request: WSGIRequest, version: str | None,
+              *parts: object) -> str | None:
+    """Returns the ETag of a page of a version, showing the given parts.
+
+    The ETag also covers the requesting user and the CSRF cookie, so a
+    form on a page is never reused with another token. Pages that show
+    pending messages are not versioned.
+
+    :param request: Django request object.
+    :type request: WSGIRequest
+    :param version: the version of the page, None if not versioned.
+    :type version: str | None
+    :param parts: anything else the page shows.
+    :type parts: object
+    :return: the quoted ETag, or None if the page can't be versioned.
+    :rtype: str | None
+    """
+    if version is None or len(messages.get_messages(request)):
+        return None
+    key = repr((request.user.pk,
+                request.COOKIES.get(settings.CSRF_COOKIE_NAME),
+                version, parts))
+    return f'"{sha256(key.encode()).hexdigest()[:32]}"'
+
+
+def not_modified(request: WSGIRequest, etag: str | None,
+                 last_modified: datetime | None) -> HttpResponse | None:
+    """Returns a 304 response if the client's copy is current.
+
+    :param request: Django request object.
+    :type request: WSGIRequest
+    :param etag: the ETag of the page, None if not versioned.
+    :type etag: str | None
+    :param last_modified: when the page last changed.
+    :type last_modified: datetime | None
+    :return: the 304 response, or None if the page should be sent.
+    :rtype: HttpResponse | None
+    """
+    if etag is None or request.method not in ('GET', 'HEAD'):
+        return None
+    response = get_conditional_response(
+        request, etag=etag,
+        last_modified=int(last_modified.timestamp())
+        if last_modified else None)
+    return add_validators(response, etag, last_modified) \
+        if response else None
+
+
+def add_validators(response: HttpResponse, etag: str | None,
+                   last_modified: datetime | None) -> HttpResponse:
+    """Adds the ETag and Last-Modified of a page to its response.
+
+    :param response: the response of the page.
+    :type response: HttpResponse
+    :param etag: the ETag of the page, None if not versioned.
+    :type etag: str | None
+    :param last_modified: when the page last changed.
+    :type last_modified: datetime | None
+    :return: the response.
+    :rtype: HttpResponse
+    """
+    if etag is None or response.status_code not in (200, 304):
+        return response
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
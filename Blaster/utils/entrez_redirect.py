@@ -0,0 +1,47 @@
+# Standard library imports
+from urllib.request import BaseHandler, Request, build_opener, \
+    install_opener
+
+# Third-party imports
+from django.conf import settings
+
+
+"""
+Redirection of Bio.Entrez to another E-utilities server.
+
+Bio.Entrez has the URL of NCBI built in, unlike qblast, which takes
+NCBI_BLAST_URL as an argument. When ENTREZ_EUTILS_URL points elsewhere,
+such as at the stand-in of benchmarks/ncbi_stand_in.py, the requests
+of Bio.Entrez are rewritten before urllib sends them.
+"""
+
+
+NCBI_EUTILS_URL = 'https://eutils.ncbi.nlm.nih.gov/entrez/eutils/'
+
+
+class EntrezRedirectHandler(BaseHandler):
+    """Rewrites requests to the E-utilities of NCBI to another URL."""
+    # Before the HTTP handlers, which set the Host header
+    handler_order = 100
+
+    def __init__(self, url: str) -> None:
+        self.url = url
+
+    def https_request(self, request: Request) -> Request:
+        if request.full_url.startswith(NCBI_EUTILS_URL):
+            request.full_url = \
+                self.url + request.full_url[len(NCBI_EUTILS_URL):]
+        return request
+
+    http_request = https_request
+
+
+def redirect_entrez() -> None:
+    """Points Bio.Entrez at ENTREZ_EUTILS_URL, if that isn't NCBI.
+
+    Installs an urllib opener for the process, which leaves all other
+    requests alone. Called when the Blaster app is loaded.
+    """
+    if settings.ENTREZ_EUTILS_URL != NCBI_EUTILS_URL:
+        install_opener(build_opener(
+            EntrezRedirectHandler(settings.ENTREZ_EUTILS_URL)))
@@ -0,0 +1,237 @@
+# Standard library imports
+import json
+import re
+from typing import AsyncIterator, Iterable, Iterator
+
+# Third-party imports
+from asgiref.sync import sync_to_async
+from django.db.models import QuerySet
+
+# Local imports
+from Blaster.utils.packing import unpack_sequence
+
+
+"""
+Export of the hits of BLAST jobs.
+
+The hits are read with `values_list(...).iterator(chunk_size=...)`,
+without instantiating hits, and formatted while they are read. A chunk
+of formatted rows is yielded at a time, so a `StreamingHttpResponse`
+sends a large export without holding it in memory, under ASGI through
+`aexport_hits`.
+
+Supported formats are a TSV with a header, BLAST tabular output
+(outfmt 6), a multi-FASTA of the subject sequences and JSON lines.
+"""
+
+
+EXPORT_CHUNK_SIZE = 2000
+FASTA_LINE_LENGTH = 60
+
+# The columns of the TSV and JSON lines exports, by the field they
+# are read from.
+COLUMNS = {
+    'job': 'job_id',
+    'query': 'job__title',
+    'hit': 'id',
+    'accession': 'accession__code',
+    'organism': 'accession__organism',
+    'description': 'description',
+    'e_value': 'e_value',
+    'bit_score': 'bit_score',
+    'blast_score': 'blast_score',
+    'identities': 'identities',
+    'percentage_identity': 'percentage_identity',
+    'align_length': 'align_length',
+    'query_start': 'query_start',
+    'query_end': 'query_end',
+    'query_coverage': 'query_coverage',
+    'subject_start': 'subject_start',
+    'subject_end': 'subject_end',
+    'subject_length': 'subject_length',
+}
+
+# The columns of BLAST tabular output, by the field they are read from
+OUTFMT6_COLUMNS = {
+    'qseqid': 'job__title',
+    'sseqid': 'accession__code',
+    'pident': 'percentage_identity',
+    'length': 'align_length',
+    'identities': 'identities',
+    'qstart': 'query_start',
+    'qend': 'query_end',
+    'sstart': 'subject_start',
+    'send': 'subject_end',
+    'evalue': 'e_value',
+    'bitscore': 'bit_score',
+    'subject': 'subject__sequence',
+}
+
+FASTA_COLUMNS = {
+    'hit': 'id',
+    'accession': 'accession__code',
+    'description': 'description',
+    'query': 'job__title',
+    'subject_start': 'subject_start',
+    'subject_end': 'subject_end',
+    'subject': 'subject__sequence',
+}
+
+GAP_OPENINGS = re.compile(r'-+')
+
+
+def _sequence(value: bytes | str | None) -> str:
+    """Returns a subject sequence read with `values_list`.
+
+    Sequences stored before they were packed are read as text.
+
+    :param value: the packed sequence, or the sequence as text.
+    :type value: bytes | str | None
+    :return: the sequence.
+    :rtype: str
+    """
+    if not value:
+        return ''
+    if isinstance(value, str):
+        return value
+    return unpack_sequence(value)
+
+
+def _query_id(title: str) -> str:
+    """Returns the first word of a job title, as query id.
+
+    :param title: the title of the job.
+    :type title: str
+    :return: the query id.
+    :rtype: str
+    """
+    return title.split()[0] if title.strip() else 'query'
+
+
+def _field(value: object) -> str:
+    """Formats a value as a field of a tab separated row.
+
+    :param value: the value.
+    :type value: object
+    :return: the value, without tabs and line breaks.
+    :rtype: str
+    """
+    return re.sub(r'[\t\r\n]+', ' ', str(value))
+
+
+def _tsv_rows(rows: Iterable[tuple]) -> Iterator[str]:
+    """Formats rows of COLUMNS as TSV, with a header."""
+    yield '\t'.join(COLUMNS) + '\n'
+    for row in rows:
+        yield '\t'.join(_field(value) for value in row) + '\n'
+
+
+def _outfmt6_rows(rows: Iterable[tuple]) -> Iterator[str]:
+    """Formats rows of OUTFMT6_COLUMNS as BLAST tabular output."""
+    # Gaps are not stored for hits, mismatches therefore include gap
+    # positions and gap openings are counted in the subject only.
+    for (qseqid, sseqid, pident, length, identities, qstart, qend,
+         sstart, send, evalue, bitscore, subject) in rows:
+        gapopen = len(GAP_OPENINGS.findall(_sequence(subject)))
+        yield (f'{_query_id(qseqid)}\t{sseqid}\t{pident:.3f}\t{length}\t'
+               f'{length - identities}\t{gapopen}\t{qstart}\t{qend}\t'
+               f'{sstart}\t{send}\t{evalue:.2e}\t{bitscore:.1f}\n')
+
+
+def _fasta_rows(rows: Iterable[tuple]) -> Iterator[str]:
+    """Formats rows of FASTA_COLUMNS as ungapped FASTA records."""
+    for (hit, accession, description, query, subject_start, subject_end,
+         subject) in rows:
+        sequence = _sequence(subject).replace('-', '')
+        lines = [sequence[start:start + FASTA_LINE_LENGTH]
+                 for start in range(0, len(sequence), FASTA_LINE_LENGTH)]
+        yield (f'>{accession}:{subject_start}-{subject_end} '
+               f'{_field(description)} [hit={hit} '
+               f'query={_query_id(query)}]\n' + ''.join(
+                   f'{line}\n' for line in lines))
+
+
+def _jsonl_rows(rows: Iterable[tuple]) -> Iterator[str]:
+    """Formats rows of COLUMNS as JSON objects, one per line."""
+    for row in rows:
+        yield json.dumps(dict(zip(COLUMNS, row))) + '\n'
+
+
+# Per format: the columns read, the function formatting the rows,
+# the content type and the file extension.
+EXPORT_FORMATS = {
+    'tsv': (COLUMNS, _tsv_rows,
+            'text/tab-separated-values', 'tsv'),
+    'outfmt6': (OUTFMT6_COLUMNS, _outfmt6_rows,
+                'text/tab-separated-values', 'outfmt6.tsv'),
+    'fasta': (FASTA_COLUMNS, _fasta_rows,
+              'text/x-fasta', 'fasta'),
+    'jsonl': (COLUMNS, _jsonl_rows,
+              'application/x-ndjson', 'jsonl'),
+}
+
+
+def export_hits(hits: QuerySet, export_format: str,
+                chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[str]:
+    """Formats hits in an export format, a chunk of rows at a time.
+
+    The hits are ordered by job and E-value. With server side cursors,
+    the database sends the hits in chunks as well. These are disabled
+    behind a transaction pooler, see `database_settings`, in which
+    case the driver reads the rows at once, but no hits are
+    instantiated and the formatted export is still never held in
+    memory.
+
+    :param hits: the hits to export.
+    :type hits: QuerySet[BlastHit]
+    :param export_format: one of EXPORT_FORMATS.
+    :type export_format: str
+    :param chunk_size: the number of rows per chunk.
+    :type chunk_size: int
+    :raises KeyError: if the export format is unknown.
+    :return: the formatted export, in chunks.
+    :rtype: Iterator[str]
+    """
+    columns, format_rows, _, _ = EXPORT_FORMATS[export_format]
+    rows = hits.order_by('job_id', 'e_value', 'id')\
+        .values_list(*columns.values())\
+        .iterator(chunk_size=chunk_size)
+
+    chunk = []
+    for line in format_rows(rows):
+        chunk.append(line)
+        if len(chunk) >= chunk_size:
+            yield ''.join(chunk)
+            chunk = []
+    if chunk:
+        yield ''.join(chunk)
+
+
+async def aexport_hits(hits: QuerySet, export_format: str,
+                       chunk_size: int = EXPORT_CHUNK_SIZE
+                       ) -> AsyncIterator[str]:
+    """Formats hits in an export format, a chunk of rows at a time,
+    for a response served under ASGI.
+
+    Django reads a sync iterator of a streaming response into a list
+    under ASGI, so the chunks of `export_hits` are read and formatted
+    in a thread one at a time instead. This is what
+    `QuerySet.aiterator` does, which can't be used itself, as in
+    Django 5.0 it runs the query of `values_list` in the event loop.
+
+    :param hits: the hits to export.
+    :type hits: QuerySet[BlastHit]
+    :param export_format: one of EXPORT_FORMATS.
+    :type export_format: str
+    :param chunk_size: the number of rows per chunk.
+    :type chunk_size: int
+    :raises KeyError: if the export format is unknown.
+    :return: the formatted export, in chunks.
+    :rtype: AsyncIterator[str]
+    """
+    chunks = export_hits(hits, export_format, chunk_size)
+    while True:
+        chunk = await sync_to_async(next)(chunks, None)
+        if chunk is None:
+            break
+        yield chunk
@@ -0,0 +1,65 @@
+# Standard library imports
+from hashlib import sha256
+from typing import Callable, Iterable
+
+# Third-party imports
+from django.core.cache import cache
+
+# Local imports
+from Blaster.models import BlastJob
+
+
+"""
+Caching of rendered comparison graphs.
+
+Rendering the Bokeh graphs of a comparison of jobs is expensive, while
+the same jobs are often compared again. The rendered graphs are cached
+by the compared jobs and the time they were processed, so revisiting a
+comparison costs a single cache lookup.
+
+Hits are not changed after their job has been processed, and ids are
+not reused, so a processed job identifies the content of its graphs,
+and a job that is processed again gets another key.
+
+The graphs of the comparison page of hits are drawn by the browser,
+from the data of `comparison_data`, so they are not cached here.
+"""
+
+
+CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def graphs_cache_key(jobs: Iterable[BlastJob]) -> str:
+    """Returns the cache key for the graphs of a comparison of jobs.
+
+    :param jobs: the compared jobs, in any order.
+    :type jobs: Iterable[BlastJob]
+    :return: the cache key.
+    :rtype: str
+    """
+    versions = ",".join(
+        f"{job.pk}-{job.finished.timestamp() if job.finished else ''}"
+        for job in sorted(set(jobs), key=lambda job: job.pk))
+    return f"comparison-graphs-jobs-{sha256(versions.encode()).hexdigest()}"
+
+
+def cached_graphs(jobs: Iterable[BlastJob], render: Callable) -> object:
+    """Returns the cached graphs of a comparison, rendering when needed.
+
+    Graphs should only be cached for processed jobs, as these no
+    longer receive new hits.
+
+    :param jobs: the compared jobs.
+    :type jobs: Iterable[BlastJob]
+    :param render: renders the graphs when they are not cached,
+        its result has to be picklable.
+    :type render: Callable
+    :return: the result of render for these jobs.
+    :rtype: object
+    """
+    key = graphs_cache_key(jobs)
+    graphs = cache.get(key)
+    if graphs is None:
+        graphs = render()
+        cache.set(key, graphs, CACHE_TIMEOUT)
+    return graphs
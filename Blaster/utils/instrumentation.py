@@ -0,0 +1,133 @@
+# Standard library imports
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterable, Iterator
+import statistics
+import time
+
+
+"""
+Timing of the phases of processing a BLAST job.
+
+While a job is processed, see `perform_blast_job`, its timings are
+recorded with `record_timings`. Code anywhere in the call stack adds
+to them with `timed` and `count`, without the timings being passed
+along. Outside of `record_timings`, as when the Entrez cache is
+refreshed, these do nothing.
+
+The phases of a job are:
+    blast: waiting on NCBI BLAST, from submitting to the result.
+    parse: reading the BLAST XML.
+    entrez: looking up organisms in Entrez.
+    insert: storing accessions, subject sequences and hits.
+and the counters:
+    remote_calls: requests to NCBI BLAST and Entrez.
+    rows_written: rows inserted into the database.
+"""
+
+
+PHASES = ("blast", "parse", "entrez", "insert")
+
+PERCENTILES = (50, 95, 99)
+
+
+class JobTimings:
+    """The seconds spent per phase, and the counters, of a job."""
+
+    def __init__(self) -> None:
+        self.seconds: dict[str, float] = {}
+        self.counts: dict[str, int] = {}
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Adds the time spent in a block to a phase.
+
+        :param name: the name of the phase.
+        :type name: str
+        :rtype: Iterator[None]
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] = self.seconds.get(name, 0.0) \
+                + time.perf_counter() - start
+
+    def count(self, name: str, number: int = 1) -> None:
+        """Adds to a counter.
+
+        :param name: the name of the counter.
+        :type name: str
+        :param number: the number to add.
+        :type number: int
+        """
+        self.counts[name] = self.counts.get(name, 0) + number
+
+
+_timings: ContextVar[JobTimings | None] = ContextVar("timings",
+                                                     default=None)
+
+
+@contextmanager
+def record_timings() -> Iterator[JobTimings]:
+    """Records the timings of the code run inside the block.
+
+    :return: the timings, complete once the block is left.
+    :rtype: Iterator[JobTimings]
+    """
+    timings = JobTimings()
+    token = _timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _timings.reset(token)
+
+
+@contextmanager
+def timed(phase: str) -> Iterator[None]:
+    """Adds the time spent in a block to a phase of the recorded
+    timings, if any.
+
+    :param phase: the name of the phase.
+    :type phase: str
+    :rtype: Iterator[None]
+    """
+    timings = _timings.get()
+    if timings is None:
+        yield
+        return
+    with timings.phase(phase):
+        yield
+
+
+def count(name: str, number: int = 1) -> None:
+    """Adds to a counter of the recorded timings, if any.
+
+    :param name: the name of the counter.
+    :type name: str
+    :param number: the number to add.
+    :type number: int
+    """
+    timings = _timings.get()
+    if timings is not None:
+        timings.count(name, number)
+
+
+def percentiles(values: Iterable[float],
+                cuts: Iterable[int] = PERCENTILES) -> list[float]:
+    """Returns percentiles of values, interpolated between them.
+
+    :param values: the values, in any order.
+    :type values: Iterable[float]
+    :param cuts: the percentiles to return, from 1 to 99.
+    :type cuts: Iterable[int]
+    :return: the value at every percentile, empty without values.
+    :rtype: list[float]
+    """
+    values = list(values)
+    if not values:
+        return []
+    if len(values) == 1:
+        return [values[0] for _ in cuts]
+    quantiles = statistics.quantiles(values, n=100, method="inclusive")
+    return [quantiles[cut - 1] for cut in cuts]
@@ -0,0 +1,287 @@
+# Standard library imports
+from math import lgamma, log
+
+# Third-party imports
+import numpy as np
+
+
+"""
+Masking of low-complexity regions in queries.
+
+Low-complexity regions, such as poly-A tails and short repeats, align
+to many unrelated sequences. Masking them before a job is submitted
+keeps these meaningless hits out of the results, and out of the time
+spent running, parsing and storing them.
+
+Both maskers score every window of the query at once with numpy,
+using cumulative counts per symbol, so a query is never scanned
+window by window in Python:
+
+    DUST (nucleotides): a window of DUST_WINDOW bases is scored by how
+        often its triplets repeat, sum(c * (c - 1) / 2) / (l - 1) for
+        triplet counts c over the l triplets in the window. Windows
+        scoring above DUST_LEVEL / 10 are masked, without the bases
+        at the edges that lower the score of the region.
+    SEG (proteins): a window of SEG_WINDOW residues is scored by the
+        Shannon entropy of its composition in bits. Runs of windows
+        below SEG_HICUT are masked when they contain a window below
+        SEG_LOCUT, trimmed to their least probable subsequence.
+
+The masked regions are replaced by N or X in the submitted query,
+the stored sequence is kept as it was submitted.
+"""
+
+
+DUST_WINDOW = 64
+DUST_LEVEL = 20
+
+SEG_WINDOW = 12
+SEG_LOCUT = 2.2
+SEG_HICUT = 2.5
+
+AMINO_ACIDS = b"ACDEFGHIKLMNPQRSTVWY"
+
+MASK_CHARACTERS = {
+    "blastn": "N",
+    "blastp": "X",
+}
+
+
+def _window_counts(codes: np.ndarray, symbol: int,
+                   window: int) -> np.ndarray:
+    """Counts a symbol in every window of a sequence of codes.
+
+    :param codes: the sequence, one code per position.
+    :type codes: np.ndarray
+    :param symbol: the code to count.
+    :type symbol: int
+    :param window: the length of a window.
+    :type window: int
+    :return: the count for every window start.
+    :rtype: np.ndarray
+    """
+    cumulative = np.concatenate(
+        ([0], np.cumsum(codes == symbol, dtype=np.int32)))
+    return cumulative[window:] - cumulative[:-window]
+
+
+def _regions(masked: np.ndarray, window: int) -> list[tuple[int, int]]:
+    """Merges masked windows into regions of the sequence.
+
+    :param masked: for every window start, whether it's masked.
+    :type masked: np.ndarray
+    :param window: the length of a window.
+    :type window: int
+    :return: the regions as (start, end), end exclusive.
+    :rtype: list[tuple[int, int]]
+    """
+    edges = np.diff(np.concatenate(([0], masked.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1) - 1 + window
+    return [(int(start), int(end)) for start, end in zip(starts, ends)]
+
+
+def dust_regions(sequence: str, window: int = DUST_WINDOW,
+                 level: int = DUST_LEVEL) -> list[tuple[int, int]]:
+    """Finds the low-complexity regions of a nucleotide sequence.
+
+    :param sequence: the sequence, of A, C, G and T in either case.
+    :type sequence: str
+    :param window: the length of a window in bases.
+    :type window: int
+    :param level: the masking threshold, 10 times the score.
+    :type level: int
+    :return: the regions as (start, end), end exclusive.
+    :rtype: list[tuple[int, int]]
+    """
+    window = min(window, len(sequence))
+    if window < 4:
+        return []
+
+    lookup = np.zeros(256, dtype=np.int8)
+    for code, base in enumerate(b"ACGT"):
+        lookup[[base, base + 32]] = code
+    bases = lookup[np.frombuffer(sequence.encode("ascii"), dtype=np.uint8)]
+    triplets = bases[:-2] * 16 + bases[1:-1] * 4 + bases[2:]
+
+    length = window - 2
+    pairs = np.zeros(len(triplets) - length + 1, dtype=np.int64)
+    for triplet in np.unique(triplets):
+        counts = _window_counts(triplets, triplet, length)
+        pairs += counts * (counts - 1) // 2
+    return [_trim_dust_region(triplets, start, end, window)
+            for start, end in _regions(pairs * 10 > level * (length - 1),
+                                       window)]
+
+
+def _trim_dust_region(triplets: np.ndarray, start: int, end: int,
+                      window: int) -> tuple[int, int]:
+    """Trims the bases a masked region took over from its windows.
+
+    A region covers its masked windows entirely, including the bases
+    at the edges that don't repeat. Each end is moved inwards, by at
+    most a window, to where the score of the region is highest.
+
+    :param triplets: the triplet codes of the sequence.
+    :type triplets: np.ndarray
+    :param start: the start of the region.
+    :type start: int
+    :param end: the end of the region, exclusive.
+    :type end: int
+    :param window: the length of a window in bases.
+    :type window: int
+    :return: the trimmed region as (start, end), end exclusive.
+    :rtype: tuple[int, int]
+    """
+    for reverse in (False, True):
+        region = triplets[start:end - 2]
+        if reverse:
+            region = region[::-1]
+        # The pairs a triplet forms with the triplets after it, which
+        # are lost when the region starts after it
+        later = np.zeros(len(region), dtype=np.int64)
+        for triplet in np.unique(region):
+            matches = region == triplet
+            later[matches] = np.arange(matches.sum() - 1, -1, -1)
+        cuts = min(window, len(region) - 2)
+        pairs = later.sum() - np.concatenate(([0], np.cumsum(later[:cuts])))
+        lengths = len(region) - np.arange(cuts + 1)
+        cut = int(np.argmax(pairs / (lengths - 1)))
+        if reverse:
+            end -= cut
+        else:
+            start += cut
+    return start, end
+
+
+def seg_regions(sequence: str, window: int = SEG_WINDOW,
+                locut: float = SEG_LOCUT,
+                hicut: float = SEG_HICUT) -> list[tuple[int, int]]:
+    """Finds the low-complexity regions of a protein sequence.
+
+    :param sequence: the sequence, of amino acids in either case.
+    :type sequence: str
+    :param window: the length of a window in residues.
+    :type window: int
+    :param locut: the entropy in bits below which a window starts a
+        region.
+    :type locut: float
+    :param hicut: the entropy in bits below which a window extends a
+        region.
+    :type hicut: float
+    :return: the regions as (start, end), end exclusive.
+    :rtype: list[tuple[int, int]]
+    """
+    if len(sequence) < window:
+        return []
+
+    residues = np.frombuffer(sequence.upper().encode("ascii"),
+                             dtype=np.uint8)
+    entropy = np.zeros(len(residues) - window + 1)
+    for residue in np.unique(residues):
+        frequencies = _window_counts(residues, residue, window) / window
+        present = frequencies > 0
+        entropy[present] -= frequencies[present] \
+            * np.log2(frequencies[present])
+
+    # Runs of windows below hicut are kept if they contain a window
+    # below locut
+    extend = entropy <= hicut
+    run_ids = np.cumsum(np.diff(np.concatenate(([0], extend))) == 1)
+    triggered = np.unique(run_ids[entropy <= locut])
+    return [_trim_seg_region(residues, start, end, window)
+            for start, end in _regions(
+                extend & np.isin(run_ids, triggered), window)]
+
+
+def _seg_log_probability(counts: np.ndarray) -> float:
+    """Returns the log probability of a composition of residues.
+
+    The probability of drawing a sequence with the same complexity
+    from random residues, as defined by Wootton and Federhen: the
+    number of compositions with the same complexity, times the number
+    of sequences with the composition, over all sequences.
+
+    :param counts: the count of every amino acid.
+    :type counts: np.ndarray
+    :return: the natural logarithm of the probability.
+    :rtype: float
+    """
+    length = int(counts.sum())
+    compositions = lgamma(len(counts) + 1) - sum(
+        lgamma(types + 1) for types in np.bincount(counts))
+    sequences = lgamma(length + 1) - sum(
+        lgamma(count + 1) for count in counts)
+    return compositions + sequences - length * log(len(counts))
+
+
+def _trim_seg_region(residues: np.ndarray, start: int, end: int,
+                     window: int) -> tuple[int, int]:
+    """Trims the residues a masked region took over from its windows.
+
+    Each end is moved inwards, by less than a window, to the
+    subsequence with the lowest probability, see
+    `_seg_log_probability`. Unlike the entropy, this favours longer
+    subsequences of low complexity.
+
+    :param residues: the residues of the sequence.
+    :type residues: np.ndarray
+    :param start: the start of the region.
+    :type start: int
+    :param end: the end of the region, exclusive.
+    :type end: int
+    :param window: the length of a window in residues.
+    :type window: int
+    :return: the trimmed region as (start, end), end exclusive.
+    :rtype: tuple[int, int]
+    """
+    region = residues[start:end]
+    cumulative = np.zeros((len(region) + 1, len(AMINO_ACIDS)),
+                          dtype=np.int64)
+    cumulative[1:] = np.cumsum(
+        region[:, None] == np.frombuffer(AMINO_ACIDS, dtype=np.uint8),
+        axis=0)
+
+    cuts = range(min(window, len(region)))
+    best = min(((_seg_log_probability(
+        cumulative[len(region) - right] - cumulative[left]), left, right)
+        for left in cuts for right in cuts
+        if left + right < len(region)))
+    return start + best[1], end - best[2]
+
+
+def low_complexity_regions(sequence: str,
+                           program: str) -> list[tuple[int, int]]:
+    """Finds the low-complexity regions of a query.
+
+    :param sequence: the query sequence.
+    :type sequence: str
+    :param program: "blastn" for DUST, or "blastp" for SEG.
+    :type program: str
+    :return: the regions as (start, end), end exclusive.
+    :rtype: list[tuple[int, int]]
+    """
+    if program == "blastn":
+        return dust_regions(sequence)
+    return seg_regions(sequence)
+
+
+def mask_sequence(sequence: str, regions: list, program: str) -> str:
+    """Replaces the regions of a query by N or X.
+
+    :param sequence: the query sequence.
+    :type sequence: str
+    :param regions: the regions as (start, end), end exclusive.
+    :type regions: list
+    :param program: "blastn" or "blastp".
+    :type program: str
+    :return: the masked sequence.
+    :rtype: str
+    """
+    if not regions:
+        return sequence
+    masked = bytearray(sequence.encode("ascii"))
+    character = ord(MASK_CHARACTERS[program])
+    for start, end in regions:
+        masked[start:end] = bytes([character]) * (end - start)
+    return masked.decode("ascii")
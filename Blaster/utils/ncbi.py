@@ -1,17 +1,30 @@
 # Standard library imports
 from urllib.error import URLError
+import asyncio
+import os
+import re
+from typing import TYPE_CHECKING
 
 # Third-party imports
-from Bio import Entrez
-from Bio.Blast import NCBIWWW, NCBIXML
-import Bio.Blast.Record
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache as django_cache
+from django.db import IntegrityError, transaction
+from django.db.models import Min
+from django.utils import timezone
 
 # Local imports
 from Blaster.models import BlastJob, BlastHit, EntrezAccession, \
-    EntrezAccessionCache, UnprocessedBlastJob
+    EntrezAccessionCache, UnprocessedBlastJob, SubjectSequence
+from Blaster.utils.async_entrez import aperform_entrez_query
+from Blaster.utils.instrumentation import count, record_timings, timed
+from Blaster.utils.masking import low_complexity_regions, mask_sequence
 from Blaster.utils.queries import get_entrez_accession_from_code, \
     get_blast_job_from_id
 
+if TYPE_CHECKING:
+    import Bio.Blast.Record
+
 
 def get_entrez_db_from_blast_program(program: str) -> str:
     """Converts a BLAST program to the corresponding Entrez database.
@@ -51,8 +64,260 @@ def query_and_create_entrez_accession_cache(accession_code: str, db: str
     """
     genbank = perform_entrez_query(accession_code, db, 'gb', 'text')
     fasta = perform_entrez_query(accession_code, db, 'fasta', 'text')
-    return EntrezAccessionCache.objects\
+    cache = EntrezAccessionCache.objects\
         .create_entrez_accession_cache(genbank, fasta)
+    EntrezAccessionCache.objects.evict()
+    return cache
+
+
+def entrez_fetch_key(accession_id: int) -> str:
+    """Returns the cache key marking a fetch of an accession in flight.
+
+    The marker is set by the web process or task scheduling the fetch,
+    and removed by the process performing it once it's done, through
+    the cache shared by both, see CACHES in settings.py.
+
+    :param accession_id: identifier for the EntrezAccession.
+    :type accession_id: int.
+    :return: the key in the Django cache.
+    :rtype: str.
+    """
+    return f'entrez-fetch-{accession_id}'
+
+
+def entrez_refresh_key(cache_id: int) -> str:
+    """Returns the cache key marking a refresh of an entry in flight.
+
+    Like `entrez_fetch_key`, the marker is set when the refresh is
+    scheduled, and removed once it's done.
+
+    :param cache_id: identifier for the EntrezAccessionCache.
+    :type cache_id: int.
+    :return: the key in the Django cache.
+    :rtype: str.
+    """
+    return f'entrez-refresh-{cache_id}'
+
+
+def split_entrez_records(text: str, rettype: str) -> dict[str, str]:
+    """Splits the result of an Entrez query for multiple accessions.
+
+    Takes the text of a GenBank ('gb') or FASTA ('fasta') efetch and
+    returns every record by its accession, both with and without
+    its version. An error message results in no records.
+
+    :param text: the result of the Entrez query.
+    :type text: str.
+    :param rettype: the type of the result, 'gb' or 'fasta'.
+    :type rettype: str.
+    :return: the records by accession.
+    :rtype: dict[str, str].
+    """
+    if text.startswith('Error:'):
+        return {}
+
+    if rettype == 'gb':
+        records = [record.lstrip('\n') + '//\n'
+                   for record in re.split(r'^//[ \t]*$\n?', text, flags=re.M)
+                   if record.strip()]
+        pattern = re.compile(r'^VERSION\s+(\S+)|^ACCESSION\s+(\S+)',
+                             re.M)
+    else:
+        records = ['>' + record.lstrip('>').rstrip('\n') + '\n'
+                   for record in re.split(r'^(?=>)', text, flags=re.M)
+                   if record.strip()]
+        pattern = re.compile(r'^>(\S+)()')
+
+    by_accession = {}
+    for record in records:
+        matches = [match.group(1) or match.group(2)
+                   for match in pattern.finditer(record)]
+        if matches:
+            # The versioned accession takes precedence
+            accession = max(matches, key=lambda code: '.' in code)
+            by_accession[accession] = record
+            by_accession.setdefault(accession.split('.')[0], record)
+    return by_accession
+
+
+def fetch_entrez_accession_caches(accession_ids: list[int], db: str) -> int:
+    """Performs batched Entrez queries and stores GenBank & FASTA data.
+
+    Takes EntrezAccession ids and fetches the GenBank and FASTA data of
+    the accessions that have no cache yet, ENTREZ_BATCH_SIZE accessions
+    per Entrez query. Entrez is queried no more than 3 times a second,
+    or 10 with an ENTREZ_API_KEY, which Bio.Entrez enforces.
+    Accessions of which no data is returned are left without a cache,
+    so they can be fetched again when their hit is visited.
+
+    :param accession_ids: identifiers for the EntrezAccessions.
+    :type accession_ids: list[int].
+    :param db: Entrez database in which the entries are stored.
+    :type db: str.
+    :return: the number of accessions that received a cache.
+    :rtype: int.
+    """
+    accessions = list(EntrezAccession.objects
+                      .filter(id__in=accession_ids, cache=None))
+    batch_size = settings.ENTREZ_BATCH_SIZE
+    cached = 0
+
+    for start in range(0, len(accessions), batch_size):
+        batch = accessions[start:start + batch_size]
+        codes = ','.join(accession.code for accession in batch)
+        genbank = split_entrez_records(
+            perform_entrez_query(codes, db, 'gb', 'text'), 'gb')
+        fasta = split_entrez_records(
+            perform_entrez_query(codes, db, 'fasta', 'text'), 'fasta')
+
+        cached += store_entrez_records(batch, genbank, fasta)
+
+    django_cache.delete_many(
+        [entrez_fetch_key(accession_id) for accession_id in accession_ids])
+    EntrezAccessionCache.objects.evict()
+    return cached
+
+
+async def afetch_entrez_accession_caches(accession_ids: list[int],
+                                         db: str) -> int:
+    """Performs batched Entrez queries and stores GenBank & FASTA data.
+
+    The asynchronous counterpart of `fetch_entrez_accession_caches`,
+    for async views. The Entrez queries are performed by the async
+    Entrez client, the GenBank and FASTA queries of a batch at the
+    same time, so no thread is held while NCBI answers.
+
+    :param accession_ids: identifiers for the EntrezAccessions.
+    :type accession_ids: list[int].
+    :param db: Entrez database in which the entries are stored.
+    :type db: str.
+    :return: the number of accessions that received a cache.
+    :rtype: int.
+    """
+    accessions = [accession async for accession in EntrezAccession.objects
+                  .filter(id__in=accession_ids, cache=None)]
+    batch_size = settings.ENTREZ_BATCH_SIZE
+    cached = 0
+
+    for start in range(0, len(accessions), batch_size):
+        batch = accessions[start:start + batch_size]
+        codes = ','.join(accession.code for accession in batch)
+        genbank, fasta = await asyncio.gather(
+            aperform_entrez_query(codes, db, 'gb', 'text'),
+            aperform_entrez_query(codes, db, 'fasta', 'text'))
+        cached += await sync_to_async(store_entrez_records)(
+            batch, split_entrez_records(genbank, 'gb'),
+            split_entrez_records(fasta, 'fasta'))
+
+    await django_cache.adelete_many(
+        [entrez_fetch_key(accession_id) for accession_id in accession_ids])
+    await sync_to_async(EntrezAccessionCache.objects.evict)()
+    return cached
+
+
+def store_entrez_records(accessions: list[EntrezAccession],
+                         genbank: dict[str, str],
+                         fasta: dict[str, str]) -> int:
+    """Stores the GenBank & FASTA records of accessions in their cache.
+
+    Accessions without a record are skipped, as are accessions that
+    received a cache in the meantime.
+
+    :param accessions: the queried EntrezAccessions.
+    :type accessions: list[EntrezAccession].
+    :param genbank: GenBank records by accession, see
+        `split_entrez_records`.
+    :type genbank: dict[str, str].
+    :param fasta: FASTA records by accession.
+    :type fasta: dict[str, str].
+    :return: the number of accessions that received a cache.
+    :rtype: int.
+    """
+    cached = 0
+    for accession in accessions:
+        if accession.code not in genbank and accession.code not in fasta:
+            continue
+        cache = EntrezAccessionCache.objects.create_entrez_accession_cache(
+            genbank.get(accession.code), fasta.get(accession.code))
+        # The accession may have been cached in the meantime
+        if EntrezAccession.objects.filter(id=accession.id, cache=None)\
+                .update(cache=cache):
+            cached += 1
+        else:
+            cache.delete()
+    return cached
+
+
+def prefetch_entrez_accession_caches(blast_job_id: int) -> int:
+    """Fetches the GenBank & FASTA data of the best hits of a job.
+
+    Takes a BlastJob id, and fetches the data of the accessions of its
+    ENTREZ_PREFETCH_HITS best hits by E-value that have no cache yet,
+    so their BLAST hit pages don't have to wait for NCBI.
+
+    :param blast_job_id: identifier for the BlastJob.
+    :type blast_job_id: int.
+    :return: the number of accessions that received a cache.
+    :rtype: int.
+    """
+    blast_job = BlastJob.objects.filter(id=blast_job_id).first()
+    if blast_job is None or blast_job.error_msg:
+        return 0
+
+    accession_ids = list(
+        BlastHit.objects.filter(job_id=blast_job_id, accession__cache=None)
+        .values('accession_id').annotate(best=Min('e_value'))
+        .order_by('best')
+        .values_list('accession_id', flat=True)
+        [:settings.ENTREZ_PREFETCH_HITS])
+    if not accession_ids:
+        return 0
+
+    django_cache.set_many(
+        {entrez_fetch_key(accession_id): True
+         for accession_id in accession_ids},
+        settings.ENTREZ_FETCH_TIMEOUT)
+    return fetch_entrez_accession_caches(
+        accession_ids, get_entrez_db_from_blast_program(blast_job.program))
+
+
+def refresh_entrez_accession_cache(cache_id: int) -> None:
+    """Fetches the GenBank & FASTA data of a cache entry again.
+
+    Takes the id of an EntrezAccessionCache and performs the Entrez
+    queries for its accession again. The Entrez database is derived
+    from the program of a job with a hit on the accession.
+    Data that can't be fetched again is kept as it was. The entry is
+    only marked as fetched when at least one of the queries succeeded,
+    so an entry that can't be refreshed stays stale, and is refreshed
+    again later, instead of being kept for another TTL.
+    Entries that no longer exist, or have no accession, are skipped.
+
+    :param cache_id: identifier for the EntrezAccessionCache.
+    :type cache_id: int.
+    """
+    try:
+        accession = EntrezAccession.objects.filter(cache__id=cache_id)\
+            .select_related('cache').first()
+        hit = BlastHit.objects.filter(accession=accession)\
+            .select_related('job').first() if accession else None
+        if hit is None:
+            return
+
+        db = get_entrez_db_from_blast_program(hit.job.program)
+        cache = accession.cache
+        fetched = False
+        for name, rettype in (('genbank', 'gb'), ('fasta', 'fasta')):
+            result = perform_entrez_query(accession.code, db, rettype,
+                                          'text')
+            if not result.startswith('Error:'):
+                setattr(cache, name, result)
+                fetched = True
+        if fetched:
+            cache.fetches += 1
+            cache.save()
+    finally:
+        django_cache.delete(entrez_refresh_key(cache_id))
 
 
 def perform_entrez_query(accession: str, db: str, rettype: str, retmode: str) \
@@ -73,12 +338,19 @@ def perform_entrez_query(accession: str, db: str, rettype: str, retmode: str) \
     :return: query result or error message.
     :rtype: str.
     """
+    # Biopython is imported on first use, so web processes that never
+    # query NCBI themselves don't load it, see benchmarks/startup.py
+    from Bio import Entrez
+
     Entrez.email = 'masterblast@bbc.com'
+    Entrez.api_key = os.environ.get('ENTREZ_API_KEY')
     try:
-        with Entrez.efetch(
-                db=db, id=accession, rettype=rettype,
-                retmode=retmode) as handle:
-            return handle.read()
+        with timed('entrez'):
+            count('remote_calls')
+            with Entrez.efetch(
+                    db=db, id=accession, rettype=rettype,
+                    retmode=retmode) as handle:
+                return handle.read()
     except URLError:
         return 'Error: a URLError occurred while executing Entrez query'
     except IOError:
@@ -114,11 +386,14 @@ def delete_unprocessed_blast_job(blast_job_id: int) -> None:
     Removes an UnprocessedBlastJob from the database.
 
     Takes a BlastJob id and tries to retrieve and delete its 
-    unprocessed counterpart from the database.
+    unprocessed counterpart from the database. As this is done once
+    the job is processed, the time it finished is recorded as well.
 
     :param blast_job_id: id of the UnprocessedBlastJob to delete.
     :type blast_job_id: int.
     """
+    BlastJob.objects.filter(pk=blast_job_id, finished=None)\
+        .update(finished=timezone.now())
     try:
         UnprocessedBlastJob.objects.get(job__pk=blast_job_id).delete()
     except UnprocessedBlastJob.DoesNotExist:
@@ -127,20 +402,68 @@ def delete_unprocessed_blast_job(blast_job_id: int) -> None:
         pass
 
 
+def limit_blast_record(
+        record: 'Bio.Blast.Record',
+        expect: float,
+        hitlist_size: int,
+        max_hsps: int
+        ) -> list[tuple['Bio.Blast.Record.Alignment',
+                        list['Bio.Blast.Record.HSP']]]:
+    """Limits the alignments of a Bio.Blast.Record to the result size.
+
+    NCBI is asked for the same limits when a job is submitted, they
+    are enforced again as NCBI may return more, and as max_hsps can't
+    be passed to qblast. HSPs with an E-value above expect are left
+    out, as are HSPs beyond the first max_hsps of an alignment, when
+    max_hsps isn't 0. Of the alignments with any HSPs left, the first
+    hitlist_size are kept, in the order NCBI ranked them.
+
+    :param record: collection of alignments from BLAST.
+    :type record: Bio.Blast.Record.
+    :param expect: the E-value threshold.
+    :type expect: float.
+    :param hitlist_size: the number of alignments to keep.
+    :type hitlist_size: int.
+    :param max_hsps: the number of HSPs to keep per alignment, or 0
+        to keep all of them.
+    :type max_hsps: int.
+    :return: the alignments to keep, with their HSPs to keep.
+    :rtype: list[tuple[Alignment, list[HSP]]].
+    """
+    kept = []
+    for alignment in record.alignments:
+        if len(kept) == hitlist_size:
+            break
+        hsps = [hsp for hsp in alignment.hsps if hsp.expect <= expect]
+        if max_hsps:
+            hsps = hsps[:max_hsps]
+        if hsps:
+            kept.append((alignment, hsps))
+    return kept
+
+
 def parse_blast_job_results(
         blast_job: BlastJob,
-        record: Bio.Blast.Record,
+        record: 'Bio.Blast.Record',
         entrez_db: str
         ) -> None:
     """Creates BlastHit objects from a Bio.Blast.Record and BlastJob.
 
     Takes a BlastJob, a Bio.Blast.Record and Entrez database identifier
-    and creates BlastHit objects from them. For each alignment in the
-    record, the MasterBlast database is queried for an EntrezAccession.
-    A new one is created if it doesn't exist yet. The alignment
-    is skipped if no EntrezAccession can be retrieved or created.
-    For each high-scoring segment pair in the alignment, a BlastHit is
-    created.
+    and creates BlastHit objects from them. Only the alignments and
+    high-scoring segment pairs within the result size of the job are
+    kept, see `limit_blast_record`. For each kept alignment, the
+    MasterBlast database is queried for an EntrezAccession.
+    A new one is created if it doesn't exist yet, only then is the
+    organism looked up in Entrez. The alignment is skipped if no
+    EntrezAccession can be retrieved or created.
+    For each kept pair in the alignment, a BlastHit is created. The
+    hits are stored at once, with their subject sequences, once all
+    accessions are known, see `store_blast_hits`.
+
+    The number of pairs NCBI returned and the number of hits stored
+    are recorded on the job. The time spent storing rows is added to
+    the insert phase of the job, see utils/instrumentation.py.
 
     :param blast_job: BlastJob to parse the results of.
     :type blast_job: BlastJob.
@@ -149,8 +472,11 @@ def parse_blast_job_results(
     :param entrez_db: Entrez database corresponding to the BlastJob.
     :type entrez_db: str.
     """
-    for alignment in record.alignments:
-        organism = get_entrez_organism(alignment.accession, entrez_db)
+    kept = limit_blast_record(record, blast_job.expect,
+                              blast_job.hitlist_size, blast_job.max_hsps)
+
+    hits = []
+    for alignment, hsps in kept:
         description = ' '.join(alignment.title.split(' ')[1::])
 
         # Try to get EntrezAccession from Django db.
@@ -159,53 +485,155 @@ def parse_blast_job_results(
         
         # Create a new one if it doesn't exist.
         except EntrezAccession.DoesNotExist:
-            accession = EntrezAccession.objects\
-                .create_entrez_accession(alignment.accession, organism)
+            organism = get_entrez_organism(alignment.accession, entrez_db)
+            with timed('insert'):
+                accession = EntrezAccession.objects\
+                    .create_entrez_accession(alignment.accession, organism)
+            count('rows_written')
         
         # Skip the alignment if an EntrezAccession cannot be created.
         except ValueError:
             continue
 
-        for hsp in alignment.hsps:
-            BlastHit.objects.create_hit(
-                blast_job_id=blast_job.id,
-                accession_id=accession.id,
-                description=description,
-                blast_score=hsp.score,
-                bit_score=hsp.bits,
-                e_value=hsp.expect,
-                identities=hsp.identities,
-                align_length=hsp.align_length,
-                query_start=hsp.query_start,
-                query_end=hsp.query_end,
-                query_length=len(blast_job.sequence),
-                subject_seq=hsp.sbjct,
-                subject_start=hsp.sbjct_start,
-                subject_end=hsp.sbjct_end
-            )
+        for hsp in hsps:
+            hits.append(({
+                'blast_job_id': blast_job.id,
+                'accession_id': accession.id,
+                'description': description,
+                'blast_score': hsp.score,
+                'bit_score': hsp.bits,
+                'e_value': hsp.expect,
+                'identities': hsp.identities,
+                'align_length': hsp.align_length,
+                'query_start': hsp.query_start,
+                'query_end': hsp.query_end,
+                'query_length': blast_job.sequence_length,
+                'subject_start': hsp.sbjct_start,
+                'subject_end': hsp.sbjct_end
+            }, hsp.sbjct))
+
+    with timed('insert'):
+        store_blast_hits(hits)
+    count('rows_written', len(hits))
+
+    blast_job.returned_hsps = sum(
+        len(alignment.hsps) for alignment in record.alignments)
+    blast_job.stored_hits = len(hits)
+    blast_job.save(update_fields=['returned_hsps', 'stored_hits'])
+
+
+def store_blast_hits(hits: list[tuple[dict, str]]) -> None:
+    """Stores BlastHits, with their subject sequences, in bulk.
+
+    The subject sequences of all hits are retrieved or stored at once,
+    and the hits are inserted at once, in a single transaction. A
+    sequence that is deleted as unreferenced, see
+    `SubjectSequenceManager.delete_unreferenced`, after it was found
+    but before the hits refer to it, fails the insert, which is then
+    tried once more.
+
+    :param hits: the arguments of `BlastHitManager.build_hit` of every
+        hit, except the subject, with its subject sequence.
+    :type hits: list[tuple[dict, str]]
+    :raises IntegrityError: if the hits still can't be inserted.
+    """
+    for attempt in range(2):
+        try:
+            with transaction.atomic():
+                subjects = SubjectSequence.objects.get_or_create_sequences(
+                    sequence for _, sequence in hits)
+                BlastHit.objects.bulk_create(
+                    [BlastHit.objects.build_hit(
+                        subject=subjects[sequence], **arguments)
+                     for arguments, sequence in hits],
+                    batch_size=500)
+            return
+        except IntegrityError:
+            if attempt:
+                raise
+
+
+def mask_blast_job_sequence(blast_job: BlastJob) -> str:
+    """Masks the low-complexity regions of the query of a BlastJob.
+
+    Jobs that don't ask for masking are submitted as they are. The
+    masked regions are stored on the job, to be shown on the result
+    page.
+
+    :param blast_job: the BlastJob to be submitted.
+    :type blast_job: BlastJob.
+    :return: the sequence to submit.
+    :rtype: str.
+    """
+    if not blast_job.mask_low_complexity:
+        return blast_job.sequence
+
+    regions = low_complexity_regions(blast_job.sequence, blast_job.program)
+    blast_job.masked_regions = [list(region) for region in regions]
+    blast_job.save(update_fields=['masked_regions'])
+    return mask_sequence(blast_job.sequence, regions, blast_job.program)
 
 
 def perform_blast_job(blast_job_id: int) -> None:
     """Queries NCBI BLAST using NCBIWWW.qblast and stores the result.
 
     Takes a BlastJob id and performs the BLAST job using NCBIWWW,
-    NCBIXML and get_entrez_db_from_blast_program. If an error occurs, 
+    NCBIXML and get_entrez_db_from_blast_program. The query is masked
+    first if the job asks for it, see `mask_blast_job_sequence`, and
+    submitted with the E-value threshold and hitlist size of the job.
+    If an error occurs, 
     the BLAST job will be given an informative message as their
     error_msg attribute. The resulting records are parsed if no errors
     occurred.
 
+    The seconds spent per phase, and the number of remote calls and
+    rows written, are stored on the job, also when it fails, see
+    utils/instrumentation.py.
+
     :param blast_job_id: identifier for the BlastJob.
     :type blast_job_id: int.
     """
     blast_job = get_blast_job_from_id(blast_job_id)
 
+    with record_timings() as timings:
+        try:
+            with timings.phase('total'):
+                _process_blast_job(blast_job)
+        finally:
+            blast_job.phase_seconds = timings.seconds
+            blast_job.phase_counts = timings.counts
+            blast_job.save(update_fields=['phase_seconds', 'phase_counts'])
+
+
+def _process_blast_job(blast_job: BlastJob) -> None:
+    """Performs the BLAST job, see `perform_blast_job`.
+
+    :param blast_job: the BlastJob to perform.
+    :type blast_job: BlastJob.
+    """
+    from Bio.Blast import NCBIWWW, NCBIXML
+
+    blast_job_id = blast_job.id
     try:
         # Depending on where the BLAST job fails, the error_msg is set
         error_msg = 'Failed: the BLAST job could not be executed.'
-        handle = NCBIWWW.qblast(blast_job.program, "nr", blast_job.sequence)
+        query = mask_blast_job_sequence(blast_job)
+        if settings.NCBI_BLAST_URL != NCBIWWW.NCBI_BLAST_URL:
+            # qblast spaces all polls of the process 20 seconds apart,
+            # which only NCBI asks for
+            NCBIWWW.qblast.previous = 0
+        with timed('blast'):
+            count('remote_calls')
+            handle = NCBIWWW.qblast(blast_job.program, "nr", query,
+                                    url_base=settings.NCBI_BLAST_URL,
+                                    expect=blast_job.expect,
+                                    hitlist_size=blast_job.hitlist_size,
+                                    alignments=blast_job.hitlist_size,
+                                    descriptions=blast_job.hitlist_size)
 
         error_msg = 'Failed: the BLAST job result could not be read.'
-        record = NCBIXML.read(handle)
+        with timed('parse'):
+            record = NCBIXML.read(handle)
 
         error_msg = 'Failed: the Entrez database could not be found.'
         entrez_db = get_entrez_db_from_blast_program(blast_job.program)
@@ -214,7 +642,7 @@ def perform_blast_job(blast_job_id: int) -> None:
         # the BlastJob
         delete_unprocessed_blast_job(blast_job_id)
         blast_job.error_msg = error_msg
-        blast_job.save()
+        blast_job.save(update_fields=['error_msg'])
         return
     except:
         delete_unprocessed_blast_job(blast_job_id)
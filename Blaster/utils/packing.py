@@ -0,0 +1,271 @@
+# Standard library imports
+import codecs
+import struct
+import zlib
+from typing import Iterator
+
+# Third-party imports
+import numpy as np
+
+
+"""
+Compact binary encodings for biological sequences.
+
+A packed sequence consists of a 5 byte header followed by a payload.
+The first header byte holds the codec, and a flag for sequences that
+were entirely lowercase. The next 4 bytes hold the length of the
+decoded sequence, so the length is known without decoding.
+
+Codecs:
+    RAW: the utf-8 encoded sequence, used when nothing else is smaller.
+    TWO_BIT: 4 nucleotides per byte, for sequences of only ACGT.
+    FOUR_BIT: 2 symbols per byte, for IUPAC nucleotides and gaps.
+    ZLIB: zlib compressed utf-8, used for protein sequences.
+
+All codecs are lossless, the codec is chosen based on the content
+of the sequence rather than the BLAST program it belongs to.
+"""
+
+
+CODEC_RAW = 0
+CODEC_TWO_BIT = 1
+CODEC_FOUR_BIT = 2
+CODEC_ZLIB = 3
+
+LOWERCASE_FLAG = 0x80
+CODEC_MASK = 0x7f
+
+HEADER = struct.Struct(">BI")
+
+TWO_BIT_ALPHABET = b"ACGT"
+FOUR_BIT_ALPHABET = b"ACGTNRYKMSWBDHV-"
+
+
+def _build_lookup_table(alphabet: bytes) -> np.ndarray:
+    """Builds a 256 entry table mapping a byte to its alphabet index.
+
+    :param alphabet: the symbols that can be packed.
+    :type alphabet: bytes
+    :return: lookup table indexed by byte value.
+    :rtype: np.ndarray
+    """
+    table = np.zeros(256, dtype=np.uint8)
+    table[np.frombuffer(alphabet, dtype=np.uint8)] = np.arange(
+        len(alphabet), dtype=np.uint8)
+    return table
+
+
+_ENCODE_TABLES = {
+    CODEC_TWO_BIT: _build_lookup_table(TWO_BIT_ALPHABET),
+    CODEC_FOUR_BIT: _build_lookup_table(FOUR_BIT_ALPHABET),
+}
+_DECODE_TABLES = {
+    CODEC_TWO_BIT: np.frombuffer(TWO_BIT_ALPHABET, dtype=np.uint8),
+    CODEC_FOUR_BIT: np.frombuffer(FOUR_BIT_ALPHABET, dtype=np.uint8),
+}
+_BITS = {
+    CODEC_TWO_BIT: 2,
+    CODEC_FOUR_BIT: 4,
+}
+
+
+def _pack_bits(data: bytes, codec: int) -> bytes:
+    """Packs bytes of a known alphabet into 2 or 4 bits per symbol.
+
+    :param data: the sequence, only containing symbols of the codec.
+    :type data: bytes
+    :param codec: CODEC_TWO_BIT or CODEC_FOUR_BIT.
+    :type codec: int
+    :return: the packed payload.
+    :rtype: bytes
+    """
+    bits = _BITS[codec]
+    per_byte = 8 // bits
+    codes = _ENCODE_TABLES[codec][np.frombuffer(data, dtype=np.uint8)]
+    padding = -len(codes) % per_byte
+    if padding:
+        codes = np.concatenate((codes, np.zeros(padding, dtype=np.uint8)))
+    shifts = np.arange(per_byte - 1, -1, -1, dtype=np.uint8) * bits
+    packed = np.bitwise_or.reduce(
+        codes.reshape(-1, per_byte) << shifts, axis=1)
+    return packed.astype(np.uint8).tobytes()
+
+
+def _unpack_bits(payload: bytes, codec: int, length: int) -> bytes:
+    """Reverses `_pack_bits`.
+
+    :param payload: the packed payload.
+    :type payload: bytes
+    :param codec: CODEC_TWO_BIT or CODEC_FOUR_BIT.
+    :type codec: int
+    :param length: the number of symbols that were packed.
+    :type length: int
+    :return: the unpacked sequence.
+    :rtype: bytes
+    """
+    bits = _BITS[codec]
+    per_byte = 8 // bits
+    shifts = np.arange(per_byte - 1, -1, -1, dtype=np.uint8) * bits
+    packed = np.frombuffer(payload, dtype=np.uint8)
+    codes = (packed[:, None] >> shifts) & ((1 << bits) - 1)
+    return _DECODE_TABLES[codec][codes.ravel()[:length]].tobytes()
+
+
+def pack_sequence(sequence: str) -> bytes:
+    """Packs a sequence into the smallest fitting binary encoding.
+
+    Sequences of only ACGT are packed with 2 bits per base, IUPAC
+    nucleotide sequences with 4 bits per symbol. Any other sequence,
+    such as a protein sequence, is zlib compressed when this is
+    smaller than storing it as is.
+
+    Sequences that are entirely lowercase are packed as uppercase,
+    and flagged to be restored as lowercase on unpacking.
+
+    :param sequence: the sequence to pack.
+    :type sequence: str
+    :return: the packed sequence, including its header.
+    :rtype: bytes
+    """
+    data = sequence.encode("utf-8")
+    lowercase = data.islower()
+    upper = data.upper() if lowercase else data
+    flag = LOWERCASE_FLAG if lowercase else 0
+
+    if not upper.translate(None, TWO_BIT_ALPHABET):
+        return HEADER.pack(CODEC_TWO_BIT | flag, len(sequence)) \
+            + _pack_bits(upper, CODEC_TWO_BIT)
+    if not upper.translate(None, FOUR_BIT_ALPHABET):
+        return HEADER.pack(CODEC_FOUR_BIT | flag, len(sequence)) \
+            + _pack_bits(upper, CODEC_FOUR_BIT)
+
+    return compress_text(sequence)
+
+
+def compress_text(text: str) -> bytes:
+    """Compresses text with zlib, in the format of `pack_sequence`.
+
+    The text is stored as is when compressing does not make it smaller.
+    Used for text that is not a sequence, such as GenBank records.
+
+    :param text: the text to compress.
+    :type text: str
+    :return: the compressed text, including its header.
+    :rtype: bytes
+    """
+    data = text.encode("utf-8")
+    compressed = zlib.compress(data)
+    if len(compressed) < len(data):
+        return HEADER.pack(CODEC_ZLIB, len(text)) + compressed
+    return HEADER.pack(CODEC_RAW, len(text)) + data
+
+
+def unpack_sequence(packed: bytes | memoryview) -> str:
+    """Restores a sequence packed by `pack_sequence`.
+
+    An empty value is considered an empty sequence.
+
+    :param packed: the packed sequence, including its header.
+    :type packed: bytes | memoryview
+    :raises ValueError: if the codec of the header is unknown.
+    :return: the original sequence.
+    :rtype: str
+    """
+    packed = bytes(packed)
+    if not packed:
+        return ""
+
+    codec, length = HEADER.unpack_from(packed)
+    payload = packed[HEADER.size:]
+    lowercase = codec & LOWERCASE_FLAG
+    codec &= CODEC_MASK
+
+    if codec in _BITS:
+        data = _unpack_bits(payload, codec, length)
+    elif codec == CODEC_ZLIB:
+        data = zlib.decompress(payload)
+    elif codec == CODEC_RAW:
+        data = payload
+    else:
+        raise ValueError(f"Error: unknown sequence codec {codec}")
+
+    sequence = data.decode("utf-8")
+    return sequence.lower() if lowercase else sequence
+
+
+def _decompressed_blocks(payload: bytes | memoryview, block_size: int
+                         ) -> Iterator[bytes]:
+    """Decompresses a zlib payload, a block of at most block_size
+    bytes at a time.
+
+    :param payload: the compressed payload.
+    :type payload: bytes | memoryview
+    :param block_size: the maximum size of a decompressed block.
+    :type block_size: int
+    :return: the decompressed data, in blocks.
+    :rtype: Iterator[bytes]
+    """
+    decompressor = zlib.decompressobj()
+    while payload:
+        yield decompressor.decompress(payload, block_size)
+        payload = decompressor.unconsumed_tail
+    yield decompressor.flush()
+
+
+def unpack_text_chunks(packed: bytes | memoryview, chunk_size: int
+                       ) -> Iterator[str]:
+    """Restores a sequence or text packed by `pack_sequence` or
+    `compress_text`, a chunk at a time.
+
+    Compressed text is decompressed as the chunks are read, so the
+    whole text is never held in memory at once. A chunk holds
+    chunk_size bytes of the encoded text, besides a character split
+    from the previous chunk, which is decoded with the next one.
+
+    :param packed: the packed sequence or text, including its header.
+    :type packed: bytes | memoryview
+    :param chunk_size: the number of bytes per chunk.
+    :type chunk_size: int
+    :raises ValueError: if the codec of the header is unknown.
+    :return: the original sequence or text, in chunks.
+    :rtype: Iterator[str]
+    """
+    if not packed:
+        return
+
+    codec, length = HEADER.unpack_from(packed)
+    payload = memoryview(packed)[HEADER.size:]
+    lowercase = codec & LOWERCASE_FLAG
+    codec &= CODEC_MASK
+
+    if codec in _BITS:
+        data = memoryview(_unpack_bits(payload, codec, length))
+        blocks = (data[start:start + chunk_size]
+                  for start in range(0, len(data), chunk_size))
+    elif codec == CODEC_ZLIB:
+        blocks = _decompressed_blocks(payload, chunk_size)
+    elif codec == CODEC_RAW:
+        blocks = (payload[start:start + chunk_size]
+                  for start in range(0, len(payload), chunk_size))
+    else:
+        raise ValueError(f"Error: unknown sequence codec {codec}")
+
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    for block in blocks:
+        chunk = decoder.decode(block)
+        if chunk:
+            yield chunk.lower() if lowercase else chunk
+    decoder.decode(b"", final=True)
+
+
+def packed_sequence_length(packed: bytes | memoryview) -> int:
+    """Returns the length of a packed sequence without unpacking it.
+
+    :param packed: the packed sequence, including its header.
+    :type packed: bytes | memoryview
+    :return: the length of the original sequence.
+    :rtype: int
+    """
+    if not packed:
+        return 0
+    return HEADER.unpack_from(bytes(packed[:HEADER.size]))[1]
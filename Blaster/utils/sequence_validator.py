@@ -0,0 +1,210 @@
+# Standard library imports
+from typing import Iterable
+
+
+"""
+Single pass validation of submitted sequences.
+
+A submitted sequence may be preceded by a FASTA header, ">" followed by
+at least one character and a newline, and consists of the residues
+allowed for the BLAST program, split over lines by "\\n" or "\\r\\n".
+The sequence has to start directly after the header, empty lines
+are allowed in between residues and at the end.
+
+`SequenceValidator` checks this on chunks of bytes as they come in,
+while it strips the newlines and keeps the header apart, so a large
+upload is never matched by a regular expression or copied by several
+replace, split and join passes. Every chunk is checked with
+`bytes.translate`, using a 256 entry table that maps every byte that
+is not allowed to 0, so both the check and the stripping run in C.
+"""
+
+
+CHARACTERS = {
+    "blastn": b"acgt",
+    "blastp": b"acdefghiklmnpqrstvwy",
+}
+
+NEWLINES = b"\r\n"
+CHUNK_SIZE = 1024 * 1024
+
+
+def _build_lookup_table(characters: bytes) -> bytes:
+    """Builds a 256 entry table mapping disallowed bytes to 0.
+
+    Residues, in either case, and newlines map to themselves.
+
+    :param characters: the allowed residues, in lowercase.
+    :type characters: bytes
+    :return: translation table for `bytes.translate`.
+    :rtype: bytes
+    """
+    allowed = set(characters + characters.upper() + NEWLINES)
+    return bytes(byte if byte in allowed else 0 for byte in range(256))
+
+
+_LOOKUP_TABLES = {blast_mode: _build_lookup_table(characters)
+                  for blast_mode, characters in CHARACTERS.items()}
+
+
+class SequenceValidator:
+    """Validates and normalizes a sequence fed in chunks of bytes.
+
+    Chunks are passed to `feed`, and the input is finished with
+    `close`. Once a disallowed byte is found, the rest of the input is
+    ignored and `error_position` holds the offset of the first bad
+    byte in the input. Otherwise `header` holds the FASTA header,
+    without ">" and the newline, and `sequence` the residues.
+    """
+
+    def __init__(self, blast_mode: str) -> None:
+        """
+        :param blast_mode: "blastn" or "blastp", which defines the
+            allowed residues.
+        :type blast_mode: str
+        """
+        self._table = _LOOKUP_TABLES[blast_mode]
+        self._position = 0
+        self._header = None
+        self._in_header = False
+        self._expect_residue = True
+        self._pending_return = False
+        self._residues = bytearray()
+        self.error_position = None
+        self.closed = False
+
+    @property
+    def valid(self) -> bool:
+        """Whether the input, once closed, is a valid sequence."""
+        return self.closed and self.error_position is None
+
+    @property
+    def header(self) -> str:
+        """The FASTA header, an empty string if there was none."""
+        if self._header is None:
+            return ""
+        return bytes(self._header).decode("utf-8", errors="replace")
+
+    @property
+    def sequence(self) -> str:
+        """The residues, without newlines."""
+        return self._residues.decode("ascii")
+
+    def feed(self, chunk: bytes) -> bool:
+        """Validates the next chunk of the input.
+
+        :param chunk: the next bytes of the input.
+        :type chunk: bytes
+        :return: False once the input is invalid.
+        :rtype: bool
+        """
+        if self.error_position is not None:
+            return False
+        start = self._position
+        self._position += len(chunk)
+
+        if start == 0 and chunk[:1] == b">":
+            self._header = bytearray()
+            self._in_header = True
+            chunk, start = chunk[1:], 1
+        if self._in_header:
+            end = chunk.find(b"\n")
+            self._header += chunk if end == -1 else chunk[:end]
+            if end == -1:
+                return True
+            if not self._header:
+                return self._fail(start + end)
+            if self._header.endswith(b"\r"):
+                del self._header[-1]
+            self._in_header = False
+            chunk, start = chunk[end + 1:], start + end + 1
+        if chunk:
+            self._feed_residues(chunk, start)
+        return self.error_position is None
+
+    def _feed_residues(self, chunk: bytes, start: int) -> None:
+        """Validates a chunk of residues and newlines.
+
+        :param chunk: the bytes, after any header.
+        :type chunk: bytes
+        :param start: offset of the chunk in the input.
+        :type start: int
+        """
+        if self._pending_return and chunk[:1] != b"\n":
+            self._fail(start - 1)
+            return
+        if self._expect_residue and chunk[:1] in (b"\r", b"\n"):
+            self._fail(start)
+            return
+
+        bad = chunk.translate(self._table).find(0)
+        if bad != -1:
+            chunk = chunk[:bad]
+        # Lone carriage returns are not allowed, one at the end of the
+        # chunk is checked against the next chunk
+        if chunk.count(b"\r") != chunk.count(b"\r\n"):
+            lone = chunk.find(b"\r")
+            while chunk[lone + 1:lone + 2] == b"\n":
+                lone = chunk.find(b"\r", lone + 1)
+            if lone != len(chunk) - 1 or bad != -1:
+                self._fail(start + lone)
+                return
+        self._pending_return = chunk.endswith(b"\r")
+
+        self._residues += chunk.translate(None, NEWLINES)
+        self._expect_residue = False
+        if bad != -1:
+            self._fail(start + bad)
+
+    def _fail(self, position: int) -> bool:
+        """Marks the input as invalid at a position.
+
+        :param position: offset of the first bad byte.
+        :type position: int
+        :return: False.
+        :rtype: bool
+        """
+        self.error_position = position
+        self._residues = bytearray()
+        return False
+
+    def close(self) -> bool:
+        """Finishes the input.
+
+        An unfinished header, a trailing carriage return or an input
+        without residues is invalid at the end of the input.
+
+        :return: whether the input is a valid sequence.
+        :rtype: bool
+        """
+        self.closed = True
+        if self.error_position is None:
+            if self._pending_return:
+                self._fail(self._position - 1)
+            elif self._in_header or not self._residues:
+                self._fail(self._position)
+        return self.valid
+
+
+def validate_sequence(data: bytes | Iterable[bytes],
+                      blast_mode: str) -> SequenceValidator:
+    """Validates a sequence in a single pass.
+
+    :param data: the sequence, or its chunks.
+    :type data: bytes | Iterable[bytes]
+    :param blast_mode: "blastn" or "blastp".
+    :type blast_mode: str
+    :return: the closed validator, with the header and sequence or
+        the position of the first bad byte.
+    :rtype: SequenceValidator
+    """
+    validator = SequenceValidator(blast_mode)
+    chunks = data
+    if isinstance(data, (bytes, bytearray)):
+        chunks = (data[start:start + CHUNK_SIZE]
+                  for start in range(0, len(data), CHUNK_SIZE))
+    for chunk in chunks:
+        if not validator.feed(chunk):
+            break
+    validator.close()
+    return validator
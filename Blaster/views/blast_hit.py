@@ -1,21 +1,74 @@
+# Standard library imports
+from datetime import datetime, time, timezone
+from hashlib import sha256
+from typing import AsyncIterator, Iterator
+
 # Third-party imports
-from django.http import HttpResponse, Http404
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache as django_cache
+from django.http import HttpResponse, Http404, JsonResponse, \
+    StreamingHttpResponse
 from django.shortcuts import render
+from django.core.handlers.asgi import ASGIRequest
 from django.core.handlers.wsgi import WSGIRequest
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from django.views.decorators.gzip import gzip_page
+from kombu.exceptions import OperationalError
 
 # Local imports
+from Blaster.models import BlastHit, EntrezAccession, EntrezAccessionCache
+from Blaster.tasks import refresh_entrez_accession_cache_task, \
+    fetch_entrez_accession_cache_task
+from Blaster.utils.conditional import job_version, page_etag, \
+    not_modified, add_validators
 from Blaster.utils.ncbi import get_entrez_db_from_blast_program, \
-    query_and_create_entrez_accession_cache
+    afetch_entrez_accession_caches, entrez_fetch_key, entrez_refresh_key
+from Blaster.utils.packing import unpack_text_chunks, packed_sequence_length
 from Blaster.utils.queries import get_blast_hit_from_id
 
 
-def blast_hit_page(request: WSGIRequest, blast_hit_id: int) -> HttpResponse:
+# The downloads of the Entrez data of a hit, by format: the field of
+# the EntrezAccessionCache and the file extension.
+ENTREZ_DOWNLOADS = {
+    'genbank': ('genbank', 'gb'),
+    'fasta': ('fasta', 'fasta'),
+}
+# The maximum number of bytes of the Entrez data per streamed chunk.
+ENTREZ_CHUNK_SIZE = 64 * 1024
+
+
+async def blast_hit_page(request: WSGIRequest, blast_hit_id: int
+                         ) -> HttpResponse:
     """Render the BLAST hit page.
 
     Takes a BlastHit id and retrieves its object from the database.
     Checks if the user is not authenticated or the hit is not valid 
-    and renders 403 and 404, respectively. Retrieves and stores a hit's
-    EntrezAccessionCache object, then renders these in blast_hit.html.
+    and renders 403 and 404, respectively. Renders the hit in
+    blast_hit.html. The GenBank and FASTA data of its
+    EntrezAccessionCache are not embedded in the page, but loaded on
+    demand, see `entrez_download`.
+
+    The Entrez data of the best hits of a job is prefetched once the
+    job is processed. For other hits, the data is fetched in the
+    background, while the page shows a placeholder that reloads the
+    page once the data is stored. If it's not possible to communicate
+    with Celery, the data is fetched before rendering, as jobs are.
+
+    Every visit is recorded on the cache entry, for its eviction.
+    A stale entry is still shown, while it's refreshed in the
+    background, a single refresh at a time. If it's not possible to
+    communicate with Celery, the entry is refreshed on a later visit
+    instead.
+
+    Once the data is stored, the page is versioned by the job and the
+    cache entry, see utils/conditional.py, and a current copy of the
+    client is answered with 304. Visits are recorded either way.
+
+    The view is asynchronous, as it waits on the Celery broker and
+    possibly on NCBI, without holding a thread. Rendering is done
+    in a thread, see `render_blast_hit_page`.
 
     :param request: Django request object.
     :type request: WSGIRequest.
@@ -24,6 +77,191 @@ def blast_hit_page(request: WSGIRequest, blast_hit_id: int) -> HttpResponse:
     :return: BLAST hit page.
     :rtype: HttpResponse.
     """
+    hit = await BlastHit.objects\
+        .select_related('job', 'accession', 'accession__cache')\
+        .filter(id=blast_hit_id).afirst()
+    if hit is None:
+        return await sync_to_async(render)(request, '404.html', status=404)
+
+    user = await request.auser()
+    if hit.job.user_id is not None and hit.job.user_id != user.pk:
+        return await sync_to_async(render)(request, '403.html', status=403)
+
+    db = get_entrez_db_from_blast_program(hit.job.program)
+    fetch_key = entrez_fetch_key(hit.accession.id)
+    if not hit.accession.cache:
+        # Only one fetch per accession is scheduled at a time
+        if await django_cache.aadd(fetch_key, True,
+                                   settings.ENTREZ_FETCH_TIMEOUT):
+            try:
+                await sync_to_async(
+                    fetch_entrez_accession_cache_task.delay,
+                    thread_sensitive=False)(hit.accession.id, db)
+            except OperationalError:
+                await afetch_entrez_accession_caches([hit.accession.id], db)
+                hit.accession = await EntrezAccession.objects\
+                    .select_related('cache').aget(id=hit.accession.id)
+    else:
+        await sync_to_async(EntrezAccessionCache.objects.touch)(
+            hit.accession.cache)
+        refresh_key = entrez_refresh_key(hit.accession.cache.id)
+        # Only one refresh per entry is scheduled at a time
+        if hit.accession.cache.is_stale() and await django_cache.aadd(
+                refresh_key, True, settings.ENTREZ_FETCH_TIMEOUT):
+            try:
+                await sync_to_async(
+                    refresh_entrez_accession_cache_task.delay,
+                    thread_sensitive=False)(hit.accession.cache.id)
+            except OperationalError:
+                await django_cache.adelete(refresh_key)
+
+    pending = hit.accession.cache is None \
+        and await django_cache.ahas_key(fetch_key)
+    return await sync_to_async(render_blast_hit_page)(request, hit, pending)
+
+
+def render_blast_hit_page(request: WSGIRequest, hit: BlastHit,
+                          pending: bool) -> HttpResponse:
+    """Renders the BLAST hit page, or answers with 304.
+
+    :param request: Django request object.
+    :type request: WSGIRequest.
+    :param hit: the BlastHit, with its job and accession.
+    :type hit: BlastHit.
+    :param pending: whether the Entrez data is being fetched.
+    :type pending: bool.
+    :return: BLAST hit page.
+    :rtype: HttpResponse.
+    """
+    cache = hit.accession.cache
+    finished = hit.job.finished_at()
+    etag = page_etag(
+        request, job_version(hit.job, finished) if cache else None,
+        hit.pk, cache and (cache.pk, cache.fetches, cache.date))
+    last_modified = max(
+        finished, datetime.combine(cache.date, time(), timezone.utc)) \
+        if finished and cache else None
+    response = not_modified(request, etag, last_modified)
+    if response:
+        return response
+
+    context = {
+        'hit': hit,
+        'genbank_length': cache.text_length('genbank') if cache else 0,
+        'fasta_length': cache.text_length('fasta') if cache else 0,
+        'pending': pending
+    }
+    return add_validators(
+        render(request, 'pages/blast_hit.html', context),
+        etag, last_modified)
+
+
+async def get_entrez_status(request: WSGIRequest, blast_hit_id: int
+                            ) -> JsonResponse:
+    """
+    This function is used for the client to retrieve if the Entrez
+    data of a hit has been stored yet.
+    It returns a JsonResponse with a boolean value of the
+    status.
+
+    status:
+        True = the GenBank and FASTA data are stored
+        False = the data has not been stored yet, or the hit does not
+            exist or belongs to another user.
+    failed:
+        True = the fetch of the data is done, or timed out, without
+            data being stored, so the client can stop polling.
+
+    As it's polled, the view is asynchronous and doesn't hold a thread.
+
+    :param request: The request object.
+    :type request: WSGIRequest
+    :param blast_hit_id: identifier for the BlastHit.
+    :type blast_hit_id: int
+    :return: JsonResponse containing the status, and whether the fetch
+        failed.
+    :rtype: JsonResponse
+    """
+    hit = await BlastHit.objects.select_related('job', 'accession')\
+        .filter(id=blast_hit_id).afirst()
+    if hit is None:
+        return JsonResponse({"status": False})
+
+    user = await request.auser()
+    if hit.job.user_id is not None and hit.job.user_id != user.pk:
+        return JsonResponse({"status": False})
+    if hit.accession.cache_id is not None:
+        return JsonResponse({"status": True})
+
+    # The marker of the fetch is removed once it's done, see
+    # `fetch_entrez_accession_caches`
+    in_flight = await django_cache.ahas_key(
+        entrez_fetch_key(hit.accession_id))
+    return JsonResponse({"status": False, "failed": not in_flight})
+
+
+def entrez_chunks(stored: bytes | str) -> Iterator[str]:
+    """Returns the Entrez data as stored, as text in chunks.
+
+    :param stored: the compressed data, or the text of rows stored
+        before it was compressed.
+    :type stored: bytes | str
+    :return: the text, in chunks of at most ENTREZ_CHUNK_SIZE bytes
+        or characters.
+    :rtype: Iterator[str]
+    """
+    if isinstance(stored, str):
+        return (stored[start:start + ENTREZ_CHUNK_SIZE]
+                for start in range(0, len(stored), ENTREZ_CHUNK_SIZE))
+    return unpack_text_chunks(stored, ENTREZ_CHUNK_SIZE)
+
+
+async def aentrez_chunks(stored: bytes | str) -> AsyncIterator[str]:
+    """Returns the Entrez data as stored, as text in chunks, for a
+    response served under ASGI.
+
+    Django reads a sync iterator of a streaming response into a list
+    under ASGI. The data is already read from the database, so the
+    chunks are decompressed in the event loop, one at a time.
+
+    :param stored: the compressed data, or the text of rows stored
+        before it was compressed.
+    :type stored: bytes | str
+    :return: the text, in chunks.
+    :rtype: AsyncIterator[str]
+    """
+    for chunk in entrez_chunks(stored):
+        yield chunk
+
+
+@gzip_page
+def entrez_download(request: WSGIRequest, blast_hit_id: int,
+                    entrez_format: str
+                    ) -> StreamingHttpResponse | HttpResponse:
+    """Streams the GenBank or FASTA data of the accession of a hit.
+
+    Used by the BLAST hit page to show and export the data on demand.
+    The data is sent inline, or as attachment with the download
+    parameter, and compressed with gzip when the client accepts it.
+    It's decompressed while it's sent, see `entrez_chunks`, so the
+    whole text is never held in memory.
+
+    The ETag is the digest of the data as stored, and Last-Modified
+    the date it was fetched, so a client can revalidate its copy
+    without the data being decompressed or sent again. Only the data
+    may be cached by the client, for a day, error pages are not.
+
+    :param request: Django request object.
+    :type request: WSGIRequest.
+    :param blast_hit_id: identifier for the BlastHit.
+    :type blast_hit_id: int.
+    :param entrez_format: 'genbank' or 'fasta'.
+    :type entrez_format: str.
+    :return: the data as plain text, 304 if the client's copy is
+        current, 403 page for hits of other users, or 404 page if
+        there is no data.
+    :rtype: StreamingHttpResponse | HttpResponse.
+    """
     try:
         hit = get_blast_hit_from_id(blast_hit_id)
     except (Http404, ValueError):
@@ -32,15 +270,36 @@ def blast_hit_page(request: WSGIRequest, blast_hit_id: int) -> HttpResponse:
     if hit.job.user is not None and hit.job.user != request.user:
         return render(request, '403.html', status=403)
 
-    db = get_entrez_db_from_blast_program(hit.job.program)
-    if not hit.accession.cache:
-        cache = query_and_create_entrez_accession_cache(hit.accession.code, db)
-        hit.accession.cache = cache
-        hit.accession.save()
+    if entrez_format not in ENTREZ_DOWNLOADS \
+            or hit.accession.cache_id is None:
+        return render(request, '404.html', status=404)
 
-    context = {
-        'hit': hit,
-        'genbank': hit.accession.cache.genbank,
-        'fasta': hit.accession.cache.fasta
-    }
-    return render(request, 'pages/blast_hit.html', context)
+    # The data is read as stored, rows stored before it was compressed
+    # are read as text
+    field, extension = ENTREZ_DOWNLOADS[entrez_format]
+    stored, date = EntrezAccessionCache.objects\
+        .filter(pk=hit.accession.cache_id).values_list(field, 'date').get()
+    if not stored or (not isinstance(stored, str)
+                      and not packed_sequence_length(stored)):
+        return render(request, '404.html', status=404)
+
+    digest = sha256(stored.encode('utf-8') if isinstance(stored, str)
+                    else stored).hexdigest()
+    etag = f'"{digest[:32]}"'
+    last_modified = int(datetime.combine(date, time(), timezone.utc)
+                        .timestamp())
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified)
+    if response is None:
+        chunks = aentrez_chunks if isinstance(request, ASGIRequest) \
+            else entrez_chunks
+        response = StreamingHttpResponse(
+            chunks(stored), content_type='text/plain; charset=utf-8')
+        disposition = 'attachment' if 'download' in request.GET \
+            else 'inline'
+        response['Content-Disposition'] = \
+            f'{disposition}; filename="{hit.accession.code}.{extension}"'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, private=True, max_age=60 * 60 * 24)
+    return response
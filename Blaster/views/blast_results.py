@@ -1,4 +1,5 @@
 # Third-party imports
+from django.contrib import messages
 from django.contrib.auth.models import User
 from django.core.handlers.wsgi import WSGIRequest
 from django.http import HttpResponse, HttpResponseRedirect, Http404
@@ -6,17 +7,29 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.template.defaulttags import register
 
 # Local imports
-from Blaster.models import SharedJobs
+from BlastBuddyClub.replica import read_only, stick_to_primary
+from Blaster.models import HitSelection, SharedJobs
+from Blaster.utils.conditional import job_version, sharing_version, \
+    page_etag, not_modified, add_validators
+from Blaster.utils.graph_cache import CACHE_TIMEOUT
 from Blaster.utils.queries import get_blast_job_from_id, \
     get_blast_hits_from_job_id
 
 
+@read_only
 def blast_result_page(request: WSGIRequest, blast_job_id: int) -> HttpResponse:
     """Renders the BLAST result page.
 
     Takes a BlastJob id and renders it with its hits in a page.
-    On POST, all selected hits are retrieved from the page,
-    and rendered om the comparison page.
+    On POST, all selected hits are retrieved from the page, stored
+    as a HitSelection, and rendered on the comparison page. Without
+    any hits to compare, the result page is shown again with an
+    error message.
+
+    Once the job is processed, the page is versioned by the job, the
+    time it finished and its sharing state, see utils/conditional.py,
+    and a current copy of the client is answered with 304. The
+    rendered table of hits is cached by the version of the job.
 
     :param request: Django request object
     :type request: WSGIRequest
@@ -27,9 +40,15 @@ def blast_result_page(request: WSGIRequest, blast_job_id: int) -> HttpResponse:
     """
     # Take selected hits to comparison on POST
     if request.method == 'POST':
-        selected_hits = request.POST.getlist('selected_hits')
-        request.session['selected_hits'] = selected_hits
-        return redirect('comparison')
+        try:
+            selection = HitSelection.objects.get_or_create_selection(
+                request.POST.getlist('selected_hits'), request.user)
+        except ValueError:
+            selection = None
+        if selection is None:
+            messages.error(request, 'Error: select hits to compare')
+            return redirect(f'/blast_result/{blast_job_id}')
+        return redirect('comparison', selection.code)
     
     # Render 404 if job can't be retrieved
     try:
@@ -37,35 +56,49 @@ def blast_result_page(request: WSGIRequest, blast_job_id: int) -> HttpResponse:
     except (Http404, ValueError):
         return render(request, '404.html', status=404)
     
-    # Calculate user permission
+    # Calculate user permission, the job is shared with the user when
+    # they're a buddie of the owner the job was shared with
     job_buddies = job.user.blastbuddies_as_user.buddie.all()
-    shared_already_rev = {}
-    for buddie in job_buddies:
-        shared_jobs = SharedJobs.objects.filter(user = buddie).first()
-        shared_already_rev[buddie.id] = shared_jobs.shared_job.filter(
-            id = blast_job_id).exists() if shared_jobs else False
-    job_is_shared = shared_already_rev.get(request.user.id, False)
+    job_is_shared = request.user.is_authenticated and \
+        SharedJobs.objects.filter(
+            user = request.user, user__in = job_buddies,
+            shared_job = blast_job_id).exists()
 
     # Render 403 if user has no permission
     if (job.user is not None and job.user != request.user) and (
         job.user is not None and not job_is_shared):
             return render(request, '403.html')
 
+    # Answer with 304 if the client's copy is current
+    finished = job.finished_at()
+    hits_version = job_version(job, finished)
+    etag = page_etag(request, hits_version, job.title, job.error_msg,
+                     sharing_version(job, request.user))
+    response = not_modified(request, etag, finished)
+    if response:
+        return response
+
     # Calculate jobs that have been shared already
-    hits = get_blast_hits_from_job_id(blast_job_id)
+    hits = get_blast_hits_from_job_id(blast_job_id)\
+        .select_related('accession')
     user_buddies = request.user.blastbuddies_as_user.buddie.all()
-    shared_already = {}
-    for buddie in user_buddies:
-        shared_jobs = SharedJobs.objects.filter(user = buddie).first()
-        shared_already[buddie.id] = shared_jobs.shared_job.filter(
-            id = blast_job_id).exists() if shared_jobs else False
+    shared_with = set(SharedJobs.objects.filter(
+        user__in = user_buddies, shared_job = blast_job_id)
+        .values_list('user_id', flat = True))
+    shared_already = {buddie.id: buddie.id in shared_with
+                      for buddie in user_buddies}
 
     context = {
         'job': job,
         'hits': hits,
+        'hit_count': hits.count(),
+        'hits_version': hits_version,
+        'hits_cache_timeout': CACHE_TIMEOUT if hits_version else 0,
         'shared_already': shared_already
     }
-    return render(request, "pages/blast_results.html", context)
+    return add_validators(
+        render(request, "pages/blast_results.html", context),
+        etag, finished)
 
 
 def share_to_buddie(request, job_id: int, buddie_username: str) -> HttpResponseRedirect:
@@ -91,6 +124,7 @@ def share_to_buddie(request, job_id: int, buddie_username: str) -> HttpResponseR
     shared_job_instance, created = SharedJobs.objects.get_or_create(
         user = name_id_obj)
     shared_job_instance.shared_job.add(job_id)
+    stick_to_primary(request)
 
     return redirect("/blast_result/" + str(job_id))
 
@@ -1,66 +1,164 @@
+# Standard library imports
+from typing import Iterable
+
 # Third-party imports
-from django.shortcuts import render
+from django.conf import settings
+from django.shortcuts import render, redirect
 from django.core.handlers.wsgi import WSGIRequest
-from django.http import HttpResponse
+from django.db.models import Count, Max, Q
+from django.http import HttpResponse, HttpResponseRedirect, JsonResponse
+from django.urls import reverse
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import etag
 
 # Local imports
-from Blaster.models import BlastHit
-from Blaster.utils.bokeh import seqlen_graph, perc_identity_graph, \
-    query_coverage_graph, e_value_graph
+from BlastBuddyClub.replica import read_only
+from Blaster.models import BlastHit, HitSelection
+from Blaster.utils.conditional import page_etag
 
 
-def comparison_page(request: WSGIRequest) -> HttpResponse:
+@read_only
+def comparison_page(request: WSGIRequest,
+                    selection_code: str | None = None
+                    ) -> HttpResponse | HttpResponseRedirect:
     """Renders the comparison page
 
-    Takes the selected hits from the BLAST hit page and creates four
-    graphs with the data from the selected hits.
-    All graphs are generated in utils/bokeh.py and are returned as 
-    scripts and divs that are embedded in the comparison template.
+    Takes a HitSelection, made on the BLAST result page, and shows
+    the selected hits. Only hits the user is allowed to see are
+    compared.
+    The four graphs of the hits are drawn in the browser, see
+    static/js/draw-comparison-graphs.js, from the data of the
+    selection, see `comparison_data`, of which the URL is included in
+    the page. The server only reads the data, which the browser caches.
+
+    Sessions from before HitSelection stored the selected hit ids,
+    without a selection code these are turned into a selection.
 
     :param request: Django request object
     :type request: WSGIRequest
-    :return: Comparison page or 500 page if no hits are selected
-    :rtype: HttpResponse
+    :param selection_code: code of the HitSelection, defaults to None
+    :type selection_code: str | None
+    :return: Comparison page, redirect to the comparison page of the
+        selection in the session, 500 page if no hits are selected,
+        or 404 page if the selection has no hits to compare
+    :rtype: HttpResponse | HttpResponseRedirect
     """
-    if not request.session.get('selected_hits'):
-        return render(request, '500.html')
+    if selection_code is None:
+        hit_ids = request.session.pop('selected_hits', None)
+        if not hit_ids:
+            return render(request, '500.html')
+        selection = HitSelection.objects.get_or_create_selection(
+            hit_ids, request.user)
+        if selection is None:
+            return render(request, '404.html', status=404)
+        return redirect('comparison', selection.code)
 
-    hit_ids = request.session.get('selected_hits')
-    hit_ids = [int(id) for id in hit_ids]
-    hits = BlastHit.objects.filter(id__in=hit_ids)
+    hits = list(BlastHit.objects.visible_to(request.user)
+                .filter(selections__code=selection_code)
+                .select_related('accession').order_by('id'))
+    if not hits:
+        return render(request, '404.html', status=404)
 
-    lengths, graphs = [], {}
-
-    # Get the sequence length of every hit
     for hit in hits:
-        lengths.append(len(hit.subject_seq))
-
         hit.unique_accession = f'{hit.accession.code}.{hit.id}'
 
-    seqlen_script, seqlen_div = seqlen_graph(hits)
-    perc_identity_script, perc_identity_div = perc_identity_graph(hits)
-    query_coverage_script, query_coverage_div = query_coverage_graph(hits)
-    e_value_script, e_value_div = e_value_graph(hits)
-    
-    graphs['seqlen'] = {
-        'script': seqlen_script, 
-        'div': seqlen_div
-        }
-    graphs['perc_identity'] = {
-        'script': perc_identity_script, 
-        'div': perc_identity_div
-        }
-    graphs['query_coverage'] = {
-        'script': query_coverage_script, 
-        'div': query_coverage_div
-        }
-    graphs['e_value'] = {
-        'script': e_value_script, 
-        'div': e_value_div
-        }
-
     context = {
         'selected_hits': hits,
-        'graphs': graphs,
+        'data_url': reverse('comparison_data')
+            + f'?selection={selection_code}',
     }
     return render(request, 'pages/comparison.html', context)
+
+
+def requested_hit_ids(request: WSGIRequest) -> Iterable[int]:
+    """Returns the ids of the hits requested by the comparison data.
+
+    The hits are given as comma separated ids in the hits parameter,
+    at most COMPARISON_MAX_HITS, or as the code of a HitSelection in
+    the selection parameter.
+
+    :param request: Django request object
+    :type request: WSGIRequest
+    :raises ValueError: if the hits parameter is not a list of ids, or
+        has too many ids, with the error message for the client.
+    :return: the ids of the hits, including hits the user is not
+        allowed to see, as a query for a selection.
+    :rtype: Iterable[int]
+    """
+    if 'selection' in request.GET:
+        return HitSelection.hits.through.objects.filter(
+            hitselection__code=request.GET['selection'])\
+            .values_list('blasthit_id', flat=True)
+    hit_ids = request.GET.get('hits', '').split(',')
+    if len(hit_ids) > settings.COMPARISON_MAX_HITS:
+        raise ValueError(f'Error: at most {settings.COMPARISON_MAX_HITS} '
+                         f'hits can be compared')
+    try:
+        return [int(hit_id) for hit_id in hit_ids]
+    except ValueError:
+        raise ValueError('Error: hits should be comma separated ids')
+
+
+def comparison_data_etag(request: WSGIRequest) -> str | None:
+    """Returns the ETag of the comparison data of a request.
+
+    Hits are not changed after their job is processed, so the data is
+    versioned by the requested hits, the number of them the user can
+    see, and when the last of their jobs was processed, which are read
+    in a single query. The data of hits of jobs that are still being
+    processed is not versioned.
+
+    :param request: Django request object
+    :type request: WSGIRequest
+    :return: the ETag of the requested hits, as seen by the user, or
+        None if the hits parameter is not valid or a job is processed.
+    :rtype: str | None
+    """
+    try:
+        hit_ids = requested_hit_ids(request)
+    except ValueError:
+        return None
+    hits = BlastHit.objects.visible_to(request.user)\
+        .filter(id__in=hit_ids).aggregate(
+            count=Count('id'), finished=Max('job__finished'),
+            processing=Count('id', filter=Q(
+                job__unprocessedblastjob__isnull=False)))
+    if hits['processing']:
+        return None
+    return page_etag(request, 'comparison-data',
+                     request.GET.get('selection', ''),
+                     request.GET.get('hits', ''), hits['count'],
+                     hits['finished'])
+
+
+@read_only
+@cache_control(private=True, max_age=60 * 60)
+@etag(comparison_data_etag)
+def comparison_data(request: WSGIRequest) -> JsonResponse:
+    """Returns the metrics of a selection of hits as JSON
+
+    The hits are given as comma separated ids in the hits parameter,
+    or as the code of a HitSelection in the selection parameter, so
+    the URL identifies the data, and it can be cached by the browser.
+    Hits are not changed after their job is processed.
+    The metrics are returned as columns, a list per metric with a
+    value per hit, ordered by hit id, for drawing on the client side:
+        {"id": [...], "accession": [...], "length": [...],
+         "identity": [...], "coverage": [...], "e_value": [...],
+         "bit_score": [...]}
+    Hits the user is not allowed to see are left out. A current copy
+    of the client is answered with 304, see `comparison_data_etag`.
+
+    :param request: Django request object
+    :type request: WSGIRequest
+    :return: the metrics of the hits, or an error with status 400
+        if the hits parameter is not a list of ids, or too long.
+    :rtype: JsonResponse
+    """
+    try:
+        hit_ids = requested_hit_ids(request)
+    except ValueError as error:
+        return JsonResponse({'error': str(error)}, status=400)
+
+    return JsonResponse(
+        BlastHit.objects.comparison_data(hit_ids, request.user))
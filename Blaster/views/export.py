@@ -0,0 +1,59 @@
+# Third-party imports
+from django.core.handlers.asgi import ASGIRequest
+from django.core.handlers.wsgi import WSGIRequest
+from django.http import HttpResponse, StreamingHttpResponse
+from django.shortcuts import render
+
+# Local imports
+from Blaster.models import BlastHit, BlastJob
+from Blaster.utils.export import EXPORT_FORMATS, aexport_hits, export_hits
+
+
+def export_page(request: WSGIRequest, export_format: str
+                ) -> StreamingHttpResponse | HttpResponse:
+    """Streams the hits of one or more BLAST jobs as a download
+
+    Takes the ids of the jobs from the jobs parameter, as sent by the
+    result and recent pages. Only processed jobs the user is allowed to
+    see are exported. The export is formatted while the hits are read
+    from the database, see utils/export.py, so its size is not limited
+    by memory. Under ASGI the export is an async iterator, as Django
+    reads a sync iterator of a streaming response into a list there.
+
+    Unlike the other result pages, the export does not read from the
+    replica: the hits are read while the response is streamed, after
+    the view has returned.
+
+    :param request: Django request object
+    :type request: WSGIRequest
+    :param export_format: tsv, outfmt6, fasta or jsonl
+    :type export_format: str
+    :return: the export as attachment, or 404 page if the format is
+        unknown or there are no jobs to export
+    :rtype: StreamingHttpResponse | HttpResponse
+    """
+    if export_format not in EXPORT_FORMATS:
+        return render(request, '404.html', status=404)
+
+    try:
+        job_ids = [int(job_id) for job_id in request.GET.getlist('jobs')]
+    except ValueError:
+        return render(request, '404.html', status=404)
+
+    jobs = list(BlastJob.objects.visible_to(request.user)
+                .filter(id__in=job_ids, unprocessedblastjob=None)
+                .order_by('id').values_list('id', flat=True))
+    if not jobs:
+        return render(request, '404.html', status=404)
+
+    _, _, content_type, extension = EXPORT_FORMATS[export_format]
+    name = f'MasterBlast{jobs[0]}' if len(jobs) == 1 else \
+        f'MasterBlast{jobs[0]}-{len(jobs)}jobs'
+    export = aexport_hits if isinstance(request, ASGIRequest) \
+        else export_hits
+    response = StreamingHttpResponse(
+        export(BlastHit.objects.filter(job_id__in=jobs), export_format),
+        content_type=f'{content_type}; charset=utf-8')
+    response['Content-Disposition'] = \
+        f'attachment; filename="{name}.{extension}"'
+    return response
@@ -1,4 +1,5 @@
 # Third-party imports
+from django.conf import settings
 from django.contrib import messages
 from django.core.handlers.wsgi import WSGIRequest
 from django.http import HttpResponse, HttpResponseRedirect
@@ -7,8 +8,9 @@ from django.urls import reverse
 from kombu.exceptions import OperationalError
 
 # Local imports
-from Blaster.forms.index_form import (validate_index_form, read_index_file,
-                                      IndexValidationEnum, process_index_form)
+from Blaster.forms.index_form import (clean_index_form,
+                                      clean_search_options,
+                                      IndexValidationEnum)
 from Blaster.models import BlastJob
 from Blaster.tasks import perform_blast_job_task
 from Blaster.utils.ncbi import perform_blast_job
@@ -26,17 +28,23 @@ def index_page(request: WSGIRequest) -> HttpResponse | HttpResponseRedirect:
         Use BLASTn and BLASTp.
         Provide a name for the blastjob.
         Input a sequence through text or through a file.
+        Mask low-complexity regions of the sequence before it's
+        submitted, with DUST for BLASTn and SEG for BLASTp.
+        Limit the result by E-value threshold, number of subjects and
+        number of HSPs per subject, left empty for the site defaults.
 
     If the form has been filled in the data from the form
     is processed and validated.
-        If a file is provided the contents of the files 
-        are parsed to a string.
+        If a file is provided the contents of the file are
+        streamed into the validator, and decompressed if the file
+        is gzip or bzip2 compressed.
     More information on processing and validation can be found
     in forms/index_form.py
 
     It is required for a valid sequence to be present to blast.
     If an invalid sequence is provided the page will be refreshed
-    and a relevant error message will show up.
+    and a relevant error message will show up, with the position
+    of the first invalid character.
     
     When a valid sequence is provided the sequence and other relevant 
     information will be stored in the database.
@@ -66,22 +74,31 @@ def index_page(request: WSGIRequest) -> HttpResponse | HttpResponseRedirect:
         job_name = request.POST.get("job-name")
         seq_text = request.POST.get("seq-text")
         seq_file = request.FILES.get("seq-file")
-        seq_file_text = read_index_file(seq_file)
+        mask_low_complexity = "mask-low-complexity" in request.POST
 
-        validation = validate_index_form(
-            blast_mode, job_name, seq_text, seq_file, seq_file_text)
+        validation, validator = clean_index_form(
+            blast_mode, job_name, seq_text, seq_file)
+        if validation == IndexValidationEnum.VALID:
+            validation, search_options = clean_search_options(
+                request.POST.get("expect"),
+                request.POST.get("hitlist-size"),
+                request.POST.get("max-hsps"))
 
         if validation != IndexValidationEnum.VALID:
-            messages.error(request, f"Error: {validation.name}")
+            if validation == IndexValidationEnum.INVALID_SEQUENCE:
+                messages.error(
+                    request, f"Error: {validation.name} at position "
+                             f"{validator.error_position + 1}")
+            else:
+                messages.error(request, f"Error: {validation.name}")
 
             return redirect(index_page)
 
-        header, sequence = process_index_form(
-            seq_text, seq_file, seq_file_text
-        )
+        header, sequence = validator.header, validator.sequence
 
         blast_job: BlastJob = BlastJob.objects.create_blast_job(
-            request, job_name, blast_mode, header, sequence
+            request, job_name, blast_mode, header, sequence,
+            mask_low_complexity, **search_options
         )
 
         try:
@@ -91,4 +108,10 @@ def index_page(request: WSGIRequest) -> HttpResponse | HttpResponseRedirect:
             perform_blast_job(blast_job.id)
 
         return redirect(reverse(loading_result_page, args=[blast_job.id]))
-    return render(request, "pages/index.html")
+    return render(request, "pages/index.html", {
+        "expect": settings.BLAST_EXPECT,
+        "hitlist_size": settings.BLAST_HITLIST_SIZE,
+        "max_hitlist_size": settings.BLAST_MAX_HITLIST_SIZE,
+        "max_hsps": settings.BLAST_MAX_HSPS,
+        "max_hsps_limit": settings.BLAST_MAX_HSPS_LIMIT,
+    })
@@ -0,0 +1,69 @@
+# Standard library imports
+from types import SimpleNamespace
+
+# Third-party imports
+from django.shortcuts import render
+from django.core.handlers.wsgi import WSGIRequest
+from django.http import HttpResponse
+
+# Local imports
+from BlastBuddyClub.replica import read_only
+from Blaster.models import BlastHit, BlastJob
+from Blaster.utils.graph_cache import cached_graphs
+
+
+@read_only
+def job_comparison_page(request: WSGIRequest) -> HttpResponse:
+    """Renders the comparison of multiple BLAST jobs
+
+    Takes the ids of the jobs to compare from the jobs parameter, as
+    sent by the recent page, so the URL can be bookmarked. Only
+    processed jobs the user is allowed to see are compared.
+
+    The hits of the jobs are grouped per accession in the database,
+    see `BlastHitManager.compare_jobs`. The accessions are shown with
+    the graphs of the comparison page, using the lowest E-value and
+    the highest identity, coverage and length of their hits.
+
+    :param request: Django request object
+    :type request: WSGIRequest
+    :return: Job comparison page, or 404 page if there are no jobs
+        to compare
+    :rtype: HttpResponse
+    """
+    try:
+        job_ids = [int(job_id) for job_id in request.GET.getlist('jobs')]
+    except ValueError:
+        return render(request, '404.html', status=404)
+
+    jobs = list(BlastJob.objects.visible_to(request.user)
+                .filter(id__in=job_ids, unprocessedblastjob=None)
+                .order_by('id'))
+    if not jobs:
+        return render(request, '404.html', status=404)
+
+    accessions = list(BlastHit.objects.compare_jobs(
+        [job.id for job in jobs]))
+
+    def render_graphs() -> tuple[str, dict[str, str]]:
+        # Bokeh and pandas take most of a second to import, so they are
+        # only loaded by processes that render graphs, on a cache miss
+        from Blaster.utils.bokeh import comparison_graphs
+
+        return comparison_graphs([
+            SimpleNamespace(unique_accession=accession['code'],
+                            subject_length=accession['length'],
+                            percentage_identity=accession['identity'],
+                            query_coverage=accession['coverage'],
+                            e_value=accession['e_value'])
+            for accession in accessions])
+
+    script, graphs = cached_graphs(jobs, render_graphs)
+
+    context = {
+        'jobs': jobs,
+        'accessions': accessions,
+        'graphs': graphs,
+        'graphs_script': script,
+    }
+    return render(request, 'pages/job_comparison.html', context)
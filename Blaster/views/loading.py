@@ -1,10 +1,12 @@
 # Third-party imports
+from asgiref.sync import sync_to_async
 from django.core.handlers.wsgi import WSGIRequest
 from django.http import HttpResponse, HttpResponseRedirect, JsonResponse
 from django.shortcuts import render, redirect
 from django.urls import reverse
 
 # Local imports
+from BlastBuddyClub.replica import stick_to_primary
 from Blaster.views.blast_results import blast_result_page
 from Blaster.models import UnprocessedBlastJob
 
@@ -14,7 +16,8 @@ def loading_result_page(request: WSGIRequest, job_id: int) \
     """
     The loading result page will check if the job has been processed.
     If the job has been processed, a redirection to the result page
-    will be returned.
+    will be returned. The user is stuck to the primary database for a
+    moment, as the replica might not have the results yet.
     If the job has not been processed, the loading page will be
     rendered.
 
@@ -26,6 +29,7 @@ def loading_result_page(request: WSGIRequest, job_id: int) \
     :rtype : HttpResponse | HttpResponseRedirect
     """
     if UnprocessedBlastJob.check_blast_job_is_processed(job_id):
+        stick_to_primary(request)
         return redirect(reverse(blast_result_page, args=[job_id]))
 
     title = UnprocessedBlastJob.objects.filter(job__pk=job_id).first().job.title
@@ -33,7 +37,8 @@ def loading_result_page(request: WSGIRequest, job_id: int) \
     return render(request, "pages/loading_result.html", context={"title": title})
 
 
-def get_processed_status(request: WSGIRequest, job_id: int) -> JsonResponse:
+async def get_processed_status(request: WSGIRequest, job_id: int
+                               ) -> JsonResponse:
     """
     This function is used for the client to retrieve if a job has
     been processed yet.
@@ -44,6 +49,12 @@ def get_processed_status(request: WSGIRequest, job_id: int) -> JsonResponse:
         True = the job has been processed
         False = the job has not been processed yet.
 
+    Once processed, the user reads from the primary database for a
+    moment, so the result page shows the results of the job, even when
+    the replica is behind.
+
+    As it's polled, the view is asynchronous and doesn't hold a thread.
+
     :param request: The request object.
     :type request: WSGIRequest
     :param job_id: The job id.
@@ -52,7 +63,10 @@ def get_processed_status(request: WSGIRequest, job_id: int) -> JsonResponse:
     :rtype: bool
     """
     try:
-        status = UnprocessedBlastJob.check_blast_job_is_processed(job_id)
+        status = not await UnprocessedBlastJob.objects\
+            .filter(job__pk=job_id).aexists()
     except ValueError:
         status = False
+    if status:
+        await sync_to_async(stick_to_primary)(request)
     return JsonResponse({"status": status})
\ No newline at end of file
@@ -4,18 +4,22 @@ from django.contrib.auth import update_session_auth_hash
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
 from django.core.handlers.wsgi import WSGIRequest
-from django.db.models import Count
+from django.db.models import Count, Max, Sum
+from django.db.models.functions import Coalesce
 from django.http import HttpResponse, HttpResponseRedirect, JsonResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.utils import timezone
 
 # Local imports
+from BlastBuddyClub.replica import read_only, stick_to_primary
+from Blaster.models.BlastHit import BlastHit
 from Blaster.models.BlastJob import BlastJob
 from Blaster.models.BlastBuddies import BlastBuddies
 from Blaster.models.SharedJobs import SharedJobs
 
 
 @login_required()
+@read_only
 def personalia_page(request: WSGIRequest) \
     -> HttpResponse | HttpResponseRedirect:
     """Renders the personalia page
@@ -62,8 +66,8 @@ def personalia_page(request: WSGIRequest) \
     user = request.user
     # IMPORTANT OR IT BREAKS, is needed for new users that dont have the table
     shared_jobs, created = SharedJobs.objects.get_or_create(user = user)
-    shared_jobs = SharedJobs.objects.get(user=request.user)\
-        .shared_job.all().annotate(hit_count=Count('blasthit'))
+    shared_jobs = shared_jobs.shared_job.all().select_related('user')\
+        .annotate(hit_count=Count('blasthit'))
 
     context = {
         'jobs_done': jobs_done,
@@ -125,35 +129,24 @@ def obtain_stats(request: WSGIRequest) -> tuple[int, int, int, float, int]:
     """
     user = request.user
 
-    jobs_done = 0
-    days_on_master_blast = 0
-    tot_query_len = 0
-    tot_hits = 0
-    tot_jobs = 0
-    longest_query = 0
-
-    jobs_done = BlastJob.objects.filter(user = request.user).count()
-
     current_date = timezone.now()
     register_date = timezone.localtime(user.date_joined)
     days_on_master_blast = (current_date - register_date).days
 
-    blast_jobs = BlastJob.objects.filter(user = request.user)
-    if blast_jobs.exists():
-        for blast_job in blast_jobs:
-            len_seq = len(blast_job.sequence)
-            tot_query_len += len_seq
-            tot_hits += blast_job.blasthit_set.count()
-            tot_jobs += 1
-            if len_seq >= longest_query:
-                longest_query = len_seq
-
-    if tot_jobs != 0:
-        avg_hits_job = tot_hits / tot_jobs
-        avg_hits_job = round(avg_hits_job, 2)
+    # Aggregated in the database, as the user can have many jobs
+    stats = BlastJob.objects.filter(user = user).aggregate(
+        jobs_done=Count('id'),
+        tot_query_len=Coalesce(Sum('sequence_length'), 0),
+        longest_query=Coalesce(Max('sequence_length'), 0))
+    tot_hits = BlastHit.objects.filter(job__user = user).count()
+
+    jobs_done = stats['jobs_done']
+    if jobs_done != 0:
+        avg_hits_job = round(tot_hits / jobs_done, 2)
     else:
         avg_hits_job = 0
-    return jobs_done, days_on_master_blast, tot_query_len, avg_hits_job, longest_query
+    return jobs_done, days_on_master_blast, stats['tot_query_len'], \
+        avg_hits_job, stats['longest_query']
 
 
 def remove_buddie(
@@ -181,6 +174,7 @@ def remove_buddie(
     buddie = get_object_or_404(User, username = buddie_username)
     if hasattr(user, 'blastbuddies_as_user'):
         user.blastbuddies_as_user.buddie.remove(buddie)
+        stick_to_primary(request)
     return redirect("/personalia")
 
 
@@ -228,5 +222,6 @@ def add_buddie(request: WSGIRequest, buddie_username: str) -> HttpResponseRedire
         blast_buddies_instance, created = \
             BlastBuddies.objects.get_or_create(user = user)
         blast_buddies_instance.buddie.add(buddie)
+        stick_to_primary(request)
 
     return redirect("/personalia")
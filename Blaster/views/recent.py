@@ -1,15 +1,17 @@
 # Third-party imports
 from django.contrib.auth.decorators import login_required
 from django.core.handlers.wsgi import WSGIRequest
-from django.db.models.functions import Length
+from django.db.models import Count, F
 from django.http import HttpResponse
 from django.shortcuts import render
 
 # Local imports
+from BlastBuddyClub.replica import read_only
 from Blaster.models import BlastJob
 
 
 @login_required()
+@read_only
 def recent_page(request: WSGIRequest) -> HttpResponse:
     """Renders the recent jobs page
 
@@ -21,13 +23,18 @@ def recent_page(request: WSGIRequest) -> HttpResponse:
     Filters cannot be stacked, only one at a time. Might be a good
     additional feature to be added.
 
+    The number of hits and the query length are selected along with
+    the jobs, so the page takes the same number of queries for any
+    number of jobs.
+
     :param request: Django request object
     :type request: WSGIRequest
     :return: Recent page, context contains recent jobs
     :rtype: HttpResponse
     """
     log_user = request.user
-    query = BlastJob.objects.order_by('-date', '-time').filter(user=log_user)
+    query = BlastJob.objects.order_by('-date', '-time').filter(user=log_user)\
+        .annotate(hits=Count('blasthit'), query_length=F('sequence_length'))
     
     if request.method == "POST":
         title = request.POST.get('filter-title')
@@ -37,9 +44,6 @@ def recent_page(request: WSGIRequest) -> HttpResponse:
 
         # Filter on title, date, min query length, max query length
         # Will always get the 10 most recent results
-        
-        if min_len or max_len:
-            query = query.annotate(sequence_length=Length('sequence'))
 
         if title:
             query = query.filter(title__icontains=title)
@@ -57,11 +61,6 @@ def recent_page(request: WSGIRequest) -> HttpResponse:
         query = query[:10]
     user_jobs = query
 
-    # Get the remaining table information
-    for job in user_jobs:
-        job.hits = job.blasthit_set.all().count()
-        job.query_length = len(job.sequence)
-    
     context = {
         'recent_jobs': user_jobs
     }
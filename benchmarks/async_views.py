@@ -0,0 +1,176 @@
+# Standard library imports
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import asyncio
+import statistics
+import time
+
+# Local imports
+from benchmarks.ncbi_stand_in import EUTILS_PATH, start_stand_in
+from benchmarks.utils import setup_django, timer
+
+
+"""
+Load test of concurrent BLAST hit page loads.
+
+Starts the NCBI stand-in, see benchmarks/ncbi_stand_in.py, which
+answers every efetch query after a fixed latency, and loads the hit
+pages of accessions without cached Entrez data concurrently. Celery is unreachable, so
+every page fetches its data from the stand-in before rendering.
+
+The pages are loaded through the WSGI handler with a fixed number of
+threads, as runserver or a threaded WSGI server does, and through the
+ASGI application, as uvicorn does. Through WSGI every load holds a
+thread while it waits, so loads queue up behind each other, through
+ASGI they wait together.
+
+Usage:
+    `python -m benchmarks.async_views --requests 32 --threads 4`
+"""
+
+
+def create_hits(count: int, prefix: str) -> list[int]:
+    """Creates hits of a processed job on accessions without a cache.
+
+    :param count: the number of hits.
+    :type count: int
+    :param prefix: prefix of the accession codes.
+    :type prefix: str
+    :return: the ids of the hits.
+    :rtype: list[int]
+    """
+    from django.utils import timezone
+    from Blaster.models import BlastJob, BlastHit, EntrezAccession
+
+    job = BlastJob.objects.create(title="benchmark", program="blastp",
+                                  sequence="MLPGSL",
+                                  finished=timezone.now())
+    hit_ids = []
+    for i in range(count):
+        accession = EntrezAccession.objects.create(
+            code=f"{prefix}{i:06d}.1", organism="benchmark")
+        hit_ids.append(BlastHit.objects.create_hit(
+            blast_job_id=job.id, accession_id=accession.id,
+            description="benchmark hit", blast_score=100, bit_score=50.0,
+            e_value=1e-30, identities=6, align_length=6, query_start=1,
+            query_end=6, query_length=6, subject_seq="MLPGSL",
+            subject_start=1, subject_end=6).id)
+    return hit_ids
+
+
+def load_wsgi(hit_ids: list[int], threads: int) -> list[float]:
+    """Loads hit pages through the WSGI handler with a pool of threads.
+
+    :param hit_ids: the hits to load the page of.
+    :type hit_ids: list[int]
+    :param threads: the number of threads serving requests.
+    :type threads: int
+    :return: the seconds every load took, queueing included.
+    :rtype: list[float]
+    """
+    from django.test import Client
+
+    start = time.perf_counter()
+
+    def load(hit_id: int) -> float:
+        response = Client().get(f"/blast_hit/{hit_id}")
+        assert response.status_code == 200, response.status_code
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(threads) as pool:
+        return list(pool.map(load, hit_ids))
+
+
+async def load_asgi(hit_ids: list[int]) -> list[float]:
+    """Loads hit pages concurrently through the ASGI application.
+
+    :param hit_ids: the hits to load the page of.
+    :type hit_ids: list[int]
+    :return: the seconds every load took.
+    :rtype: list[float]
+    """
+    from BlastBuddyClub.asgi import application
+
+    start = time.perf_counter()
+
+    async def load(hit_id: int) -> float:
+        path = f"/blast_hit/{hit_id}"
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"},
+            "http_version": "1.1", "method": "GET", "scheme": "http",
+            "path": path, "raw_path": path.encode(), "query_string": b"",
+            "root_path": "", "headers": [(b"host", b"localhost")],
+            "client": ("127.0.0.1", 50000), "server": ("localhost", 80)}
+        requested = asyncio.Event()
+        status = []
+
+        async def receive() -> dict:
+            if requested.is_set():
+                # The client stays connected until the response is sent
+                await asyncio.Future()
+            requested.set()
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message: dict) -> None:
+            if message["type"] == "http.response.start":
+                status.append(message["status"])
+
+        await application(scope, receive, send)
+        assert status == [200], status
+        return time.perf_counter() - start
+
+    return await asyncio.gather(*(load(hit_id) for hit_id in hit_ids))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Load test of concurrent BLAST hit page loads.")
+    parser.add_argument("--requests", type=int, default=32)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.5)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    from kombu.exceptions import OperationalError
+    from Blaster.tasks import fetch_entrez_accession_cache_task
+    from Blaster.utils import async_entrez
+
+    stand_in = start_stand_in(latency=args.latency, rate_limit=0,
+                              api_key_rate_limit=0)
+    settings.ENTREZ_EUTILS_URL = stand_in.url + EUTILS_PATH
+
+    # Celery is unreachable, so the pages fetch the data themselves
+    def unreachable(*args, **kwargs):
+        raise OperationalError("benchmark")
+    fetch_entrez_accession_cache_task.delay = unreachable
+
+    # The stand-in has no rate limit, NCBI's would dominate the timings
+    async def no_wait() -> None:
+        pass
+    async_entrez._wait_for_turn = no_wait
+
+    # The first load also compiles the templates, so it's not timed
+    load_wsgi(create_hits(1, "WARM"), 1)
+
+    results = {}
+    with timer() as wsgi:
+        results["wsgi"] = load_wsgi(
+            create_hits(args.requests, "WSGI"), args.threads)
+    with timer() as asgi:
+        results["asgi"] = asyncio.run(
+            load_asgi(create_hits(args.requests, "ASGI")))
+
+    print(f"{args.requests} hit pages, {args.latency:.2f} s Entrez latency, "
+          f"{args.threads} WSGI threads")
+    print(f"{'server':<8}{'total (s)':>11}{'median (s)':>12}"
+          f"{'max (s)':>9}{'pages/s':>9}")
+    for name, seconds in (("wsgi", wsgi["seconds"]),
+                          ("asgi", asgi["seconds"])):
+        print(f"{name:<8}{seconds:>11.2f}"
+              f"{statistics.median(results[name]):>12.2f}"
+              f"{max(results[name]):>9.2f}{args.requests / seconds:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# Standard library imports
+import argparse
+import statistics
+
+# Local imports
+from benchmarks.utils import setup_django, load_fixture, timer
+
+
+"""
+Benchmark of rendering the comparison graphs.
+
+Loads the development fixture, and for the hits of every job measures
+rendering the four graphs as separate Bokeh documents, as was done
+before, and as a single document, as the job comparison does. Next to
+these, the load of the comparison page and its data, which is all the
+server does for a comparison since the graphs are drawn by the
+browser.
+
+Usage:
+    `python -m benchmarks.comparison_graphs --repeat 10`
+"""
+
+
+def render_separately(hits) -> list:
+    """Renders every graph as its own Bokeh document, as it used to be.
+
+    :param hits: the hits, with their unique_accession set.
+    :type hits: list[BlastHit]
+    :return: the script and div of every graph.
+    :rtype: list
+    """
+    from bokeh.embed import components
+    from bokeh.models import ColumnDataSource
+    from Blaster.utils.bokeh import hit_bar_graph, e_value_graph
+
+    accessions = [hit.unique_accession for hit in hits]
+    rendered = []
+    for column, attribute in (("length", "subject_length"),
+                              ("identity", "percentage_identity"),
+                              ("coverage", "query_coverage")):
+        source = ColumnDataSource(data={
+            "accession": accessions,
+            column: [getattr(hit, attribute) for hit in hits]})
+        rendered.append(components(
+            hit_bar_graph(source, accessions, column, column, column)))
+    rendered.append(components(e_value_graph(
+        accessions, [float(hit.e_value) for hit in hits])))
+    return rendered
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmarks rendering the comparison graphs.")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    setup_django()
+    load_fixture()
+
+    from django.test import Client
+    from django.urls import reverse
+    from Blaster.models import BlastJob, BlastHit
+    from Blaster.utils.bokeh import comparison_graphs
+
+    print(f"{'job':<20}{'separate (ms)':>15}{'single (ms)':>13}"
+          f"{'page + data (ms)':>18}")
+    for job in BlastJob.objects.exclude(user=None):
+        hits = list(BlastHit.objects.filter(job=job)
+                    .select_related("accession"))
+        if not hits:
+            continue
+        for hit in hits:
+            hit.unique_accession = f"{hit.accession.code}.{hit.id}"
+
+        client = Client()
+        client.force_login(job.user)
+        comparison_url = client.post(
+            f"/blast_result/{job.id}",
+            {"selected_hits": [hit.id for hit in hits]}).url
+        data_url = (reverse("comparison_data") + "?selection="
+                    + comparison_url.rstrip("/").rsplit("/", 1)[-1])
+        # The first load also compiles the templates, so it's skipped.
+        client.get(comparison_url)
+
+        timings = {"separate": [], "single": [], "page": []}
+        for _ in range(args.repeat):
+            with timer() as separate:
+                render_separately(hits)
+            timings["separate"].append(separate["seconds"])
+            with timer() as single:
+                comparison_graphs(hits)
+            timings["single"].append(single["seconds"])
+
+            with timer() as page:
+                client.get(comparison_url)
+                client.get(data_url)
+            timings["page"].append(page["seconds"])
+
+        medians = [statistics.median(values) * 1000
+                   for values in timings.values()]
+        print(f"{f'{job.id} ({len(hits)} hits)':<20}{medians[0]:>15.2f}"
+              f"{medians[1]:>13.2f}{medians[2]:>18.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+# Standard library imports
+import argparse
+import multiprocessing
+import os
+import time
+from pathlib import Path
+
+# Local imports
+from benchmarks.utils import setup_django
+
+
+"""
+Benchmark of concurrent writes to the database.
+
+Runs a number of worker processes that each keep creating jobs and
+inserting hits one by one, the way `parse_blast_job_results` does,
+while reader processes keep loading hits, like the result page does.
+Reports the sustained insert throughput and how often a worker ran
+into "database is locked".
+
+With SQLite it compares WAL mode against the rollback journal,
+with DB_ENGINE=postgresql it runs against the configured database.
+
+Usage:
+    `python -m benchmarks.database_concurrency --workers 4 --seconds 10`
+"""
+
+
+HITS_PER_JOB = 50
+
+
+def writer(db_path: str, seconds: float, results) -> None:
+    """Creates jobs with hits until the time runs out.
+
+    :param db_path: path of the SQLite database.
+    :type db_path: str
+    :param seconds: how long to keep writing.
+    :type seconds: float
+    :param results: queue to put (rows written, locked errors) on.
+    """
+    setup_django(db_path, create_tables=False)
+    from django.db import OperationalError
+    from Blaster.models import BlastJob, BlastHit, EntrezAccession
+
+    accession = EntrezAccession.objects.first()
+    rows, locked = 0, 0
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        try:
+            job = BlastJob.objects.create(
+                title="benchmark", program="blastn", sequence="ACGT" * 100)
+            rows += 1
+            for i in range(HITS_PER_JOB):
+                BlastHit.objects.create_hit(
+                    blast_job_id=job.id, accession_id=accession.id,
+                    description="benchmark hit", blast_score=100 + i,
+                    bit_score=50.0, e_value=1e-30, identities=90,
+                    align_length=100, query_start=1, query_end=100,
+                    query_length=400, subject_seq="ACGT" * 25,
+                    subject_start=1, subject_end=100)
+                rows += 1
+        except OperationalError:
+            locked += 1
+    results.put((rows, locked))
+
+
+def reader(db_path: str, seconds: float, results) -> None:
+    """Loads the hits of the latest job until the time runs out.
+
+    :param db_path: path of the SQLite database.
+    :type db_path: str
+    :param seconds: how long to keep reading.
+    :type seconds: float
+    :param results: queue to put (reads done, locked errors) on.
+    """
+    setup_django(db_path, create_tables=False)
+    from django.db import OperationalError
+    from Blaster.models import BlastHit
+
+    reads, locked = 0, 0
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        try:
+            list(BlastHit.objects.order_by("-id")[:HITS_PER_JOB])
+            reads += 1
+        except OperationalError:
+            locked += 1
+    results.put((reads, locked))
+
+
+def run(db_path: Path, workers: int, readers: int, seconds: float
+        ) -> tuple[int, int, int, int]:
+    """Runs writers and readers against the database at the same time.
+
+    :param db_path: path of the SQLite database.
+    :type db_path: Path
+    :param workers: number of writing processes.
+    :type workers: int
+    :param readers: number of reading processes.
+    :type readers: int
+    :param seconds: how long the processes run.
+    :type seconds: float
+    :return: rows written, write errors, reads done and read errors.
+    :rtype: tuple[int, int, int, int]
+    """
+    context = multiprocessing.get_context("spawn")
+    write_results, read_results = context.Queue(), context.Queue()
+    processes = [
+        context.Process(target=writer,
+                        args=(str(db_path), seconds, write_results))
+        for _ in range(workers)
+    ] + [
+        context.Process(target=reader,
+                        args=(str(db_path), seconds, read_results))
+        for _ in range(readers)
+    ]
+    for process in processes:
+        process.start()
+
+    written = [write_results.get() for _ in range(workers)]
+    read = [read_results.get() for _ in range(readers)]
+    for process in processes:
+        process.join()
+
+    return (sum(rows for rows, _ in written),
+            sum(locked for _, locked in written),
+            sum(reads for reads, _ in read),
+            sum(locked for _, locked in read))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmarks concurrent inserts into the database.")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=1)
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    if os.environ.get("DB_ENGINE", "sqlite") == "sqlite":
+        modes = {"rollback journal": "0", "WAL": "1"}
+    else:
+        modes = {os.environ["DB_ENGINE"]: os.environ.get("DB_SQLITE_WAL")}
+
+    print(f"{args.workers} writers, {args.readers} readers, "
+          f"{args.seconds:.0f} seconds")
+    print(f"{'mode':<20}{'rows/s':>10}{'write locks':>13}"
+          f"{'reads/s':>10}{'read locks':>12}")
+    for mode, wal in modes.items():
+        if wal is not None:
+            os.environ["DB_SQLITE_WAL"] = wal
+        db_path = setup_django()
+
+        from Blaster.models import EntrezAccession
+        from django.db import connections
+        EntrezAccession.objects.get_or_create(
+            code="BENCHMARK", organism="Benchmark organism")
+        connections.close_all()
+
+        rows, write_locks, reads, read_locks = run(
+            db_path, args.workers, args.readers, args.seconds)
+        print(f"{mode:<20}{rows / args.seconds:>10.0f}{write_locks:>13}"
+              f"{reads / args.seconds:>10.0f}{read_locks:>12}")
+
+
+if __name__ == "__main__":
+    main()
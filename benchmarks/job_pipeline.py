@@ -0,0 +1,314 @@
+# Standard library imports
+from contextlib import contextmanager
+from functools import wraps
+from pathlib import Path
+import argparse
+import gc
+import io
+import json
+import platform
+import sys
+import time
+from typing import Iterator
+
+# Local imports
+from benchmarks.ncbi_fixtures import (FIXTURES, load_blast_xml,
+                                      load_entrez_responses)
+from benchmarks.utils import BASE_DIR, setup_django, peak_memory, timer
+
+
+"""
+Benchmark of processing the result of a BLAST job.
+
+For every NCBI fixture, see benchmarks/ncbi_fixtures.py, measures
+reading the BLAST XML with NCBIXML, and storing the record with
+`parse_blast_job_results`. The time spent storing is split into
+resolving the accessions, including their organism lookups in Entrez,
+and inserting the subject sequences and hits. Entrez is replaced by a
+transport answering from the recorded responses, after --latency
+seconds per request.
+
+The results can be saved as a JSON baseline, and compared against one,
+in which case the benchmark exits with status 1 when a measurement
+exceeds the baseline by more than --threshold. Counts, such as the
+number of Entrez requests, may not increase at all. Baselines depend
+on the machine, so compare against one saved on the same machine.
+
+Usage:
+    `python -m benchmarks.job_pipeline --save`
+    `python -m benchmarks.job_pipeline --compare --threshold 0.25`
+"""
+
+
+BASELINE = BASE_DIR / "benchmarks" / "baselines" / "job_pipeline.json"
+
+# Timings and memory below these differences are never regressions,
+# as they're within the noise of a run.
+MINIMUM_DIFFERENCES = {
+    "seconds": 0.005,
+    "mb": 0.5,
+}
+
+COUNTS = ("alignments", "stored_hits", "entrez_requests")
+
+
+class PhaseTimer:
+    """Accumulates the time spent in wrapped functions per phase."""
+
+    def __init__(self) -> None:
+        self.seconds = {}
+
+    def wrap(self, phase: str, function):
+        """Wraps a function, adding the time of every call to a phase.
+
+        :param phase: the name of the phase.
+        :type phase: str
+        :param function: the function to wrap.
+        :return: the wrapped function.
+        """
+        self.seconds.setdefault(phase, 0.0)
+
+        @wraps(function)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.seconds[phase] += time.perf_counter() - start
+        return timed
+
+
+@contextmanager
+def collection_paused() -> Iterator[None]:
+    """Pauses garbage collection, as timeit does, so a collection
+    started by earlier rounds isn't timed.
+
+    :rtype: Iterator[None]
+    """
+    gc.collect()
+    gc.disable()
+    try:
+        yield
+    finally:
+        gc.enable()
+
+
+@contextmanager
+def recorded_entrez(responses: dict[str, str],
+                    latency: float) -> Iterator[list[str]]:
+    """Answers Entrez.efetch from recorded responses.
+
+    :param responses: the Entrez XML per accession code.
+    :type responses: dict[str, str]
+    :param latency: the seconds to wait before answering a request.
+    :type latency: float
+    :return: the accession codes that are requested, in order.
+    :rtype: Iterator[list[str]]
+    """
+    from Bio import Entrez
+
+    requests = []
+
+    def efetch(db, id, rettype, retmode, **kwargs):
+        requests.append(id)
+        time.sleep(latency)
+        return io.StringIO(responses[id])
+
+    original = Entrez.efetch
+    Entrez.efetch = efetch
+    try:
+        yield requests
+    finally:
+        Entrez.efetch = original
+
+
+@contextmanager
+def phase_timers(timer_: PhaseTimer) -> Iterator[None]:
+    """Times the accession resolution and hit insertion of parsing.
+
+    :param timer_: the timer to add the time of the phases to.
+    :type timer_: PhaseTimer
+    :rtype: Iterator[None]
+    """
+    from Blaster.models import BlastHit, EntrezAccession, SubjectSequence
+    from Blaster.utils import ncbi
+
+    patches = [
+        (ncbi, "get_entrez_accession_from_code", "accessions"),
+        (ncbi, "get_entrez_organism", "accessions"),
+        (EntrezAccession.objects, "create_entrez_accession", "accessions"),
+        (SubjectSequence.objects, "get_or_create_sequences", "insertion"),
+        (BlastHit.objects, "bulk_create", "insertion"),
+    ]
+    originals = [getattr(owner, name) for owner, name, _ in patches]
+    for (owner, name, phase), original in zip(patches, originals):
+        setattr(owner, name, timer_.wrap(phase, original))
+    try:
+        yield
+    finally:
+        for (owner, name, _), original in zip(patches, originals):
+            setattr(owner, name, original)
+
+
+def store_record(record, requests: list[str]) -> dict:
+    """Stores a record as the result of a new job, and rolls it back.
+
+    The job keeps every alignment, up to BLAST_MAX_HITLIST_SIZE, so
+    larger fixtures are stored as a whole.
+
+    :param record: the parsed BLAST record.
+    :type record: Bio.Blast.Record
+    :param requests: the Entrez requests made so far.
+    :type requests: list[str]
+    :return: the number of hits stored and of Entrez requests made.
+    :rtype: dict
+    """
+    from django.conf import settings
+    from django.contrib.auth.models import AnonymousUser
+    from django.db import transaction
+    from django.test import RequestFactory
+    from Blaster.models import BlastJob
+    from Blaster.utils.ncbi import parse_blast_job_results
+
+    request = RequestFactory().get("/")
+    request.user = AnonymousUser()
+    before = len(requests)
+    with transaction.atomic():
+        job = BlastJob.objects.create_blast_job(
+            request, "", "blastn", "", "ACGT",
+            hitlist_size=settings.BLAST_MAX_HITLIST_SIZE)
+        parse_blast_job_results(job, record, "nucleotide")
+        stored_hits = job.stored_hits
+        transaction.set_rollback(True)
+    return {"stored_hits": stored_hits,
+            "entrez_requests": len(requests) - before}
+
+
+def benchmark_fixture(name: str, repeat: int, latency: float) -> dict:
+    """Measures reading and storing the record of a fixture.
+
+    :param name: the name of the fixture.
+    :type name: str
+    :param repeat: the number of times to measure, the fastest time
+        is used, as it's the least affected by other load.
+    :type repeat: int
+    :param latency: the seconds an Entrez request takes.
+    :type latency: float
+    :return: the measurements.
+    :rtype: dict
+    """
+    from Bio.Blast import NCBIXML
+
+    blast_xml = load_blast_xml(name)
+    timings = {"parse_seconds": [], "store_seconds": [],
+               "accessions_seconds": [], "insertion_seconds": []}
+    with recorded_entrez(load_entrez_responses(name), latency) as requests:
+        # The first round warms up imports and caches, and isn't counted
+        store_record(NCBIXML.read(io.StringIO(blast_xml)), requests)
+        for _ in range(repeat):
+            with collection_paused(), timer() as timing:
+                record = NCBIXML.read(io.StringIO(blast_xml))
+            timings["parse_seconds"].append(timing["seconds"])
+
+            phases = PhaseTimer()
+            with collection_paused(), phase_timers(phases), \
+                    timer() as timing:
+                counts = store_record(record, requests)
+            timings["store_seconds"].append(timing["seconds"])
+            timings["accessions_seconds"].append(phases.seconds["accessions"])
+            timings["insertion_seconds"].append(phases.seconds["insertion"])
+
+        result = {key: min(values) for key, values in timings.items()}
+        result["parse_peak_mb"] = peak_memory(
+            NCBIXML.read, io.StringIO(blast_xml)) / 1024 ** 2
+        result["store_peak_mb"] = peak_memory(
+            store_record, record, requests) / 1024 ** 2
+    result["alignments"] = len(record.alignments)
+    result.update(counts)
+    return result
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Lists the measurements that regressed against a baseline.
+
+    :param results: the measurements per fixture.
+    :type results: dict
+    :param baseline: the baseline measurements per fixture.
+    :type baseline: dict
+    :param threshold: the allowed increase of timings and memory, as
+        a fraction of the baseline.
+    :type threshold: float
+    :return: a description of every regression.
+    :rtype: list[str]
+    """
+    regressions = []
+    for name, measurements in results.items():
+        for key, value in measurements.items():
+            if key not in baseline.get(name, {}):
+                continue
+            expected = baseline[name][key]
+            if key in COUNTS:
+                regressed = value > expected
+            else:
+                unit = key.rsplit("_", 1)[1]
+                regressed = value > expected * (1 + threshold) \
+                    and value - expected > MINIMUM_DIFFERENCES[unit]
+            if regressed:
+                regressions.append(
+                    f"{name} {key}: {value:.4g} against {expected:.4g}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmarks processing the result of a BLAST job.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--fixtures", nargs="+", default=list(FIXTURES))
+    parser.add_argument("--save", nargs="?", type=Path, const=BASELINE)
+    parser.add_argument("--compare", nargs="?", type=Path, const=BASELINE)
+    parser.add_argument("--threshold", type=float, default=0.25)
+    args = parser.parse_args()
+
+    setup_django()
+
+    results = {}
+    print(f"{'fixture':<10}{'hits':>7}{'parse (ms)':>12}{'store (ms)':>12}"
+          f"{'accessions':>12}{'insertion':>12}{'parse (MB)':>12}"
+          f"{'store (MB)':>12}")
+    for name in args.fixtures:
+        result = results[name] = benchmark_fixture(
+            name, args.repeat, args.latency)
+        print(f"{name:<10}{result['stored_hits']:>7}"
+              f"{result['parse_seconds'] * 1000:>12.1f}"
+              f"{result['store_seconds'] * 1000:>12.1f}"
+              f"{result['accessions_seconds'] * 1000:>12.1f}"
+              f"{result['insertion_seconds'] * 1000:>12.1f}"
+              f"{result['parse_peak_mb']:>12.1f}"
+              f"{result['store_peak_mb']:>12.1f}")
+
+    if args.save:
+        args.save.parent.mkdir(parents=True, exist_ok=True)
+        args.save.write_text(json.dumps({
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "latency": args.latency,
+            "results": results,
+        }, indent=4) + "\n")
+        print(f"Saved the baseline to {args.save}")
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())
+        if baseline["latency"] != args.latency:
+            sys.exit(f"The baseline was measured with a latency of "
+                     f"{baseline['latency']} seconds")
+        regressions = compare(results, baseline["results"], args.threshold)
+        for regression in regressions:
+            print(f"Regression: {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
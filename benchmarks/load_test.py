@@ -0,0 +1,231 @@
+# Standard library imports
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from pathlib import Path
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+import argparse
+import random
+import statistics
+import threading
+
+# Local imports
+from benchmarks.utils import setup_django, timer
+
+
+"""
+Load test of the pages that grow with the data of a user.
+
+Fills a database with `py manage.py generate_data`, or uses one that
+was filled before, and requests the recent, personalia, BLAST result
+and comparison pages of random synthetic users, with --concurrency
+requests at a time. Reports the 50th, 95th and 99th percentile of the
+latency, and the number of queries, per page.
+
+The pages are requested through the Django test client by default,
+in threads of this process. With --server, they are requested from a
+running server instead, which has to use the same database, e.g.
+    `DB_NAME=/tmp/load.sqlite3 uvicorn BlastBuddyClub.asgi:application`
+The queries of a server are read from its X-Query-Count header, when
+it's started with QUERY_PROFILING set.
+
+Usage:
+    `python -m benchmarks.load_test --users 200 --hits 500000`
+    `python -m benchmarks.load_test --db /tmp/load.sqlite3 \
+--server http://127.0.0.1:8000 --concurrency 8`
+"""
+
+
+PAGES = ("recent", "personalia", "blast_result", "comparison")
+
+PERCENTILES = (50, 95, 99)
+
+
+def create_sessions(prefix: str, number: int) -> list[dict]:
+    """Logs in synthetic users, and collects the URLs of their pages.
+
+    :param prefix: the prefix of the synthetic users.
+    :type prefix: str
+    :param number: the number of users to log in.
+    :type number: int
+    :return: per user, the session cookie and the URL of every page,
+        None for a page the user has no data for.
+    :rtype: list[dict]
+    """
+    from django.conf import settings
+    from django.contrib.auth.models import User
+    from django.test import Client
+    from Blaster.models import BlastJob, HitSelection
+
+    users = list(User.objects.filter(username__startswith=prefix)
+                 .order_by("?")[:number])
+    sessions = []
+    for user in users:
+        client = Client()
+        client.force_login(user)
+        job_id = BlastJob.objects.filter(user=user).order_by("?")\
+            .values_list("id", flat=True).first()
+        code = HitSelection.objects.filter(user=user).order_by("?")\
+            .values_list("code", flat=True).first()
+        sessions.append({
+            "cookie": client.cookies[settings.SESSION_COOKIE_NAME].value,
+            "recent": "/recent",
+            "personalia": "/personalia",
+            "blast_result": job_id and f"/blast_result/{job_id}",
+            "comparison": code and f"/comparison/{code}",
+        })
+    return sessions
+
+
+class ClientLoader:
+    """Requests pages through the Django test client, counting queries.
+
+    Every thread uses its own client and database connections.
+    """
+
+    def __init__(self) -> None:
+        self.local = threading.local()
+
+    def __call__(self, url: str, cookie: str) -> tuple[int, float, int]:
+        """Requests a page.
+
+        :param url: the path of the page.
+        :type url: str
+        :param cookie: the session cookie of the user.
+        :type cookie: str
+        :return: the status, the latency in seconds and the number of
+            queries.
+        :rtype: tuple[int, float, int]
+        """
+        from django.conf import settings
+        from django.db import connections
+        from django.test import Client
+        from django.test.utils import CaptureQueriesContext
+
+        if not hasattr(self.local, "client"):
+            self.local.client = Client()
+        client = self.local.client
+        client.cookies[settings.SESSION_COOKIE_NAME] = cookie
+
+        with ExitStack() as stack:
+            captures = [stack.enter_context(CaptureQueriesContext(
+                connections[alias])) for alias in connections]
+            with timer() as timing:
+                response = client.get(url)
+        return (response.status_code, timing["seconds"],
+                sum(len(capture) for capture in captures))
+
+
+class ServerLoader:
+    """Requests pages from a running server."""
+
+    def __init__(self, server: str) -> None:
+        self.server = server.rstrip("/")
+
+    def __call__(self, url: str, cookie: str) -> tuple[int, float, int | None]:
+        """Requests a page.
+
+        :param url: the path of the page.
+        :type url: str
+        :param cookie: the session cookie of the user.
+        :type cookie: str
+        :return: the status, the latency in seconds and the number of
+            queries, None when the server doesn't profile its queries.
+        :rtype: tuple[int, float, int | None]
+        """
+        from django.conf import settings
+        from BlastBuddyClub.profiling import HEADERS
+
+        request = Request(
+            self.server + url,
+            headers={"Cookie": f"{settings.SESSION_COOKIE_NAME}={cookie}"})
+        with timer() as timing:
+            try:
+                with urlopen(request) as response:
+                    response.read()
+                    status, headers = response.status, response.headers
+            except HTTPError as error:
+                status, headers = error.code, error.headers
+        queries = headers.get(HEADERS["count"])
+        return status, timing["seconds"], queries and int(queries)
+
+
+def percentile_row(page: str, results: list[tuple]) -> str:
+    """Formats the latency percentiles and queries of a page.
+
+    :param page: the name of the page.
+    :type page: str
+    :param results: the status, latency and queries of every request.
+    :type results: list[tuple]
+    :return: a row of the report.
+    :rtype: str
+    """
+    latencies = [seconds * 1000 for _, seconds, _ in results]
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive") \
+        if len(latencies) > 1 else latencies * 99
+    errors = sum(status != 200 for status, _, _ in results)
+    queries = [count for _, _, count in results if count is not None]
+    query_columns = f"{statistics.mean(queries):>10.1f}{max(queries):>8}" \
+        if queries else f"{'-':>10}{'-':>8}"
+    return (f"{page:<14}{len(results):>9}{errors:>8}"
+            + "".join(f"{cuts[percentile - 1]:>10.1f}"
+                      for percentile in PERCENTILES)
+            + query_columns)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Load tests the pages that grow with the data.")
+    parser.add_argument("--db", type=Path)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--hits", type=int, default=100_000)
+    parser.add_argument("--prefix", default="synthetic")
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=200,
+                        help="The number of requests per page.")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--pages", nargs="+", choices=PAGES,
+                        default=list(PAGES))
+    parser.add_argument("--server")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    generate = args.db is None or not args.db.exists()
+    db_path = setup_django(args.db)
+    if generate:
+        from django.core.management import call_command
+        print(f"Generating data in {db_path}")
+        call_command("generate_data", users=args.users, hits=args.hits,
+                     prefix=args.prefix, seed=args.seed)
+
+    rng = random.Random(args.seed)
+    sessions = create_sessions(args.prefix, args.sessions)
+    requests = []
+    for page in args.pages:
+        candidates = [(session[page], session["cookie"])
+                      for session in sessions if session[page]]
+        requests += [(page, *rng.choice(candidates))
+                     for _ in range(args.requests)]
+    rng.shuffle(requests)
+
+    load = ServerLoader(args.server) if args.server else ClientLoader()
+    with ThreadPoolExecutor(args.concurrency) as executor, \
+            timer() as total:
+        results = list(executor.map(lambda request: load(*request[1:]),
+                                    requests))
+
+    print(f"{len(requests)} requests, {args.concurrency} at a time, in "
+          f"{total['seconds']:.1f} s ({len(requests) / total['seconds']:.1f}"
+          f" requests/s)")
+    print(f"{'page':<14}{'requests':>9}{'errors':>8}"
+          + "".join(f"{f'p{percentile} (ms)':>10}"
+                    for percentile in PERCENTILES)
+          + f"{'queries':>10}{'max':>8}")
+    for page in args.pages:
+        print(percentile_row(page, [
+            result for request, result in zip(requests, results)
+            if request[0] == page]))
+
+
+if __name__ == "__main__":
+    main()
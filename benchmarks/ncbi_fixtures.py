@@ -0,0 +1,317 @@
+# Standard library imports
+from pathlib import Path
+import argparse
+import gzip
+import json
+import random
+import re
+
+# Local imports
+from benchmarks.utils import BASE_DIR
+
+
+"""
+NCBI responses used by the benchmarks, stored in fixtures/ncbi.
+
+Every fixture consists of a BLAST XML output, <name>.xml.gz, and the
+Entrez GenBank XML of every subject in it, <name>.entrez.json.gz,
+mapping accession codes to the responses of efetch.
+
+The committed fixtures are generated, as NCBI can't be reached from
+the machines the benchmarks run on. They follow the layout of the XML
+qblast returns, with random sequences of a fixed seed, so generating
+them again gives the same files. Real responses can be recorded with
+--record, which needs access to NCBI.
+
+Usage:
+    `python -m benchmarks.ncbi_fixtures`
+    `python -m benchmarks.ncbi_fixtures --record query.fasta --name real`
+"""
+
+
+FIXTURE_DIR = BASE_DIR / "fixtures" / "ncbi"
+
+# name: (query length, alignments, maximum HSPs per alignment)
+FIXTURES = {
+    "small": (300, 10, 2),
+    "medium": (1_000, 100, 3),
+    "huge": (2_000, 500, 5),
+}
+
+ORGANISMS = [
+    "Homo sapiens", "Mus musculus", "Rattus norvegicus", "Danio rerio",
+    "Gallus gallus", "Bos taurus", "Sus scrofa", "Pan troglodytes",
+    "Macaca mulatta", "Canis lupus familiaris",
+]
+
+BLAST_XML = """<?xml version="1.0"?>
+<!DOCTYPE BlastOutput PUBLIC "-//NCBI//NCBI BlastOutput/EN" \
+"http://www.ncbi.nlm.nih.gov/dtd/NCBI_BlastOutput.dtd">
+<BlastOutput>
+  <BlastOutput_program>blastn</BlastOutput_program>
+  <BlastOutput_version>BLASTN 2.15.0+</BlastOutput_version>
+  <BlastOutput_reference>Stephen F. Altschul, Thomas L. Madden, \
+Alejandro A. Sch&amp;auml;ffer, Jinghui Zhang, Zheng Zhang, Webb Miller, \
+and David J. Lipman (1997), &quot;Gapped BLAST and PSI-BLAST: a new \
+generation of protein database search programs&quot;, Nucleic Acids Res. \
+25:3389-3402.</BlastOutput_reference>
+  <BlastOutput_db>nr</BlastOutput_db>
+  <BlastOutput_query-ID>Query_1</BlastOutput_query-ID>
+  <BlastOutput_query-def>{name} benchmark query</BlastOutput_query-def>
+  <BlastOutput_query-len>{query_length}</BlastOutput_query-len>
+  <BlastOutput_param>
+    <Parameters>
+      <Parameters_expect>10</Parameters_expect>
+      <Parameters_sc-match>2</Parameters_sc-match>
+      <Parameters_sc-mismatch>-3</Parameters_sc-mismatch>
+      <Parameters_gap-open>5</Parameters_gap-open>
+      <Parameters_gap-extend>2</Parameters_gap-extend>
+      <Parameters_filter>L;m;</Parameters_filter>
+    </Parameters>
+  </BlastOutput_param>
+<BlastOutput_iterations>
+<Iteration>
+  <Iteration_iter-num>1</Iteration_iter-num>
+  <Iteration_query-ID>Query_1</Iteration_query-ID>
+  <Iteration_query-def>{name} benchmark query</Iteration_query-def>
+  <Iteration_query-len>{query_length}</Iteration_query-len>
+<Iteration_hits>
+{hits}</Iteration_hits>
+  <Iteration_stat>
+    <Statistics>
+      <Statistics_db-num>104587466</Statistics_db-num>
+      <Statistics_db-len>1425486232583</Statistics_db-len>
+      <Statistics_hsp-len>0</Statistics_hsp-len>
+      <Statistics_eff-space>0</Statistics_eff-space>
+      <Statistics_kappa>0.41</Statistics_kappa>
+      <Statistics_lambda>0.625</Statistics_lambda>
+      <Statistics_entropy>0.78</Statistics_entropy>
+    </Statistics>
+  </Iteration_stat>
+</Iteration>
+</BlastOutput_iterations>
+</BlastOutput>
+"""
+
+HIT_XML = """<Hit>
+  <Hit_num>{number}</Hit_num>
+  <Hit_id>gi|{gi}|ref|{accession}.1|</Hit_id>
+  <Hit_def>{organism} benchmark subject {number}, mRNA</Hit_def>
+  <Hit_accession>{accession}</Hit_accession>
+  <Hit_len>{length}</Hit_len>
+  <Hit_hsps>
+{hsps}  </Hit_hsps>
+</Hit>
+"""
+
+HSP_XML = """    <Hsp>
+      <Hsp_num>{number}</Hsp_num>
+      <Hsp_bit-score>{bits:.3f}</Hsp_bit-score>
+      <Hsp_score>{score}</Hsp_score>
+      <Hsp_evalue>{evalue:.3g}</Hsp_evalue>
+      <Hsp_query-from>{query_from}</Hsp_query-from>
+      <Hsp_query-to>{query_to}</Hsp_query-to>
+      <Hsp_hit-from>{hit_from}</Hsp_hit-from>
+      <Hsp_hit-to>{hit_to}</Hsp_hit-to>
+      <Hsp_query-frame>1</Hsp_query-frame>
+      <Hsp_hit-frame>1</Hsp_hit-frame>
+      <Hsp_identity>{identity}</Hsp_identity>
+      <Hsp_positive>{identity}</Hsp_positive>
+      <Hsp_gaps>0</Hsp_gaps>
+      <Hsp_align-len>{length}</Hsp_align-len>
+      <Hsp_qseq>{qseq}</Hsp_qseq>
+      <Hsp_hseq>{hseq}</Hsp_hseq>
+      <Hsp_midline>{midline}</Hsp_midline>
+    </Hsp>
+"""
+
+ENTREZ_XML = """<?xml version="1.0" encoding="UTF-8"  ?>
+<!DOCTYPE GBSet PUBLIC "-//NCBI//NCBI GBSeq/EN" \
+"https://www.ncbi.nlm.nih.gov/dtd/NCBI_GBSeq.dtd">
+<GBSet>
+  <GBSeq>
+    <GBSeq_locus>{accession}</GBSeq_locus>
+    <GBSeq_length>{length}</GBSeq_length>
+    <GBSeq_strandedness>single</GBSeq_strandedness>
+    <GBSeq_moltype>mRNA</GBSeq_moltype>
+    <GBSeq_topology>linear</GBSeq_topology>
+    <GBSeq_division>PRI</GBSeq_division>
+    <GBSeq_definition>{organism} benchmark subject, mRNA</GBSeq_definition>
+    <GBSeq_primary-accession>{accession}</GBSeq_primary-accession>
+    <GBSeq_accession-version>{accession}.1</GBSeq_accession-version>
+    <GBSeq_source>{organism}</GBSeq_source>
+    <GBSeq_organism>{organism}</GBSeq_organism>
+    <GBSeq_sequence>{sequence}</GBSeq_sequence>
+  </GBSeq>
+</GBSet>
+"""
+
+
+def generate_fixture(name: str, query_length: int, alignments: int,
+                     max_hsps: int) -> tuple[str, dict[str, str]]:
+    """Generates a BLAST XML output and the Entrez responses for it.
+
+    The HSPs of a subject align parts of the query to the subject with
+    about 90% identity, in order of decreasing score, as NCBI sorts
+    them.
+
+    :param name: the name of the fixture, seeds the sequences.
+    :type name: str
+    :param query_length: the length of the query.
+    :type query_length: int
+    :param alignments: the number of subjects.
+    :type alignments: int
+    :param max_hsps: the maximum number of HSPs of a subject.
+    :type max_hsps: int
+    :return: the BLAST XML, and the Entrez XML per accession code.
+    :rtype: tuple[str, dict[str, str]]
+    """
+    rng = random.Random(name)
+    query = "".join(rng.choices("ACGT", k=query_length))
+    hits, entrez = [], {}
+    for number in range(1, alignments + 1):
+        accession = f"NM_{rng.randrange(10 ** 9):09d}"
+        organism = rng.choice(ORGANISMS)
+        subject = list("".join(rng.choices("ACGT", k=query_length * 2)))
+
+        hsps = []
+        for _ in range(rng.randint(1, max_hsps)):
+            length = rng.randint(min(50, query_length), query_length // 2)
+            query_from = rng.randrange(query_length - length + 1)
+            hit_from = rng.randrange(len(subject) - length + 1)
+            qseq = query[query_from:query_from + length]
+            hseq = "".join(base if rng.random() < 0.9 else rng.choice("ACGT")
+                           for base in qseq)
+            subject[hit_from:hit_from + length] = hseq
+            identity = sum(q == h for q, h in zip(qseq, hseq))
+            score = 2 * identity - 3 * (length - identity)
+            hsps.append(dict(
+                score=score, bits=score * 0.9, query_from=query_from + 1,
+                query_to=query_from + length, hit_from=hit_from + 1,
+                hit_to=hit_from + length, identity=identity, length=length,
+                qseq=qseq, hseq=hseq,
+                midline="".join("|" if q == h else " "
+                                for q, h in zip(qseq, hseq))))
+        hsps.sort(key=lambda hsp: -hsp["score"])
+        for hsp_number, hsp in enumerate(hsps, 1):
+            # Spread the E-values over the range NCBI reports
+            hsp["evalue"] = 10 ** -rng.uniform(0, 100) \
+                * (number * hsp_number)
+        hits.append((min(hsp["evalue"] for hsp in hsps), accession,
+                     organism, "".join(subject), hsps))
+        entrez[accession] = ENTREZ_XML.format(
+            accession=accession, organism=organism,
+            length=len(subject), sequence="".join(subject).lower())
+
+    hits.sort(key=lambda hit: hit[0])
+    hits_xml = "".join(
+        HIT_XML.format(
+            number=number, gi=rng.randrange(10 ** 9), accession=accession,
+            organism=organism, length=len(subject),
+            hsps="".join(HSP_XML.format(number=hsp_number, **hsp)
+                         for hsp_number, hsp in enumerate(hsps, 1)))
+        for number, (_, accession, organism, subject, hsps)
+        in enumerate(hits, 1))
+    return BLAST_XML.format(name=name, query_length=query_length,
+                            hits=hits_xml), entrez
+
+
+def write_fixture(name: str, blast_xml: str,
+                  entrez: dict[str, str]) -> None:
+    """Writes a fixture to fixtures/ncbi, compressed.
+
+    The modification time is left out of the gzip header, so writing
+    the same fixture again gives the same file.
+
+    :param name: the name of the fixture.
+    :type name: str
+    :param blast_xml: the BLAST XML output.
+    :type blast_xml: str
+    :param entrez: the Entrez XML per accession code.
+    :type entrez: dict[str, str]
+    """
+    FIXTURE_DIR.mkdir(parents=True, exist_ok=True)
+    (FIXTURE_DIR / f"{name}.xml.gz").write_bytes(
+        gzip.compress(blast_xml.encode("utf-8"), mtime=0))
+    (FIXTURE_DIR / f"{name}.entrez.json.gz").write_bytes(gzip.compress(
+        json.dumps(entrez, indent=0, sort_keys=True).encode("utf-8"),
+        mtime=0))
+
+
+def load_blast_xml(name: str) -> str:
+    """Returns the BLAST XML output of a fixture.
+
+    :param name: the name of the fixture.
+    :type name: str
+    :rtype: str
+    """
+    return gzip.decompress(
+        (FIXTURE_DIR / f"{name}.xml.gz").read_bytes()).decode("utf-8")
+
+
+def load_entrez_responses(name: str) -> dict[str, str]:
+    """Returns the Entrez XML per accession code of a fixture.
+
+    :param name: the name of the fixture.
+    :type name: str
+    :rtype: dict[str, str]
+    """
+    return json.loads(gzip.decompress(
+        (FIXTURE_DIR / f"{name}.entrez.json.gz").read_bytes()))
+
+
+def record_fixture(name: str, query_path: Path, program: str) -> None:
+    """Records the responses of NCBI for a query as a fixture.
+
+    The query is submitted with qblast, after which the GenBank XML
+    of every subject in the result is fetched with efetch, as
+    `get_entrez_organism` does.
+
+    :param name: the name of the fixture.
+    :type name: str
+    :param query_path: a FASTA file with the query.
+    :type query_path: Path
+    :param program: "blastn" or "blastp".
+    :type program: str
+    """
+    from Bio import Entrez
+    from Bio.Blast import NCBIWWW
+
+    Entrez.email = "masterblast@bbc.com"
+    db = "nucleotide" if program == "blastn" else "protein"
+    with NCBIWWW.qblast(program, "nr", query_path.read_text()) as handle:
+        blast_xml = handle.read()
+
+    entrez = {}
+    for accession in re.findall(r"<Hit_accession>(.+?)</Hit_accession>",
+                                blast_xml):
+        with Entrez.efetch(db=db, id=accession, rettype="xml",
+                           retmode="xml") as handle:
+            response = handle.read()
+        entrez[accession] = response.decode("utf-8") \
+            if isinstance(response, bytes) else response
+    write_fixture(name, blast_xml, entrez)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Generates, or records, the NCBI fixtures.")
+    parser.add_argument("--record", type=Path, metavar="QUERY_FASTA")
+    parser.add_argument("--name", default="recorded")
+    parser.add_argument("--program", default="blastn",
+                        choices=["blastn", "blastp"])
+    args = parser.parse_args()
+
+    if args.record:
+        record_fixture(args.name, args.record, args.program)
+        print(f"Recorded {FIXTURE_DIR / args.name}")
+        return
+    for name, (query_length, alignments, max_hsps) in FIXTURES.items():
+        write_fixture(name, *generate_fixture(
+            name, query_length, alignments, max_hsps))
+        size = (FIXTURE_DIR / f"{name}.xml.gz").stat().st_size
+        print(f"Generated {name}: {alignments} alignments, {size:,} bytes")
+
+
+if __name__ == "__main__":
+    main()
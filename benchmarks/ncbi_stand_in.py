@@ -0,0 +1,370 @@
+# Standard library imports
+from collections import Counter, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+
+# Local imports
+from benchmarks.ncbi_fixtures import (ENTREZ_XML, FIXTURES, ORGANISMS,
+                                      load_blast_xml, load_entrez_responses)
+
+
+"""
+A local stand-in for the NCBI BLAST and Entrez services.
+
+Answers the requests Biopython makes, so the job pipeline can be run
+and load tested without access to NCBI:
+    blast/Blast.cgi: the qblast protocol, CMD=Put submits a search
+        and answers with its RID, CMD=Get answers Status=WAITING until
+        the search is done, then the BLAST XML of a fixture.
+    entrez/eutils/efetch.fcgi: GenBank XML, GenBank text or FASTA of
+        every accession, from the Entrez responses of the fixture, or
+        made up for accessions outside of it.
+    entrez/eutils/esummary.fcgi: a document summary per accession.
+    stats: the number of requests per endpoint and status, as JSON.
+
+Every request is answered after --latency seconds. Like NCBI, Entrez
+answers 429 Too Many Requests above --rate-limit requests per second,
+or --api-key-rate-limit with an api_key, and --failure-rate of all
+requests fail with 503 Service Unavailable, to test the handling of
+errors. Failures are drawn with --seed, so a run can be repeated.
+
+MasterBlast uses the stand-in when NCBI_STAND_IN_URL is set to its URL,
+see BlastBuddyClub/settings.py. Biopython polls a BLAST search every 20
+seconds at most, so a --blast-seconds above 0 makes every job take at
+least 20 seconds.
+
+Usage:
+    `python -m benchmarks.ncbi_stand_in --port 8800 --latency 0.2`
+    `NCBI_STAND_IN_URL=http://127.0.0.1:8800/ py manage.py runserver`
+"""
+
+
+BLAST_PATH = "blast/Blast.cgi"
+EUTILS_PATH = "entrez/eutils/"
+
+QBLAST_INFO = "<!--QBlastInfoBegin\n{info}\nQBlastInfoEnd\n-->\n"
+
+ESUMMARY_XML = """<?xml version="1.0" encoding="UTF-8" ?>
+<!DOCTYPE eSummaryResult PUBLIC "-//NLM//DTD esummary v1 20041029//EN" \
+"https://eutils.ncbi.nlm.nih.gov/eutils/dtd/20041029/esummary-v1.dtd">
+<eSummaryResult>
+{docsums}</eSummaryResult>
+"""
+
+DOCSUM_XML = """<DocSum>
+    <Id>{accession}</Id>
+    <Item Name="Caption" Type="String">{caption}</Item>
+    <Item Name="Title" Type="String">{organism} stand-in subject</Item>
+    <Item Name="AccessionVersion" Type="String">{accession}</Item>
+    <Item Name="Length" Type="Integer">{length}</Item>
+</DocSum>
+"""
+
+_GBSEQ = re.compile(r"<GBSeq>.*?</GBSeq>\n?", re.DOTALL)
+
+
+class NCBIStandIn:
+    """The state of the stand-in: its responses, searches and counts.
+
+    :param fixture: the NCBI fixture to answer with.
+    :type fixture: str
+    :param latency: the seconds to wait before answering a request.
+    :type latency: float
+    :param blast_seconds: the seconds a BLAST search takes.
+    :type blast_seconds: float
+    :param rate_limit: the Entrez requests per second, 0 for no limit.
+    :type rate_limit: int
+    :param api_key_rate_limit: the limit for requests with an api_key.
+    :type api_key_rate_limit: int
+    :param failure_rate: the fraction of requests that fail.
+    :type failure_rate: float
+    :param seed: the seed of the failures.
+    :type seed: int
+    """
+
+    def __init__(self, fixture: str = "small", latency: float = 0.0,
+                 blast_seconds: float = 0.0, rate_limit: int = 3,
+                 api_key_rate_limit: int = 10, failure_rate: float = 0.0,
+                 seed: int = 0) -> None:
+        self.blast_xml = load_blast_xml(fixture)
+        self.entrez = load_entrez_responses(fixture)
+        self.latency = latency
+        self.blast_seconds = blast_seconds
+        self.rate_limit = rate_limit
+        self.api_key_rate_limit = api_key_rate_limit
+        self.failure_rate = failure_rate
+        self.rng = random.Random(seed)
+        self.searches: dict[str, float] = {}
+        self.entrez_requests: deque[float] = deque()
+        self.counts = Counter()
+        self.lock = threading.Lock()
+
+    def fails(self) -> bool:
+        """Draws whether a request fails.
+
+        :rtype: bool
+        """
+        with self.lock:
+            return self.rng.random() < self.failure_rate
+
+    def throttled(self, api_key: bool) -> bool:
+        """Counts an Entrez request, and returns whether it exceeds the
+        rate limit of the last second.
+
+        :param api_key: whether the request has an api_key.
+        :type api_key: bool
+        :rtype: bool
+        """
+        limit = self.api_key_rate_limit if api_key else self.rate_limit
+        now = time.monotonic()
+        with self.lock:
+            while self.entrez_requests \
+                    and self.entrez_requests[0] <= now - 1:
+                self.entrez_requests.popleft()
+            if limit and len(self.entrez_requests) >= limit:
+                return True
+            self.entrez_requests.append(now)
+            return False
+
+    def count(self, endpoint: str, status: int) -> None:
+        with self.lock:
+            self.counts[f"{endpoint} {status}"] += 1
+
+    def blast(self, query: dict[str, str]) -> tuple[int, str, str]:
+        """Answers a qblast request.
+
+        :param query: the parameters of the request.
+        :type query: dict[str, str]
+        :return: the status, content type and body.
+        :rtype: tuple[int, str, str]
+        """
+        command = query.get("CMD")
+        if command == "Put":
+            if not query.get("QUERY"):
+                return 200, "text/html", (
+                    "<p class=\"error\">Message ID#32 Error: Query contains "
+                    "no data: Query contains no sequence data</p>\n")
+            rid = uuid.uuid4().hex[:11].upper()
+            with self.lock:
+                self.searches[rid] = time.monotonic() + self.blast_seconds
+            return 200, "text/html", QBLAST_INFO.format(
+                info=f"    RID = {rid}\n    RTOE = "
+                     f"{max(1, round(self.blast_seconds))}")
+        if command == "Get":
+            with self.lock:
+                ready_at = self.searches.get(query.get("RID"))
+            if ready_at is None:
+                return 404, "text/plain", "Unknown RID\n"
+            if time.monotonic() < ready_at:
+                return 200, "text/html", QBLAST_INFO.format(
+                    info="\tStatus=WAITING")
+            return 200, "text/xml", self.blast_xml
+        return 400, "text/plain", f"Unknown CMD {command}\n"
+
+    def genbank_xml(self, accession: str) -> str:
+        """Returns the GenBank XML of an accession, as in the fixture,
+        or made up.
+
+        :param accession: the accession code.
+        :type accession: str
+        :rtype: str
+        """
+        code = accession.split(".")[0]
+        if code in self.entrez:
+            return self.entrez[code]
+        organism = ORGANISMS[sum(map(ord, code)) % len(ORGANISMS)]
+        return ENTREZ_XML.format(accession=code, organism=organism,
+                                 length=6, sequence="mlpgsl")
+
+    def efetch(self, accessions: list[str], rettype: str) -> tuple[str, str]:
+        """Answers an efetch request.
+
+        :param accessions: the accession codes.
+        :type accessions: list[str]
+        :param rettype: "xml", "gb" or "fasta".
+        :type rettype: str
+        :return: the content type and body.
+        :rtype: tuple[str, str]
+        """
+        if rettype == "gb":
+            return "text/plain", "".join(
+                f"LOCUS       {accession}\n"
+                f"ACCESSION   {accession.split('.')[0]}\n"
+                f"VERSION     {accession}\n"
+                f"ORIGIN\n        1 mlpgsl\n//\n"
+                for accession in accessions)
+        if rettype == "fasta":
+            return "text/plain", "".join(
+                f">{accession} stand-in subject\nMLPGSL\n"
+                for accession in accessions)
+        documents = [self.genbank_xml(accession) for accession in accessions]
+        header = documents[0].split("<GBSet>")[0]
+        sequences = "".join("  " + match.group()
+                            for document in documents
+                            for match in _GBSEQ.finditer(document))
+        return "text/xml", f"{header}<GBSet>\n{sequences}</GBSet>\n"
+
+    def esummary(self, accessions: list[str]) -> tuple[str, str]:
+        """Answers an esummary request.
+
+        :param accessions: the accession codes.
+        :type accessions: list[str]
+        :return: the content type and body.
+        :rtype: tuple[str, str]
+        """
+        docsums = []
+        for accession in accessions:
+            document = self.genbank_xml(accession)
+            docsums.append(DOCSUM_XML.format(
+                accession=accession, caption=accession.split(".")[0],
+                organism=re.search(r"<GBSeq_organism>(.*?)<", document)[1],
+                length=re.search(r"<GBSeq_length>(\d+)<", document)[1]))
+        return "text/xml", ESUMMARY_XML.format(docsums="".join(docsums))
+
+    def answer(self, path: str, query: dict[str, str]) \
+            -> tuple[int, str, str]:
+        """Answers a request to any endpoint.
+
+        :param path: the path of the request, without the leading /.
+        :type path: str
+        :param query: the parameters of the request.
+        :type query: dict[str, str]
+        :return: the status, content type and body.
+        :rtype: tuple[int, str, str]
+        """
+        if path == "stats":
+            with self.lock:
+                return 200, "application/json", json.dumps(
+                    dict(sorted(self.counts.items())))
+
+        entrez = path.startswith(EUTILS_PATH)
+        if entrez and self.throttled("api_key" in query):
+            return 429, "application/json", json.dumps(
+                {"error": "API rate limit exceeded",
+                 "limit": str(self.rate_limit)})
+        time.sleep(self.latency)
+        if self.fails():
+            return 503, "text/html", "<h1>Service unavailable</h1>\n"
+
+        if path == BLAST_PATH:
+            return self.blast(query)
+        accessions = query.get("id", "").split(",")
+        if path == EUTILS_PATH + "efetch.fcgi" and accessions[0]:
+            return 200, *self.efetch(accessions, query.get("rettype", "xml"))
+        if path == EUTILS_PATH + "esummary.fcgi" and accessions[0]:
+            return 200, *self.esummary(accessions)
+        return 400, "text/plain", f"Unknown request {path}\n"
+
+
+class NCBIStandInHandler(BaseHTTPRequestHandler):
+    """Passes the GET and POST requests to the stand-in of the server."""
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        self.respond(url.path, url.query)
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length", 0))
+        url = urlsplit(self.path)
+        body = self.rfile.read(length).decode("utf-8")
+        self.respond(url.path, "&".join(filter(None, [url.query, body])))
+
+    def respond(self, path: str, query_string: str) -> None:
+        """Answers the request, and counts it.
+
+        :param path: the path of the request.
+        :type path: str
+        :param query_string: the parameters of the request, URL encoded.
+        :type query_string: str
+        """
+        query = {key: values[0] for key, values
+                 in parse_qs(query_string).items()}
+        path = path.lstrip("/")
+        stand_in = self.server.stand_in
+        status, content_type, body = stand_in.answer(path, query)
+        if path != "stats":
+            stand_in.count(path.rsplit("/", 1)[-1], status)
+
+        content = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", f"{content_type}; charset=UTF-8")
+        self.send_header("Content-Length", str(len(content)))
+        if status == 429:
+            self.send_header("Retry-After", "1")
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format: str, *args) -> None:
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class NCBIStandInServer(ThreadingHTTPServer):
+    """Serves the stand-in, a thread per request."""
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, address: tuple[str, int], stand_in: NCBIStandIn,
+                 verbose: bool = False) -> None:
+        super().__init__(address, NCBIStandInHandler)
+        self.stand_in = stand_in
+        self.verbose = verbose
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/"
+
+
+def start_stand_in(**options) -> NCBIStandInServer:
+    """Starts the stand-in on a free port in a background thread.
+
+    :param options: the options of `NCBIStandIn`.
+    :return: the server, stopped with `shutdown`.
+    :rtype: NCBIStandInServer
+    """
+    server = NCBIStandInServer(("127.0.0.1", 0), NCBIStandIn(**options))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Serves a stand-in for NCBI BLAST and Entrez.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8800)
+    parser.add_argument("--fixture", choices=FIXTURES, default="small")
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--blast-seconds", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=int, default=3)
+    parser.add_argument("--api-key-rate-limit", type=int, default=10)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    stand_in = NCBIStandIn(
+        args.fixture, args.latency, args.blast_seconds, args.rate_limit,
+        args.api_key_rate_limit, args.failure_rate, args.seed)
+    server = NCBIStandInServer((args.host, args.port), stand_in,
+                               args.verbose)
+    print(f"Serving the {args.fixture} fixture, "
+          f"use NCBI_STAND_IN_URL={server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps(dict(sorted(stand_in.counts.items())), indent=4))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# Standard library imports
+import argparse
+import statistics
+
+# Local imports
+from benchmarks.utils import (setup_django, load_fixture, timer,
+                              database_size)
+
+
+"""
+Benchmark of the packed sequence storage.
+
+Loads the development fixture, and measures the database size and the
+load time of the result and comparison pages, with the sequences
+stored packed and stored as text, like before PackedSequenceField.
+
+Usage:
+    `python -m benchmarks.sequence_storage --repeat 20`
+"""
+
+
+def store_sequences_as_text() -> None:
+    """Rewrites every packed sequence as plain text, as it used to be."""
+    from django.db import connection, transaction
+    from Blaster.models import BlastJob, SubjectSequence
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        for job in BlastJob.objects.only("id", "sequence"):
+            cursor.execute(
+                "UPDATE Blaster_blastjob SET sequence = %s WHERE id = %s",
+                [job.sequence, job.id])
+        for subject in SubjectSequence.objects.only("id", "sequence"):
+            cursor.execute(
+                "UPDATE Blaster_subjectsequence SET sequence = %s "
+                "WHERE id = %s",
+                [subject.sequence, subject.id])
+
+
+def time_pages(repeat: int) -> dict[str, float]:
+    """Times the median load of the result and comparison pages.
+
+    :param repeat: how often every page is loaded.
+    :type repeat: int
+    :return: median seconds per page.
+    :rtype: dict[str, float]
+    """
+    from django.test import Client
+    from Blaster.models import BlastJob, BlastHit
+
+    timings = {}
+    for job in BlastJob.objects.exclude(user=None):
+        client = Client()
+        client.force_login(job.user)
+        hit_ids = [str(i) for i in BlastHit.objects.filter(job=job)
+                   .values_list("id", flat=True)]
+        if not hit_ids:
+            continue
+
+        # The first load also compiles the templates, so it's skipped.
+        client.get(f"/blast_result/{job.id}")
+        results, comparisons = [], []
+        for _ in range(repeat):
+            with timer() as result:
+                client.get(f"/blast_result/{job.id}")
+            results.append(result["seconds"])
+
+            comparison_url = client.post(
+                f"/blast_result/{job.id}", {"selected_hits": hit_ids}).url
+            with timer() as comparison:
+                client.get(comparison_url)
+            comparisons.append(comparison["seconds"])
+
+        timings[f"blast_result/{job.id} ({len(hit_ids)} hits)"] = \
+            statistics.median(results)
+        timings[f"comparison/{job.id} ({len(hit_ids)} hits)"] = \
+            statistics.median(comparisons)
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmarks packed against text sequence storage.")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    db_path = setup_django()
+    load_fixture()
+
+    packed_size = database_size(db_path)
+    packed_times = time_pages(args.repeat)
+
+    store_sequences_as_text()
+    text_size = database_size(db_path)
+    text_times = time_pages(args.repeat)
+
+    print(f"database size, text:   {text_size:>10} bytes")
+    print(f"database size, packed: {packed_size:>10} bytes "
+          f"({packed_size / text_size:.0%})")
+    print()
+    print(f"{'page':<40}{'text (ms)':>12}{'packed (ms)':>14}")
+    for page, seconds in text_times.items():
+        print(f"{page:<40}{seconds * 1000:>12.2f}"
+              f"{packed_times[page] * 1000:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
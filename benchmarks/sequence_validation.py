@@ -0,0 +1,113 @@
+# Standard library imports
+import argparse
+import random
+import re
+import statistics
+
+# Local imports
+from benchmarks.utils import peak_memory, timer
+from Blaster.utils.sequence_validator import validate_sequence
+
+
+"""
+Benchmark of validating and processing submitted sequences.
+
+Compares the regular expression and string passes the index form used
+to validate and process a sequence, against the single pass
+`SequenceValidator`, for FASTA inputs of 1 kb up to 50 Mb, split over
+lines of 80 characters. Reports the median time and the peak memory
+allocated while processing an input.
+
+Usage:
+    `python -m benchmarks.sequence_validation --repeat 5`
+"""
+
+
+SIZES = [1_000, 100_000, 1_000_000, 10_000_000, 50_000_000]
+
+
+def regex_process(sequence: str, blast_mode: str) -> tuple[str, str] | None:
+    """Validates and processes a sequence as the index form used to.
+
+    :param sequence: the submitted sequence.
+    :type sequence: str
+    :param blast_mode: "blastn" or "blastp".
+    :type blast_mode: str
+    :return: the header and sequence, or None if invalid.
+    :rtype: tuple[str, str] | None
+    """
+    characters = "atcg" if blast_mode == "blastn" \
+        else "acdefghiklmnpqrstvwy"
+    pattern = rf"(?i)" \
+              rf"^(>.+(\n|\r\n))?" \
+              rf"(?>[{characters}]+(\n|\r\n)*)+$"
+    if not re.match(pattern, sequence):
+        return None
+
+    sequence = sequence.replace("\r\n", "\n")
+    if sequence.startswith(">"):
+        header, *sequence = sequence[1:].rstrip("\n").split("\n")
+        return header, "".join(sequence)
+    return "", sequence.replace("\n", "")
+
+
+def single_pass_process(sequence: str,
+                        blast_mode: str) -> tuple[str, str] | None:
+    """Validates and processes a sequence with `SequenceValidator`.
+
+    :param sequence: the submitted sequence.
+    :type sequence: str
+    :param blast_mode: "blastn" or "blastp".
+    :type blast_mode: str
+    :return: the header and sequence, or None if invalid.
+    :rtype: tuple[str, str] | None
+    """
+    validator = validate_sequence(sequence.encode("utf-8"), blast_mode)
+    if not validator.valid:
+        return None
+    return validator.header, validator.sequence
+
+
+def fasta_input(size: int) -> str:
+    """Generates a nucleotide FASTA input of about a size.
+
+    :param size: the number of residues.
+    :type size: int
+    :return: the input, with a header and lines of 80 residues.
+    :rtype: str
+    """
+    residues = "".join(random.choices("ACGT", k=size))
+    lines = [residues[i:i + 80] for i in range(0, size, 80)]
+    return ">benchmark sequence\n" + "\n".join(lines) + "\n"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmarks validating submitted sequences.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-size", type=int, default=SIZES[-1])
+    args = parser.parse_args()
+
+    print(f"{'residues':>12}{'regex (ms)':>13}{'single (ms)':>13}"
+          f"{'regex (MB)':>12}{'single (MB)':>13}")
+    for size in [size for size in SIZES if size <= args.max_size]:
+        sequence = fasta_input(size)
+        assert regex_process(sequence, "blastn") \
+            == single_pass_process(sequence, "blastn")
+
+        timings = {regex_process: [], single_pass_process: []}
+        for _ in range(args.repeat):
+            for function, values in timings.items():
+                with timer() as timing:
+                    function(sequence, "blastn")
+                values.append(timing["seconds"])
+        medians = [statistics.median(values) * 1000
+                   for values in timings.values()]
+        memory = [peak_memory(function, sequence, "blastn") / 1024 ** 2
+                  for function in timings]
+        print(f"{size:>12,}{medians[0]:>13.2f}{medians[1]:>13.2f}"
+              f"{memory[0]:>12.1f}{memory[1]:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
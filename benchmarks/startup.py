@@ -0,0 +1,121 @@
+# Standard library imports
+from pathlib import Path
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Local imports
+from benchmarks.utils import BASE_DIR
+
+
+"""
+Benchmark of the startup time and memory of the processes of the site.
+
+Every scenario is run in a fresh interpreter, as a process is started:
+    check: `manage.py check`, which runs before every management
+        command and deploy.
+    wsgi: loading the WSGI application and resolving the URLconf, as
+        a web worker does before its first request.
+    worker: loading the Celery app and importing the task modules, as
+        a Celery worker does when it boots, without connecting to the
+        broker.
+
+The wall time includes starting the interpreter. The memory is the
+peak resident set size of the process. Every process also reports
+which of the heavy libraries it loaded, these should only be loaded
+by the processes that use them, on first use: Bokeh and pandas when
+graphs are rendered, Biopython when NCBI is queried.
+
+Usage:
+    `python -m benchmarks.startup --repeat 5`
+"""
+
+
+HEAVY_MODULES = ("bokeh", "pandas", "numpy", "Bio.Entrez",
+                 "Bio.Blast.NCBIWWW", "Bio.Blast.NCBIXML")
+
+SCENARIOS = {
+    "check": (
+        "from django.core.management import execute_from_command_line\n"
+        "execute_from_command_line(['manage.py', 'check'])\n"),
+    "wsgi": (
+        "from BlastBuddyClub.wsgi import application\n"
+        "from django.urls import get_resolver\n"
+        "get_resolver().url_patterns\n"),
+    "worker": (
+        "import django\n"
+        "django.setup()\n"
+        "from BlastBuddyClub.celery import app\n"
+        "app.loader.import_default_modules()\n"
+        "app.finalize()\n"),
+}
+
+REPORT = (
+    "import json, resource, sys\n"
+    "print(json.dumps({\n"
+    "    'rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,\n"
+    "    'modules': [name for name in %r if name in sys.modules],\n"
+    "}))\n")
+
+
+def measure(scenario: str, db_path: Path | str | None = None) -> dict:
+    """Starts a process for a scenario, and measures its startup.
+
+    The process uses a throwaway SQLite database, so the development
+    database is never touched.
+
+    :param scenario: the name of the scenario, see SCENARIOS.
+    :type scenario: str
+    :param db_path: path of the database, defaults to a temporary file.
+    :type db_path: Path | str | None
+    :raises RuntimeError: if the process fails.
+    :return: the wall time in seconds, the peak resident set size in
+        bytes, and the heavy modules that were loaded.
+    :rtype: dict
+    """
+    if db_path is None:
+        db_path = Path(tempfile.mkdtemp()) / "startup.sqlite3"
+    environment = dict(os.environ, DB_NAME=str(db_path),
+                       DJANGO_SETTINGS_MODULE="BlastBuddyClub.settings")
+    code = SCENARIOS[scenario] + REPORT % (HEAVY_MODULES,)
+
+    start = time.perf_counter()
+    process = subprocess.run([sys.executable, "-c", code], cwd=BASE_DIR,
+                             env=environment, capture_output=True,
+                             text=True)
+    seconds = time.perf_counter() - start
+    if process.returncode != 0:
+        raise RuntimeError(f"{scenario} failed:\n{process.stderr}")
+
+    result = json.loads(process.stdout.splitlines()[-1])
+    result["seconds"] = seconds
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmark of the startup of the site's processes.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--scenario", choices=SCENARIOS, action="append",
+                        help="scenario to run, defaults to all of them")
+    args = parser.parse_args()
+
+    db_path = Path(tempfile.mkdtemp()) / "startup.sqlite3"
+    print(f"{'scenario':<10}{'median (s)':>12}{'min (s)':>9}"
+          f"{'RSS (MB)':>10}  heavy modules loaded")
+    for scenario in args.scenario or SCENARIOS:
+        results = [measure(scenario, db_path) for _ in range(args.repeat)]
+        seconds = [result["seconds"] for result in results]
+        rss = max(result["rss"] for result in results)
+        modules = ", ".join(results[-1]["modules"]) or "-"
+        print(f"{scenario:<10}{statistics.median(seconds):>12.3f}"
+              f"{min(seconds):>9.3f}{rss / 1024 ** 2:>10.1f}  {modules}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+# Standard library imports
+from contextlib import contextmanager
+from pathlib import Path
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Iterator
+
+
+"""
+Shared helpers for the benchmark scripts.
+
+Benchmarks never touch the development database, every benchmark
+creates its own throwaway SQLite database through `setup_django`.
+"""
+
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+FIXTURE = BASE_DIR / "fixtures" / "dev" / "initial.json"
+
+
+def setup_django(db_path: Path | str | None = None,
+                 create_tables: bool = True) -> Path:
+    """Configures Django to use a separate SQLite database file.
+
+    Has to be called before any model is imported. The tables are
+    created from the current models, as the app has no migrations,
+    with the table of the cache.
+
+    When DB_ENGINE is set to another database than SQLite, the
+    database from the environment is used as is, so DB_NAME should
+    point to a scratch database.
+
+    :param db_path: path of the database, defaults to a temporary file.
+    :type db_path: Path | str | None
+    :param create_tables: whether the tables should be created.
+    :type create_tables: bool
+    :return: the path of the database that is used.
+    :rtype: Path
+    """
+    if db_path is None:
+        db_path = Path(tempfile.mkdtemp()) / "benchmark.sqlite3"
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "BlastBuddyClub.settings")
+
+    from django.conf import settings
+    database = settings.DATABASES["default"]
+    if database["ENGINE"] == "django.db.backends.sqlite3":
+        database["NAME"] = str(db_path)
+    settings.ALLOWED_HOSTS = ["*"]
+
+    import django
+    from django.core.management import call_command
+    django.setup()
+    if create_tables:
+        call_command("migrate", run_syncdb=True, verbosity=0)
+        call_command("createcachetable", verbosity=0)
+    return Path(db_path)
+
+
+def load_fixture() -> None:
+    """Loads the development fixture into the benchmark database.
+
+    Some jobs in the fixture have no date or time, which the database
+    does not accept, these are given the first date of the fixture.
+    """
+    from django.core import serializers
+    from django.db import connection, transaction
+
+    with open(FIXTURE) as fixture:
+        objects = json.load(fixture)
+    for obj in objects:
+        if obj["model"] == "Blaster.blastjob":
+            obj["fields"]["date"] = obj["fields"]["date"] or "2024-02-20"
+            obj["fields"]["time"] = obj["fields"]["time"] or "00:00:00"
+
+    with transaction.atomic(), connection.constraint_checks_disabled():
+        for obj in serializers.deserialize("json", json.dumps(objects)):
+            obj.save()
+
+
+@contextmanager
+def timer() -> Iterator[dict]:
+    """Measures the wall time of a block in seconds.
+
+    The result is stored under "seconds" in the yielded dict.
+
+    :rtype: Iterator[dict]
+    """
+    result = {}
+    start = time.perf_counter()
+    try:
+        yield result
+    finally:
+        result["seconds"] = time.perf_counter() - start
+
+
+def peak_memory(function: Callable, *args) -> int:
+    """Returns the peak memory allocated by a call, in bytes.
+
+    :param function: the function to call.
+    :type function: Callable
+    :param args: the arguments of the call.
+    :return: the peak of the allocated memory.
+    :rtype: int
+    """
+    tracemalloc.start()
+    try:
+        function(*args)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def database_size(db_path: Path) -> int:
+    """Returns the size in bytes of a vacuumed SQLite database.
+
+    The write ahead log is checkpointed first, so all data is counted.
+
+    :param db_path: path of the database.
+    :type db_path: Path
+    :return: size of the database file.
+    :rtype: int
+    """
+    from django.db import connection
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        cursor.execute("VACUUM")
+        cursor.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    return Path(db_path).stat().st_size
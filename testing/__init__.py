@@ -1,2 +1,3 @@
 from testing.pytest_fixtures import (create_request, create_blast_job,
-                                     create_hit, create_accession)
+                                     create_hit, create_accession,
+                                     query_budget)
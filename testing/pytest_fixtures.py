@@ -1,4 +1,5 @@
 # Standard library imports
+from contextlib import contextmanager
 from typing import Callable
 
 # Third-party imports
@@ -8,6 +9,7 @@ from django.test import RequestFactory
 import pytest
 
 # Local imports
+from BlastBuddyClub.profiling import profile_queries
 from Blaster.models import EntrezAccession, BlastJob, BlastHit
 
 
@@ -144,3 +146,31 @@ def create_hit(create_request, create_blast_job, create_accession):
         )
 
     return create_hit_inner
+
+
+@pytest.fixture()
+def query_budget() -> Callable:
+    """
+    A context manager failing the test when the code inside it makes
+    more queries than its budget, listing the queries that were
+    repeated, as an N+1 pattern shows up as one query repeated for
+    every row.
+
+    The queries of all databases and threads are counted. To show a
+    view doesn't make a query per row, the same budget is declared for
+    every size of the data, e.g. by parametrizing the test:
+
+        with query_budget(12) as profile:
+            client.get("/recent")
+
+    :rtype Callable
+    """
+    @contextmanager
+    def query_budget_inner(budget: int):
+        with profile_queries() as profile:
+            yield profile
+        if profile.count > budget:
+            pytest.fail(f"{profile.count} queries exceed the budget of "
+                        f"{budget}: {profile.summary()}", pytrace=False)
+
+    return query_budget_inner
@@ -0,0 +1,50 @@
+# Third-party imports
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import Count
+import pytest
+
+# Local imports
+from Blaster.models import (BlastBuddies, BlastHit, BlastJob, HitSelection,
+                            SharedJobs)
+
+
+@pytest.mark.django_db
+def test_generate_data() -> None:
+    """
+    Tests that the generated data is consistent: the hits of every job
+    match its stored_hits, nobody is their own buddy, and jobs are only
+    shared by buddies.
+    """
+    call_command("generate_data", users=20, hits=2000, accessions=100,
+                 selections=1, batch_size=500)
+
+    jobs = BlastJob.objects.annotate(hit_count=Count("blasthit"))
+    assert User.objects.filter(username__startswith="synthetic").count() \
+        == 20
+    assert BlastHit.objects.count() == sum(job.stored_hits for job in jobs)
+    assert abs(BlastHit.objects.count() - 2000) < 50
+    assert all(job.hit_count == job.stored_hits for job in jobs)
+    assert jobs.filter(user=None).exists()
+
+    for buddies in BlastBuddies.objects.all():
+        buddy_ids = set(buddies.buddie.values_list("id", flat=True))
+        assert buddies.user_id not in buddy_ids
+        shared_owners = set(SharedJobs.objects.get(user=buddies.user)
+                            .shared_job.values_list("user_id", flat=True))
+        assert all(buddies.user in BlastBuddies.objects.get(user_id=owner)
+                   .buddie.all() for owner in shared_owners)
+    assert all(selection.user_id == selection.hits.first().job.user_id
+               for selection in HitSelection.objects.all())
+
+
+@pytest.mark.django_db
+def test_generate_data_prefix_taken() -> None:
+    """
+    Tests that the data isn't generated twice with the same prefix.
+    """
+    User.objects.create_user("synthetic0")
+
+    with pytest.raises(CommandError):
+        call_command("generate_data", users=1, hits=0, accessions=1)
@@ -0,0 +1,135 @@
+# Standard library imports
+import bz2
+import gzip
+
+# Third-party imports
+from django.core.files.uploadedfile import (SimpleUploadedFile,
+                                            TemporaryUploadedFile)
+from django.test import Client
+import pytest
+
+# Local imports
+from Blaster.forms.index_form import (clean_index_form, read_index_file,
+                                      IndexValidationEnum)
+from Blaster.models import BlastJob
+from Blaster.tasks import perform_blast_job_task
+
+
+FASTA = b">gene1\r\nACGT\r\nacgt\r\n"
+
+
+def temporary_file(content: bytes) -> TemporaryUploadedFile:
+    """
+    Creates an upload as Django stores larger files, on disk.
+
+    :param content: The content of the file.
+    :type content: bytes
+    :return: The uploaded file.
+    :rtype: TemporaryUploadedFile
+    """
+    upload = TemporaryUploadedFile("gene.fasta", "text/plain",
+                                   len(content), None)
+    upload.write(content)
+    upload.seek(0)
+    return upload
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        FASTA,
+        gzip.compress(FASTA),
+        # concatenated gzip members, as written by bgzip
+        gzip.compress(FASTA[:12]) + gzip.compress(FASTA[12:]),
+        bz2.compress(FASTA),
+    ]
+)
+@pytest.mark.parametrize("upload", [SimpleUploadedFile, temporary_file])
+def test_clean_index_form_file(content: bytes, upload) -> None:
+    """
+    Tests that files kept in memory and temporary files are streamed
+    into the validator, decompressed if needed.
+
+    :param content: The content of the file.
+    :type content: bytes
+    :param upload: Creates the uploaded file.
+    """
+    seq_file = upload("gene.fasta", content) \
+        if upload is SimpleUploadedFile else upload(content)
+
+    validation, validator = clean_index_form("blastn", "", "", seq_file)
+
+    assert validation == IndexValidationEnum.VALID
+    assert validator.header == "gene1"
+    assert validator.sequence == "ACGTacgt"
+    assert read_index_file(seq_file) == FASTA.decode()
+
+
+def test_clean_index_form_file_too_large(settings) -> None:
+    """
+    Tests that the size of a compressed file is limited after
+    decompression.
+
+    :param settings: pytest-django fixture for the settings.
+    """
+    settings.SEQUENCE_FILE_MAX_SIZE = 1000
+    seq_file = SimpleUploadedFile("gene.fasta.gz",
+                                  gzip.compress(b"A" * 1001))
+
+    validation, validator = clean_index_form("blastn", "", "", seq_file)
+
+    assert validation == IndexValidationEnum.FILE_TOO_LARGE
+    assert validator is None
+
+
+@pytest.mark.parametrize(
+    "content, seq_text, expected_result",
+    [
+        (gzip.compress(FASTA)[:-10], "",
+         IndexValidationEnum.INVALID_FILE_OBJECT),
+        (b"BZh9" + FASTA, "", IndexValidationEnum.INVALID_FILE_OBJECT),
+        (b"", "", IndexValidationEnum.MISSING_SEQUENCE_INPUT),
+        (b"", "acgt", IndexValidationEnum.VALID),
+        (b"acgx", "acgt", IndexValidationEnum.INVALID_SEQUENCE),
+    ]
+)
+def test_clean_index_form_file_invalid(content: bytes, seq_text: str,
+                                       expected_result: IndexValidationEnum
+                                       ) -> None:
+    """
+    Tests damaged files, and that an empty file counts as no file.
+
+    :param content: The content of the file.
+    :type content: bytes
+    :param seq_text: The sequence as text.
+    :type seq_text: str
+    :param expected_result: The expected validation status.
+    :type expected_result: IndexValidationEnum
+    """
+    seq_file = SimpleUploadedFile("gene.fasta", content)
+
+    validation, _ = clean_index_form("blastn", "", seq_text, seq_file)
+
+    assert validation == expected_result
+
+
+@pytest.mark.django_db
+def test_index_page_compressed_upload(
+        monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Tests that a job is created from a compressed upload.
+
+    :param monkeypatch: pytest fixture to keep the job from running.
+    :type monkeypatch: pytest.MonkeyPatch
+    """
+    monkeypatch.setattr(perform_blast_job_task, "delay",
+                        lambda *args, **kwargs: None)
+    seq_file = SimpleUploadedFile("gene.fasta.gz", gzip.compress(FASTA))
+
+    response = Client().post("/", {"blast-mode": "blastn",
+                                   "job-name": "upload", "seq-text": "",
+                                   "seq-file": seq_file})
+    job = BlastJob.objects.get()
+
+    assert response.status_code == 302
+    assert (job.header, job.sequence) == ("gene1", "ACGTacgt")
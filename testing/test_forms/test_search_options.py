@@ -0,0 +1,91 @@
+# Third-party imports
+from django.test import Client
+import pytest
+
+# Local imports
+from Blaster.forms.index_form import clean_search_options, IndexValidationEnum
+from Blaster.models import BlastJob
+from Blaster.tasks import perform_blast_job_task
+
+
+@pytest.mark.parametrize(
+    "expect, hitlist_size, max_hsps, expected_result, expected_options",
+    [
+        ("", "", "", IndexValidationEnum.VALID, {}),
+        (None, None, None, IndexValidationEnum.VALID, {}),
+        ("1e-5", "10", "0", IndexValidationEnum.VALID,
+         {"expect": 1e-5, "hitlist_size": 10, "max_hsps": 0}),
+        ("0.001", "", "2", IndexValidationEnum.VALID,
+         {"expect": 0.001, "max_hsps": 2}),
+        ("0", "", "", IndexValidationEnum.INVALID_SEARCH_OPTIONS, {}),
+        ("nan", "", "", IndexValidationEnum.INVALID_SEARCH_OPTIONS, {}),
+        ("ten", "", "", IndexValidationEnum.INVALID_SEARCH_OPTIONS, {}),
+        ("", "0", "", IndexValidationEnum.INVALID_SEARCH_OPTIONS, {}),
+        ("", "501", "", IndexValidationEnum.INVALID_SEARCH_OPTIONS, {}),
+        ("", "2.5", "", IndexValidationEnum.INVALID_SEARCH_OPTIONS, {}),
+        ("", "", "-1", IndexValidationEnum.INVALID_SEARCH_OPTIONS, {}),
+        ("", "", "100", IndexValidationEnum.VALID, {"max_hsps": 100}),
+        ("", "", "101", IndexValidationEnum.INVALID_SEARCH_OPTIONS, {}),
+        ("", "", "1" + "0" * 30,
+         IndexValidationEnum.INVALID_SEARCH_OPTIONS, {}),
+    ]
+)
+def test_clean_search_options(expect: str | None, hitlist_size: str | None,
+                              max_hsps: str | None,
+                              expected_result: IndexValidationEnum,
+                              expected_options: dict) -> None:
+    """
+    Tests the validation of the result size options, and that empty
+    options are left to the site defaults.
+
+    :param expect: The E-value threshold.
+    :type expect: str | None
+    :param hitlist_size: The number of subjects.
+    :type hitlist_size: str | None
+    :param max_hsps: The number of HSPs per subject.
+    :type max_hsps: str | None
+    :param expected_result: The expected validation status.
+    :type expected_result: IndexValidationEnum
+    :param expected_options: The expected options.
+    :type expected_options: dict
+    """
+    assert clean_search_options(expect, hitlist_size, max_hsps) \
+        == (expected_result, expected_options)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "options, expected",
+    [
+        ({}, (0.5, 20, 0)),
+        ({"expect": "1e-10", "hitlist-size": "5", "max-hsps": "1"},
+         (1e-10, 5, 1)),
+    ],
+    ids=["site defaults", "per job"]
+)
+def test_index_page_search_options(settings,
+                                   monkeypatch: pytest.MonkeyPatch,
+                                   options: dict, expected: tuple) -> None:
+    """
+    Tests that a job is created with the options of the form, or the
+    site defaults.
+
+    :param settings: pytest-django fixture for the settings.
+    :param monkeypatch: pytest fixture to keep the job from running.
+    :type monkeypatch: pytest.MonkeyPatch
+    :param options: The result size options posted.
+    :type options: dict
+    :param expected: The expected expect, hitlist_size and max_hsps.
+    :type expected: tuple
+    """
+    settings.BLAST_EXPECT = 0.5
+    settings.BLAST_HITLIST_SIZE = 20
+    monkeypatch.setattr(perform_blast_job_task, "delay",
+                        lambda *args, **kwargs: None)
+
+    response = Client().post("/", {"blast-mode": "blastn", "job-name": "",
+                                   "seq-text": "ACGT", **options})
+    job = BlastJob.objects.get()
+
+    assert response.status_code == 302
+    assert (job.expect, job.hitlist_size, job.max_hsps) == expected
@@ -0,0 +1,98 @@
+# Standard library imports
+from datetime import timedelta
+
+# Third-party imports
+import pytest
+from django.utils import timezone
+
+# Local imports
+from Blaster.models import EntrezAccessionCache
+
+
+@pytest.mark.django_db
+def test_cache_stored_compressed() -> None:
+    """
+    Tests that the GenBank and FASTA data are stored compressed,
+    that the stored size is recorded, and that the data is read back
+    as the original text.
+    """
+    genbank = "LOCUS       XP_000001\n" + "FEATURES\n" * 200
+    cache = EntrezAccessionCache.objects.create_entrez_accession_cache(
+        genbank, ">XP_000001\nMHSSIVLATV")
+
+    stored = EntrezAccessionCache.objects.filter(pk=cache.pk)\
+        .values_list("genbank", flat=True).get()
+    cache = EntrezAccessionCache.objects.get(pk=cache.pk)
+
+    assert len(stored) < len(genbank)
+    assert 0 < cache.size < len(genbank)
+    assert cache.genbank == genbank
+    assert cache.fasta == ">XP_000001\nMHSSIVLATV"
+
+
+@pytest.mark.django_db
+def test_cache_evicts_least_recently_accessed() -> None:
+    """
+    Tests that eviction deletes the least recently accessed entries,
+    including entries never accessed, until the cache fits its budget.
+    """
+    now = timezone.now()
+    caches = [EntrezAccessionCache.objects.create_entrez_accession_cache(
+        "A" * 100, "") for _ in range(4)]
+    for cache, hours in zip(caches, (None, 3, 1, 2)):
+        EntrezAccessionCache.objects.filter(pk=cache.pk).update(
+            last_accessed=now - timedelta(hours=hours) if hours else None)
+    size = caches[0].size
+
+    evicted = EntrezAccessionCache.objects.evict(budget=size * 2)
+
+    remaining = EntrezAccessionCache.objects.values_list("id", flat=True)
+    assert evicted == 2
+    assert set(remaining) == {caches[2].pk, caches[3].pk}
+
+
+@pytest.mark.django_db
+def test_cache_within_budget_not_evicted() -> None:
+    """
+    Tests that nothing is evicted while the cache fits its budget.
+    """
+    cache = EntrezAccessionCache.objects.create_entrez_accession_cache(
+        "A" * 100, "")
+
+    assert EntrezAccessionCache.objects.evict(budget=cache.size) == 0
+    assert EntrezAccessionCache.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_cache_touch() -> None:
+    """
+    Tests that an access is recorded as a hit, with its time.
+    """
+    cache = EntrezAccessionCache.objects.create_entrez_accession_cache()
+
+    EntrezAccessionCache.objects.touch(cache)
+    EntrezAccessionCache.objects.touch(cache)
+
+    touched = EntrezAccessionCache.objects.get(pk=cache.pk)
+    assert touched.hits == 2
+    assert touched.last_accessed >= cache.last_accessed
+
+
+@pytest.mark.django_db
+def test_cache_stale(settings) -> None:
+    """
+    Tests that an entry fetched longer ago than the TTL is stale.
+
+    :param settings: pytest-django fixture to change settings.
+    :type settings: pytest.fixture
+    """
+    settings.ENTREZ_CACHE_TTL_DAYS = 30
+    fresh = EntrezAccessionCache.objects.create_entrez_accession_cache()
+    stale = EntrezAccessionCache.objects.create_entrez_accession_cache()
+    EntrezAccessionCache.objects.filter(pk=stale.pk).update(
+        date=timezone.localdate() - timedelta(days=31))
+
+    assert list(EntrezAccessionCache.objects.stale()) == [
+        EntrezAccessionCache.objects.get(pk=stale.pk)]
+    assert not EntrezAccessionCache.objects.get(pk=fresh.pk).is_stale()
+    assert EntrezAccessionCache.objects.get(pk=stale.pk).is_stale()
@@ -0,0 +1,118 @@
+# Third-party imports
+from django.contrib.auth.models import AnonymousUser, User
+from django.test import Client
+import pytest
+
+# Local imports
+from Blaster.models import BlastBuddies, BlastJob, HitSelection
+from testing import (create_request, create_blast_job, create_accession,
+                     create_hit)
+
+
+@pytest.mark.django_db
+def test_selection_reused(create_hit: pytest.fixture) -> None:
+    """
+    Tests that selecting the same hits, in any order, returns the same
+    selection, and that unknown hit ids are left out.
+
+    :param create_hit: pytest fixture to create a hit.
+    :type create_hit: pytest.fixture
+    """
+    first, second = create_hit(), create_hit()
+
+    selection = HitSelection.objects.get_or_create_selection(
+        [str(first.pk), str(second.pk), "999"], AnonymousUser())
+    again = HitSelection.objects.get_or_create_selection(
+        [second.pk, first.pk], AnonymousUser())
+
+    assert selection.pk == again.pk
+    assert len(selection.code) == 16
+    assert selection.size == 2
+    assert set(selection.hits.values_list("id", flat=True)) == \
+        {first.pk, second.pk}
+
+
+@pytest.mark.django_db
+def test_selection_leaves_out_hidden_hits(create_hit: pytest.fixture
+                                          ) -> None:
+    """
+    Tests that hits of jobs of other users can't be selected.
+
+    :param create_hit: pytest fixture to create a hit.
+    :type create_hit: pytest.fixture
+    """
+    owner = User.objects.create_user("owner", "owner@test.com", "test")
+    hidden, visible = create_hit(), create_hit()
+    job = BlastJob.objects.create(program="blastp", sequence="MLP",
+                                  user=owner)
+    hidden.job = job
+    hidden.save()
+
+    selection = HitSelection.objects.get_or_create_selection(
+        [hidden.pk, visible.pk], AnonymousUser())
+
+    assert list(selection.hits.values_list("id", flat=True)) == \
+        [visible.pk]
+
+
+@pytest.mark.django_db
+def test_comparison_by_selection(create_hit: pytest.fixture) -> None:
+    """
+    Tests that selecting hits on the result page redirects to a
+    comparison page of the selection, without storing the hits in
+    the session.
+
+    :param create_hit: pytest fixture to create a hit.
+    :type create_hit: pytest.fixture
+    """
+    first, second = create_hit(), create_hit()
+    client = Client()
+
+    response = client.post(f"/blast_result/{first.job_id}",
+                           {"selected_hits": [first.pk, second.pk]})
+    page = client.get(response.url)
+
+    selection = HitSelection.objects.get()
+    assert response.url == f"/comparison/{selection.code}"
+    assert "selected_hits" not in client.session
+    assert [hit.pk for hit in page.context["selected_hits"]] == \
+        [first.pk, second.pk]
+
+
+@pytest.mark.django_db
+def test_comparison_unknown_selection() -> None:
+    """
+    Tests that an unknown selection renders the 404 page.
+    """
+    response = Client().get("/comparison/0123456789abcdef")
+
+    assert response.status_code == 404
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("selected_hits", [[], ["999"], ["hit"]])
+def test_comparison_without_hits(create_hit: pytest.fixture,
+                                 selected_hits: list[str]) -> None:
+    """
+    Tests that comparing no hits, or only hits that can't be
+    selected, shows the result page again with an error, without
+    creating a selection.
+
+    :param create_hit: pytest fixture to create a hit.
+    :type create_hit: pytest.fixture
+    :param selected_hits: the hit ids that are posted.
+    :type selected_hits: list[str]
+    """
+    owner = User.objects.create_user("owner", "owner@test.com", "test")
+    BlastBuddies.objects.create(user=owner)
+    hit = create_hit()
+    BlastJob.objects.filter(pk=hit.job_id).update(user=owner)
+    client = Client()
+    client.force_login(owner)
+
+    response = client.post(f"/blast_result/{hit.job_id}",
+                           {"selected_hits": selected_hits}, follow=True)
+
+    assert response.redirect_chain == [(f"/blast_result/{hit.job_id}", 302)]
+    assert b"Error: select hits to compare" in response.content
+    assert not HitSelection.objects.exists()
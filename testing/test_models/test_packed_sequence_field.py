@@ -0,0 +1,72 @@
+# Third-party imports
+import pytest
+
+# Local imports
+from Blaster.models import BlastJob, BlastHit, SubjectSequence
+from testing import (create_request, create_blast_job, create_accession,
+                     create_hit)
+
+
+@pytest.mark.django_db
+def test_blast_job_sequence_round_trip(
+        create_request: pytest.fixture,
+        create_blast_job: pytest.fixture) -> None:
+    """
+    Tests that the sequence of a job is stored packed, and read back
+    as the original sequence, including its length.
+
+    :param create_request: pytest fixture to create a request.
+    :type create_request: pytest.fixture
+    :param create_blast_job: pytest fixture to create a blast job.
+    :type create_blast_job: pytest.fixture
+    """
+    job = create_blast_job(create_request(False), sequence="atcg" * 50)
+
+    stored = BlastJob.objects.filter(pk=job.pk)\
+        .values_list("sequence", flat=True).get()
+    job = BlastJob.objects.get(pk=job.pk)
+
+    assert isinstance(stored, bytes)
+    assert len(stored) < 200
+    assert job.sequence == "atcg" * 50
+    assert job.sequence_length == 200
+
+
+@pytest.mark.django_db
+def test_blast_hit_subject_length(create_hit: pytest.fixture) -> None:
+    """
+    Tests that the subject length of a hit is filled in on creation,
+    and can be used without unpacking the subject sequence.
+
+    :param create_hit: pytest fixture to create a hit.
+    :type create_hit: pytest.fixture
+    """
+    hit = create_hit(subject_seq="MHSSIVLATV")
+
+    subject = SubjectSequence.objects.defer("sequence")\
+        .get(pk=hit.subject_id)
+
+    assert BlastHit.objects.get(pk=hit.pk).subject_length == 10
+    assert subject.length == 10
+    assert "sequence" in subject.get_deferred_fields()
+    assert subject.sequence == "MHSSIVLATV"
+
+
+@pytest.mark.django_db
+def test_subject_sequence_text(create_hit: pytest.fixture) -> None:
+    """
+    Tests that a subject sequence stored as text, as done before
+    the field was packed, is still read correctly.
+
+    :param create_hit: pytest fixture to create a hit.
+    :type create_hit: pytest.fixture
+    """
+    from django.db import connection
+
+    hit = create_hit(subject_seq="ACGT")
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "UPDATE Blaster_subjectsequence SET sequence = %s "
+            "WHERE id = %s", ["ACGT", hit.subject_id])
+
+    assert BlastHit.objects.get(pk=hit.pk).subject_seq == "ACGT"
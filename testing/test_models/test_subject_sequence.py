@@ -0,0 +1,105 @@
+# Standard library imports
+from typing import Callable
+
+# Third-party imports
+import pytest
+
+# Local imports
+from Blaster.models import BlastHit, SubjectSequence
+from testing import (create_request, create_blast_job, create_accession,
+                     create_hit, query_budget)
+
+
+@pytest.mark.django_db
+def test_hits_share_subject_sequence(create_hit: pytest.fixture) -> None:
+    """
+    Tests that hits with the same subject sequence refer to a single
+    SubjectSequence, and still read their own sequence.
+
+    :param create_hit: pytest fixture to create a hit.
+    :type create_hit: pytest.fixture
+    """
+    first = create_hit(subject_seq="MHSSIVLATV")
+    second = create_hit(subject_seq="MHSSIVLATV")
+    other = create_hit(subject_seq="ACGTACGT")
+
+    assert first.subject_id == second.subject_id
+    assert first.subject_id != other.subject_id
+    assert SubjectSequence.objects.count() == 2
+    assert BlastHit.objects.get(pk=second.pk).subject_seq == "MHSSIVLATV"
+
+
+@pytest.mark.django_db
+def test_get_or_create_sequences() -> None:
+    """
+    Tests that retrieving many sequences at once only stores the
+    sequences that are not stored yet, and maps every sequence,
+    including duplicates, to its SubjectSequence.
+    """
+    existing = SubjectSequence.objects.get_or_create_sequence("ACGT")
+
+    subjects = SubjectSequence.objects.get_or_create_sequences(
+        ["ACGT", "MHSS", "MHSS", "ACGTT"])
+
+    assert SubjectSequence.objects.count() == 3
+    assert subjects["ACGT"].pk == existing.pk
+    assert set(subjects) == {"ACGT", "MHSS", "ACGTT"}
+    assert all(subject.pk is not None for subject in subjects.values())
+    assert subjects["ACGTT"].length == 5
+
+
+@pytest.mark.django_db
+def test_delete_unreferenced(create_hit: pytest.fixture) -> None:
+    """
+    Tests that only the sequences no hit refers to anymore are
+    deleted, in batches.
+
+    :param create_hit: pytest fixture to create a hit.
+    :type create_hit: pytest.fixture
+    """
+    kept = create_hit(subject_seq="MHSSIVLATV")
+    deleted = [create_hit(subject_seq=sequence)
+               for sequence in ("ACGT", "ACGTT", "ACGTTT")]
+    SubjectSequence.objects.get_or_create_sequence("MLP")
+    BlastHit.objects.filter(pk__in=[hit.pk for hit in deleted]).delete()
+
+    assert SubjectSequence.objects.delete_unreferenced(batch_size=2) == 4
+    assert list(SubjectSequence.objects.values_list("id", flat=True)) \
+        == [kept.subject_id]
+
+
+@pytest.mark.django_db
+def test_bulk_create_stores_subject_sequences(
+        create_hit: pytest.fixture,
+        query_budget: Callable) -> None:
+    """
+    Tests that setting the subject sequence of hits built in memory
+    makes no queries, and that their sequences are stored at once
+    when the hits are.
+
+    :param create_hit: pytest fixture to create a hit.
+    :type create_hit: pytest.fixture
+    :param query_budget: pytest fixture to limit the queries.
+    :type query_budget: Callable
+    """
+    hit = create_hit(subject_seq="MLP")
+    hits = []
+    with query_budget(0):
+        for sequence in ("MLP", "ACGT", "ACGT"):
+            built = BlastHit(
+                job_id=hit.job_id, accession_id=hit.accession_id,
+                description="built", blast_score=1, bit_score=1.0,
+                e_value=1.0, identities=1, percentage_identity=100.0,
+                align_length=1, query_start=1, query_end=1,
+                query_coverage=1.0, subject_start=1, subject_end=1)
+            built.subject_seq = sequence
+            hits.append(built)
+
+    BlastHit.objects.bulk_create(hits)
+
+    assert [built.subject_seq for built in
+            BlastHit.objects.filter(description="built").order_by("id")] \
+        == ["MLP", "ACGT", "ACGT"]
+    assert hits[0].subject_id == hit.subject_id
+    assert hits[1].subject_length == 4
+    assert SubjectSequence.objects.count() == 2
@@ -0,0 +1,125 @@
+# Standard library imports
+from urllib.parse import parse_qs, urlsplit
+import asyncio
+import threading
+
+# Third-party imports
+from django.test import Client
+from kombu.exceptions import OperationalError
+import pytest
+
+# Local imports
+from Blaster.models import BlastHit, BlastJob
+from Blaster.tasks import fetch_entrez_accession_cache_task
+from Blaster.utils import async_entrez
+from Blaster.utils.async_entrez import aperform_entrez_query
+from Blaster.utils.ncbi import delete_unprocessed_blast_job
+from testing import (create_request, create_blast_job, create_hit,
+                     create_accession)
+
+
+RECORDS = {
+    'gb': "LOCUS       XP_000001    3 aa\nVERSION     XP_000001.1\n//\n",
+    'fasta': ">XP_000001.1 first protein [Homo sapiens]\nMLP\n",
+}
+
+
+@pytest.fixture
+def efetch_server(settings, monkeypatch: pytest.MonkeyPatch) -> list[dict]:
+    """
+    Starts a local stand-in for efetch, and points the async Entrez
+    client to it. Unknown accessions are answered with 400.
+
+    :param settings: pytest-django fixture for the settings.
+    :param monkeypatch: pytest fixture to patch the rate limit.
+    :type monkeypatch: pytest.MonkeyPatch
+    :return: the parameters of every query the stand-in received.
+    :rtype: list[dict]
+    """
+    queries = []
+
+    async def handle(reader, writer):
+        request = await reader.readuntil(b"\r\n\r\n")
+        query = parse_qs(urlsplit(request.split(b" ")[1].decode()).query)
+        queries.append(query)
+        if query["id"] == ["XP_000001.1"]:
+            writer.write(b"HTTP/1.0 200 OK\r\n\r\n"
+                         + RECORDS[query["rettype"][0]].encode())
+        else:
+            writer.write(b"HTTP/1.0 400 Bad Request\r\n\r\nError")
+        await writer.drain()
+        writer.close()
+
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(
+        asyncio.start_server(handle, "127.0.0.1", 0))
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+
+    async def no_wait():
+        pass
+    monkeypatch.setattr(async_entrez, "_wait_for_turn", no_wait)
+    port = server.sockets[0].getsockname()[1]
+    settings.ENTREZ_EUTILS_URL = f"http://127.0.0.1:{port}/"
+    yield queries
+
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    server.close()
+    loop.close()
+
+
+def test_aperform_entrez_query(efetch_server: list[dict]) -> None:
+    """
+    Tests that the async client returns the result of a query, and an
+    error message for an unsuccessful query.
+
+    :param efetch_server: pytest fixture starting an efetch stand-in.
+    :type efetch_server: list[dict]
+    """
+    fasta = asyncio.run(
+        aperform_entrez_query("XP_000001.1", "protein", "fasta", "text"))
+    error = asyncio.run(
+        aperform_entrez_query("XP_999999.1", "protein", "fasta", "text"))
+
+    assert fasta == RECORDS["fasta"]
+    assert error.startswith("Error:")
+    assert efetch_server[0]["db"] == ["protein"]
+    assert efetch_server[0]["tool"] == ["MasterBlast"]
+
+
+@pytest.mark.django_db
+def test_hit_page_fetches_without_celery(efetch_server: list[dict],
+                                         create_hit: pytest.fixture,
+                                         create_accession: pytest.fixture,
+                                         monkeypatch: pytest.MonkeyPatch
+                                         ) -> None:
+    """
+    Tests that the hit page fetches the Entrez data through the async
+    client when Celery is unreachable.
+
+    :param efetch_server: pytest fixture starting an efetch stand-in.
+    :type efetch_server: list[dict]
+    :param create_hit: pytest fixture to create a hit.
+    :type create_hit: pytest.fixture
+    :param create_accession: pytest fixture to create an accession.
+    :type create_accession: pytest.fixture
+    :param monkeypatch: pytest fixture to make Celery unreachable.
+    :type monkeypatch: pytest.MonkeyPatch
+    """
+    def unreachable(*args, **kwargs):
+        raise OperationalError()
+    monkeypatch.setattr(fetch_entrez_accession_cache_task, "delay",
+                        unreachable)
+    hit = create_hit(accession_id=create_accession("XP_000001.1").pk)
+    BlastJob.objects.filter(pk=hit.job_id).update(program="blastp")
+    delete_unprocessed_blast_job(hit.job_id)
+
+    response = Client().get(f"/blast_hit/{hit.pk}")
+    cache = BlastHit.objects.get(pk=hit.pk).accession.cache
+
+    assert response.status_code == 200
+    assert not response.context["pending"]
+    assert sorted(query["rettype"][0] for query in efetch_server) \
+        == ["fasta", "gb"]
+    assert cache.fasta == RECORDS["fasta"]
@@ -0,0 +1,129 @@
+# Standard library imports
+from datetime import timedelta
+import gzip
+import io
+
+# Third-party imports
+from Bio import Entrez
+from Bio.Blast import NCBIWWW
+from django.contrib.auth.models import User
+from django.test import Client
+from django.utils import timezone
+import pytest
+
+# Local imports
+from Blaster.models import BlastJob
+from Blaster.utils import ncbi
+from BlastBuddyClub.settings import BASE_DIR
+from testing import create_request
+
+
+BLAST_XML = gzip.decompress(
+    (BASE_DIR / "fixtures" / "ncbi" / "small.xml.gz").read_bytes()).decode()
+
+
+@pytest.mark.django_db
+def test_perform_blast_job_records_timings(create_request: pytest.fixture,
+                                           monkeypatch: pytest.MonkeyPatch
+                                           ) -> None:
+    """
+    Tests that the phases, remote calls and rows written of a job are
+    stored on it.
+
+    :param create_request: pytest fixture to create a request.
+    :type create_request: pytest.fixture
+    :param monkeypatch: pytest fixture to answer NCBI.
+    :type monkeypatch: pytest.MonkeyPatch
+    """
+    monkeypatch.setattr(NCBIWWW, "qblast",
+                        lambda *args, **kwargs: io.StringIO(BLAST_XML))
+    monkeypatch.setattr(
+        Entrez, "efetch", lambda **kwargs: io.StringIO(
+            "<GBSeq_organism>Homo sapiens</GBSeq_organism>"))
+    job = BlastJob.objects.create_blast_job(
+        create_request(), "", "blastn", "", "ACGT")
+
+    ncbi.perform_blast_job(job.id)
+    job.refresh_from_db()
+
+    assert set(job.phase_seconds) \
+        == {"blast", "parse", "entrez", "insert", "total"}
+    assert job.phase_seconds["total"] >= job.phase_seconds["insert"]
+    # 1 BLAST query and 10 organism lookups, 10 accessions, 17 subject
+    # sequences and 17 hits
+    assert job.phase_counts == {"remote_calls": 11, "rows_written": 44}
+
+
+@pytest.mark.django_db
+def test_perform_blast_job_records_timings_on_failure(
+        create_request: pytest.fixture,
+        monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Tests that the timings of a job are stored when BLAST fails.
+
+    :param create_request: pytest fixture to create a request.
+    :type create_request: pytest.fixture
+    :param monkeypatch: pytest fixture to fail BLAST.
+    :type monkeypatch: pytest.MonkeyPatch
+    """
+    def qblast(*args, **kwargs):
+        raise ValueError()
+    monkeypatch.setattr(NCBIWWW, "qblast", qblast)
+    job = BlastJob.objects.create_blast_job(
+        create_request(), "", "blastn", "", "ACGT")
+
+    ncbi.perform_blast_job(job.id)
+    job.refresh_from_db()
+
+    assert job.error_msg
+    assert set(job.phase_seconds) == {"blast", "total"}
+    assert job.phase_counts == {"remote_calls": 1}
+
+
+@pytest.mark.django_db
+def test_admin_timings_page() -> None:
+    """
+    Tests that the admin timings page shows the percentiles of the
+    jobs finished within the window only.
+    """
+    now = timezone.now()
+    for total, days in ((1.0, 0), (3.0, 0), (100.0, 10)):
+        BlastJob.objects.create(
+            program="blastn", sequence="ACGT",
+            finished=now - timedelta(days=days),
+            phase_seconds={"blast": total / 2, "total": total})
+    BlastJob.objects.create(program="blastn", sequence="ACGT",
+                            finished=now)
+    client = Client()
+    client.force_login(User.objects.create_superuser("admin"))
+
+    timings = client.get("/admin/Blaster/blastjob/timings/?days=7")\
+        .context["timings"]
+    response = client.get("/admin/Blaster/blastjob/")
+    change = client.get(
+        f"/admin/Blaster/blastjob/{BlastJob.objects.first().id}/change/")
+
+    total = next(timing for timing in timings if timing["phase"] == "total")
+    assert (total["jobs"], total["mean"]) == (2, 2.0)
+    assert total["percentiles"][0] == pytest.approx(2.0)
+    assert b"/admin/Blaster/blastjob/timings/" in response.content
+    assert change.status_code == 200
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("days", ["-1", "3", "1000000000", "week"])
+def test_admin_timings_page_window(days: str) -> None:
+    """
+    Tests that a window of days other than the listed ones falls back
+    to 7 days.
+
+    :param days: the days of the window that are requested.
+    :type days: str
+    """
+    client = Client()
+    client.force_login(User.objects.create_superuser("admin"))
+
+    response = client.get(f"/admin/Blaster/blastjob/timings/?days={days}")
+
+    assert response.status_code == 200
+    assert response.context["days"] == 7
@@ -0,0 +1,63 @@
+# Third-party imports
+from Bio.Blast import NCBIWWW
+from django.test import Client
+import pytest
+
+# Local imports
+from Blaster.models import BlastBuddies, BlastJob
+from Blaster.utils import ncbi
+from testing import create_request
+
+
+SEQUENCE = "ACGTTGCAAGCTTCGATCGGATCCTAGCTAGGCTC" + "A" * 60
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("mask_low_complexity, submitted, regions", [
+    (True, SEQUENCE[:35] + "N" * 60, [[35, 95]]),
+    (False, SEQUENCE, []),
+], ids=["masked", "not masked"])
+def test_perform_blast_job_masks_query(create_request: pytest.fixture,
+                                       monkeypatch: pytest.MonkeyPatch,
+                                       mask_low_complexity: bool,
+                                       submitted: str,
+                                       regions: list) -> None:
+    """
+    Tests that the query is masked before it's submitted when the job
+    asks for it, and that the masked regions are shown on the result
+    page.
+
+    :param create_request: pytest fixture to create a request.
+    :type create_request: pytest.fixture
+    :param monkeypatch: pytest fixture to capture the submission.
+    :type monkeypatch: pytest.MonkeyPatch
+    :param mask_low_complexity: Whether the job asks for masking.
+    :type mask_low_complexity: bool
+    :param submitted: The expected submitted sequence.
+    :type submitted: str
+    :param regions: The expected masked regions.
+    :type regions: list
+    """
+    queries = []
+
+    def qblast(program, database, sequence, **kwargs):
+        queries.append(sequence)
+        raise ValueError()
+    monkeypatch.setattr(NCBIWWW, "qblast", qblast)
+    request = create_request()
+    BlastBuddies.objects.create(user=request.user)
+    job = BlastJob.objects.create_blast_job(
+        request, "", "blastn", "", SEQUENCE, mask_low_complexity)
+    client = Client()
+    client.force_login(request.user)
+
+    ncbi.perform_blast_job(job.id)
+    job.refresh_from_db()
+    response = client.get(f"/blast_result/{job.id}")
+
+    assert queries == [submitted]
+    assert job.masked_regions == regions
+    assert job.sequence == SEQUENCE
+    assert (b"36-95" in response.content) == mask_low_complexity
+    assert (b"(60 of 95 positions)" in response.content) \
+        == mask_low_complexity
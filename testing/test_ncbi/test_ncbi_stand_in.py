@@ -0,0 +1,181 @@
+# Standard library imports
+from typing import Iterator
+from urllib.error import HTTPError
+from urllib.parse import urlencode
+from urllib.request import Request, install_opener, urlopen
+import json
+
+# Third-party imports
+import pytest
+
+# Local imports
+from benchmarks.ncbi_stand_in import (BLAST_PATH, EUTILS_PATH,
+                                      NCBIStandInServer, start_stand_in)
+from Blaster.models import BlastHit, BlastJob
+from Blaster.utils import ncbi
+from Blaster.utils.entrez_redirect import NCBI_EUTILS_URL, redirect_entrez
+from testing import create_request
+
+
+@pytest.fixture
+def stand_in(settings, monkeypatch: pytest.MonkeyPatch) \
+        -> Iterator[NCBIStandInServer]:
+    """
+    Starts an NCBI stand-in without a rate limit, and points BLAST and
+    Entrez at it.
+
+    :param settings: pytest-django fixture for the settings.
+    :param monkeypatch: pytest fixture to space Entrez requests less.
+    :type monkeypatch: pytest.MonkeyPatch
+    :return: the server of the stand-in.
+    :rtype: Iterator[NCBIStandInServer]
+    """
+    server = start_stand_in(rate_limit=0, api_key_rate_limit=0)
+    settings.NCBI_BLAST_URL = server.url + BLAST_PATH
+    settings.ENTREZ_EUTILS_URL = server.url + EUTILS_PATH
+    # Bio.Entrez spaces requests 0.1 seconds apart with an API key
+    monkeypatch.setenv("ENTREZ_API_KEY", "stand-in")
+    redirect_entrez()
+    yield server
+    install_opener(None)
+    server.shutdown()
+    server.server_close()
+
+
+def stats(server: NCBIStandInServer) -> dict:
+    """
+    Returns the requests counted by a stand-in.
+
+    :param server: the server of the stand-in.
+    :type server: NCBIStandInServer
+    :return: the number of requests per endpoint and status.
+    :rtype: dict
+    """
+    with urlopen(server.url + "stats") as response:
+        return json.loads(response.read())
+
+
+@pytest.mark.django_db
+def test_perform_blast_job_against_stand_in(
+        stand_in: NCBIStandInServer,
+        create_request: pytest.fixture) -> None:
+    """
+    Tests that a job is processed end to end against the stand-in,
+    through qblast and Bio.Entrez, with the organisms of the fixture.
+
+    :param stand_in: pytest fixture starting the stand-in.
+    :type stand_in: NCBIStandInServer
+    :param create_request: pytest fixture to create a request.
+    :type create_request: pytest.fixture
+    """
+    job = BlastJob.objects.create_blast_job(
+        create_request(), "", "blastn", "", "ACGT")
+
+    ncbi.perform_blast_job(job.id)
+    job.refresh_from_db()
+    organisms = set(BlastHit.objects.filter(job=job)
+                    .values_list("accession__organism", flat=True))
+
+    # 10 subjects with 17 HSPs, and an organism lookup per subject
+    assert job.error_msg is None
+    assert job.stored_hits == 17
+    assert "Unknown Organism" not in organisms
+    assert stats(stand_in) == {"Blast.cgi 200": 2, "efetch.fcgi 200": 10}
+
+
+def test_stand_in_waits_for_search(stand_in: NCBIStandInServer) -> None:
+    """
+    Tests that a search is answered with Status=WAITING until it's
+    done, following the qblast protocol.
+
+    :param stand_in: pytest fixture starting the stand-in.
+    :type stand_in: NCBIStandInServer
+    """
+    stand_in.stand_in.blast_seconds = 60
+    url = stand_in.url + BLAST_PATH
+
+    def post(**parameters) -> str:
+        request = Request(url, urlencode(parameters).encode())
+        with urlopen(request) as response:
+            return response.read().decode()
+
+    put = post(CMD="Put", PROGRAM="blastn", DATABASE="nr", QUERY="ACGT")
+    rid = put.split("RID = ")[1].split("\n")[0]
+
+    assert "RTOE = 60" in put
+    assert "Status=WAITING" in post(CMD="Get", RID=rid)
+    with pytest.raises(HTTPError) as error:
+        post(CMD="Get", RID="UNKNOWN")
+    assert error.value.code == 404
+
+
+def test_stand_in_throttles_entrez(stand_in: NCBIStandInServer) -> None:
+    """
+    Tests that Entrez requests above the rate limit are answered with
+    429, as NCBI does, and BLAST requests aren't limited.
+
+    :param stand_in: pytest fixture starting the stand-in.
+    :type stand_in: NCBIStandInServer
+    """
+    stand_in.stand_in.rate_limit = 2
+    url = f"{stand_in.url}{EUTILS_PATH}esummary.fcgi?db=nucleotide&id=X1"
+
+    for _ in range(2):
+        urlopen(url).close()
+    with pytest.raises(HTTPError) as error:
+        urlopen(url)
+    blast = urlopen(Request(stand_in.url + BLAST_PATH,
+                            b"CMD=Put&QUERY=ACGT"))
+
+    assert error.value.code == 429
+    assert error.value.headers["Retry-After"] == "1"
+    assert blast.status == 200
+    blast.close()
+
+
+def test_stand_in_injects_failures(stand_in: NCBIStandInServer) -> None:
+    """
+    Tests that the configured fraction of requests fails with 503, as
+    when NCBI is overloaded.
+
+    :param stand_in: pytest fixture starting the stand-in.
+    :type stand_in: NCBIStandInServer
+    """
+    stand_in.stand_in.failure_rate = 1.0
+
+    with pytest.raises(HTTPError) as error:
+        urlopen(f"{stand_in.url}{EUTILS_PATH}efetch.fcgi?id=X1")
+
+    assert error.value.code == 503
+    assert stats(stand_in) == {"efetch.fcgi 503": 1}
+
+
+def test_stand_in_answers_bio_entrez(stand_in: NCBIStandInServer) -> None:
+    """
+    Tests that Bio.Entrez is redirected, and gets one GenBank record
+    per accession of a batch.
+
+    :param stand_in: pytest fixture starting the stand-in.
+    :type stand_in: NCBIStandInServer
+    """
+    xml = ncbi.perform_entrez_query("X1.1,X2.1", "nucleotide", "xml", "xml")
+    fasta = ncbi.perform_entrez_query("X1.1,X2.1", "nucleotide", "fasta",
+                                      "text")
+
+    assert str(xml).count("<GBSeq_organism>") == 2
+    assert fasta.count(">") == 2
+
+
+def test_redirect_entrez_only_away_from_ncbi(settings) -> None:
+    """
+    Tests that no opener is installed while Entrez points at NCBI.
+
+    :param settings: pytest-django fixture for the settings.
+    """
+    from urllib import request
+
+    settings.ENTREZ_EUTILS_URL = NCBI_EUTILS_URL
+    install_opener(None)
+    redirect_entrez()
+
+    assert request._opener is None
@@ -0,0 +1,151 @@
+# Standard library imports
+from types import SimpleNamespace
+from typing import Callable
+
+# Third-party imports
+import pytest
+
+# Local imports
+from Blaster.models import BlastHit, BlastJob, EntrezAccession
+from Blaster.utils import ncbi
+from testing import create_request, query_budget
+
+
+def hsp(expect: float, sbjct: str = "ACGT") -> SimpleNamespace:
+    """
+    Creates a high-scoring segment pair as parsed by NCBIXML.
+
+    :param expect: The E-value of the pair.
+    :type expect: float
+    :param sbjct: The subject sequence of the pair.
+    :type sbjct: str
+    :return: The pair.
+    :rtype: SimpleNamespace
+    """
+    return SimpleNamespace(
+        expect=expect, sbjct=sbjct, score=50, bits=40.0, identities=4,
+        align_length=4, query_start=1, query_end=4, sbjct_start=1,
+        sbjct_end=4)
+
+
+def alignment(accession: str, *hsps: SimpleNamespace) -> SimpleNamespace:
+    """
+    Creates an alignment as parsed by NCBIXML.
+
+    :param accession: The accession code of the subject.
+    :type accession: str
+    :param hsps: The pairs of the alignment.
+    :type hsps: SimpleNamespace
+    :return: The alignment.
+    :rtype: SimpleNamespace
+    """
+    return SimpleNamespace(accession=accession, hsps=list(hsps),
+                           title=f"gi|{accession} subject {accession}")
+
+
+RECORD = SimpleNamespace(alignments=[
+    alignment("A1", hsp(1e-30, "AAAA"), hsp(1e-5, "AAAC"), hsp(0.1)),
+    alignment("A2", hsp(5.0)),
+    alignment("A3", hsp(1e-20, "CCCC")),
+    alignment("A4", hsp(1e-10, "GGGG")),
+])
+
+
+@pytest.mark.parametrize(
+    "expect, hitlist_size, max_hsps, expected",
+    [
+        (10.0, 50, 0, {"A1": 3, "A2": 1, "A3": 1, "A4": 1}),
+        (1.0, 50, 0, {"A1": 3, "A3": 1, "A4": 1}),
+        (1e-8, 50, 0, {"A1": 1, "A3": 1, "A4": 1}),
+        (1.0, 2, 0, {"A1": 3, "A3": 1}),
+        (10.0, 50, 2, {"A1": 2, "A2": 1, "A3": 1, "A4": 1}),
+    ],
+    ids=["no limits", "expect", "expect within alignment",
+         "hitlist size after expect", "max hsps"]
+)
+def test_limit_blast_record(expect: float, hitlist_size: int,
+                            max_hsps: int, expected: dict) -> None:
+    """
+    Tests that the E-value threshold applies to every pair, the
+    hitlist size to the alignments with pairs left, and max_hsps to
+    the pairs of every alignment.
+
+    :param expect: The E-value threshold.
+    :type expect: float
+    :param hitlist_size: The number of alignments to keep.
+    :type hitlist_size: int
+    :param max_hsps: The number of pairs to keep per alignment.
+    :type max_hsps: int
+    :param expected: The number of pairs kept per accession.
+    :type expected: dict
+    """
+    kept = ncbi.limit_blast_record(RECORD, expect, hitlist_size, max_hsps)
+
+    assert {alignment.accession: len(hsps) for alignment, hsps in kept} \
+        == expected
+
+
+@pytest.mark.django_db
+def test_parse_blast_job_results_limits(create_request: pytest.fixture,
+                                        monkeypatch: pytest.MonkeyPatch
+                                        ) -> None:
+    """
+    Tests that only the hits within the result size of a job are
+    stored and counted, and that organisms are only looked up for new
+    accessions.
+
+    :param create_request: pytest fixture to create a request.
+    :type create_request: pytest.fixture
+    :param monkeypatch: pytest fixture to capture the organism lookups.
+    :type monkeypatch: pytest.MonkeyPatch
+    """
+    lookups = []
+
+    def get_entrez_organism(accession, db):
+        lookups.append(accession)
+        return "Homo sapiens"
+    monkeypatch.setattr(ncbi, "get_entrez_organism", get_entrez_organism)
+    EntrezAccession.objects.create_entrez_accession("A1", "Mus musculus")
+    job = BlastJob.objects.create_blast_job(
+        create_request(), "", "blastn", "", "ACGT",
+        expect=1.0, hitlist_size=2, max_hsps=2)
+
+    ncbi.parse_blast_job_results(job, RECORD, "nucleotide")
+    job.refresh_from_db()
+
+    assert sorted(BlastHit.objects.filter(job=job).values_list(
+        "accession__code", "e_value")) \
+        == [("A1", 1e-30), ("A1", 1e-5), ("A3", 1e-20)]
+    assert lookups == ["A3"]
+    assert (job.returned_hsps, job.stored_hits) == (6, 3)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("size", (1, 20))
+def test_store_blast_hits_budget(size: int, create_request: pytest.fixture,
+                                 query_budget: Callable) -> None:
+    """
+    Tests that hits are stored with their subject sequences at once,
+    rather than with a query per hit.
+
+    :param size: The number of hits, with as many subject sequences.
+    :type size: int
+    :param create_request: pytest fixture to create a request.
+    :type create_request: pytest.fixture
+    :param query_budget: pytest fixture to limit the queries.
+    :type query_budget: Callable
+    """
+    EntrezAccession.objects.create_entrez_accession("A1", "Mus musculus")
+    job = BlastJob.objects.create_blast_job(
+        create_request(), "", "blastn", "", "ACGT")
+    record = SimpleNamespace(alignments=[alignment(
+        "A1", *(hsp(1e-5, "ACGT" + "A" * number)
+                for number in range(size)))])
+
+    with query_budget(8):
+        ncbi.parse_blast_job_results(job, record, "nucleotide")
+
+    assert BlastHit.objects.filter(job=job).count() == size
+    assert set(BlastHit.objects.filter(job=job)
+               .values_list("subject__length", flat=True)) \
+        == set(range(4, 4 + size))
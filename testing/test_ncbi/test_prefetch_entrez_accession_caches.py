@@ -0,0 +1,282 @@
+# Standard library imports
+from datetime import timedelta
+
+# Third-party imports
+from django.core.cache import cache
+from django.test import Client
+from django.utils import timezone
+import pytest
+
+# Local imports
+from Blaster.models import BlastJob, EntrezAccession, EntrezAccessionCache
+from Blaster.tasks import fetch_entrez_accession_cache_task, \
+    refresh_entrez_accession_cache_task
+from Blaster.utils import ncbi
+from testing import (create_request, create_blast_job, create_hit,
+                     create_accession)
+
+
+GENBANK = """LOCUS       XP_000001    3 aa
+ACCESSION   XP_000001
+VERSION     XP_000001.1
+ORIGIN
+        1 mlp
+//
+
+LOCUS       XP_000002    3 aa
+ACCESSION   XP_000002
+VERSION     XP_000002.2
+ORIGIN
+        1 mkv
+//
+
+"""
+
+FASTA = """>XP_000001.1 first protein [Homo sapiens]
+MLP
+
+>XP_000002.2 second protein [Homo sapiens]
+MKV
+
+"""
+
+
+@pytest.fixture
+def entrez_queries(monkeypatch: pytest.MonkeyPatch) -> list[tuple]:
+    """
+    Replaces the Entrez queries by the records above, recording the
+    arguments of every query.
+
+    :param monkeypatch: pytest fixture to replace the Entrez query.
+    :type monkeypatch: pytest.MonkeyPatch
+    :return: the arguments of the performed queries.
+    :rtype: list[tuple]
+    """
+    queries = []
+
+    def perform_entrez_query(accession: str, db: str, rettype: str,
+                             retmode: str) -> str:
+        queries.append((accession, db, rettype))
+        return GENBANK if rettype == 'gb' else FASTA
+
+    monkeypatch.setattr(ncbi, "perform_entrez_query", perform_entrez_query)
+    return queries
+
+
+def test_split_entrez_records() -> None:
+    """
+    Tests that GenBank and FASTA results of multiple accessions are
+    split per accession, with and without version.
+    """
+    genbank = ncbi.split_entrez_records(GENBANK, 'gb')
+    fasta = ncbi.split_entrez_records(FASTA, 'fasta')
+
+    assert genbank["XP_000001"] is genbank["XP_000001.1"]
+    assert genbank["XP_000002"].startswith("LOCUS       XP_000002")
+    assert genbank["XP_000002"].endswith("1 mkv\n//\n")
+    assert fasta["XP_000001"] == \
+        ">XP_000001.1 first protein [Homo sapiens]\nMLP\n"
+    assert fasta["XP_000002.2"].endswith("MKV\n")
+    assert ncbi.split_entrez_records("Error: timeout", 'gb') == {}
+
+
+@pytest.mark.django_db
+def test_prefetch_best_hits(settings: pytest.fixture,
+                            entrez_queries: list[tuple],
+                            create_request: pytest.fixture,
+                            create_blast_job: pytest.fixture,
+                            create_accession: pytest.fixture,
+                            create_hit: pytest.fixture) -> None:
+    """
+    Tests that the accessions of the best hits of a job are fetched
+    in batches, leaving out the hits beyond ENTREZ_PREFETCH_HITS.
+
+    :param settings: pytest-django fixture to alter the settings.
+    :type settings: pytest.fixture
+    :param entrez_queries: fixture recording the Entrez queries.
+    :type entrez_queries: list[tuple]
+    :param create_request: pytest fixture to create a request.
+    :type create_request: pytest.fixture
+    :param create_blast_job: pytest fixture to create a blast job.
+    :type create_blast_job: pytest.fixture
+    :param create_accession: pytest fixture to create an accession.
+    :type create_accession: pytest.fixture
+    :param create_hit: pytest fixture to create a hit.
+    :type create_hit: pytest.fixture
+    """
+    settings.ENTREZ_PREFETCH_HITS = 2
+    settings.ENTREZ_BATCH_SIZE = 1
+    job = create_blast_job(create_request(False), program="blastp")
+    first = create_accession(code="XP_000001")
+    second = create_accession(code="XP_000002")
+    worst = create_accession(code="XP_000003")
+    create_hit(blast_job_id=job.pk, accession_id=worst.pk, e_value=1.0)
+    create_hit(blast_job_id=job.pk, accession_id=second.pk, e_value=1e-5)
+    create_hit(blast_job_id=job.pk, accession_id=first.pk, e_value=1e-10)
+    create_hit(blast_job_id=job.pk, accession_id=first.pk, e_value=1e-2)
+
+    assert ncbi.prefetch_entrez_accession_caches(job.pk) == 2
+
+    assert [query[0] for query in entrez_queries] == \
+        ["XP_000001", "XP_000001", "XP_000002", "XP_000002"]
+    assert {query[1] for query in entrez_queries} == {"protein"}
+    first.refresh_from_db()
+    assert first.cache.fasta.startswith(">XP_000001.1")
+    assert EntrezAccession.objects.get(pk=worst.pk).cache is None
+    assert ncbi.prefetch_entrez_accession_caches(job.pk) == 0
+
+
+@pytest.mark.django_db
+def test_hit_page_placeholder(monkeypatch: pytest.MonkeyPatch,
+                              entrez_queries: list[tuple],
+                              create_hit: pytest.fixture) -> None:
+    """
+    Tests that the hit page schedules a single fetch of an accession
+    without Entrez data, and shows a placeholder until the status
+    endpoint reports the data as stored.
+
+    :param monkeypatch: pytest fixture to replace scheduling the task.
+    :type monkeypatch: pytest.MonkeyPatch
+    :param entrez_queries: fixture recording the Entrez queries.
+    :type entrez_queries: list[tuple]
+    :param create_hit: pytest fixture to create a hit.
+    :type create_hit: pytest.fixture
+    """
+    scheduled = []
+    monkeypatch.setattr(fetch_entrez_accession_cache_task, "delay",
+                        lambda *args: scheduled.append(args))
+    hit = create_hit()
+    BlastJob.objects.filter(pk=hit.job_id).update(program="blastp")
+    EntrezAccession.objects.filter(pk=hit.accession_id)\
+        .update(code="XP_000002")
+    cache.clear()
+    client = Client()
+
+    response = client.get(f"/blast_hit/{hit.pk}")
+    client.get(f"/blast_hit/{hit.pk}")
+    status = client.get(f"/blast_hit/get_entrez_status/{hit.pk}")
+
+    assert response.context["pending"] is True
+    assert b"being retrieved from NCBI" in response.content
+    assert len(scheduled) == 1
+    assert entrez_queries == []
+    assert status.json() == {"status": False, "failed": False}
+
+    fetch_entrez_accession_cache_task(*scheduled[0])
+    response = client.get(f"/blast_hit/{hit.pk}")
+    status = client.get(f"/blast_hit/get_entrez_status/{hit.pk}")
+
+    assert response.context["pending"] is False
+    assert response.context["fasta_length"] == \
+        len(">XP_000002.2 second protein [Homo sapiens]\nMKV\n")
+    assert status.json() == {"status": True}
+
+
+@pytest.mark.django_db
+def test_hit_page_failed_fetch(monkeypatch: pytest.MonkeyPatch,
+                               create_hit: pytest.fixture) -> None:
+    """
+    Tests that the status endpoint reports a fetch that stored no data
+    as failed, so the placeholder stops polling, and that a later visit
+    schedules the fetch again.
+
+    :param monkeypatch: pytest fixture to replace the Entrez query and
+        scheduling the task.
+    :type monkeypatch: pytest.MonkeyPatch
+    :param create_hit: pytest fixture to create a hit.
+    :type create_hit: pytest.fixture
+    """
+    scheduled = []
+    monkeypatch.setattr(fetch_entrez_accession_cache_task, "delay",
+                        lambda *args: scheduled.append(args))
+    monkeypatch.setattr(ncbi, "perform_entrez_query",
+                        lambda *args: "Error: timeout")
+    hit = create_hit()
+    BlastJob.objects.filter(pk=hit.job_id).update(program="blastp")
+    cache.clear()
+    client = Client()
+
+    client.get(f"/blast_hit/{hit.pk}")
+    fetch_entrez_accession_cache_task(*scheduled[0])
+    status = client.get(f"/blast_hit/get_entrez_status/{hit.pk}")
+    response = client.get(f"/blast_hit/{hit.pk}")
+
+    assert status.json() == {"status": False, "failed": True}
+    assert response.context["pending"] is True
+    assert len(scheduled) == 2
+
+
+@pytest.mark.django_db
+def test_failed_refresh_keeps_entry_stale(monkeypatch: pytest.MonkeyPatch,
+                                          create_hit: pytest.fixture) \
+        -> None:
+    """
+    Tests that a refresh of which both Entrez queries fail leaves the
+    entry as it was, stale, and a successful refresh marks it fetched.
+
+    :param monkeypatch: pytest fixture to replace the Entrez query.
+    :type monkeypatch: pytest.MonkeyPatch
+    :param create_hit: pytest fixture to create a hit.
+    :type create_hit: pytest.fixture
+    """
+    hit = create_hit()
+    BlastJob.objects.filter(pk=hit.job_id).update(program="blastp")
+    entry = EntrezAccessionCache.objects.create_entrez_accession_cache(
+        "LOCUS old", ">old")
+    EntrezAccession.objects.filter(pk=hit.accession_id).update(cache=entry)
+    stale_date = timezone.localdate() - timedelta(days=365)
+    EntrezAccessionCache.objects.filter(pk=entry.pk).update(date=stale_date)
+
+    monkeypatch.setattr(ncbi, "perform_entrez_query",
+                        lambda *args: "Error: timeout")
+    ncbi.refresh_entrez_accession_cache(entry.pk)
+    failed = EntrezAccessionCache.objects.get(pk=entry.pk)
+
+    monkeypatch.setattr(ncbi, "perform_entrez_query",
+                        lambda *args: ">new" if args[2] == "fasta"
+                        else "Error: timeout")
+    ncbi.refresh_entrez_accession_cache(entry.pk)
+    refreshed = EntrezAccessionCache.objects.get(pk=entry.pk)
+
+    assert failed.is_stale()
+    assert (failed.fetches, failed.fasta) == (1, ">old")
+    assert not refreshed.is_stale()
+    assert (refreshed.fetches, refreshed.genbank, refreshed.fasta) == \
+        (2, "LOCUS old", ">new")
+
+
+@pytest.mark.django_db
+def test_hit_page_schedules_single_refresh(monkeypatch: pytest.MonkeyPatch,
+                                           create_hit: pytest.fixture) \
+        -> None:
+    """
+    Tests that visits of a hit with a stale entry schedule a single
+    refresh until it's done.
+
+    :param monkeypatch: pytest fixture to replace the Entrez query and
+        scheduling the task.
+    :type monkeypatch: pytest.MonkeyPatch
+    :param create_hit: pytest fixture to create a hit.
+    :type create_hit: pytest.fixture
+    """
+    scheduled = []
+    monkeypatch.setattr(refresh_entrez_accession_cache_task, "delay",
+                        lambda *args: scheduled.append(args))
+    monkeypatch.setattr(ncbi, "perform_entrez_query",
+                        lambda *args: "Error: timeout")
+    hit = create_hit()
+    BlastJob.objects.filter(pk=hit.job_id).update(program="blastp")
+    entry = EntrezAccessionCache.objects.create_entrez_accession_cache(
+        "LOCUS old", ">old")
+    EntrezAccession.objects.filter(pk=hit.accession_id).update(cache=entry)
+    EntrezAccessionCache.objects.filter(pk=entry.pk).update(
+        date=timezone.localdate() - timedelta(days=365))
+    cache.clear()
+    client = Client()
+
+    client.get(f"/blast_hit/{hit.pk}")
+    client.get(f"/blast_hit/{hit.pk}")
+    refresh_entrez_accession_cache_task(*scheduled[0])
+    client.get(f"/blast_hit/{hit.pk}")
+
+    assert scheduled == [(entry.pk,), (entry.pk,)]
@@ -0,0 +1,81 @@
+# Standard library imports
+from types import SimpleNamespace
+
+# Third-party imports
+import numpy as np
+
+# Local imports
+from Blaster.utils.bokeh import (comparison_graphs, e_value_graph,
+                                 histogram_graph, tooltip_accessions,
+                                 TOOLTIP_ACCESSIONS)
+
+
+def create_hits(amount: int) -> list[SimpleNamespace]:
+    """
+    Creates objects with the attributes of a hit used by the graphs,
+    without using the database.
+
+    :param amount: the number of hits.
+    :type amount: int
+    :return: the hits.
+    :rtype: list[SimpleNamespace]
+    """
+    return [SimpleNamespace(unique_accession=f"XP_{index:06}.{index}",
+                            subject_length=100 + index % 400,
+                            percentage_identity=index % 101,
+                            query_coverage=(index * 7) % 101,
+                            e_value=10.0 ** -(index % 80))
+            for index in range(amount)]
+
+
+def test_tooltip_accessions_capped() -> None:
+    """
+    Tests that a tooltip lists at most TOOLTIP_ACCESSIONS accessions,
+    followed by the number left out.
+    """
+    accessions = [f"XP_{index}" for index in range(25)]
+
+    assert tooltip_accessions(accessions[:2], 2) == "XP_0<br>XP_1"
+    tooltip = tooltip_accessions(accessions, 25)
+    assert tooltip.count("<br>") == TOOLTIP_ACCESSIONS
+    assert tooltip.endswith(f"... and {25 - TOOLTIP_ACCESSIONS} more")
+
+
+def test_histogram_graph_counts() -> None:
+    """
+    Tests that the histogram counts the hits per bin, including the
+    right edge in the last bin, and lists only the accessions of a bin.
+    """
+    accessions = np.array(["a", "b", "c", "d"], dtype=object)
+    plot = histogram_graph(accessions, np.array([5, 55, 60, 100]),
+                           np.linspace(0, 100, 3), "title", "Identity")
+
+    data = plot.renderers[0].data_source.data
+    assert list(data["count"]) == [1, 3]
+    assert data["accessions"] == ["a", "b<br>c<br>d"]
+
+
+def test_e_value_graph_categories() -> None:
+    """
+    Tests that the E-values are divided over the four categories, with
+    the boundaries belonging to the less significant category.
+    """
+    plot = e_value_graph(["a", "b", "c", "d", "e"],
+                         [1e-60, 1e-50, 1e-10, 1e-5, 1.0])
+
+    data = plot.renderers[0].data_source.data
+    assert list(data["value"]) == [1, 1, 1, 2]
+    assert list(data["accessions"]) == ["a", "b", "c", "d<br>e"]
+
+
+def test_comparison_graphs_aggregated_bounded() -> None:
+    """
+    Tests that above the threshold, the graphs are aggregated, so
+    the size of the script does not grow with the number of hits.
+    """
+    small_script, _ = comparison_graphs(create_hits(1000))
+    large_script, _ = comparison_graphs(create_hits(4000))
+    bars_script, _ = comparison_graphs(create_hits(1000), aggregate=False)
+
+    assert len(large_script) < len(small_script) * 1.1
+    assert len(small_script) < len(bars_script)
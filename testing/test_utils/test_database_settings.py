@@ -0,0 +1,64 @@
+# Standard library imports
+from pathlib import Path
+
+# Third-party imports
+import pytest
+
+# Local imports
+from BlastBuddyClub.database import database_settings
+
+
+def test_database_settings_sqlite_default(monkeypatch: pytest.MonkeyPatch
+                                          ) -> None:
+    """
+    Tests that without any environment variables, the SQLite file
+    in the root of the project is used, with a busy timeout.
+
+    :param monkeypatch: pytest fixture to alter the environment.
+    :type monkeypatch: pytest.MonkeyPatch
+    """
+    monkeypatch.delenv("DB_ENGINE", raising=False)
+    monkeypatch.delenv("DB_NAME", raising=False)
+
+    database = database_settings(Path("/app"))["default"]
+
+    assert database["ENGINE"] == "django.db.backends.sqlite3"
+    assert database["NAME"] == Path("/app") / "db.sqlite3"
+    assert database["OPTIONS"]["timeout"] == 20
+
+
+def test_database_settings_postgresql(monkeypatch: pytest.MonkeyPatch
+                                      ) -> None:
+    """
+    Tests that PostgreSQL is configured from the environment, with
+    persistent connections, and without server side cursors when
+    a pooler is used.
+
+    :param monkeypatch: pytest fixture to alter the environment.
+    :type monkeypatch: pytest.MonkeyPatch
+    """
+    monkeypatch.setenv("DB_ENGINE", "postgresql")
+    monkeypatch.setenv("DB_HOST", "pgbouncer")
+    monkeypatch.setenv("DB_CONN_MAX_AGE", "300")
+    monkeypatch.setenv("DB_POOLER", "1")
+
+    database = database_settings(Path("/app"))["default"]
+
+    assert database["ENGINE"] == "django.db.backends.postgresql"
+    assert database["HOST"] == "pgbouncer"
+    assert database["CONN_MAX_AGE"] == 300
+    assert database["DISABLE_SERVER_SIDE_CURSORS"] is True
+
+
+def test_database_settings_unsupported(monkeypatch: pytest.MonkeyPatch
+                                       ) -> None:
+    """
+    Tests that an unsupported engine raises a ValueError.
+
+    :param monkeypatch: pytest fixture to alter the environment.
+    :type monkeypatch: pytest.MonkeyPatch
+    """
+    monkeypatch.setenv("DB_ENGINE", "mysql")
+
+    with pytest.raises(ValueError):
+        database_settings(Path("/app"))
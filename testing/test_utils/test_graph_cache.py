@@ -0,0 +1,86 @@
+# Third-party imports
+from django.core.cache import cache
+from django.utils import timezone
+import pytest
+
+# Local imports
+from Blaster.models import BlastHit, BlastJob
+from Blaster.utils.bokeh import comparison_graphs
+from Blaster.utils.graph_cache import cached_graphs, graphs_cache_key
+from testing import (create_request, create_blast_job, create_accession,
+                     create_hit)
+
+
+@pytest.fixture
+def renders() -> list:
+    """
+    Clears the cache, and returns a list that counts the renders of
+    the `render` function passed to cached_graphs by the tests.
+
+    :return: a list, with an item appended per render.
+    :rtype: list
+    """
+    cache.clear()
+    return []
+
+
+def test_graphs_cache_key() -> None:
+    """
+    Tests that the cache key only depends on the set of jobs, and the
+    time they were processed.
+    """
+    first, second = BlastJob(pk=1), BlastJob(pk=2)
+    key = graphs_cache_key([first, second])
+    single = graphs_cache_key([first])
+    second.finished = timezone.now()
+
+    assert graphs_cache_key([second, first, first]) != key
+    assert single != key
+    second.finished = None
+    assert graphs_cache_key([second, first, first]) == key
+
+
+@pytest.mark.django_db
+def test_cached_graphs_rendered_once(create_hit: pytest.fixture,
+                                     renders: list) -> None:
+    """
+    Tests that the graphs of the same jobs are only rendered once,
+    and rendered again once a job is processed again.
+
+    :param create_hit: pytest fixture to create a hit.
+    :type create_hit: pytest.fixture
+    :param renders: pytest fixture counting the renders.
+    :type renders: list
+    """
+    jobs = [create_hit().job, create_hit().job]
+    render = lambda: renders.append(1) or len(renders)
+
+    first = cached_graphs(jobs, render)
+    second = cached_graphs(jobs[::-1], render)
+    jobs[0].finished = timezone.now()
+    processed = cached_graphs(jobs, render)
+
+    assert first == second == 1
+    assert processed == 2
+
+
+@pytest.mark.django_db
+def test_comparison_graphs_single_document(create_hit: pytest.fixture
+                                           ) -> None:
+    """
+    Tests that all four graphs are embedded with a single script.
+
+    :param create_hit: pytest fixture to create a hit.
+    :type create_hit: pytest.fixture
+    """
+    create_hit(e_value=1e-60)
+    create_hit(e_value=0.5)
+    hits = BlastHit.objects.select_related("accession")
+    for hit in hits:
+        hit.unique_accession = f"{hit.accession.code}.{hit.id}"
+
+    script, divs = comparison_graphs(hits)
+
+    assert set(divs) == {"seqlen", "perc_identity", "query_coverage",
+                         "e_value"}
+    assert script.count("<script") == 1
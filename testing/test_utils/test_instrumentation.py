@@ -0,0 +1,51 @@
+# Standard library imports
+import time
+
+# Third-party imports
+import pytest
+
+# Local imports
+from Blaster.utils.instrumentation import (count, percentiles,
+                                           record_timings, timed)
+
+
+def test_record_timings() -> None:
+    """
+    Tests that phases add up, counters count, and that nothing is
+    recorded outside of `record_timings`.
+    """
+    with timed("outside"):
+        count("outside")
+
+    with record_timings() as timings:
+        for _ in range(2):
+            with timed("sleep"):
+                time.sleep(0.01)
+        count("calls")
+        count("rows", 5)
+        count("rows", 2)
+
+    assert set(timings.seconds) == {"sleep"}
+    assert timings.seconds["sleep"] >= 0.02
+    assert timings.counts == {"calls": 1, "rows": 7}
+
+
+@pytest.mark.parametrize(
+    "values, expected",
+    [
+        ([], []),
+        ([3.0], [3.0, 3.0, 3.0]),
+        (list(range(101)), [50.0, 95.0, 99.0]),
+    ]
+)
+def test_percentiles(values: list, expected: list) -> None:
+    """
+    Tests the percentiles, of no values, of a single value, and
+    interpolated between values.
+
+    :param values: The values.
+    :type values: list
+    :param expected: The expected 50th, 95th and 99th percentiles.
+    :type expected: list
+    """
+    assert percentiles(values) == pytest.approx(expected)
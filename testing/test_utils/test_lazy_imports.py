@@ -0,0 +1,21 @@
+# Third-party imports
+import pytest
+
+# Local imports
+from benchmarks.startup import measure
+
+
+@pytest.mark.parametrize("scenario", ["wsgi", "worker"])
+def test_startup_leaves_heavy_libraries_unloaded(scenario: str,
+                                                 tmp_path) -> None:
+    """
+    Tests that starting a web or Celery worker doesn't import Bokeh,
+    pandas or Biopython, which are imported on first use.
+
+    :param scenario: the process to start, see benchmarks/startup.py.
+    :type scenario: str
+    :param tmp_path: pytest fixture for a directory for the database.
+    """
+    result = measure(scenario, tmp_path / "startup.sqlite3")
+
+    assert set(result["modules"]) <= {"numpy"}
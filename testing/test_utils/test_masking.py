@@ -0,0 +1,72 @@
+# Standard library imports
+import random
+
+# Third-party imports
+import pytest
+
+# Local imports
+from Blaster.utils.masking import (dust_regions, seg_regions,
+                                   mask_sequence)
+
+
+random.seed(0)
+NUCLEOTIDES = "".join(random.choices("ACGT", k=900))
+PROTEIN = "".join(random.choices("ACDEFGHIKLMNPQRSTVWY", k=500))
+
+
+@pytest.mark.parametrize(
+    "sequence, expected_regions",
+    [
+        (NUCLEOTIDES[:300] + "A" * 80 + NUCLEOTIDES[300:600],
+         [(300, 380)]),
+        (NUCLEOTIDES[:300] + "ac" * 40 + NUCLEOTIDES[300:600],
+         [(300, 380)]),
+        (NUCLEOTIDES, []),
+        ("A" * 20, [(0, 20)]),
+        ("ACG", []),
+    ],
+    ids=["poly-A", "dinucleotide repeat", "random", "short", "too short"]
+)
+def test_dust_regions(sequence: str, expected_regions: list) -> None:
+    """
+    Tests that DUST masks repeats, and no random sequence.
+
+    :param sequence: The nucleotide sequence.
+    :type sequence: str
+    :param expected_regions: The expected masked regions.
+    :type expected_regions: list
+    """
+    assert dust_regions(sequence) == expected_regions
+
+
+@pytest.mark.parametrize(
+    "sequence, expected_regions",
+    [
+        (PROTEIN[:200] + "Q" * 30 + PROTEIN[200:400], [(200, 230)]),
+        (PROTEIN[:200] + "pepe" * 10 + PROTEIN[200:400], [(200, 240)]),
+        ("Q" * 12, [(0, 12)]),
+        ("MKV", []),
+    ],
+    ids=["poly-Q", "dipeptide repeat", "window", "too short"]
+)
+def test_seg_regions(sequence: str, expected_regions: list) -> None:
+    """
+    Tests that SEG masks regions of a biased composition.
+
+    :param sequence: The protein sequence.
+    :type sequence: str
+    :param expected_regions: The expected masked regions.
+    :type expected_regions: list
+    """
+    assert seg_regions(sequence) == expected_regions
+
+
+def test_mask_sequence() -> None:
+    """
+    Tests that regions are replaced by N for nucleotides and X for
+    proteins.
+    """
+    assert mask_sequence("ACGTACGT", [(1, 3), (6, 8)], "blastn") \
+        == "ANNTACNN"
+    assert mask_sequence("MKVQQQ", [[3, 6]], "blastp") == "MKVXXX"
+    assert mask_sequence("MKV", [], "blastp") == "MKV"
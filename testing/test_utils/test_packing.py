@@ -0,0 +1,88 @@
+# Third-party imports
+import pytest
+
+# Local imports
+from Blaster.utils.packing import (pack_sequence, unpack_sequence,
+                                   unpack_text_chunks, compress_text,
+                                   packed_sequence_length, CODEC_RAW,
+                                   CODEC_TWO_BIT, CODEC_FOUR_BIT,
+                                   CODEC_ZLIB, CODEC_MASK)
+
+
+@pytest.mark.parametrize(
+    "sequence, expected_codec",
+    [
+        ("", CODEC_TWO_BIT),
+        ("ACGT", CODEC_TWO_BIT),
+        ("ACGTA", CODEC_TWO_BIT),
+        ("atcgatcgat", CODEC_TWO_BIT),
+        ("ACGTNRYKMSWBDHV-", CODEC_FOUR_BIT),
+        ("acgtn", CODEC_FOUR_BIT),
+        ("MHSSIVLATVLFVAIASASKTRELCMKSLEHAKVG" * 10, CODEC_ZLIB),
+        # mixed case can't be packed into bits
+        ("AcGt", CODEC_RAW),
+        ("MLP", CODEC_RAW),
+    ]
+)
+def test_pack_sequence_round_trip(sequence: str, expected_codec: int) -> None:
+    """
+    Tests if a packed sequence unpacks to the original sequence,
+    and that the expected codec was chosen for the sequence.
+
+    :param sequence: The sequence to pack.
+    :type sequence: str
+    :param expected_codec: The codec the sequence should be packed with.
+    :type expected_codec: int
+    """
+    packed = pack_sequence(sequence)
+
+    assert packed[0] & CODEC_MASK == expected_codec
+    assert unpack_sequence(packed) == sequence
+    assert packed_sequence_length(packed) == len(sequence)
+
+
+def test_pack_sequence_nucleotide_size() -> None:
+    """
+    Tests that a nucleotide sequence of only ACGT takes up a quarter
+    of its length, besides the header.
+    """
+    packed = pack_sequence("ACGT" * 1000)
+
+    assert len(packed) == 5 + 1000
+
+
+def test_unpack_sequence_empty() -> None:
+    """
+    Tests that an empty value, as the binary field defaults to,
+    unpacks to an empty sequence.
+    """
+    assert unpack_sequence(b"") == ""
+    assert packed_sequence_length(b"") == 0
+
+
+@pytest.mark.parametrize(
+    "packed",
+    [
+        pack_sequence("acgt" * 100),
+        pack_sequence("ACGTN" * 100),
+        compress_text("LOCUS       XP_000001\n" * 100),
+        # characters of two and three bytes, split between chunks
+        compress_text("\u00e9\u20ac" * 100),
+        compress_text("\u00e9\u20ac"),
+        b"",
+    ]
+)
+def test_unpack_text_chunks(packed: bytes) -> None:
+    """
+    Tests that packed text unpacks to the original text in chunks of
+    the chunk size, besides the bytes of a split character, whatever
+    its codec.
+
+    :param packed: The packed text.
+    :type packed: bytes
+    """
+    chunks = list(unpack_text_chunks(packed, 64))
+
+    assert "".join(chunks) == unpack_sequence(packed)
+    assert all(0 < len(chunk.encode("utf-8")) < 64 + 4 for chunk in chunks)
+    assert len(chunks) == -(-len(unpack_sequence(packed).encode()) // 64)
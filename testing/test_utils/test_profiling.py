@@ -0,0 +1,112 @@
+# Third-party imports
+from asgiref.sync import async_to_sync, sync_to_async
+from django.contrib.auth.models import User
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, override_settings
+import pytest
+
+# Local imports
+from BlastBuddyClub.profiling import (QueryProfilingMiddleware,
+                                      fingerprint, profile_queries)
+
+
+def test_fingerprint_leaves_out_values() -> None:
+    """
+    Tests that queries only differing in their values, or the number
+    of values in a list, have the same fingerprint.
+    """
+    first = fingerprint('SELECT "id" FROM "t" WHERE "id" IN (%s, %s) '
+                        "AND \"name\" = 'a' LIMIT 21")
+    second = fingerprint('SELECT "id"\n  FROM "t" WHERE "id" IN (%s) '
+                         "AND \"name\" = 'it''s' LIMIT 1")
+    inserts = {fingerprint('INSERT INTO "t" ("a", "b") VALUES '
+                           + ", ".join(["(%s, %s)"] * rows))
+               for rows in (1, 2, 5)}
+
+    assert first == second
+    assert first == 'SELECT "id" FROM "t" WHERE "id" IN (...) ' \
+                    'AND "name" = ? LIMIT ?'
+    assert len(inserts) == 1
+
+
+@pytest.mark.django_db
+def test_profile_counts_repeated_queries() -> None:
+    """
+    Tests that a query made per row is recorded as repeated.
+    """
+    for number in range(3):
+        User.objects.create_user(f"user{number}")
+
+    with profile_queries() as profile:
+        for user in User.objects.all():
+            User.objects.filter(pk=user.pk).exists()
+
+    assert profile.count == 4
+    assert profile.duplicate_count == 2
+    assert profile.duplicates()[0][1] == 3
+    assert "3x SELECT" in profile.summary()
+
+
+@pytest.mark.django_db
+def test_profile_outside_block_not_recorded() -> None:
+    """
+    Tests that queries after leaving the block aren't recorded.
+    """
+    with profile_queries() as profile:
+        User.objects.count()
+    User.objects.count()
+
+    assert profile.count == 1
+
+
+@pytest.mark.django_db
+@override_settings(QUERY_PROFILING=True)
+def test_middleware_adds_headers() -> None:
+    """
+    Tests that the query profile of a request is added to the headers
+    of the response when profiling is enabled.
+    """
+    user = User.objects.create_user("profiled")
+    client = Client()
+    client.force_login(user)
+
+    response = client.get("/recent")
+
+    assert int(response["X-Query-Count"]) >= 3
+    assert float(response["X-Query-Time"]) >= 0
+    assert response["X-Query-Duplicates"] == "0"
+    assert response["Server-Timing"].startswith("db;dur=")
+
+
+@pytest.mark.django_db
+def test_middleware_not_used_by_default() -> None:
+    """
+    Tests that the middleware is left out without QUERY_PROFILING, and
+    no headers are added.
+    """
+    response = Client().get("/login")
+
+    with pytest.raises(MiddlewareNotUsed):
+        QueryProfilingMiddleware(lambda request: HttpResponse())
+    assert "X-Query-Count" not in response
+
+
+@pytest.mark.django_db(transaction=True)
+@override_settings(QUERY_PROFILING=True)
+def test_middleware_profiles_async_views() -> None:
+    """
+    Tests that the queries of an async view, made in another thread,
+    are recorded.
+    """
+    User.objects.create_user("async")
+
+    async def view(request):
+        count = await sync_to_async(User.objects.count)()
+        return HttpResponse(str(count))
+
+    middleware = QueryProfilingMiddleware(view)
+    response = async_to_sync(middleware)(RequestFactory().get("/"))
+
+    assert response.content == b"1"
+    assert response["X-Query-Count"] == "1"
@@ -0,0 +1,163 @@
+# Standard library imports
+from pathlib import Path
+
+# Third-party imports
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.contrib.auth.models import User
+from django.contrib.sessions.backends.db import SessionStore
+from django.http import HttpResponse
+from django.test import RequestFactory
+import pytest
+
+# Local imports
+from BlastBuddyClub import replica
+from BlastBuddyClub.database import database_settings
+from BlastBuddyClub.replica import (ReplicaRouter,
+                                    ReplicaStickinessMiddleware,
+                                    read_only, replica_reads)
+from Blaster.models import BlastJob
+
+
+router = ReplicaRouter()
+
+
+@pytest.fixture
+def with_replica(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Acts as if a replica database is configured.
+
+    :param monkeypatch: pytest fixture to replace the replica check.
+    :type monkeypatch: pytest.MonkeyPatch
+    """
+    monkeypatch.setattr(replica, "replica_configured", lambda: True)
+
+
+def test_router_reads_replica(with_replica: None) -> None:
+    """
+    Tests that only reads of the Blaster app, made within
+    replica_reads, are routed to the replica, and that writes always
+    go to the primary database.
+
+    :param with_replica: pytest fixture acting as if a replica exists.
+    :type with_replica: None
+    """
+    assert router.db_for_read(BlastJob) is None
+    with replica_reads():
+        assert router.db_for_read(BlastJob) == "replica"
+        assert router.db_for_read(User) is None
+        assert router.db_for_write(BlastJob) == "default"
+
+
+def test_router_without_replica() -> None:
+    """
+    Tests that without a replica, reads use the primary database.
+    """
+    with replica_reads():
+        assert router.db_for_read(BlastJob) is None
+
+
+def test_read_only_async_view(with_replica: None) -> None:
+    """
+    Tests that an async view decorated with read_only stays async, and
+    reads from the replica while it's awaited.
+
+    :param with_replica: pytest fixture acting as if a replica exists.
+    :type with_replica: None
+    """
+    @read_only
+    async def view(request):
+        return router.db_for_read(BlastJob)
+
+    assert iscoroutinefunction(view)
+    assert async_to_sync(view)(RequestFactory().get("/")) == "replica"
+
+
+@pytest.mark.django_db
+def test_middleware_sticks_after_write(with_replica: None) -> None:
+    """
+    Tests that a POST request, and the next requests of the same
+    session, read from the primary database, while other sessions
+    still read from the replica.
+
+    :param with_replica: pytest fixture acting as if a replica exists.
+    :type with_replica: None
+    """
+    databases = []
+
+    def view(request):
+        with replica_reads():
+            databases.append(router.db_for_read(BlastJob))
+        return HttpResponse()
+
+    middleware = ReplicaStickinessMiddleware(view)
+    factory = RequestFactory()
+    session = SessionStore()
+
+    for request in (factory.get("/"), factory.post("/"), factory.get("/")):
+        request.session = session
+        middleware(request)
+    other = factory.get("/")
+    other.session = SessionStore()
+    middleware(other)
+
+    assert databases == ["replica", None, None, "replica"]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_async_middleware_primary_for_write(with_replica: None) -> None:
+    """
+    Tests that an async POST request reads from the primary database,
+    while an async GET request reads from the replica.
+
+    :param with_replica: pytest fixture acting as if a replica exists.
+    :type with_replica: None
+    """
+    databases = []
+
+    async def view(request):
+        with replica_reads():
+            databases.append(router.db_for_read(BlastJob))
+        return HttpResponse()
+
+    middleware = ReplicaStickinessMiddleware(view)
+    factory = RequestFactory()
+
+    for request in (factory.get("/"), factory.post("/")):
+        request.session = SessionStore()
+        async_to_sync(middleware)(request)
+
+    assert databases == ["replica", None]
+
+
+def test_database_settings_replica(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Tests that a replica is configured by the DB_REPLICA_ variables,
+    based on the primary database, and mirrors it during tests.
+
+    :param monkeypatch: pytest fixture to alter the environment.
+    :type monkeypatch: pytest.MonkeyPatch
+    """
+    monkeypatch.delenv("DB_ENGINE", raising=False)
+    monkeypatch.delenv("DB_NAME", raising=False)
+    monkeypatch.setenv("DB_REPLICA_NAME", "/app/replica.sqlite3")
+
+    databases = database_settings(Path("/app"))
+
+    assert databases["default"]["NAME"] == Path("/app") / "db.sqlite3"
+    assert databases["replica"]["NAME"] == "/app/replica.sqlite3"
+    assert databases["replica"]["ENGINE"] == databases["default"]["ENGINE"]
+    assert databases["replica"]["TEST"] == {"MIRROR": "default"}
+
+
+def test_database_settings_no_replica(monkeypatch: pytest.MonkeyPatch
+                                      ) -> None:
+    """
+    Tests that no replica is configured by default.
+
+    :param monkeypatch: pytest fixture to alter the environment.
+    :type monkeypatch: pytest.MonkeyPatch
+    """
+    for key in ("NAME", "HOST", "PORT", "USER", "PASSWORD"):
+        monkeypatch.delenv(f"DB_REPLICA_{key}", raising=False)
+
+    assert "replica" not in database_settings(Path("/app"))
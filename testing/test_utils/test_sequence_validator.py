@@ -0,0 +1,95 @@
+# Third-party imports
+import pytest
+
+# Local imports
+from Blaster.utils.sequence_validator import (SequenceValidator,
+                                              validate_sequence)
+
+
+@pytest.mark.parametrize(
+    "data, blast_mode, header, sequence",
+    [
+        (b"acgt", "blastn", "", "acgt"),
+        (b">gene1\nAC\nGT\n\n", "blastn", "gene1", "ACGT"),
+        (b">gene1\r\nac\r\n\r\ngt\r\n", "blastn", "gene1", "acgt"),
+        (b">\xc3\xa9\nMLP", "blastp", "\xe9", "MLP"),
+        (b">\r\nMLP", "blastp", "", "MLP"),
+    ]
+)
+def test_validate_sequence_valid(data: bytes, blast_mode: str, header: str,
+                                 sequence: str) -> None:
+    """
+    Tests that a valid input is split into its header and sequence,
+    with the newlines removed, however it is chunked.
+
+    :param data: The input.
+    :type data: bytes
+    :param blast_mode: The BLAST program.
+    :type blast_mode: str
+    :param header: The expected header.
+    :type header: str
+    :param sequence: The expected sequence.
+    :type sequence: str
+    """
+    for chunk_size in (1, 2, 3, len(data)):
+        validator = validate_sequence(
+            (data[i:i + chunk_size] for i in range(0, len(data), chunk_size)),
+            blast_mode)
+
+        assert validator.valid
+        assert validator.header == header
+        assert validator.sequence == sequence
+
+
+@pytest.mark.parametrize(
+    "data, blast_mode, error_position",
+    [
+        (b"acgx", "blastn", 3),
+        (b"acgt acgt", "blastn", 4),
+        (b"MLPB", "blastp", 3),
+        (b"ac\rgt", "blastn", 2),
+        (b"ac\r", "blastn", 2),
+        (b"ac\rx", "blastn", 2),
+        (b"\nacgt", "blastn", 0),
+        (b">gene1\n\nacgt", "blastn", 7),
+        (b">\nacgt", "blastn", 1),
+        (b">gene1", "blastn", 6),
+        (b">gene1\n", "blastn", 7),
+        (b" >gene1\nacgt", "blastn", 0),
+        (b"", "blastn", 0),
+    ]
+)
+def test_validate_sequence_invalid(data: bytes, blast_mode: str,
+                                   error_position: int) -> None:
+    """
+    Tests that the first invalid byte is reported, however the input
+    is chunked. Missing parts are reported at the end of the input.
+
+    :param data: The input.
+    :type data: bytes
+    :param blast_mode: The BLAST program.
+    :type blast_mode: str
+    :param error_position: The expected position of the error.
+    :type error_position: int
+    """
+    for chunk_size in (1, 2, 3, max(len(data), 1)):
+        validator = validate_sequence(
+            (data[i:i + chunk_size] for i in range(0, len(data), chunk_size)),
+            blast_mode)
+
+        assert not validator.valid
+        assert validator.error_position == error_position
+
+
+def test_sequence_validator_stops_at_error() -> None:
+    """
+    Tests that the input after an invalid byte is ignored.
+    """
+    validator = SequenceValidator("blastn")
+
+    assert validator.feed(b"acgt")
+    assert not validator.feed(b"ac-gt")
+    assert not validator.feed(b"acgt")
+    assert not validator.close()
+    assert validator.error_position == 6
+    assert validator.sequence == ""
@@ -0,0 +1,116 @@
+# Third-party imports
+from django.contrib.auth.models import User
+from django.test import Client
+import pytest
+
+# Local imports
+from Blaster.models import BlastJob, SharedJobs
+from testing import (create_hit, create_blast_job, create_request,
+                     create_accession)
+
+
+@pytest.mark.django_db
+def test_comparison_data_columns(create_hit: pytest.fixture,
+                                 create_accession: pytest.fixture) -> None:
+    """
+    Tests that the metrics of the requested hits are returned as a
+    column per metric, ordered by hit id, and can be cached privately.
+
+    :param create_hit: pytest fixture to create a hit.
+    :type create_hit: pytest.fixture
+    :param create_accession: pytest fixture to create an accession.
+    :type create_accession: pytest.fixture
+    """
+    accession = create_accession(code="XP_000001")
+    first = create_hit(accession_id=accession.pk, subject_seq="MLP",
+                       e_value=1e-30)
+    second = create_hit(accession_id=accession.pk, subject_seq="ACGTA")
+    create_hit()
+
+    response = Client().get(
+        f"/comparison/data?hits={second.pk},{first.pk}")
+
+    data = response.json()
+    assert data["id"] == [first.pk, second.pk]
+    assert data["accession"] == ["XP_000001", "XP_000001"]
+    assert data["length"] == [3, 5]
+    assert data["e_value"] == [1e-30, 0.0]
+    assert "private" in response["Cache-Control"]
+
+
+@pytest.mark.django_db
+def test_comparison_data_visibility(create_hit: pytest.fixture) -> None:
+    """
+    Tests that hits of jobs of other users are left out, unless the
+    job is shared with the requesting user.
+
+    :param create_hit: pytest fixture to create a hit.
+    :type create_hit: pytest.fixture
+    """
+    owner = User.objects.create_user("owner", "owner@test.com", "test")
+    buddy = User.objects.create_user("buddy", "buddy@test.com", "test")
+    hit = create_hit()
+    BlastJob.objects.filter(pk=hit.job_id).update(user=owner)
+    client = Client()
+    client.force_login(buddy)
+
+    hidden = client.get(f"/comparison/data?hits={hit.pk}").json()
+    SharedJobs.objects.create(user=buddy).shared_job.add(hit.job_id)
+    shared = client.get(f"/comparison/data?hits={hit.pk}").json()
+
+    assert hidden["id"] == []
+    assert shared["id"] == [hit.pk]
+
+
+@pytest.mark.django_db
+def test_comparison_data_invalid_ids() -> None:
+    """
+    Tests that hits that are not ids are answered with a 400.
+    """
+    response = Client().get("/comparison/data?hits=1,a")
+
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_comparison_data_too_many_ids(settings) -> None:
+    """
+    Tests that more ids than COMPARISON_MAX_HITS are answered with a
+    400, without querying the hits.
+
+    :param settings: pytest-django fixture to change settings.
+    :type settings: pytest.fixture
+    """
+    settings.COMPARISON_MAX_HITS = 3
+
+    allowed = Client().get("/comparison/data?hits=1,2,3")
+    response = Client().get("/comparison/data?hits=1,2,3,4")
+
+    assert allowed.status_code == 200
+    assert response.status_code == 400
+    assert response.json() == {"error": "Error: at most 3 hits can be "
+                                        "compared"}
+
+
+@pytest.mark.django_db
+def test_comparison_page_drawn_by_client(create_hit: pytest.fixture) -> None:
+    """
+    Tests that the comparison page doesn't render the graphs, but
+    points the client renderer at the data of the selection.
+
+    :param create_hit: pytest fixture to create a hit.
+    :type create_hit: pytest.fixture
+    """
+    hit_ids = [create_hit().pk, create_hit().pk]
+    client = Client()
+    session = client.session
+    session["selected_hits"] = hit_ids
+    session.save()
+
+    page = client.get("/comparison", follow=True)
+    data = client.get(page.context["data_url"]).json()
+
+    assert b"draw-comparison-graphs.js" in page.content
+    assert b"cdn.bokeh.org" not in page.content
+    assert "graphs" not in page.context
+    assert data["id"] == hit_ids
@@ -0,0 +1,131 @@
+# Third-party imports
+from django.contrib.auth.models import User
+from django.test import Client
+from django.utils import timezone
+import pytest
+
+# Local imports
+from Blaster.models import (BlastBuddies, BlastHit, BlastJob,
+                            EntrezAccessionCache, SharedJobs,
+                            UnprocessedBlastJob)
+from Blaster.utils.ncbi import delete_unprocessed_blast_job
+from testing import (create_hit, create_blast_job, create_request,
+                     create_accession)
+
+
+@pytest.fixture
+def owner_client(create_hit: pytest.fixture) -> tuple[Client, BlastHit]:
+    """
+    Creates a hit of a processed job of a logged in user, with
+    cached Entrez data.
+
+    :param create_hit: pytest fixture to create a hit.
+    :type create_hit: pytest.fixture
+    :return: the client of the user, and the hit.
+    :rtype: tuple[Client, BlastHit]
+    """
+    owner = User.objects.create_user("owner", "owner@test.com", "test")
+    BlastBuddies.objects.create(user=owner)
+    hit = create_hit()
+    BlastJob.objects.filter(pk=hit.job_id).update(user=owner,
+                                                  program="blastp")
+    delete_unprocessed_blast_job(hit.job_id)
+    hit.accession.cache = EntrezAccessionCache.objects\
+        .create_entrez_accession_cache(fasta=">XP_000001\nMLP\n")
+    hit.accession.save()
+
+    client = Client()
+    client.force_login(owner)
+    return client, hit
+
+
+@pytest.mark.django_db
+def test_result_page_not_modified(owner_client: tuple) -> None:
+    """
+    Tests that the result page of a processed job is answered with
+    304 for a current copy, until the job is shared.
+
+    :param owner_client: pytest fixture creating a user with a hit.
+    :type owner_client: tuple[Client, BlastHit]
+    """
+    client, hit = owner_client
+    url = f"/blast_result/{hit.job_id}"
+    # The first visit sets the CSRF cookie, which is part of the ETag
+    client.get(url)
+
+    response = client.get(url)
+    again = client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+    buddy = User.objects.create_user("buddy", "buddy@test.com", "test")
+    SharedJobs.objects.create(user=buddy).shared_job.add(hit.job_id)
+    shared = client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+
+    assert response.status_code == 200
+    assert BlastJob.objects.get(pk=hit.job_id).finished is not None
+    assert response["Last-Modified"]
+    assert again.status_code == 304
+    assert shared.status_code == 200
+    assert shared["ETag"] != response["ETag"]
+
+
+@pytest.mark.django_db
+def test_unprocessed_job_not_versioned(owner_client: tuple) -> None:
+    """
+    Tests that the result page of a job that is still processed is
+    not versioned.
+
+    :param owner_client: pytest fixture creating a user with a hit.
+    :type owner_client: tuple[Client, BlastHit]
+    """
+    client, hit = owner_client
+    UnprocessedBlastJob.objects.create(job_id=hit.job_id)
+
+    response = client.get(f"/blast_result/{hit.job_id}")
+
+    assert response.status_code == 200
+    assert not response.has_header("ETag")
+
+
+@pytest.mark.django_db
+def test_hit_page_not_modified(owner_client: tuple) -> None:
+    """
+    Tests that the hit page is answered with 304 for a current copy,
+    while the visit is still recorded.
+
+    :param owner_client: pytest fixture creating a user with a hit.
+    :type owner_client: tuple[Client, BlastHit]
+    """
+    client, hit = owner_client
+    url = f"/blast_hit/{hit.pk}"
+
+    response = client.get(url)
+    again = client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+
+    assert response.status_code == 200
+    assert again.status_code == 304
+    assert EntrezAccessionCache.objects.get(
+        pk=hit.accession.cache_id).hits == 2
+
+
+@pytest.mark.django_db
+def test_comparison_data_not_modified(owner_client: tuple) -> None:
+    """
+    Tests that the comparison data is answered with 304 for a current
+    copy, until the job is processed again or a hit is deleted.
+
+    :param owner_client: pytest fixture creating a user with a hit.
+    :type owner_client: tuple[Client, BlastHit]
+    """
+    client, hit = owner_client
+    url = f"/comparison/data?hits={hit.pk}"
+
+    response = client.get(url)
+    again = client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+    BlastJob.objects.filter(pk=hit.job_id).update(finished=timezone.now())
+    processed = client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+    hit.delete()
+    deleted = client.get(url, HTTP_IF_NONE_MATCH=processed["ETag"])
+
+    assert again.status_code == 304
+    assert processed.status_code == 200
+    assert deleted.status_code == 200
+    assert deleted.json()["id"] == []
@@ -0,0 +1,155 @@
+# Standard library imports
+import asyncio
+from typing import Iterator
+
+# Third-party imports
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core.handlers.asgi import ASGIHandler
+from django.test import Client
+import pytest
+
+# Local imports
+from Blaster.models import BlastHit, BlastJob, EntrezAccessionCache
+from Blaster.views import blast_hit
+from testing import (create_hit, create_blast_job, create_request,
+                     create_accession)
+
+
+GENBANK = "LOCUS       XP_000001\n" + "ORIGIN      mlpkv\n" * 500 + "//\n"
+
+
+@pytest.fixture
+def cached_hit(create_hit: pytest.fixture) -> BlastHit:
+    """
+    Creates a hit on an accession with cached GenBank data only.
+
+    :param create_hit: pytest fixture to create a hit.
+    :type create_hit: pytest.fixture
+    :return: the hit.
+    :rtype: BlastHit
+    """
+    hit = create_hit()
+    hit.accession.code = "XP_000001"
+    hit.accession.cache = EntrezAccessionCache.objects\
+        .create_entrez_accession_cache(genbank=GENBANK)
+    hit.accession.save()
+    return hit
+
+
+@pytest.mark.django_db
+def test_hit_page_without_payload(cached_hit: BlastHit) -> None:
+    """
+    Tests that the hit page links to the GenBank data, rather than
+    embedding it.
+
+    :param cached_hit: pytest fixture creating a hit with cached data.
+    :type cached_hit: BlastHit
+    """
+    BlastJob.objects.filter(pk=cached_hit.job_id).update(program="blastp")
+
+    response = Client().get(f"/blast_hit/{cached_hit.pk}")
+
+    assert response.context["genbank_length"] == len(GENBANK)
+    assert response.context["fasta_length"] == 0
+    assert b"ORIGIN" not in response.content
+    assert f"/blast_hit/{cached_hit.pk}/genbank".encode() in response.content
+
+
+@pytest.mark.django_db
+def test_entrez_download(cached_hit: BlastHit) -> None:
+    """
+    Tests that the GenBank data is sent gzipped, as attachment on
+    request, and revalidated with its ETag, and that only the data
+    may be cached by the client.
+
+    :param cached_hit: pytest fixture creating a hit with cached data.
+    :type cached_hit: BlastHit
+    """
+    client = Client()
+    url = f"/blast_hit/{cached_hit.pk}/genbank"
+
+    response = client.get(url)
+    gzipped = client.get(url, {"download": ""},
+                         HTTP_ACCEPT_ENCODING="gzip")
+    revalidated = client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+    fasta = client.get(f"/blast_hit/{cached_hit.pk}/fasta")
+
+    assert response.streaming
+    assert response.getvalue().decode() == GENBANK
+    assert response["Last-Modified"]
+    assert gzipped["Content-Encoding"] == "gzip"
+    assert len(gzipped.getvalue()) < len(GENBANK)
+    assert gzipped["Content-Disposition"] == \
+        'attachment; filename="XP_000001.gb"'
+    assert revalidated.status_code == 304
+    assert "max-age=86400" in response["Cache-Control"]
+    assert "max-age=86400" in revalidated["Cache-Control"]
+    assert fasta.status_code == 404
+    assert not fasta.has_header("Cache-Control")
+
+
+@pytest.mark.django_db
+def test_entrez_download_permission(cached_hit: BlastHit) -> None:
+    """
+    Tests that the data of hits of other users can't be downloaded.
+
+    :param cached_hit: pytest fixture creating a hit with cached data.
+    :type cached_hit: BlastHit
+    """
+    owner = User.objects.create_user("owner", "owner@test.com", "test")
+    BlastJob.objects.filter(pk=cached_hit.job_id).update(user=owner)
+
+    response = Client().get(f"/blast_hit/{cached_hit.pk}/genbank")
+
+    assert response.status_code == 403
+    assert not response.has_header("Cache-Control")
+
+
+@pytest.mark.django_db(transaction=True)
+def test_entrez_download_streams_under_asgi(cached_hit: BlastHit,
+                                            monkeypatch: pytest.MonkeyPatch
+                                            ) -> None:
+    """
+    Tests that under ASGI the data is sent a chunk at a time, each
+    chunk before the next one is decompressed, rather than
+    decompressed as a whole before it's sent.
+
+    :param cached_hit: pytest fixture creating a hit with cached data.
+    :type cached_hit: BlastHit
+    :param monkeypatch: pytest fixture to count the unpacked chunks.
+    :type monkeypatch: pytest.MonkeyPatch
+    """
+    unpacked = []
+    unpack_text_chunks = blast_hit.unpack_text_chunks
+
+    def counted_chunks(stored: bytes, chunk_size: int) -> Iterator[str]:
+        for chunk in unpack_text_chunks(stored, chunk_size):
+            unpacked.append(chunk)
+            yield chunk
+
+    monkeypatch.setattr(blast_hit, "unpack_text_chunks", counted_chunks)
+    monkeypatch.setattr(blast_hit, "ENTREZ_CHUNK_SIZE", 1024)
+    requests = [{"type": "http.request", "body": b""}]
+    bodies = []
+
+    async def receive() -> dict:
+        if requests:
+            return requests.pop()
+        # The client stays connected
+        await asyncio.Event().wait()
+
+    async def send(message: dict) -> None:
+        if message.get("body"):
+            bodies.append((message["body"], len(unpacked)))
+
+    async_to_sync(ASGIHandler())(
+        {"type": "http", "method": "GET",
+         "path": f"/blast_hit/{cached_hit.pk}/genbank",
+         "query_string": b"", "headers": [],
+         "server": ("testserver", 80)},
+        receive, send)
+
+    assert b"".join(body for body, _ in bodies).decode() == GENBANK
+    assert [chunks for _, chunks in bodies] == \
+        list(range(1, len(GENBANK) // 1024 + 2))
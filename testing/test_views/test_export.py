@@ -0,0 +1,172 @@
+# Standard library imports
+from functools import partial
+from typing import Iterable, Iterator
+import asyncio
+import json
+
+# Third-party imports
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core.handlers.asgi import ASGIHandler
+from django.test import Client
+import pytest
+
+# Local imports
+from Blaster.models import BlastJob, UnprocessedBlastJob
+from Blaster.utils.export import EXPORT_FORMATS, aexport_hits, export_hits
+from Blaster.views import export
+from testing import (create_hit, create_blast_job, create_request,
+                     create_accession)
+
+
+@pytest.fixture
+def exported_job(create_request: pytest.fixture,
+                 create_blast_job: pytest.fixture,
+                 create_accession: pytest.fixture,
+                 create_hit: pytest.fixture) -> BlastJob:
+    """
+    Creates a processed job with two hits, the second one gapped.
+
+    :param create_request: pytest fixture to create a request.
+    :type create_request: pytest.fixture
+    :param create_blast_job: pytest fixture to create a blast job.
+    :type create_blast_job: pytest.fixture
+    :param create_accession: pytest fixture to create an accession.
+    :type create_accession: pytest.fixture
+    :param create_hit: pytest fixture to create a hit.
+    :type create_hit: pytest.fixture
+    :return: the job.
+    :rtype: BlastJob
+    """
+    job = create_blast_job(create_request(False), title="query one",
+                           program="blastp")
+    UnprocessedBlastJob.objects.all().delete()
+    accession = create_accession(code="XP_000001", organism="Homo sapiens")
+    create_hit(blast_job_id=job.pk, accession_id=accession.pk,
+               description="first\thit", e_value=1e-5, bit_score=50.25,
+               identities=8, align_length=10, query_start=1, query_end=10,
+               query_length=10, subject_seq="MLPKV", subject_start=1,
+               subject_end=5)
+    create_hit(blast_job_id=job.pk, accession_id=accession.pk,
+               description="best hit", e_value=1e-30, bit_score=99.0,
+               identities=9, align_length=10, query_start=1, query_end=10,
+               query_length=10, subject_seq="ML--PK-V", subject_start=2,
+               subject_end=7)
+    return job
+
+
+@pytest.mark.django_db
+def test_export_formats(exported_job: BlastJob) -> None:
+    """
+    Tests the TSV, BLAST tabular, FASTA and JSON lines exports of the
+    hits of a job, ordered by E-value.
+
+    :param exported_job: pytest fixture creating a job with hits.
+    :type exported_job: BlastJob
+    """
+    hits = exported_job.blasthit_set.all()
+    best = hits.get(description="best hit")
+
+    tsv = "".join(export_hits(hits, "tsv")).splitlines()
+    outfmt6 = "".join(export_hits(hits, "outfmt6")).splitlines()
+    fasta = "".join(export_hits(hits, "fasta")).splitlines()
+    jsonl = "".join(export_hits(hits, "jsonl")).splitlines()
+
+    assert tsv[0].split("\t")[:4] == ["job", "query", "hit", "accession"]
+    assert len(tsv) == 3
+    assert tsv[2].split("\t")[5] == "first hit"
+    assert outfmt6[0].split("\t") == [
+        "query", "XP_000001", "90.000", "10", "1", "2", "1", "10",
+        "2", "7", "1.00e-30", "99.0"]
+    assert fasta[:2] == [
+        f">XP_000001:2-7 best hit [hit={best.pk} query=query]", "MLPKV"]
+    assert json.loads(jsonl[1])["description"] == "first\thit"
+
+
+@pytest.mark.django_db
+def test_export_in_chunks(exported_job: BlastJob) -> None:
+    """
+    Tests that the export is yielded in chunks of rows.
+
+    :param exported_job: pytest fixture creating a job with hits.
+    :type exported_job: BlastJob
+    """
+    chunks = list(export_hits(exported_job.blasthit_set.all(), "jsonl",
+                              chunk_size=1))
+
+    assert len(chunks) == 2
+
+
+@pytest.mark.django_db
+def test_export_page(exported_job: BlastJob) -> None:
+    """
+    Tests that the export is streamed as an attachment, and that jobs
+    of other users and unknown formats are not exported.
+
+    :param exported_job: pytest fixture creating a job with hits.
+    :type exported_job: BlastJob
+    """
+    client = Client()
+
+    response = client.get(f"/export/fasta?jobs={exported_job.pk}")
+    content = b"".join(response.streaming_content)
+    unknown = client.get(f"/export/xml?jobs={exported_job.pk}")
+    owner = User.objects.create_user("owner", "owner@test.com", "test")
+    BlastJob.objects.filter(pk=exported_job.pk).update(user=owner)
+    hidden = client.get(f"/export/fasta?jobs={exported_job.pk}")
+
+    assert response.streaming
+    assert response["Content-Disposition"] == \
+        f'attachment; filename="MasterBlast{exported_job.pk}.fasta"'
+    assert content.count(b">") == 2
+    assert unknown.status_code == 404
+    assert hidden.status_code == 404
+
+
+@pytest.mark.django_db(transaction=True)
+def test_export_page_streams_under_asgi(exported_job: BlastJob,
+                                        monkeypatch: pytest.MonkeyPatch
+                                        ) -> None:
+    """
+    Tests that under ASGI the export is sent a chunk at a time, each
+    chunk before the next rows are formatted, rather than formatted
+    as a whole before it's sent.
+
+    :param exported_job: pytest fixture creating a job with hits.
+    :type exported_job: BlastJob
+    :param monkeypatch: pytest fixture to count the formatted rows.
+    :type monkeypatch: pytest.MonkeyPatch
+    """
+    formatted = []
+    columns, format_rows, *rest = EXPORT_FORMATS["jsonl"]
+
+    def counted_rows(rows: Iterable[tuple]) -> Iterator[str]:
+        for row in rows:
+            formatted.append(row)
+            yield from format_rows([row])
+
+    monkeypatch.setitem(EXPORT_FORMATS, "jsonl",
+                        (columns, counted_rows, *rest))
+    monkeypatch.setattr(export, "aexport_hits",
+                        partial(aexport_hits, chunk_size=1))
+    requests = [{"type": "http.request", "body": b""}]
+    bodies = []
+
+    async def receive() -> dict:
+        if requests:
+            return requests.pop()
+        # The client stays connected
+        await asyncio.Event().wait()
+
+    async def send(message: dict) -> None:
+        if message.get("body"):
+            bodies.append((message["body"], len(formatted)))
+
+    async_to_sync(ASGIHandler())(
+        {"type": "http", "method": "GET", "path": "/export/jsonl",
+         "query_string": f"jobs={exported_job.pk}".encode(),
+         "headers": [], "server": ("testserver", 80)},
+        receive, send)
+
+    assert [rows for _, rows in bodies] == [1, 2]
+    assert all(body.count(b"\n") == 1 for body, _ in bodies)
@@ -0,0 +1,102 @@
+# Third-party imports
+from django.contrib.auth.models import User
+from django.test import Client
+import pytest
+
+# Local imports
+from Blaster.models import BlastHit, BlastJob, UnprocessedBlastJob
+from testing import (create_hit, create_blast_job, create_request,
+                     create_accession)
+
+
+@pytest.fixture
+def two_jobs(create_request: pytest.fixture,
+             create_blast_job: pytest.fixture,
+             create_accession: pytest.fixture,
+             create_hit: pytest.fixture) -> tuple[BlastJob, BlastJob]:
+    """
+    Creates two processed jobs with hits on a shared accession, and
+    a hit on an accession of only the second job.
+
+    :param create_request: pytest fixture to create a request.
+    :type create_request: pytest.fixture
+    :param create_blast_job: pytest fixture to create a blast job.
+    :type create_blast_job: pytest.fixture
+    :param create_accession: pytest fixture to create an accession.
+    :type create_accession: pytest.fixture
+    :param create_hit: pytest fixture to create a hit.
+    :type create_hit: pytest.fixture
+    :return: the two jobs.
+    :rtype: tuple[BlastJob, BlastJob]
+    """
+    request = create_request(False)
+    first = create_blast_job(request, title="first")
+    second = create_blast_job(request, title="second")
+    UnprocessedBlastJob.objects.all().delete()
+    shared = create_accession(code="XP_000001", organism="Homo sapiens")
+    other = create_accession(code="XP_000002")
+
+    create_hit(blast_job_id=first.pk, accession_id=shared.pk,
+               e_value=1e-10, identities=5, align_length=10,
+               subject_seq="ACGT")
+    create_hit(blast_job_id=second.pk, accession_id=shared.pk,
+               e_value=1e-30, identities=8, align_length=10,
+               subject_seq="ACG")
+    create_hit(blast_job_id=second.pk, accession_id=other.pk,
+               e_value=1.0, identities=1, align_length=10)
+    return first, second
+
+
+@pytest.mark.django_db
+def test_compare_jobs_per_accession(two_jobs: tuple) -> None:
+    """
+    Tests that the hits of jobs are grouped per accession, with the
+    best metrics of its hits, ordered by E-value.
+
+    :param two_jobs: pytest fixture creating two jobs with hits.
+    :type two_jobs: tuple[BlastJob, BlastJob]
+    """
+    accessions = list(BlastHit.objects.compare_jobs(
+        [job.pk for job in two_jobs]))
+
+    assert [accession["code"] for accession in accessions] == \
+        ["XP_000001", "XP_000002"]
+    assert accessions[0]["organism"] == "Homo sapiens"
+    assert accessions[0]["jobs"] == 2
+    assert accessions[0]["hits"] == 2
+    assert accessions[0]["e_value"] == 1e-30
+    assert accessions[0]["identity"] == 80.0
+    assert accessions[0]["length"] == 4
+
+
+@pytest.mark.django_db
+def test_job_comparison_page(two_jobs: tuple) -> None:
+    """
+    Tests that the comparison page shows the accessions of the
+    requested jobs, leaving out jobs of other users.
+
+    :param two_jobs: pytest fixture creating two jobs with hits.
+    :type two_jobs: tuple[BlastJob, BlastJob]
+    """
+    first, second = two_jobs
+    owner = User.objects.create_user("owner", "owner@test.com", "test")
+    BlastJob.objects.filter(pk=second.pk).update(user=owner)
+
+    response = Client().get(
+        f"/comparison/jobs?jobs={first.pk}&jobs={second.pk}")
+
+    assert response.status_code == 200
+    assert response.context["jobs"] == [first]
+    assert [accession["code"] for accession in
+            response.context["accessions"]] == ["XP_000001"]
+
+
+@pytest.mark.django_db
+def test_job_comparison_without_jobs() -> None:
+    """
+    Tests that a comparison without visible, processed jobs renders
+    the 404 page.
+    """
+    response = Client().get("/comparison/jobs?jobs=1")
+
+    assert response.status_code == 404
@@ -0,0 +1,230 @@
+# Standard library imports
+from typing import Callable
+
+# Third-party imports
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import Client, RequestFactory
+import pytest
+
+# Local imports
+from Blaster.models import BlastBuddies, BlastHit, BlastJob, SharedJobs
+from Blaster.utils.ncbi import delete_unprocessed_blast_job
+from testing import (create_hit, create_blast_job, create_request,
+                     create_accession, query_budget)
+
+
+"""
+The pages growing with the data of a user are held to a query budget
+that is the same for every size of the data, so a query made per row,
+an N+1 pattern, fails the tests.
+"""
+
+
+SIZES = (1, 5, 20)
+# The cache is kept in the database, storing the table of hits of the
+# result page on a miss costs six queries: the lookup, culling, and the
+# insert with its savepoint
+RESULT_PAGE_BUDGET = 16 + 6
+
+
+@pytest.fixture
+def user_data(create_hit: pytest.fixture,
+              create_accession: pytest.fixture) -> Callable:
+    """
+    Creates a user with data of a given size: as many buddies, jobs,
+    and hits per job, as the size. Every buddy has a job shared with
+    the user, and the first job of the user is shared with every
+    other buddy.
+
+    :param create_hit: pytest fixture to create a hit.
+    :type create_hit: pytest.fixture
+    :param create_accession: pytest fixture to create an accession.
+    :type create_accession: pytest.fixture
+    :return: a function taking the size, and returning the user, a
+        buddy the first job is shared with, and the first job.
+    :rtype: Callable
+    """
+    def user_data_inner(size: int) -> tuple[User, User, BlastJob]:
+        # The table of hits is cached by job id, which tests reuse
+        cache.clear()
+        owner = User.objects.create_user("owner", "owner@test.com", "test")
+        owner_buddies = BlastBuddies.objects.create(user=owner)
+        owner_shared = SharedJobs.objects.create(user=owner)
+        accessions = [create_accession(f"ACC{number}", f"organism {number}")
+                      for number in range(size)]
+
+        jobs = []
+        for number in range(size):
+            request = RequestFactory().get("/")
+            request.user = owner
+            job = BlastJob.objects.create_blast_job(
+                request, f"job {number}", "blastn", "", "ACGT")
+            for accession in accessions:
+                create_hit(blast_job_id=job.pk, accession_id=accession.pk)
+            delete_unprocessed_blast_job(job.pk)
+            jobs.append(job)
+
+        for number in range(size):
+            buddy = User.objects.create_user(f"buddy{number}")
+            owner_buddies.buddie.add(buddy)
+            BlastBuddies.objects.create(user=buddy).buddie.add(owner)
+            request = RequestFactory().get("/")
+            request.user = buddy
+            buddy_job = BlastJob.objects.create_blast_job(
+                request, f"buddy job {number}", "blastn", "", "ACGT")
+            owner_shared.shared_job.add(buddy_job)
+            if number % 2 == 0:
+                SharedJobs.objects.create(user=buddy).shared_job.add(jobs[0])
+                shared_buddy = buddy
+        return owner, shared_buddy, jobs[0]
+
+    return user_data_inner
+
+
+def logged_in(user: User) -> Client:
+    """
+    Returns a client with the user logged in.
+
+    :param user: the user to log in.
+    :type user: User
+    :return: the client.
+    :rtype: Client
+    """
+    client = Client()
+    client.force_login(user)
+    return client
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("size", SIZES)
+def test_recent_page_budget(size: int, user_data: Callable,
+                            query_budget: Callable) -> None:
+    """
+    Tests that the recent page counts the hits of all jobs at once.
+
+    :param size: the number of jobs and hits per job.
+    :type size: int
+    :param user_data: pytest fixture to create the data of a user.
+    :type user_data: Callable
+    :param query_budget: pytest fixture to limit the queries.
+    :type query_budget: Callable
+    """
+    owner, _, _ = user_data(size)
+    client = logged_in(owner)
+
+    with query_budget(3):
+        response = client.get("/recent")
+
+    assert response.status_code == 200
+    assert response.context["recent_jobs"][0].hits == size
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("size", SIZES)
+def test_personalia_page_budget(size: int, user_data: Callable,
+                                query_budget: Callable) -> None:
+    """
+    Tests that the statistics and shared jobs of the personalia page
+    are queried at once.
+
+    :param size: the number of jobs, hits per job and buddies.
+    :type size: int
+    :param user_data: pytest fixture to create the data of a user.
+    :type user_data: Callable
+    :param query_budget: pytest fixture to limit the queries.
+    :type query_budget: Callable
+    """
+    owner, _, _ = user_data(size)
+    client = logged_in(owner)
+
+    with query_budget(11):
+        response = client.get("/personalia")
+
+    assert response.status_code == 200
+    assert response.context["jobs_done"] == size
+    assert response.context["avg_hits_job"] == size
+    assert len(response.context["shared_jobs"]) == size
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("size", SIZES)
+def test_blast_result_page_budget(size: int, user_data: Callable,
+                                  query_budget: Callable) -> None:
+    """
+    Tests that the result page reads the organisms with the hits, and
+    with whom the job is shared for all buddies at once.
+
+    :param size: the number of hits and buddies.
+    :type size: int
+    :param user_data: pytest fixture to create the data of a user.
+    :type user_data: Callable
+    :param query_budget: pytest fixture to limit the queries.
+    :type query_budget: Callable
+    """
+    owner, _, job = user_data(size)
+    client = logged_in(owner)
+
+    with query_budget(RESULT_PAGE_BUDGET):
+        response = client.get(f"/blast_result/{job.pk}")
+
+    shared_already = response.context["shared_already"]
+    assert response.status_code == 200
+    assert len(shared_already) == size
+    assert sum(shared_already.values()) == (size + 1) // 2
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("size", SIZES)
+def test_shared_blast_result_page_budget(size: int, user_data: Callable,
+                                         query_budget: Callable) -> None:
+    """
+    Tests that the permission of a buddy to see a shared job is
+    checked at once.
+
+    :param size: the number of hits and buddies.
+    :type size: int
+    :param user_data: pytest fixture to create the data of a user.
+    :type user_data: Callable
+    :param query_budget: pytest fixture to limit the queries.
+    :type query_budget: Callable
+    """
+    _, buddy, job = user_data(size)
+    client = logged_in(buddy)
+
+    with query_budget(RESULT_PAGE_BUDGET):
+        response = client.get(f"/blast_result/{job.pk}")
+
+    assert response.status_code == 200
+    assert "pages/blast_results.html" in [
+        template.name for template in response.templates]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("size", SIZES)
+def test_comparison_data_budget(size: int, user_data: Callable,
+                                query_budget: Callable) -> None:
+    """
+    Tests that the comparison data of the hits of all jobs, and its
+    ETag, are read at once, and that revalidating it costs no more.
+
+    :param size: the number of jobs and hits per job.
+    :type size: int
+    :param user_data: pytest fixture to create the data of a user.
+    :type user_data: Callable
+    :param query_budget: pytest fixture to limit the queries.
+    :type query_budget: Callable
+    """
+    owner, _, _ = user_data(size)
+    client = logged_in(owner)
+    hit_ids = BlastHit.objects.filter(job__user=owner)\
+        .values_list("id", flat=True)
+    url = "/comparison/data?hits=" + ",".join(map(str, hit_ids))
+
+    with query_budget(4):
+        response = client.get(url)
+    with query_budget(3):
+        again = client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+
+    assert len(response.json()["id"]) == size * size
+    assert again.status_code == 304